@@ -0,0 +1,62 @@
+"""
+Tooling for developing and validating IFC 4.3 alignment geometry.
+
+Helpers shared by the scripts, notebooks and tests in this repo.
+"""
+
+from alignment_tools.deviation import DeviationMetrics
+from alignment_tools.deviation import deviation_metrics
+from alignment_tools.deviation import polyline_deviation
+from alignment_tools.deviation import write_report
+from alignment_tools.evaluator import CurveEvaluator
+from alignment_tools.evaluator import CurvePoints
+from alignment_tools.reference_store import ReferenceStore
+from alignment_tools.stations import StationCursor
+from alignment_tools.stations import StationMapping
+from alignment_tools.stations import iter_station_grid
+from alignment_tools.stations import map_stations
+from alignment_tools.stations import merge_stations
+from alignment_tools.cant import AlignmentCantSide
+from alignment_tools.cant import segment_cant
+from alignment_tools.vertical import segment_height
+from alignment_tools.alignment import Alignment
+from alignment_tools.alignment import COLUMNS
+from alignment_tools.projection import ProjectionIndex
+from alignment_tools.projection import StationOffset
+from alignment_tools.linear_placement import ResolvedPlacements
+from alignment_tools.linear_placement import resolve_linear_placements
+from alignment_tools.gltf import write_glb
+from alignment_tools.sweep import SweepMesh
+from alignment_tools.sweep import sweep_points
+from alignment_tools.sweep import sweep_profile
+from alignment_tools.tiles import LevelOfDetail
+from alignment_tools.tiles import export_tiles
+from alignment_tools.builder import AlignmentBuilder
+from alignment_tools.builder import CantSegment
+from alignment_tools.builder import HorizontalSegment
+from alignment_tools.builder import VerticalSegment
+from alignment_tools.builder import segment_table
+from alignment_tools.landxml import convert_landxml
+from alignment_tools.landxml import iter_alignments
+from alignment_tools.editable import EditableAlignment
+from alignment_tools.editable import LayoutEdit
+from alignment_tools.profiling import Instrumentation
+from alignment_tools.profiling import StageTiming
+from alignment_tools.synthetic import SyntheticSpec
+from alignment_tools.synthetic import synthetic_layouts
+from alignment_tools.synthetic import write_synthetic
+from alignment_tools.differ import AlignmentSource
+from alignment_tools.differ import diff_alignments
+from alignment_tools.differ import read_sources
+from alignment_tools.points import AlignmentPoints
+from alignment_tools.batch import BatchResult
+from alignment_tools.batch import EvaluationSettings
+from alignment_tools.batch import evaluate_model
+from alignment_tools.federation import FederationIndex
+from alignment_tools.federation import build_federation_index
+from alignment_tools.federation import federation_index
+from alignment_tools.clearance import Intrusion
+from alignment_tools.clearance import check_clearance
+from alignment_tools.clearance import check_models
+from alignment_tools.sight_distance import SightDistance
+from alignment_tools.sight_distance import sight_distance
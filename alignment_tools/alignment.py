@@ -0,0 +1,575 @@
+"""
+Alignment geometry calculated from the IFC 4.3 alignment business logic.
+
+`Alignment` follows the calculation procedure in
+`docs/alignment_calculation.md`: distances along the alignment are mapped
+onto the horizontal, vertical and cant segments with
+`alignment_tools.stations`, and each segment is evaluated once for all of
+its points with the vectorized functions in `alignment_tools.horizontal`,
+`alignment_tools.vertical` and `alignment_tools.cant`.
+
+Points are returned as an (N, 8) array with the columns in `COLUMNS`, in
+project length units.
+
+`from_entity(entity, lazy=True)` reads nothing from the model until the
+alignment is first used. The layouts are then indexed by the start and
+length of their segments only, and the remaining design parameters of a
+segment are decoded into a compact record the first time a distance on it
+is evaluated. Opening a model with many alignments and querying one of them
+thus leaves the others untouched.
+"""
+
+from collections import namedtuple
+from collections.abc import Sequence
+import functools
+
+import numpy as np
+
+import ifcopenshell
+import ifcopenshell.geom as geom
+
+from alignment_tools.builder import CANT_COLUMNS
+from alignment_tools.builder import HORIZONTAL_COLUMNS
+from alignment_tools.builder import VERTICAL_COLUMNS
+from alignment_tools.cant import AlignmentCantSide
+from alignment_tools.cant import segment_cant
+from alignment_tools.evaluator import CurveEvaluator
+from alignment_tools.horizontal import segment_curvature
+from alignment_tools.horizontal import segment_point
+from alignment_tools.profiling import NULL_INSTRUMENTATION
+from alignment_tools.profiling import Instrumentation
+from alignment_tools.stations import StationCursor
+from alignment_tools.stations import critical_stations
+from alignment_tools.stations import distance_grid
+from alignment_tools.stations import iter_station_grid
+from alignment_tools.stations import map_stations
+from alignment_tools.stations import merge_stations
+from alignment_tools.stations import segment_starts
+from alignment_tools.transitions import predefined_type
+from alignment_tools.vertical import segment_height
+
+COLUMNS = ("Distance", "X", "Y", "Direction", "Z", "Cant", "Cant_Rotation", "ReferenceZ")
+DISTANCE, X, Y, DIRECTION, Z, CANT, CANT_ROTATION, REFERENCE_Z = range(len(COLUMNS))
+
+# upper bound on the number of times an interval is halved in adaptive sampling
+MAX_REFINEMENTS = 30
+
+# attributes set by set_layouts(), read on first use after from_entity(lazy=True)
+LAYOUT_ATTRIBUTES = (
+    "horizontal",
+    "vertical",
+    "cant",
+    "start_distance",
+    "rail_head_distance",
+    "_projection_index",
+    "_h_lengths",
+    "_h_starts",
+    "_v_starts",
+    "_v_lengths",
+    "_c_starts",
+    "_c_lengths",
+)
+
+SEGMENT_RECORDS = {
+    "IfcAlignmentHorizontal": namedtuple("HorizontalRecord", HORIZONTAL_COLUMNS),
+    "IfcAlignmentVertical": namedtuple("VerticalRecord", VERTICAL_COLUMNS),
+    "IfcAlignmentCant": namedtuple("CantRecord", CANT_COLUMNS),
+}
+
+
+def _layout_segments(layout: ifcopenshell.entity_instance) -> list:
+    """
+    Design parameters of the segments nested in an alignment layout.
+    """
+    segments = []
+    for rel in layout.IsNestedBy:
+        for obj in rel.RelatedObjects:
+            if obj.is_a("IfcAlignmentSegment"):
+                segments.append(obj.DesignParameters)
+    return segments
+
+
+def _layouts(entity: ifcopenshell.entity_instance) -> dict:
+    """
+    Horizontal, vertical and cant layouts nested in an IfcAlignment, by entity type.
+    """
+    layouts = {}
+    for rel in entity.IsNestedBy:
+        for obj in rel.RelatedObjects:
+            for layout_type in SEGMENT_RECORDS:
+                if obj.is_a(layout_type):
+                    layouts[layout_type] = obj
+    if "IfcAlignmentHorizontal" not in layouts:
+        raise ValueError(f"{entity} has no horizontal layout.")
+    return layouts
+
+
+def _column(segments, name: str) -> np.ndarray:
+    if isinstance(segments, SegmentTable):
+        return segments.column(name)
+    return np.array([float(getattr(s, name)) for s in segments], dtype=np.float64)
+
+
+class SegmentTable(Sequence):
+    """
+    Segments of an alignment layout, decoded from the model on first access.
+
+    Indexing returns a namedtuple with the design parameters used by the
+    business logic, StartPoint as an (x, y) tuple. `column()` reads a single
+    attribute of all segments without decoding them.
+
+    @param layout: IfcAlignmentHorizontal, IfcAlignmentVertical or IfcAlignmentCant
+    """
+
+    def __init__(self, layout: ifcopenshell.entity_instance) -> None:
+        self.record = SEGMENT_RECORDS[layout.is_a()]
+        self.parameters = _layout_segments(layout)
+        self.records = [None] * len(self.parameters)
+
+    def __len__(self) -> int:
+        return len(self.parameters)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        record = self.records[index]
+        if record is None:
+            record = self.records[index] = self._decode(self.parameters[index])
+        return record
+
+    def __setitem__(self, index: int, segment) -> None:
+        self.records[index] = segment
+
+    @property
+    def decoded(self) -> int:
+        """
+        Number of segments decoded so far.
+        """
+        return sum(r is not None for r in self.records)
+
+    def column(self, name: str) -> np.ndarray:
+        values = [
+            getattr(p if r is None else r, name)
+            for p, r in zip(self.parameters, self.records)
+        ]
+        return np.array(values, dtype=np.float64)
+
+    def _decode(self, parameters):
+        values = {}
+        for name in self.record._fields:
+            value = getattr(parameters, name, None)
+            if name == "StartPoint":
+                value = tuple(getattr(value, "Coordinates", value))[:2]
+            values[name] = value
+        return self.record(**values)
+
+
+def _map_stations(distances, cursor: StationCursor, stage: str, instrumentation: Instrumentation):
+    with instrumentation.measure(stage, None, len(distances)):
+        return cursor.map(distances)
+
+
+def _rail_cant(segment, u) -> tuple:
+    return segment_cant(segment, u, AlignmentCantSide.LEFT), segment_cant(segment, u, AlignmentCantSide.RIGHT)
+
+
+def _cant_rotation(cant: np.ndarray, rail_head_distance: float) -> np.ndarray:
+    return np.arcsin(np.clip(cant / float(rail_head_distance), -1.0, 1.0))
+
+
+def _insert_midpoints(pts, idx, mid, chord_tolerance, angle_tolerance, min_interval) -> tuple:
+    """
+    Insert the midpoints of the intervals `idx` that do not satisfy the tolerances.
+
+    @return: the points and the mask of the intervals to check next
+    """
+    a, b = pts[idx], pts[idx + 1]
+    split = np.zeros(len(idx), dtype=bool)
+
+    if chord_tolerance is not None:
+        chord = (a + b) / 2.0
+        offset = np.nan_to_num(mid[:, [X, Y, Z]] - chord[:, [X, Y, Z]])
+        cant = np.nan_to_num(mid[:, CANT] - chord[:, CANT])
+        split |= np.linalg.norm(offset, axis=1) > chord_tolerance
+        split |= np.abs(cant) > chord_tolerance
+    if angle_tolerance is not None:
+        turn = np.remainder(b[:, DIRECTION] - a[:, DIRECTION] + np.pi, 2.0 * np.pi) - np.pi
+        split |= np.abs(turn) > angle_tolerance
+
+    split &= (b[:, DISTANCE] - a[:, DISTANCE]) > 2.0 * min_interval
+    active = np.zeros(len(pts) - 1, dtype=bool)
+    active[idx[split]] = True
+    pts = np.insert(pts, idx[split] + 1, mid[split], axis=0)
+    active = np.insert(active, idx[split] + 1, True)
+
+    return pts, active
+
+
+class Alignment:
+    """
+    Horizontal, vertical and cant layouts of an alignment.
+
+    Segments are IfcAlignmentHorizontalSegment, IfcAlignmentVerticalSegment
+    and IfcAlignmentCantSegment entities or any objects with the same
+    attribute names, so an alignment can be built from tables as well as
+    with `from_entity()`.
+
+    @param horizontal: horizontal segments, contiguous from `start_distance`
+    @param vertical: vertical segments, located by StartDistAlong
+    @param cant: cant segments, located by StartDistAlong
+    @param start_distance: distance along at the start of the horizontal layout
+    @param rail_head_distance: IfcAlignmentCant.RailHeadDistance, needed for Cant_Rotation
+    """
+
+    def __init__(
+        self,
+        horizontal: list = None,
+        vertical: list = None,
+        cant: list = None,
+        start_distance: float = 0.0,
+        rail_head_distance: float = None,
+    ) -> None:
+        self.entity = None
+        self.set_layouts(horizontal, vertical, cant, start_distance, rail_head_distance)
+
+    def __getattr__(self, name: str):
+        # only called for attributes that are not set, i.e. layouts not read yet after from_entity(lazy=True)
+        lazy = self.__dict__.get("_lazy_entity")
+        if name in LAYOUT_ATTRIBUTES and lazy is not None:
+            del self._lazy_entity
+            self._read_layouts(lazy)
+            return getattr(self, name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def set_layouts(
+        self,
+        horizontal: list = None,
+        vertical: list = None,
+        cant: list = None,
+        start_distance: float = 0.0,
+        rail_head_distance: float = None,
+    ) -> None:
+        self.horizontal, self.vertical, self.cant = (
+            segments if isinstance(segments, SegmentTable) else list(segments or [])
+            for segments in (horizontal, vertical, cant)
+        )
+        self.start_distance = float(start_distance or 0.0)
+        self.rail_head_distance = rail_head_distance
+        self._projection_index = None
+
+        self._h_lengths = _column(self.horizontal, "SegmentLength")
+        self._h_starts = segment_starts(self._h_lengths, self.start_distance)
+        self._v_starts = _column(self.vertical, "StartDistAlong")
+        self._v_lengths = _column(self.vertical, "HorizontalLength")
+        self._c_starts = _column(self.cant, "StartDistAlong")
+        self._c_lengths = _column(self.cant, "HorizontalLength")
+
+    def from_entity(self, entity: ifcopenshell.entity_instance, lazy: bool = False) -> "Alignment":
+        """
+        Read the layouts of an IfcAlignment.
+
+        @param entity: IfcAlignment with nested horizontal, and optionally vertical and cant, layouts
+        @param lazy: True to read the layouts on first use and decode each segment
+            the first time it is evaluated, see the module documentation
+        @return: self
+        """
+        self.entity = entity
+        if lazy:
+            for name in LAYOUT_ATTRIBUTES:
+                self.__dict__.pop(name, None)
+            self._lazy_entity = entity
+        else:
+            self._read_layouts(entity, lazy=False)
+
+        return self
+
+    def _read_layouts(self, entity: ifcopenshell.entity_instance, lazy: bool = True) -> None:
+        layouts = _layouts(entity)
+        segments = SegmentTable if lazy else _layout_segments
+        horizontal = layouts["IfcAlignmentHorizontal"]
+        vertical = layouts.get("IfcAlignmentVertical")
+        cant = layouts.get("IfcAlignmentCant")
+        self.set_layouts(
+            horizontal=segments(horizontal),
+            vertical=segments(vertical) if vertical else None,
+            cant=segments(cant) if cant else None,
+            start_distance=getattr(horizontal, "StartDistAlong", None),
+            rail_head_distance=cant.RailHeadDistance if cant else None,
+        )
+
+    @property
+    def start(self) -> float:
+        return self.start_distance
+
+    @property
+    def end(self) -> float:
+        return self.start_distance + float(self._h_lengths.sum())
+
+    @property
+    def length(self) -> float:
+        return float(self._h_lengths.sum())
+
+    def critical_stations(self) -> np.ndarray:
+        """
+        Segment boundaries of all layouts within the extent of the horizontal layout.
+        """
+        stations = critical_stations(self._h_starts, self._h_lengths)
+        for starts, lengths in ((self._v_starts, self._v_lengths), (self._c_starts, self._c_lengths)):
+            if len(starts):
+                stations = merge_stations(stations, critical_stations(starts, lengths))
+
+        return stations
+
+    def evaluate(self, distances: np.ndarray, instrumentation: Instrumentation = None) -> np.ndarray:
+        """
+        Alignment geometry at an array of distances along.
+
+        Z is NaN outside the vertical layout, and the cant columns are NaN
+        outside the cant layout. Cant is the superelevation of the left rail
+        over the right rail, Cant_Rotation the corresponding roll (positive
+        raising the left side) and ReferenceZ the height of the midpoint
+        between the rails.
+
+        @param distances: (N,) distances along the alignment
+        @param instrumentation: records the time per stage and segment type, see `alignment_tools.profiling`
+        @return: (N, 8) array with the columns in `COLUMNS`
+        """
+        return self._evaluate(distances, self._cursors(), instrumentation)
+
+    def _cursors(self) -> tuple:
+        """
+        New horizontal, vertical and cant station cursors.
+        """
+        return (
+            StationCursor(self._h_starts, self._h_lengths),
+            StationCursor(self._v_starts, self._v_lengths),
+            StationCursor(self._c_starts, self._c_lengths),
+        )
+
+    def _evaluate(self, distances: np.ndarray, cursors: tuple, instrumentation: Instrumentation = None) -> np.ndarray:
+        instrumentation = instrumentation or NULL_INSTRUMENTATION
+        distances = np.atleast_1d(np.asarray(distances, dtype=np.float64))
+        out = np.full((len(distances), len(COLUMNS)), np.nan)
+        out[:, DISTANCE] = distances
+
+        mapping = _map_stations(distances, cursors[0], "horizontal", instrumentation)
+        for i, idx in mapping.groups():
+            segment, u = self.horizontal[i], mapping.u[idx]
+            with instrumentation.measure("horizontal", predefined_type(segment), len(idx)):
+                out[idx, X : DIRECTION + 1] = segment_point(segment, u)
+        self._evaluate_profile(out, instrumentation, cursors)
+
+        return out
+
+    def _evaluate_profile(self, out: np.ndarray, instrumentation: Instrumentation = None, cursors: tuple = None) -> None:
+        """
+        Fill the height and cant columns of points at the distances in out[:, DISTANCE].
+        """
+        instrumentation = instrumentation or NULL_INSTRUMENTATION
+        _, vertical, cant = cursors or self._cursors()
+        distances = out[:, DISTANCE]
+        mapping = _map_stations(distances, vertical, "vertical", instrumentation)
+        for i, idx in mapping.groups():
+            segment, u = self.vertical[i], mapping.u[idx]
+            with instrumentation.measure("vertical", predefined_type(segment), len(idx)):
+                out[idx, Z] = segment_height(segment, u)
+
+        mapping = _map_stations(distances, cant, "cant", instrumentation)
+        for i, idx in mapping.groups():
+            segment, u = self.cant[i], mapping.u[idx]
+            with instrumentation.measure("cant", predefined_type(segment), len(idx)):
+                left, right = _rail_cant(segment, u)
+            out[idx, CANT] = left - right
+            out[idx, REFERENCE_Z] = out[idx, Z] + (left + right) / 2.0
+        if self.rail_head_distance:
+            with instrumentation.measure("cant_rotation", None, len(out)):
+                out[:, CANT_ROTATION] = _cant_rotation(out[:, CANT], self.rail_head_distance)
+
+    def curvature(self, distances: np.ndarray) -> np.ndarray:
+        """
+        Signed curvature of the horizontal layout at an array of distances along, positive turning left.
+        """
+        distances = np.atleast_1d(np.asarray(distances, dtype=np.float64))
+        out = np.full(len(distances), np.nan)
+        mapping = map_stations(distances, self._h_starts, self._h_lengths)
+        for i, idx in mapping.groups():
+            out[idx] = segment_curvature(self.horizontal[i], mapping.u[idx])
+
+        return out
+
+    def project(self, points: np.ndarray):
+        """
+        Station, offset and height of an array of XY or XYZ points.
+
+        The spatial index is built on the first call and reused,
+        see `alignment_tools.projection.ProjectionIndex`.
+
+        @param points: (N, 2) or (N, 3) points in project length units
+        @return: `alignment_tools.projection.StationOffset`
+        """
+        # imported here as alignment_tools.projection depends on this module
+        from alignment_tools.projection import ProjectionIndex
+
+        if self._projection_index is None:
+            self._projection_index = ProjectionIndex(self)
+
+        return self._projection_index.project(points)
+
+    def _representation_evaluator(self, settings: geom.settings = None):
+        """
+        Function evaluating the alignment's Axis representation with the geometry kernel.
+        """
+        if self.entity is None or self.entity.Representation is None:
+            raise ValueError("Alignment has no representation to evaluate.")
+        axis = None
+        for rep in self.entity.Representation.Representations:
+            if rep.RepresentationIdentifier == "Axis":
+                axis = rep.Items[0]
+        if axis is None:
+            raise ValueError(f"{self.entity} has no Axis representation.")
+        curve = CurveEvaluator(axis, settings)
+
+        def evaluate(distances):
+            distances = np.atleast_1d(np.asarray(distances, dtype=np.float64))
+            pts = curve.evaluate(distances - self.start_distance)
+            out = np.full((len(distances), len(COLUMNS)), np.nan)
+            out[:, DISTANCE] = distances
+            out[:, X : Y + 1] = pts.position[:, :2]
+            out[:, DIRECTION] = np.arctan2(pts.tangent[:, 1], pts.tangent[:, 0])
+            out[:, Z] = pts.position[:, 2]
+            if self.rail_head_distance:
+                out[:, CANT_ROTATION] = pts.cant_rotation
+                out[:, CANT] = float(self.rail_head_distance) * np.sin(pts.cant_rotation)
+                out[:, REFERENCE_Z] = out[:, Z]
+            return out
+
+        return evaluate
+
+    def create_shape(
+        self,
+        use_representation: bool = False,
+        point_interval: float = 25.0,
+        chord_tolerance: float = None,
+        angle_tolerance: float = None,
+        max_spacing: float = None,
+        settings: geom.settings = None,
+        instrumentation: Instrumentation = None,
+    ) -> np.ndarray:
+        """
+        Calculate points along the alignment.
+
+        By default points are placed at a fixed `point_interval` plus the
+        boundaries of the horizontal, vertical and cant segments. If
+        `chord_tolerance` or `angle_tolerance` is given, points are placed
+        adaptively instead: starting from the segment boundaries (and a grid
+        at `max_spacing`, if given), each interval is halved until the
+        midpoint of the calculated geometry lies within `chord_tolerance` of
+        the straight line between its ends, in position and in cant, and the
+        change of direction across it is at most `angle_tolerance`. Long
+        tangents thus keep only their end points while tight curves and
+        transitions are sampled densely.
+
+        @param use_representation: True to evaluate the Axis representation with the
+            geometry kernel, False to calculate from the business logic (layouts)
+        @param point_interval: distance between points in fixed interval mode
+        @param chord_tolerance: maximum deviation between the geometry and the polyline through the points
+        @param angle_tolerance: maximum change of direction between points, radians
+        @param max_spacing: maximum distance between points in adaptive mode
+        @param settings: geometry settings used with `use_representation`
+        @param instrumentation: records the time per stage and segment type, see
+            `alignment_tools.profiling`. Evaluation by the geometry kernel is not broken down.
+        @return: (N, 8) array with the columns in `COLUMNS`
+        """
+        instrumentation = instrumentation or NULL_INSTRUMENTATION
+        if use_representation:
+            evaluate = self._representation_evaluator(settings)
+        else:
+            evaluate = functools.partial(self.evaluate, instrumentation=instrumentation)
+        adaptive = chord_tolerance is not None or angle_tolerance is not None
+
+        with instrumentation.measure("stations") as call:
+            distances = self._sampling_stations(adaptive, point_interval, max_spacing)
+            call.points = len(distances)
+        if not adaptive:
+            return evaluate(distances)
+
+        return self._refine(evaluate, distances, chord_tolerance, angle_tolerance, instrumentation)
+
+    def points(self, compact: bool = False, **kwargs):
+        """
+        `create_shape()` as named columns, see `alignment_tools.points`.
+
+        @param compact: True to store directions and cant as float32
+        @param kwargs: arguments of `create_shape()`
+        @return: AlignmentPoints
+        """
+        from alignment_tools.points import AlignmentPoints
+
+        return AlignmentPoints.from_array(self.create_shape(**kwargs), compact=compact)
+
+    def iter_stations(
+        self,
+        start: float = None,
+        end: float = None,
+        step: float = 25.0,
+        chunk_size: int = 65536,
+        instrumentation: Instrumentation = None,
+    ):
+        """
+        Calculate points along the alignment chunk by chunk.
+
+        Yields the points of `create_shape(point_interval=step)` between
+        `start` and `end`, including all segment boundaries in that range, as
+        (chunk_size, 8) arrays; only the last chunk may be shorter. Each chunk
+        continues the segment lookup where the previous one ended, and only
+        the segment boundaries are held for the whole range, so memory does
+        not grow with the length of the alignment.
+
+        @param start: first distance along, the start of the alignment if None
+        @param end: last distance along, the end of the alignment if None
+        @param step: distance between points
+        @param chunk_size: number of points per chunk
+        @param instrumentation: records the time per stage and segment type, see `alignment_tools.profiling`
+        @return: generator of (M, 8) arrays with the columns in `COLUMNS`
+        """
+        start = self.start if start is None else float(start)
+        end = self.end if end is None else float(end)
+        cursors = self._cursors()
+        for distances in iter_station_grid(start, end, step, self.critical_stations(), chunk_size):
+            yield self._evaluate(distances, cursors, instrumentation)
+
+    def _sampling_stations(self, adaptive: bool, point_interval: float, max_spacing: float) -> np.ndarray:
+        """
+        Distances to sample at before any refinement, see `create_shape()`.
+        """
+        critical = self.critical_stations()
+        if not adaptive:
+            return merge_stations(distance_grid(self.start, self.end, point_interval), critical)
+        if max_spacing is not None:
+            return merge_stations(distance_grid(self.start, self.end, max_spacing), critical)
+
+        return critical
+
+    @staticmethod
+    def _refine(evaluate, distances, chord_tolerance, angle_tolerance, instrumentation=None) -> np.ndarray:
+        """
+        Halve intervals until their midpoints satisfy the tolerances.
+        """
+        instrumentation = instrumentation or NULL_INSTRUMENTATION
+        pts = evaluate(distances)
+        min_interval = 1e-9 * max(1.0, float(np.abs(distances).max()))
+        # intervals that have not been checked yet
+        active = np.ones(len(pts) - 1, dtype=bool)
+
+        for _ in range(MAX_REFINEMENTS):
+            idx = np.flatnonzero(active)
+            if len(idx) == 0:
+                break
+            a, b = pts[idx], pts[idx + 1]
+            mid = evaluate((a[:, DISTANCE] + b[:, DISTANCE]) / 2.0)
+            with instrumentation.measure("assembly") as call:
+                count = len(pts)
+                pts, active = _insert_midpoints(pts, idx, mid, chord_tolerance, angle_tolerance, min_interval)
+                call.points = len(pts) - count
+
+        return pts
@@ -0,0 +1,231 @@
+"""
+Evaluate all alignments of a model across a pool of worker processes.
+
+Network models hold hundreds of alignments: mainlines, ramps, turnouts.
+`evaluate_model()` spreads them over worker processes. Each worker opens the
+model once when it starts and evaluates the alignments it is given with
+`Alignment.create_shape()`. The points are written to a
+`multiprocessing.shared_memory` block, so only the name of the block goes
+back to the parent, which maps it as an `AlignmentPoints` without copying.
+
+The blocks stay allocated until `BatchResult.close()`, so use the result as
+a context manager and copy any points needed afterwards. An alignment that
+fails to evaluate is reported in `BatchResult.errors` and does not stop the
+batch; if the batch itself fails, all blocks created so far are released. With `workers=0`
+the alignments are evaluated in the calling process, without a pool or
+shared memory, which is convenient for debugging.
+
+From the command line the points of each alignment are written to a .npy
+file named after its GlobalId:
+
+    python -m alignment_tools.batch model.ifc out_dir --workers 8 --point-interval 5
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+import os
+
+import numpy as np
+
+import ifcopenshell
+
+from alignment_tools.alignment import COLUMNS
+from alignment_tools.alignment import Alignment
+from alignment_tools.points import AlignmentPoints
+
+# model opened by the initializer of each worker process
+_model = None
+
+
+@dataclass
+class EvaluationSettings:
+    """
+    Arguments of `Alignment.create_shape()` for every alignment of a batch.
+
+    @param point_interval: distance between points in fixed interval mode
+    @param chord_tolerance: maximum deviation between the geometry and the polyline through the points
+    @param angle_tolerance: maximum change of direction between points, radians
+    @param max_spacing: maximum distance between points in adaptive mode
+    @param use_representation: True to evaluate the Axis representation with the geometry kernel
+    """
+
+    point_interval: float = 25.0
+    chord_tolerance: float = None
+    angle_tolerance: float = None
+    max_spacing: float = None
+    use_representation: bool = False
+
+
+@dataclass
+class BatchResult:
+    """
+    Points of the alignments of a model, by GlobalId.
+
+    @param points: AlignmentPoints of each evaluated alignment
+    @param names: Name of each evaluated alignment
+    @param errors: message for each alignment that could not be evaluated
+    """
+
+    points: dict = field(default_factory=dict)
+    names: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    blocks: list = field(default_factory=list, repr=False)
+
+    def __enter__(self) -> "BatchResult":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Release the shared memory. Points of this result must not be used afterwards.
+        """
+        self.points = {}
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def _open_model(path: str) -> None:
+    global _model
+    _model = ifcopenshell.open(path)
+
+
+def _evaluate(step_id: int, settings: dict, model: ifcopenshell.file = None):
+    entity = (model or _model).by_id(step_id)
+    try:
+        points = Alignment().from_entity(entity, lazy=True).create_shape(**settings)
+    except Exception as e:
+        # e.g. no horizontal layout, an unsupported segment type or a malformed layout
+        return entity.GlobalId, entity.Name, None, f"{type(e).__name__}: {e}"
+    return entity.GlobalId, entity.Name, points, None
+
+
+def _create_block(size: int) -> shared_memory.SharedMemory:
+    """
+    New shared memory block that is not unlinked when the creating process exits.
+    """
+    try:
+        return shared_memory.SharedMemory(create=True, size=size, track=False)
+    except TypeError:
+        # Python < 3.13 has no track argument
+        block = shared_memory.SharedMemory(create=True, size=size)
+        resource_tracker.unregister(block._name, "shared_memory")
+        return block
+
+
+def _unlink_block(name: str) -> None:
+    block = shared_memory.SharedMemory(name=name)
+    block.close()
+    block.unlink()
+
+
+def _evaluate_shared(step_id: int, settings: dict):
+    """
+    Evaluate an alignment in a worker and copy its points to a new shared memory block.
+
+    @return: GlobalId, Name, (block name, number of points) or None, error message or None
+    """
+    global_id, name, points, error = _evaluate(step_id, settings)
+    if points is None:
+        return global_id, name, None, error
+    # the parent unlinks the block, not the resource tracker when this worker exits
+    block = _create_block(max(points.nbytes, 1))
+    np.ndarray(points.shape, dtype=np.float64, buffer=block.buf)[:] = points
+    block.close()
+    return global_id, name, (block.name, len(points)), None
+
+
+def evaluate_model(
+    path: str,
+    settings: EvaluationSettings = None,
+    workers: int = None,
+    alignments: list = None,
+) -> BatchResult:
+    """
+    Evaluate the alignments of a model in parallel.
+
+    @param path: path to the IFC model
+    @param settings: sampling of the points, the defaults of `create_shape()` if None
+    @param workers: number of worker processes, os.cpu_count() if None, 0 to evaluate in this process
+    @param alignments: GlobalIds of the alignments to evaluate, all IfcAlignment if None
+    @return: points by GlobalId, release with `BatchResult.close()`
+    """
+    settings = asdict(settings or EvaluationSettings())
+    model = ifcopenshell.open(path)
+    entities = model.by_type("IfcAlignment")
+    if alignments is not None:
+        wanted = set(alignments)
+        entities = [e for e in entities if e.GlobalId in wanted]
+    step_ids = [e.id() for e in entities]
+    result = BatchResult()
+
+    if workers == 0:
+        for step_id in step_ids:
+            global_id, name, points, error = _evaluate(step_id, settings, model)
+            result.names[global_id] = name
+            if points is None:
+                result.errors[global_id] = error
+            else:
+                result.points[global_id] = AlignmentPoints.from_array(points)
+        return result
+
+    del model
+    workers = min(workers or os.cpu_count() or 1, max(len(step_ids), 1))
+    futures = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_open_model, initargs=(path,)) as pool:
+            futures = [pool.submit(_evaluate_shared, step_id, settings) for step_id in step_ids]
+            try:
+                for future in futures:
+                    global_id, name, shared, error = future.result()
+                    result.names[global_id] = name
+                    if shared is None:
+                        result.errors[global_id] = error
+                        continue
+                    block = shared_memory.SharedMemory(name=shared[0])
+                    result.blocks.append(block)
+                    points = np.ndarray((shared[1], len(COLUMNS)), dtype=np.float64, buffer=block.buf)
+                    result.points[global_id] = AlignmentPoints.from_array(points)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+    except BaseException:
+        # release the blocks taken over so far and those of results not collected yet
+        taken = {block.name for block in result.blocks}
+        result.close()
+        for future in futures:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                shared = future.result()[2]
+                if shared is not None and shared[0] not in taken:
+                    _unlink_block(shared[0])
+        raise
+
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate all alignments of a model in parallel.")
+    parser.add_argument("model", help="path to the IFC model")
+    parser.add_argument("out_dir", help="output directory for the .npy point files")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes, 0 for none")
+    parser.add_argument("--point-interval", type=float, default=EvaluationSettings.point_interval, help="distance between points")
+    parser.add_argument("--chord-tolerance", type=float, default=None, help="adaptive sampling tolerance")
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    settings = EvaluationSettings(point_interval=args.point_interval, chord_tolerance=args.chord_tolerance)
+    with evaluate_model(args.model, settings, args.workers) as result:
+        for global_id, points in result.points.items():
+            points.save(os.path.join(args.out_dir, f"{global_id}.npy"))
+            print(f"[INFO] {result.names[global_id]} ({global_id}): {len(points)} points.")
+        for global_id, error in result.errors.items():
+            print(f"[INFO] {result.names[global_id]} ({global_id}) skipped: {error}")
@@ -0,0 +1,180 @@
+"""
+Timing, baselines and regression checks for the alignment benchmarks.
+
+A benchmark case is a name and a function without arguments. `time_case()`
+calls the function a number of times after a warm-up call and keeps the
+individual timings. The minimum is the figure that is compared: it is the
+run least disturbed by the rest of the machine, so it is the most stable
+one between runs.
+
+Results are stored as JSON: a version, a description of the machine and
+one entry per case. `compare()` checks a run against a stored baseline and
+returns the cases that slowed down by more than a relative `threshold`.
+Differences below `min_difference` seconds are ignored, as the timings of
+very short cases are mostly noise.
+
+The cases themselves are in `benchmarks/` next to `tests/`.
+"""
+
+from dataclasses import asdict
+from dataclasses import dataclass
+import json
+import os
+import platform
+import statistics
+import time
+
+BASELINE_VERSION = 1
+
+# relative slowdown over the baseline that is flagged
+DEFAULT_THRESHOLD = 0.25
+# absolute slowdown below which a case is never flagged, seconds
+DEFAULT_MIN_DIFFERENCE = 1e-4
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Timings of a benchmark case.
+
+    @param name: unique name of the case, e.g. "create_shape[4REN0_Autodesk-5]"
+    @param group: the path that is timed, e.g. "create_shape"
+    @param params: parameters of the case
+    @param times: seconds taken by each call
+    """
+
+    name: str
+    group: str
+    params: dict
+    times: list
+
+    @property
+    def min(self) -> float:
+        return min(self.times)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "min": self.min, "median": self.median}
+
+
+@dataclass
+class Regression:
+    """
+    A case that is slower than its baseline.
+
+    @param name: name of the case
+    @param baseline: minimum time of the baseline, seconds
+    @param current: minimum time of this run, seconds
+    """
+
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+def time_case(name: str, group: str, func, params: dict = None, repeat: int = 5, warmup: int = 1) -> BenchmarkResult:
+    """
+    Time a benchmark case.
+
+    @param name: unique name of the case
+    @param group: the path that is timed
+    @param func: function without arguments doing the work of the case
+    @param params: parameters of the case, stored with the result
+    @param repeat: number of timed calls
+    @param warmup: number of calls before timing, e.g. to fill caches of the kernel
+    @return: the timings
+    """
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    return BenchmarkResult(name=name, group=group, params=dict(params or {}), times=times)
+
+
+def machine() -> dict:
+    """
+    Description of the machine and the versions the results were measured with.
+    """
+    import numpy as np
+
+    import ifcopenshell
+
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "ifcopenshell": ifcopenshell.version,
+    }
+
+
+def write_results(results: list, path: str) -> None:
+    """
+    Write benchmark results to a JSON file, e.g. a new baseline.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    contents = {
+        "version": BASELINE_VERSION,
+        "machine": machine(),
+        "results": {r.name: r.to_dict() for r in results},
+    }
+    with open(path, "w") as f:
+        json.dump(contents, f, indent=2)
+
+
+def read_results(path: str) -> dict:
+    """
+    Benchmark results of a JSON file by name, empty if there is no file.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        contents = json.load(f)
+    if contents.get("version") != BASELINE_VERSION:
+        raise ValueError(f"{path} has version {contents.get('version')}, expected {BASELINE_VERSION}.")
+
+    return {
+        name: BenchmarkResult(r["name"], r["group"], r["params"], r["times"])
+        for name, r in contents["results"].items()
+    }
+
+
+def compare(
+    results: list,
+    baseline: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    min_difference: float = DEFAULT_MIN_DIFFERENCE,
+) -> list:
+    """
+    Cases that are slower than their baseline.
+
+    A case is flagged if its minimum time exceeds that of the baseline by
+    more than `threshold` relative and by more than `min_difference`
+    seconds. Cases without a baseline are not flagged.
+
+    @param results: `BenchmarkResult` list of this run
+    @param baseline: `BenchmarkResult` by name, see `read_results()`
+    @param threshold: relative slowdown that is flagged, 0.25 for 25 %
+    @param min_difference: absolute slowdown that is always tolerated, seconds
+    @return: `Regression` list, slowest relative to its baseline first
+    """
+    regressions = []
+    for result in results:
+        if result.name not in baseline:
+            continue
+        reference = baseline[result.name].min
+        if result.min > reference * (1.0 + threshold) and result.min - reference > min_difference:
+            regressions.append(Regression(result.name, reference, result.min))
+
+    return sorted(regressions, key=lambda r: r.ratio, reverse=True)
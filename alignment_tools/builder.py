@@ -0,0 +1,968 @@
+"""
+Creation of IFC 4.3 alignments from horizontal and vertical segment tables.
+
+The `create_*` helpers are ported from
+`examples/FHWA_Bridge_Geometry_Manual/Alignment.py`. Each one creates the
+geometry (an IfcCurveSegment) and the business logic (an IfcAlignmentSegment)
+of one segment. They differ from the example in two places. The direction of
+a gradient run is the normalized (1, slope), so the run has its horizontal
+length. The parabolic arc keeps the example's placement, but has no constant
+or linear coefficient, because the placement already holds the start height
+and gradient, and its SegmentLength is the arc length of the parent curve.
+With these changes the representation evaluated by the geometry kernel
+matches the business logic evaluated by `alignment_tools.alignment.Alignment`.
+The example also has no helper for spirals, so `create_spiral` is new.
+
+The builder also writes the other horizontal transitions. Bloss curves,
+Viennese bends, sine and cosine curves become the polynomial, sine and
+cosine spirals whose curvature is that of the business logic, and a Helmert
+curve becomes two second order spirals, one for each half. Circular
+vertical curves are arcs of an IfcCircle.
+
+`AlignmentBuilder` sets up a project with units and an Axis representation
+context, and adds alignments from whole segment tables. A table is a mapping
+of IFC attribute name to a column of values, see `segment_table()`, or a list
+of `HorizontalSegment`, `VerticalSegment` or any objects with the same
+attribute names. Horizontal segments are contiguous from distance along 0.
+Vertical and cant segments are located by StartDistAlong.
+
+Unlike the helpers, which create fresh points, directions, placements and
+parent curves for every segment, the builder creates each distinct one once
+per model. Every tangent shares one IfcLine, arcs of the same radius share
+one IfcCircle, and identical points, directions and placements are reused.
+This keeps the STEP file small and the number of entities to create and
+write low.
+"""
+
+from dataclasses import dataclass
+import math
+
+import numpy as np
+
+import ifcopenshell
+import ifcopenshell.api
+import ifcopenshell.guid
+
+from alignment_tools.horizontal import segment_point
+from alignment_tools.vertical import segment_height
+
+# scale to metres of the supported linear units
+LINEAR_UNITS = {
+    "meter": 1.0,
+    "millimeter": 0.001,
+    "centimeter": 0.01,
+    "kilometer": 1000.0,
+    "foot": 0.3048,
+    "USSurveyFoot": 1200.0 / 3937.0,
+    "inch": 0.0254,
+}
+SI_PREFIXES = {"millimeter": "MILLI", "centimeter": "CENTI", "kilometer": "KILO"}
+
+# tolerance on the curvature for continuity between segments
+CONTINUITY_TOLERANCE = 1e-9
+
+HORIZONTAL_COLUMNS = (
+    "StartPoint",
+    "StartDirection",
+    "StartRadiusOfCurvature",
+    "EndRadiusOfCurvature",
+    "SegmentLength",
+    "PredefinedType",
+)
+VERTICAL_COLUMNS = (
+    "StartDistAlong",
+    "HorizontalLength",
+    "StartHeight",
+    "StartGradient",
+    "EndGradient",
+    "RadiusOfCurvature",
+    "PredefinedType",
+)
+CANT_COLUMNS = (
+    "StartDistAlong",
+    "HorizontalLength",
+    "StartCantLeft",
+    "EndCantLeft",
+    "StartCantRight",
+    "EndCantRight",
+    "PredefinedType",
+)
+
+
+@dataclass
+class HorizontalSegment:
+    """
+    Design parameters of an IfcAlignmentHorizontalSegment.
+
+    @param StartPoint: (x, y) start of the segment
+    @param StartDirection: direction at the start in radians, counter-clockwise from the x axis
+    @param StartRadiusOfCurvature: radius at the start, positive turning left, 0 for a straight
+    @param EndRadiusOfCurvature: radius at the end, positive turning left, 0 for a straight
+    @param SegmentLength: length of the segment
+    @param PredefinedType: LINE, CIRCULARARC, CLOTHOID, ...
+    """
+
+    StartPoint: tuple
+    StartDirection: float
+    StartRadiusOfCurvature: float
+    EndRadiusOfCurvature: float
+    SegmentLength: float
+    PredefinedType: str
+
+
+@dataclass
+class VerticalSegment:
+    """
+    Design parameters of an IfcAlignmentVerticalSegment.
+
+    @param StartDistAlong: distance along the horizontal layout at the start of the segment
+    @param HorizontalLength: length of the segment projected on the horizontal layout
+    @param StartHeight: height at the start
+    @param StartGradient: gradient at the start
+    @param EndGradient: gradient at the end
+    @param RadiusOfCurvature: radius of a PARABOLICARC or CIRCULARARC, None otherwise
+    @param PredefinedType: CONSTANTGRADIENT, PARABOLICARC, ...
+    """
+
+    StartDistAlong: float
+    HorizontalLength: float
+    StartHeight: float
+    StartGradient: float
+    EndGradient: float
+    RadiusOfCurvature: float
+    PredefinedType: str
+
+
+@dataclass
+class CantSegment:
+    """
+    Design parameters of an IfcAlignmentCantSegment.
+
+    @param StartDistAlong: distance along the horizontal layout at the start of the segment
+    @param HorizontalLength: length of the segment projected on the horizontal layout
+    @param StartCantLeft: cant of the left rail at the start
+    @param EndCantLeft: cant of the left rail at the end, None if constant
+    @param StartCantRight: cant of the right rail at the start
+    @param EndCantRight: cant of the right rail at the end, None if constant
+    @param PredefinedType: CONSTANTCANT, LINEARTRANSITION, ...
+    """
+
+    StartDistAlong: float
+    HorizontalLength: float
+    StartCantLeft: float
+    EndCantLeft: float
+    StartCantRight: float
+    EndCantRight: float
+    PredefinedType: str
+
+
+def _radius(radius) -> float:
+    return float(radius or 0.0)
+
+
+def _curvature(radius) -> float:
+    radius = _radius(radius)
+    return 1.0 / radius if radius else 0.0
+
+
+def _parabola_length(C: float, length: float) -> float:
+    """
+    Arc length of the parabola C u^2 for u from 0 to `length`.
+    """
+    if C == 0.0:
+        return length
+    w = 2.0 * C * length
+
+    return (length * math.sqrt(1.0 + w * w)) / 2.0 + math.asinh(w) / (4.0 * C)
+
+
+def _clothoid_geometry(start_radius, end_radius, length: float) -> tuple:
+    """
+    ClothoidConstant A and SegmentStart of a clothoid whose curvature s / (A |A|)
+    passes through the start and end curvature over `length`.
+    """
+    k0 = _curvature(start_radius)
+    k1 = _curvature(end_radius)
+    if k0 == k1:
+        raise ValueError(f"Start and end radius of a spiral must differ, got {start_radius} and {end_radius}.")
+    rate = (k1 - k0) / length
+
+    return math.copysign(math.sqrt(1.0 / abs(rate)), rate), k0 / rate
+
+
+def _spiral_terms(coefficients: list) -> list:
+    """
+    Terms of an IFC polynomial spiral, highest order first, whose curvature is sum(c_i s^i).
+
+    The term A_i contributes s^i sign(A_i) / |A_i|^(i + 1) to the curvature, a
+    zero coefficient gives no term.
+    """
+    terms = [math.copysign(abs(c) ** (-1.0 / (i + 1)), c) if c else None for i, c in enumerate(coefficients)]
+    return terms[::-1]
+
+
+def _transition_geometry(predefined_type: str, start_radius, end_radius, length: float) -> list:
+    """
+    Parent curves of a horizontal transition other than a clothoid.
+
+    The curvature k0 + (k1 - k0) shape(s / length) of the transition is
+    written as a spiral starting with direction 0 at s = 0. A Helmert curve is
+    two second order spirals, one for each half.
+
+    @return: (IFC class, terms, start, length) of each parent curve, start being the distance along the segment
+    """
+    k0 = _curvature(start_radius)
+    k1 = _curvature(end_radius)
+    dk = k1 - k0
+    if dk == 0.0:
+        raise ValueError(f"Start and end radius of a spiral must differ, got {start_radius} and {end_radius}.")
+    L = length
+    if predefined_type == "BLOSSCURVE":
+        return [("IfcThirdOrderPolynomialSpiral", _spiral_terms([k0, 0.0, 3.0 * dk / L**2, -2.0 * dk / L**3]), 0.0, L)]
+    if predefined_type == "VIENNESEBEND":
+        # the GravityCenterLineHeight term is ignored, as in alignment_tools.horizontal
+        coefficients = [k0, 0.0, 0.0, 0.0, 35.0 * dk / L**4, -84.0 * dk / L**5, 70.0 * dk / L**6, -20.0 * dk / L**7]
+        return [("IfcSeventhOrderPolynomialSpiral", _spiral_terms(coefficients), 0.0, L)]
+    if predefined_type == "HELMERTCURVE":
+        return [
+            ("IfcSecondOrderPolynomialSpiral", _spiral_terms([k0, 0.0, 2.0 * dk / L**2]), 0.0, L / 2.0),
+            ("IfcSecondOrderPolynomialSpiral", _spiral_terms([k0 + dk / 2.0, 2.0 * dk / L, -2.0 * dk / L**2]), L / 2.0, L / 2.0),
+        ]
+    if predefined_type == "COSINECURVE":
+        # curvature 1 / A_C cos(pi s / L) + 1 / A_0, with L the SegmentLength
+        middle = k0 + dk / 2.0
+        return [("IfcCosineSpiral", [-2.0 / dk, 1.0 / middle if middle else None], 0.0, L)]
+    if predefined_type == "SINECURVE":
+        # curvature 1 / A_S sin(2 pi s / L) + s / (A_1 |A_1|) + 1 / A_0, with L the SegmentLength
+        terms = [-2.0 * math.pi / dk, math.copysign(math.sqrt(L / abs(dk)), dk), 1.0 / k0 if k0 else None]
+        return [("IfcSineSpiral", terms, 0.0, L)]
+    raise NotImplementedError(f"Horizontal segment type {predefined_type} is not supported.")
+
+
+def _gradient_geometry(slope: float, length: float) -> tuple:
+    """
+    Placement direction ratios and SegmentLength of a gradient run.
+    """
+    norm = math.sqrt(1.0 + slope * slope)
+    return (1.0 / norm, slope / norm), length * norm
+
+
+def _parabola_geometry(start_slope: float, end_slope: float, length: float) -> tuple:
+    """
+    Placement direction ratios, coefficient C and SegmentLength of a parabolic vertical curve.
+
+    The parameter u of the parabola is the distance from the start and the
+    height is u sin(a) + C u^2 cos(a), with sin(a) the start gradient.
+    """
+    cos_a = math.sqrt(1.0 - start_slope * start_slope)
+    C = (end_slope - start_slope) / (2.0 * length) / cos_a
+
+    return (cos_a, start_slope), C, _parabola_length(C, length)
+
+
+def _vertical_arc_geometry(start_slope: float, end_slope: float, length: float, radius) -> tuple:
+    """
+    Parent circle and SegmentStart, SegmentLength of a circular vertical curve.
+
+    The radius is `radius` if given, otherwise it follows from the gradients
+    and the horizontal length. As in `ifcopenshell.api.alignment`, the
+    circle is placed with its centre relative to the start of the segment,
+    and SegmentStart and SegmentLength are the arc lengths to the start and
+    over the curve, negative over a crest.
+
+    @return: (centre, radius, start, length)
+    """
+    a0, a1 = math.atan(start_slope), math.atan(end_slope)
+    radius = abs(radius) if radius else length / abs(math.sin(a1) - math.sin(a0))
+    if a1 > a0:
+        centre = (-radius * math.sin(a0), radius * math.cos(a0))
+        a0, a1 = a0 + 1.5 * math.pi, a1 + 1.5 * math.pi
+    else:
+        centre = (radius * math.sin(a0), -radius * math.cos(a0))
+        a0, a1 = a0 + 0.5 * math.pi, a1 + 0.5 * math.pi
+
+    return centre, radius, radius * a0, radius * (a1 - a0)
+
+
+def create_tangent(file, p, dir, length, transition="CONTSAMEGRADIENT"):
+    """
+    Curve segment and alignment segment of a horizontal tangent run.
+
+    @param p: IfcCartesianPoint at the start
+    @param dir: direction in radians
+    @param length: length of the run
+    @return: (IfcCurveSegment, IfcAlignmentSegment)
+    """
+    # geometry
+    parent_curve = file.createIfcLine(
+        file.createIfcCartesianPoint((0.0, 0.0)),
+        file.createIfcVector(file.createIfcDirection((1.0, 0.0)), 1.0),
+    )
+    curve_segment = file.createIfcCurveSegment(
+        Transition=transition,
+        Placement=file.createIfcAxis2Placement2D(p, file.createIfcDirection((math.cos(dir), math.sin(dir)))),
+        SegmentStart=file.createIfcLengthMeasure(0.0),
+        SegmentLength=file.createIfcLengthMeasure(length),
+        ParentCurve=parent_curve,
+    )
+
+    # business logic
+    design_parameters = file.createIfcAlignmentHorizontalSegment(
+        StartPoint=p,
+        StartDirection=dir,
+        StartRadiusOfCurvature=0.0,
+        EndRadiusOfCurvature=0.0,
+        SegmentLength=length,
+        PredefinedType="LINE",
+    )
+    alignment_segment = file.createIfcAlignmentSegment(ifcopenshell.guid.new(), DesignParameters=design_parameters)
+
+    return curve_segment, alignment_segment
+
+
+def create_hcurve(file, pc, dir, radius, lc, transition="CONTSAMEGRADIENT"):
+    """
+    Curve segment and alignment segment of a horizontal circular curve.
+
+    @param pc: IfcCartesianPoint at the point of curve
+    @param dir: direction at the point of curve in radians
+    @param radius: radius, negative for curves to the right
+    @param lc: length of the curve
+    @return: (IfcCurveSegment, IfcAlignmentSegment)
+    """
+    # geometry
+    sign = math.copysign(1.0, radius)
+    parent_curve = file.createIfcCircle(
+        file.createIfcAxis2Placement2D(file.createIfcCartesianPoint((0.0, 0.0)), file.createIfcDirection((1.0, 0.0))),
+        abs(radius),
+    )
+    curve_segment = file.createIfcCurveSegment(
+        Transition=transition,
+        Placement=file.createIfcAxis2Placement2D(pc, file.createIfcDirection((math.cos(dir), math.sin(dir)))),
+        SegmentStart=file.createIfcLengthMeasure(0.0),
+        SegmentLength=file.createIfcLengthMeasure(sign * lc),
+        ParentCurve=parent_curve,
+    )
+
+    # business logic
+    design_parameters = file.createIfcAlignmentHorizontalSegment(
+        StartPoint=pc,
+        StartDirection=dir,
+        StartRadiusOfCurvature=radius,
+        EndRadiusOfCurvature=radius,
+        SegmentLength=lc,
+        PredefinedType="CIRCULARARC",
+    )
+    alignment_segment = file.createIfcAlignmentSegment(ifcopenshell.guid.new(), DesignParameters=design_parameters)
+
+    return curve_segment, alignment_segment
+
+
+def create_spiral(file, ps, dir, start_radius, end_radius, length, transition="CONTSAMEGRADIENTSAMECURVATURE"):
+    """
+    Curve segment and alignment segment of a clothoid transition.
+
+    The parent curve is an IfcClothoid whose curvature s / (A |A|) passes
+    through the start and end curvature over the length of the segment.
+
+    @param ps: IfcCartesianPoint at the start of the spiral
+    @param dir: direction at the start in radians
+    @param start_radius: radius at the start, positive turning left, 0 for infinite
+    @param end_radius: radius at the end, positive turning left, 0 for infinite
+    @param length: length of the spiral
+    @return: (IfcCurveSegment, IfcAlignmentSegment)
+    """
+    # geometry
+    clothoid_constant, segment_start = _clothoid_geometry(start_radius, end_radius, length)
+    parent_curve = file.createIfcClothoid(
+        file.createIfcAxis2Placement2D(file.createIfcCartesianPoint((0.0, 0.0)), file.createIfcDirection((1.0, 0.0))),
+        clothoid_constant,
+    )
+    curve_segment = file.createIfcCurveSegment(
+        Transition=transition,
+        Placement=file.createIfcAxis2Placement2D(ps, file.createIfcDirection((math.cos(dir), math.sin(dir)))),
+        SegmentStart=file.createIfcLengthMeasure(segment_start),
+        SegmentLength=file.createIfcLengthMeasure(length),
+        ParentCurve=parent_curve,
+    )
+
+    # business logic
+    design_parameters = file.createIfcAlignmentHorizontalSegment(
+        StartPoint=ps,
+        StartDirection=dir,
+        StartRadiusOfCurvature=_radius(start_radius),
+        EndRadiusOfCurvature=_radius(end_radius),
+        SegmentLength=length,
+        PredefinedType="CLOTHOID",
+    )
+    alignment_segment = file.createIfcAlignmentSegment(ifcopenshell.guid.new(), DesignParameters=design_parameters)
+
+    return curve_segment, alignment_segment
+
+
+def create_gradient(file, p, slope, length, transition="CONTSAMEGRADIENT"):
+    """
+    Curve segment and alignment segment of a vertical gradient run.
+
+    @param p: IfcCartesianPoint (distance along, height) at the start
+    @param slope: gradient of the run
+    @param length: horizontal length of the run
+    @return: (IfcCurveSegment, IfcAlignmentSegment)
+    """
+    # geometry
+    ratios, segment_length = _gradient_geometry(slope, length)
+    parent_curve = file.createIfcLine(
+        file.createIfcCartesianPoint((0.0, 0.0)),
+        file.createIfcVector(file.createIfcDirection((1.0, 0.0)), 1.0),
+    )
+    curve_segment = file.createIfcCurveSegment(
+        Transition=transition,
+        Placement=file.createIfcAxis2Placement2D(p, file.createIfcDirection(ratios)),
+        SegmentStart=file.createIfcLengthMeasure(0.0),
+        SegmentLength=file.createIfcLengthMeasure(segment_length),
+        ParentCurve=parent_curve,
+    )
+
+    # business logic
+    start_distance, start_height = p.Coordinates
+    design_parameters = file.createIfcAlignmentVerticalSegment(
+        StartDistAlong=start_distance,
+        HorizontalLength=length,
+        StartHeight=start_height,
+        StartGradient=slope,
+        EndGradient=slope,
+        PredefinedType="CONSTANTGRADIENT",
+    )
+    alignment_segment = file.createIfcAlignmentSegment(ifcopenshell.guid.new(), DesignParameters=design_parameters)
+
+    return curve_segment, alignment_segment
+
+
+def create_vcurve(file, p, start_slope, end_slope, length, transition="CONTSAMEGRADIENT"):
+    """
+    Curve segment and alignment segment of a parabolic vertical curve.
+
+    @param p: IfcCartesianPoint (distance along, height) at the vertical point of curve
+    @param start_slope: gradient at the start
+    @param end_slope: gradient at the end
+    @param length: horizontal length of the curve
+    @return: (IfcCurveSegment, IfcAlignmentSegment)
+    """
+    # geometry
+    ratios, C, segment_length = _parabola_geometry(start_slope, end_slope, length)
+    parent_curve = file.createIfcPolynomialCurve(
+        file.createIfcAxis2Placement2D(file.createIfcCartesianPoint((0.0, 0.0)), file.createIfcDirection((1.0, 0.0))),
+        [0.0, 1.0],
+        [0.0, 0.0, C],
+    )
+    curve_segment = file.createIfcCurveSegment(
+        Transition=transition,
+        Placement=file.createIfcAxis2Placement2D(p, file.createIfcDirection(ratios)),
+        SegmentStart=file.createIfcLengthMeasure(0.0),
+        SegmentLength=file.createIfcLengthMeasure(segment_length),
+        ParentCurve=parent_curve,
+    )
+
+    # business logic
+    start_distance, start_height = p.Coordinates
+    k = (end_slope - start_slope) / length
+    design_parameters = file.createIfcAlignmentVerticalSegment(
+        StartDistAlong=start_distance,
+        HorizontalLength=length,
+        StartHeight=start_height,
+        StartGradient=start_slope,
+        EndGradient=end_slope,
+        RadiusOfCurvature=1.0 / k if k else None,
+        PredefinedType="PARABOLICARC",
+    )
+    alignment_segment = file.createIfcAlignmentSegment(ifcopenshell.guid.new(), DesignParameters=design_parameters)
+
+    return curve_segment, alignment_segment
+
+
+def create_segment_representations(file, global_placement, segment_axis_subcontext, curve_segments, alignment_segments):
+    """
+    Axis representation of each IfcAlignmentSegment per CT 4.1.7.1.1.4.
+    """
+    for curve_segment, alignment_segment in zip(curve_segments, alignment_segments):
+        axis_representation = file.createIfcShapeRepresentation(segment_axis_subcontext, "Axis", "Segment", [curve_segment])
+        alignment_segment.ObjectPlacement = global_placement
+        alignment_segment.Representation = file.createIfcProductDefinitionShape(Representations=[axis_representation])
+
+
+def segment_table(segments, columns: tuple) -> dict:
+    """
+    A segment table as a dict of column arrays.
+
+    @param segments: mapping of column name to values, e.g. a dict of arrays or
+        a pandas DataFrame, or a list of objects with the IFC attribute names
+    @param columns: `HORIZONTAL_COLUMNS`, `VERTICAL_COLUMNS` or `CANT_COLUMNS`
+    @return: (N,) float arrays, (N, 2) for StartPoint and str for PredefinedType, NaN for missing values
+    """
+    if hasattr(segments, "keys"):
+        values = {c: segments[c] for c in columns if c in segments.keys()}
+    else:
+        segments = list(segments)
+        values = {c: [getattr(s, c, None) for s in segments] for c in columns}
+    types = np.asarray(values["PredefinedType"], dtype=str)
+
+    table = {"PredefinedType": types}
+    for column in columns:
+        if column == "PredefinedType":
+            continue
+        data = values.get(column)
+        if data is None:
+            table[column] = np.full(len(types), np.nan)
+        elif column == "StartPoint":
+            data = np.asarray(data)
+            if data.dtype == object:
+                data = [tuple(getattr(p, "Coordinates", p))[:2] for p in data]
+            table[column] = np.asarray(data, dtype=np.float64).reshape(len(types), 2)
+        else:
+            table[column] = np.array([np.nan if v is None else v for v in data], dtype=np.float64)
+
+    return table
+
+
+def _curvatures(radius: np.ndarray) -> np.ndarray:
+    radius = np.nan_to_num(radius)
+    with np.errstate(divide="ignore"):
+        return np.where(radius != 0.0, 1.0 / radius, 0.0)
+
+
+def _optional(value: float) -> float:
+    return None if math.isnan(value) else value
+
+
+class AlignmentBuilder:
+    """
+    An IFC 4.3 model with a project, units and an Axis representation context to add alignments to.
+
+    @param name: name of the project
+    @param linear_unit: length unit of the segment tables, a key of `LINEAR_UNITS`
+    @param schema: schema of the model
+    """
+
+    def __init__(self, name: str = "Alignments", linear_unit: str = "meter", schema: str = "IFC4X3_ADD2") -> None:
+        if linear_unit not in LINEAR_UNITS:
+            raise ValueError(f"Linear unit {linear_unit!r} is not supported.")
+        run = ifcopenshell.api.run
+        self.file = ifcopenshell.file(schema=schema)
+        self.project = run("root.create_entity", self.file, ifc_class="IfcProject", name=name)
+        self.linear_unit = linear_unit
+        run("unit.assign_unit", self.file, units=[self._length_unit(linear_unit), self._angle_unit()])
+
+        context = run("context.add_context", self.file, context_type="Model")
+        self.axis_context = self.file.createIfcGeometricRepresentationSubContext(
+            ContextIdentifier="Axis",
+            ContextType="Model",
+            ParentContext=context,
+            TargetView="MODEL_VIEW",
+        )
+        self.placement = self.file.createIfcLocalPlacement(
+            RelativePlacement=self.file.createIfcAxis2Placement3D(Location=self.file.createIfcCartesianPoint((0.0, 0.0, 0.0)))
+        )
+        self.alignments = []
+        self._aggregates = None
+        self._cache = {}
+
+    def _length_unit(self, linear_unit: str):
+        run = ifcopenshell.api.run
+        if linear_unit == "meter" or linear_unit in SI_PREFIXES:
+            return run("unit.add_si_unit", self.file, unit_type="LENGTHUNIT", prefix=SI_PREFIXES.get(linear_unit))
+        unit = run("unit.add_conversion_based_unit", self.file, name="foot")
+        if linear_unit == "USSurveyFoot":
+            unit.Name = "US survey foot"
+        elif linear_unit == "inch":
+            unit.Name = "inch"
+        factor = unit.ConversionFactor
+        factor.ValueComponent = self.file.create_entity(factor.ValueComponent.is_a(), LINEAR_UNITS[linear_unit])
+
+        return unit
+
+    def _angle_unit(self):
+        # directions are always in radians
+        return ifcopenshell.api.run("unit.add_si_unit", self.file, unit_type="PLANEANGLEUNIT")
+
+    def _shared(self, ifc_class: str, *args) -> ifcopenshell.entity_instance:
+        """
+        An entity with the given attributes, created once and reused.
+        """
+        key = (ifc_class,) + tuple(("#", a.id()) if isinstance(a, ifcopenshell.entity_instance) else a for a in args)
+        entity = self._cache.get(key)
+        if entity is None:
+            entity = self._cache[key] = self.file.create_entity(ifc_class, *args)
+        return entity
+
+    def _point(self, coordinates) -> ifcopenshell.entity_instance:
+        return self._shared("IfcCartesianPoint", tuple(coordinates))
+
+    def _placement(self, location, ratios) -> ifcopenshell.entity_instance:
+        return self._shared("IfcAxis2Placement2D", self._point(location), self._shared("IfcDirection", tuple(ratios)))
+
+    def _parent_line(self) -> ifcopenshell.entity_instance:
+        vector = self._shared("IfcVector", self._shared("IfcDirection", (1.0, 0.0)), 1.0)
+        return self._shared("IfcLine", self._point((0.0, 0.0)), vector)
+
+    def _curve_segment(self, transition: str, placement, start: float, length: float, parent):
+        return self.file.create_entity(
+            "IfcCurveSegment",
+            transition,
+            placement,
+            self.file.create_entity("IfcLengthMeasure", start),
+            self.file.create_entity("IfcLengthMeasure", length),
+            parent,
+        )
+
+    def _alignment_segments(self, design_parameters: list, curve_segments: list) -> list:
+        """
+        IfcAlignmentSegment of each design parameters entity, with its Axis representation if any.
+
+        `curve_segments` holds the list of curve segments of each alignment segment.
+        """
+        file = self.file
+        if curve_segments is None:
+            return [
+                file.create_entity("IfcAlignmentSegment", ifcopenshell.guid.new(), DesignParameters=parameters)
+                for parameters in design_parameters
+            ]
+        return [
+            file.create_entity(
+                "IfcAlignmentSegment",
+                ifcopenshell.guid.new(),
+                ObjectPlacement=self.placement,
+                Representation=file.create_entity(
+                    "IfcProductDefinitionShape",
+                    Representations=[file.create_entity("IfcShapeRepresentation", self.axis_context, "Axis", "Segment", segment)],
+                ),
+                DesignParameters=parameters,
+            )
+            for parameters, segment in zip(design_parameters, curve_segments)
+        ]
+
+    def _horizontal_segments(self, table: dict) -> tuple:
+        types = table["PredefinedType"].tolist()
+        points = table["StartPoint"].tolist()
+        directions = table["StartDirection"].tolist()
+        ratios = np.column_stack((np.cos(table["StartDirection"]), np.sin(table["StartDirection"]))).tolist()
+        start_radius = np.nan_to_num(table["StartRadiusOfCurvature"]).tolist()
+        end_radius = np.nan_to_num(table["EndRadiusOfCurvature"]).tolist()
+        lengths = table["SegmentLength"].tolist()
+
+        # the last segment is followed by the terminator
+        k0 = _curvatures(table["StartRadiusOfCurvature"])
+        k1 = _curvatures(table["EndRadiusOfCurvature"])
+        continuous = np.abs(k1[:-1] - k0[1:]) < CONTINUITY_TOLERANCE
+        transitions = np.where(continuous, "CONTSAMEGRADIENTSAMECURVATURE", "CONTSAMEGRADIENT").tolist()
+        transitions.append("CONTSAMEGRADIENT")
+
+        origin = self._placement((0.0, 0.0), (1.0, 0.0))
+        curve_segments, design_parameters = [], []
+        for i, predefined_type in enumerate(types):
+            start, length = 0.0, lengths[i]
+            point = self._point(points[i])
+            placement = self._shared("IfcAxis2Placement2D", point, self._shared("IfcDirection", tuple(ratios[i])))
+            if predefined_type == "LINE":
+                parent = self._parent_line()
+            elif predefined_type == "CIRCULARARC":
+                parent = self._shared("IfcCircle", origin, abs(start_radius[i]))
+                length = math.copysign(length, start_radius[i])
+            elif predefined_type == "CLOTHOID":
+                clothoid_constant, start = _clothoid_geometry(start_radius[i], end_radius[i], length)
+                parent = self._shared("IfcClothoid", origin, clothoid_constant)
+            else:
+                parent = None
+            if parent is not None:
+                curve_segments.append([self._curve_segment(transitions[i], placement, start, length, parent)])
+            else:
+                curve_segments.append(self._transition_segments(table, i, transitions[i], placement, origin))
+            design_parameters.append(
+                self.file.create_entity(
+                    "IfcAlignmentHorizontalSegment",
+                    StartPoint=point,
+                    StartDirection=directions[i],
+                    StartRadiusOfCurvature=start_radius[i],
+                    EndRadiusOfCurvature=end_radius[i],
+                    SegmentLength=lengths[i],
+                    PredefinedType=predefined_type,
+                )
+            )
+
+        # zero-length terminator segment
+        last = HorizontalSegment(points[-1], directions[-1], start_radius[-1], end_radius[-1], lengths[-1], types[-1])
+        x, y, direction = (float(v) for v in segment_point(last, last.SegmentLength))
+        point = self._point((x, y))
+        placement = self._shared("IfcAxis2Placement2D", point, self._shared("IfcDirection", (math.cos(direction), math.sin(direction))))
+        curve_segments.append([self._curve_segment("DISCONTINUOUS", placement, 0.0, 0.0, self._parent_line())])
+        design_parameters.append(
+            self.file.create_entity(
+                "IfcAlignmentHorizontalSegment",
+                StartPoint=point,
+                StartDirection=direction,
+                StartRadiusOfCurvature=0.0,
+                EndRadiusOfCurvature=0.0,
+                SegmentLength=0.0,
+                PredefinedType="LINE",
+            )
+        )
+
+        return curve_segments, design_parameters
+
+    def _transition_segments(self, table: dict, i: int, transition: str, placement, origin) -> list:
+        """
+        Curve segments of the horizontal transition in row `i` of a table, see `_transition_geometry()`.
+        """
+        segment = HorizontalSegment(*(table[c][i] for c in HORIZONTAL_COLUMNS))
+        pieces = _transition_geometry(
+            segment.PredefinedType, segment.StartRadiusOfCurvature, segment.EndRadiusOfCurvature, segment.SegmentLength
+        )
+        curve_segments = []
+        for j, (ifc_class, terms, start, length) in enumerate(pieces):
+            if start:
+                x, y, direction = (float(v) for v in segment_point(segment, start))
+                placement = self._placement((x, y), (math.cos(direction), math.sin(direction)))
+            parent = self._shared(ifc_class, origin, *terms)
+            # the pieces of a transition join with the same curvature
+            piece_transition = transition if j == len(pieces) - 1 else "CONTSAMEGRADIENTSAMECURVATURE"
+            curve_segments.append(self._curve_segment(piece_transition, placement, 0.0, length, parent))
+
+        return curve_segments
+
+    def _vertical_segments(self, table: dict) -> tuple:
+        types = table["PredefinedType"].tolist()
+        starts = table["StartDistAlong"].tolist()
+        lengths = table["HorizontalLength"].tolist()
+        heights = table["StartHeight"].tolist()
+        g0 = table["StartGradient"].tolist()
+        g1 = table["EndGradient"].tolist()
+        radius = table["RadiusOfCurvature"].tolist()
+
+        origin = self._placement((0.0, 0.0), (1.0, 0.0))
+        curve_segments, design_parameters = [], []
+        for i, predefined_type in enumerate(types):
+            segment_start = 0.0
+            if predefined_type == "CONSTANTGRADIENT":
+                ratios, segment_length = _gradient_geometry(g0[i], lengths[i])
+                parent = self._parent_line()
+                end_gradient, radius_of_curvature = g0[i], None
+            elif predefined_type == "PARABOLICARC":
+                ratios, C, segment_length = _parabola_geometry(g0[i], g1[i], lengths[i])
+                parent = self._shared("IfcPolynomialCurve", origin, (0.0, 1.0), (0.0, 0.0, C))
+                end_gradient, radius_of_curvature = g1[i], _optional(radius[i])
+                if radius_of_curvature is None and g1[i] != g0[i]:
+                    radius_of_curvature = lengths[i] / (g1[i] - g0[i])
+            elif predefined_type == "CIRCULARARC":
+                centre, arc_radius, segment_start, segment_length = _vertical_arc_geometry(
+                    g0[i], g1[i], lengths[i], _optional(radius[i])
+                )
+                ratios, _ = _gradient_geometry(g0[i], 0.0)
+                parent = self._shared("IfcCircle", self._placement(centre, (1.0, 0.0)), arc_radius)
+                end_gradient, radius_of_curvature = g1[i], math.copysign(arc_radius, g1[i] - g0[i])
+            else:
+                raise NotImplementedError(f"Vertical segment type {predefined_type} is not supported.")
+            point = self._point((starts[i], heights[i]))
+            placement = self._shared("IfcAxis2Placement2D", point, self._shared("IfcDirection", ratios))
+            curve_segments.append(
+                [self._curve_segment("CONTSAMEGRADIENT", placement, segment_start, segment_length, parent)]
+            )
+            design_parameters.append(
+                self.file.create_entity(
+                    "IfcAlignmentVerticalSegment",
+                    StartDistAlong=starts[i],
+                    HorizontalLength=lengths[i],
+                    StartHeight=heights[i],
+                    StartGradient=g0[i],
+                    EndGradient=end_gradient,
+                    RadiusOfCurvature=radius_of_curvature,
+                    PredefinedType=predefined_type,
+                )
+            )
+
+        # zero-length terminator segment
+        gradient = g1[-1] if types[-1] != "CONSTANTGRADIENT" else g0[-1]
+        last = VerticalSegment(starts[-1], lengths[-1], heights[-1], g0[-1], gradient, _optional(radius[-1]), types[-1])
+        end = (starts[-1] + lengths[-1], float(segment_height(last, lengths[-1])))
+        point = self._point(end)
+        ratios, _ = _gradient_geometry(gradient, 0.0)
+        placement = self._shared("IfcAxis2Placement2D", point, self._shared("IfcDirection", ratios))
+        curve_segments.append([self._curve_segment("DISCONTINUOUS", placement, 0.0, 0.0, self._parent_line())])
+        design_parameters.append(
+            self.file.create_entity(
+                "IfcAlignmentVerticalSegment",
+                StartDistAlong=end[0],
+                HorizontalLength=0.0,
+                StartHeight=end[1],
+                StartGradient=gradient,
+                EndGradient=gradient,
+                PredefinedType="CONSTANTGRADIENT",
+            )
+        )
+
+        return curve_segments, design_parameters
+
+    def _cant_segments(self, table: dict) -> list:
+        rows = np.column_stack([table[c] for c in CANT_COLUMNS[:-1]])
+        rows = [[_optional(v) for v in row] for row in rows.tolist()]
+        design_parameters = [
+            self.file.create_entity("IfcAlignmentCantSegment", None, None, *row, predefined_type)
+            for row, predefined_type in zip(rows, table["PredefinedType"].tolist())
+        ]
+
+        # zero-length terminator segment
+        start, length, _, end_left, _, end_right = rows[-1]
+        end_left = table["StartCantLeft"][-1] if end_left is None else end_left
+        end_right = table["StartCantRight"][-1] if end_right is None else end_right
+        design_parameters.append(
+            self.file.create_entity(
+                "IfcAlignmentCantSegment",
+                None,
+                None,
+                start + length,
+                0.0,
+                float(end_left),
+                None,
+                float(end_right),
+                None,
+                "CONSTANTCANT",
+            )
+        )
+
+        return design_parameters
+
+    def _layout(self, ifc_class: str, description: str, segments: list, **attributes) -> ifcopenshell.entity_instance:
+        layout = self.file.create_entity(ifc_class, ifcopenshell.guid.new(), Description=description, **attributes)
+        self.file.create_entity(
+            "IfcRelNests",
+            ifcopenshell.guid.new(),
+            Description=f"Nests alignment segments with {description.lower()}",
+            RelatingObject=layout,
+            RelatedObjects=segments,
+        )
+        return layout
+
+    def add_alignment(
+        self,
+        name: str,
+        horizontal,
+        vertical=None,
+        cant=None,
+        station_start: float = None,
+        rail_head_distance: float = None,
+        segment_representations: bool = True,
+    ) -> ifcopenshell.entity_instance:
+        """
+        Add an IfcAlignment with a horizontal and optionally a vertical and a cant layout.
+
+        Each layout is given as a segment table, see `segment_table()`.
+        Identical points, directions, placements and parent curves are
+        created once and shared by all segments and alignments of the model.
+        The cant layout has no representation.
+
+        @param name: name of the alignment
+        @param horizontal: segment table of the horizontal layout
+        @param vertical: segment table of the vertical layout
+        @param cant: segment table of the cant layout
+        @param station_start: station at the start, recorded in Pset_Stationing of an IfcReferent
+        @param rail_head_distance: IfcAlignmentCant.RailHeadDistance, required with `cant`
+        @param segment_representations: False to omit the Axis representation of each segment
+        @return: the IfcAlignment
+        """
+        file = self.file
+        table = segment_table(horizontal, HORIZONTAL_COLUMNS)
+        if not len(table["PredefinedType"]):
+            raise ValueError(f"Alignment {name!r} has no horizontal segments.")
+        horizontal_curve_segments, design_parameters = self._horizontal_segments(table)
+        segments = self._alignment_segments(
+            design_parameters, horizontal_curve_segments if segment_representations else None
+        )
+        layouts = [self._layout("IfcAlignmentHorizontal", "Horizontal Alignment", segments)]
+        composite_curve = file.create_entity(
+            "IfcCompositeCurve", [c for pieces in horizontal_curve_segments for c in pieces], False
+        )
+        representations = [file.create_entity("IfcShapeRepresentation", self.axis_context, "FootPrint", "Curve2D", [composite_curve])]
+
+        table = segment_table(vertical, VERTICAL_COLUMNS) if vertical is not None else None
+        if table is not None and len(table["PredefinedType"]):
+            vertical_curve_segments, design_parameters = self._vertical_segments(table)
+            segments = self._alignment_segments(
+                design_parameters, vertical_curve_segments if segment_representations else None
+            )
+            layouts.append(self._layout("IfcAlignmentVertical", "Vertical Alignment", segments))
+            gradient_curve = file.create_entity(
+                "IfcGradientCurve", [c for pieces in vertical_curve_segments for c in pieces], False, composite_curve
+            )
+            representations.append(file.create_entity("IfcShapeRepresentation", self.axis_context, "Axis", "Curve3D", [gradient_curve]))
+
+        table = segment_table(cant, CANT_COLUMNS) if cant is not None else None
+        if table is not None and len(table["PredefinedType"]):
+            if rail_head_distance is None:
+                raise ValueError("A rail head distance is required for a cant layout.")
+            segments = self._alignment_segments(self._cant_segments(table), None)
+            layouts.append(self._layout("IfcAlignmentCant", "Cant Alignment", segments, RailHeadDistance=rail_head_distance))
+
+        alignment = file.create_entity(
+            "IfcAlignment",
+            ifcopenshell.guid.new(),
+            Name=name,
+            ObjectPlacement=self.placement,
+            Representation=file.create_entity("IfcProductDefinitionShape", Representations=representations),
+        )
+        file.create_entity(
+            "IfcRelNests",
+            ifcopenshell.guid.new(),
+            Description="Nest horizontal, vertical and cant alignment layouts with the alignment",
+            RelatingObject=alignment,
+            RelatedObjects=layouts,
+        )
+        if station_start is not None:
+            self._add_station_referent(alignment, station_start)
+
+        self.alignments.append(alignment)
+
+        return alignment
+
+    def _add_station_referent(self, alignment, station: float) -> None:
+        file = self.file
+        referent = file.createIfcReferent(
+            ifcopenshell.guid.new(),
+            Name="Start",
+            ObjectPlacement=self.placement,
+            PredefinedType="STATION",
+        )
+        file.createIfcRelNests(
+            ifcopenshell.guid.new(),
+            Description="Referents along the alignment",
+            RelatingObject=alignment,
+            RelatedObjects=[referent],
+        )
+        stationing = file.createIfcPropertySet(
+            ifcopenshell.guid.new(),
+            Name="Pset_Stationing",
+            HasProperties=[file.createIfcPropertySingleValue("Station", NominalValue=file.createIfcLengthMeasure(station))],
+        )
+        file.createIfcRelDefinesByProperties(ifcopenshell.guid.new(), RelatedObjects=[referent], RelatingPropertyDefinition=stationing)
+
+    def finalize(self) -> None:
+        """
+        Relate the alignments added so far to the project.
+
+        The IfcRelAggregates is set once here rather than extended on every
+        `add_alignment()`, which rebuilt its list each time. `write()` calls
+        this; call it before using `.file` directly.
+        """
+        if not self.alignments:
+            return
+        if self._aggregates is None:
+            self._aggregates = self.file.create_entity(
+                "IfcRelAggregates",
+                ifcopenshell.guid.new(),
+                Description="Alignments in project",
+                RelatingObject=self.project,
+                RelatedObjects=self.alignments,
+            )
+        elif len(self._aggregates.RelatedObjects) != len(self.alignments):
+            self._aggregates.RelatedObjects = self.alignments
+
+    def write(self, path: str) -> None:
+        self.finalize()
+        self.file.write(path)
@@ -0,0 +1,128 @@
+"""
+Vectorized cant calculation for cant segments.
+
+`c_on_<PredefinedType>(segment, u, side)` returns the cant of the given rail
+at distance `u` along the segment. `u` may be a scalar or an array of any
+shape; scalar input returns a float. The segment is read through its IFC
+attribute names (HorizontalLength, StartCantLeft, EndCantLeft,
+StartCantRight, EndCantRight), so an IfcAlignmentCantSegment entity or any
+object with the same attributes can be passed.
+
+Transitions interpolate between the start and end cant of the side with the
+shape functions in `alignment_tools.transitions`.
+"""
+
+from enum import Enum
+
+import numpy as np
+
+from alignment_tools.transitions import BLOSS
+from alignment_tools.transitions import COSINE
+from alignment_tools.transitions import HELMERT
+from alignment_tools.transitions import LINEAR
+from alignment_tools.transitions import SINE
+from alignment_tools.transitions import VIENNESE
+from alignment_tools.transitions import Transition
+from alignment_tools.transitions import as_result
+from alignment_tools.transitions import predefined_type
+
+
+class AlignmentCantSide(Enum):
+    LEFT = "Left"
+    RIGHT = "Right"
+
+
+def _cant_values(segment, side: AlignmentCantSide):
+    if not isinstance(side, AlignmentCantSide):
+        raise ValueError(f"Side must be an AlignmentCantSide, got {side!r}.")
+    start = getattr(segment, f"StartCant{side.value}")
+    end = getattr(segment, f"EndCant{side.value}")
+    if end is None:
+        end = start
+
+    return np.asarray(start, dtype=np.float64), np.asarray(end, dtype=np.float64)
+
+
+def _transition(segment, u, side: AlignmentCantSide, transition: Transition):
+    start, end = _cant_values(segment, side)
+    length = np.asarray(segment.HorizontalLength, dtype=np.float64)
+    t = np.clip(np.asarray(u, dtype=np.float64) / length, 0.0, 1.0)
+
+    return as_result(start + (end - start) * transition.shape(t))
+
+
+def c_on_CONSTANTCANT(segment, u, side: AlignmentCantSide):
+    """
+    Cant on a constant cant segment.
+    """
+    start, _ = _cant_values(segment, side)
+    u = np.asarray(u, dtype=np.float64)
+
+    return as_result(np.broadcast_to(start, np.broadcast_shapes(start.shape, u.shape)))
+
+
+def c_on_LINEARTRANSITION(segment, u, side: AlignmentCantSide):
+    """
+    Cant on a linear transition.
+    """
+    return _transition(segment, u, side, LINEAR)
+
+
+def c_on_BLOSSCURVE(segment, u, side: AlignmentCantSide):
+    """
+    Cant on a Bloss transition.
+    """
+    return _transition(segment, u, side, BLOSS)
+
+
+def c_on_COSINECURVE(segment, u, side: AlignmentCantSide):
+    """
+    Cant on a cosine transition.
+    """
+    return _transition(segment, u, side, COSINE)
+
+
+def c_on_SINECURVE(segment, u, side: AlignmentCantSide):
+    """
+    Cant on a sine transition.
+    """
+    return _transition(segment, u, side, SINE)
+
+
+def c_on_HELMERTCURVE(segment, u, side: AlignmentCantSide):
+    """
+    Cant on a Helmert (Schramm) transition.
+    """
+    return _transition(segment, u, side, HELMERT)
+
+
+def c_on_VIENNESEBEND(segment, u, side: AlignmentCantSide):
+    """
+    Cant on a Viennese bend transition.
+    """
+    return _transition(segment, u, side, VIENNESE)
+
+
+CANT_EVALUATORS = {
+    "CONSTANTCANT": c_on_CONSTANTCANT,
+    "LINEARTRANSITION": c_on_LINEARTRANSITION,
+    "BLOSSCURVE": c_on_BLOSSCURVE,
+    "COSINECURVE": c_on_COSINECURVE,
+    "SINECURVE": c_on_SINECURVE,
+    "HELMERTCURVE": c_on_HELMERTCURVE,
+    "VIENNESEBEND": c_on_VIENNESEBEND,
+}
+
+
+def segment_cant(segment, u, side: AlignmentCantSide):
+    """
+    Cant at distance `u` along a cant segment of any supported type.
+    """
+    try:
+        evaluator = CANT_EVALUATORS[predefined_type(segment)]
+    except KeyError:
+        raise NotImplementedError(
+            f"Cant segment type {predefined_type(segment)} is not supported."
+        ) from None
+
+    return evaluator(segment, u, side)
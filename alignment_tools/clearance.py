@@ -0,0 +1,268 @@
+"""
+Check a gauge swept along an alignment for intrusions by federated elements.
+
+The gauge is a closed cross-section given as (offset, elevation) relative
+to the alignment, offset positive to the left, placed and rolled by the
+cant rotation at each station as in `alignment_tools.sweep`. Elements are
+triangle meshes in world coordinates, e.g. from
+`alignment_tools.federation.element_meshes()`.
+
+The check has two phases:
+
+- Broad phase: the stations are split into buckets of `bucket` length. The
+  envelope of the rolled gauge in each bucket, as a range of offsets and
+  heights, is collected while streaming the stations with
+  `Alignment.iter_stations()`. Each element's bounding box is located by
+  projecting its four corners, and only elements whose box overlaps the
+  envelope of a bucket it spans are kept. Both are widened by `margin`,
+  which has to cover the sampling of the envelope and the curvature of the
+  alignment across a bounding box.
+- Narrow phase: the vertices of the candidates are projected onto the
+  alignment and rotated back by the cant rotation at their station, which
+  puts them in the plane of the gauge. A triangle intrudes if it intersects
+  the gauge polygon in that plane: one of its vertices lies inside the
+  gauge, a gauge vertex lies inside it, or their edges cross.
+
+Each intruding element is reported once with the stations it intrudes over
+and the offset and height of its intruding vertex nearest to the alignment.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+import ifcopenshell
+
+from alignment_tools.alignment import CANT_ROTATION
+from alignment_tools.alignment import DISTANCE
+from alignment_tools.alignment import Z
+from alignment_tools.federation import element_meshes
+
+
+@dataclass
+class Intrusion:
+    """
+    An element intruding into the gauge.
+
+    @param element: key of the element, e.g. its GlobalId
+    @param station_start: first station of the intruding triangles
+    @param station_end: last station of the intruding triangles
+    @param offset: offset of the intruding vertex nearest to the alignment, positive to the left
+    @param height: height of that vertex above the alignment
+    @param model: the model of the element, if checked with `check_models()`
+    """
+
+    element: str
+    station_start: float
+    station_end: float
+    offset: float
+    height: float
+    model: str = None
+
+
+def _rolled(profile: np.ndarray, roll: np.ndarray) -> tuple:
+    """
+    Offsets and heights of the profile vertices rolled by each angle, (N, M) each.
+    """
+    cos, sin = np.cos(roll)[:, None], np.sin(roll)[:, None]
+    return profile[None, :, 0] * cos - profile[None, :, 1] * sin, profile[None, :, 0] * sin + profile[None, :, 1] * cos
+
+
+def points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """
+    (N,) mask of 2D points inside a polygon, by the even-odd rule.
+    """
+    x, y = points[:, 0, None], points[:, 1, None]
+    x1, y1 = polygon[:, 0], polygon[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    spans = (y1 > y) != (y2 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing = x < x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+
+    return np.count_nonzero(spans & crossing, axis=1) % 2 == 1
+
+
+def _cross(o, a, b) -> np.ndarray:
+    return (a[..., 0] - o[..., 0]) * (b[..., 1] - o[..., 1]) - (a[..., 1] - o[..., 1]) * (b[..., 0] - o[..., 0])
+
+
+def triangles_intersecting_polygon(triangles: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """
+    (T,) mask of 2D triangles that intersect a polygon.
+
+    @param triangles: (T, 3, 2) triangle vertices
+    @param polygon: (M, 2) polygon vertices
+    """
+    hit = points_in_polygon(triangles.reshape(-1, 2), polygon).reshape(-1, 3).any(axis=1)
+
+    # polygon vertices inside a triangle of either orientation
+    a, b, c = (triangles[:, None, k] for k in range(3))
+    p = polygon[None, :, :]
+    sides = np.stack((_cross(a, b, p), _cross(b, c, p), _cross(c, a, p)))
+    hit |= ((sides >= 0.0).all(axis=0) | (sides <= 0.0).all(axis=0)).any(axis=1)
+
+    # proper crossings of a triangle edge and a polygon edge
+    start = triangles[:, :, None, :]
+    end = np.roll(triangles, -1, axis=1)[:, :, None, :]
+    q0 = polygon[None, None, :, :]
+    q1 = np.roll(polygon, -1, axis=0)[None, None, :, :]
+    crosses = (_cross(start, end, q0) * _cross(start, end, q1) < 0.0) & (_cross(q0, q1, start) * _cross(q0, q1, end) < 0.0)
+    hit |= crosses.any(axis=(1, 2))
+
+    return hit
+
+
+def gauge_envelope(
+    alignment,
+    profile: np.ndarray,
+    start: float,
+    end: float,
+    step: float = 1.0,
+    bucket: float = 50.0,
+) -> np.ndarray:
+    """
+    Range of offsets and heights covered by the rolled gauge in each station bucket.
+
+    A station on the boundary between two buckets counts for both.
+
+    @return: (B, 4) offset min, offset max, height min, height max per bucket,
+        heights absolute and inf/-inf where the alignment has no height
+    """
+    count = max(1, int(np.ceil((end - start) / bucket)))
+    envelope = np.tile([np.inf, -np.inf, np.inf, -np.inf], (count, 1))
+    for pts in alignment.iter_stations(start, end, step):
+        offset, up = _rolled(profile, np.nan_to_num(pts[:, CANT_ROTATION]))
+        height = pts[:, Z, None] + up
+        position = (pts[:, DISTANCE] - start) / bucket
+        k = np.clip(np.floor(position).astype(np.int64), 0, count - 1)
+        on_boundary = (position == np.floor(position)) & (k > 0)
+        for idx, rows in ((k, slice(None)), (k[on_boundary] - 1, on_boundary)):
+            np.fmin.at(envelope[:, 0], idx, offset[rows].min(axis=1))
+            np.fmax.at(envelope[:, 1], idx, offset[rows].max(axis=1))
+            np.fmin.at(envelope[:, 2], idx, height[rows].min(axis=1))
+            np.fmax.at(envelope[:, 3], idx, height[rows].max(axis=1))
+
+    return envelope
+
+
+def check_clearance(
+    alignment,
+    profile: np.ndarray,
+    meshes: dict,
+    start: float = None,
+    end: float = None,
+    step: float = 1.0,
+    bucket: float = 50.0,
+    margin: float = 0.1,
+) -> list:
+    """
+    Elements intruding into a gauge swept along an alignment.
+
+    @param alignment: `alignment_tools.alignment.Alignment` in the coordinates of the meshes
+    @param profile: (M, 2) gauge as (offset, elevation) relative to the alignment
+    @param meshes: ((V, 3) vertices, (T, 3) triangles) in world coordinates by element key
+    @param start: first station to check, by default where the alignment starts to have a height
+    @param end: last station to check, by default where the alignment stops to have a height
+    @param step: distance between the stations the gauge envelope is sampled at
+    @param bucket: length of the station buckets of the broad phase
+    @param margin: widening of the gauge envelope and the bounding boxes in the broad phase
+    @return: `Intrusion` of each intruding element, in order of station
+    """
+    profile = np.asarray(profile, dtype=np.float64)
+    if start is None or end is None:
+        stations = alignment.critical_stations()
+        stations = stations[np.isfinite(alignment.evaluate(stations)[:, Z])]
+        start = stations[0] if start is None else start
+        end = stations[-1] if end is None else end
+    keys = list(meshes)
+    if not keys or end <= start:
+        return []
+
+    # broad phase
+    envelope = gauge_envelope(alignment, profile, start, end, step, bucket)
+    lower = np.array([meshes[k][0].min(axis=0) for k in keys]) - margin
+    upper = np.array([meshes[k][0].max(axis=0) for k in keys]) + margin
+    corners = np.stack(
+        (lower[:, :2], np.column_stack((upper[:, 0], lower[:, 1])), upper[:, :2], np.column_stack((lower[:, 0], upper[:, 1]))),
+        axis=1,
+    )
+    located = alignment.project(corners.reshape(-1, 2))
+    distance = located.distance.reshape(-1, 4)
+    offset = located.offset.reshape(-1, 4)
+    on_alignment = located.on_alignment.reshape(-1, 4).any(axis=1)
+    first = np.clip(np.floor((distance.min(axis=1) - start) / bucket).astype(np.int64), 0, len(envelope) - 1)
+    last = np.clip(np.floor((distance.max(axis=1) - start) / bucket).astype(np.int64), 0, len(envelope) - 1)
+    inside = on_alignment & (distance.max(axis=1) >= start) & (distance.min(axis=1) <= end)
+
+    spans = np.where(inside, last - first + 1, 0)
+    element = np.repeat(np.arange(len(keys)), spans)
+    buckets = first[element] + np.arange(len(element)) - np.repeat(np.cumsum(spans) - spans, spans)
+    env = envelope[buckets]
+    overlap = (
+        (env[:, 0] - margin <= offset.max(axis=1)[element])
+        & (env[:, 1] + margin >= offset.min(axis=1)[element])
+        & (env[:, 2] - margin <= upper[element, 2])
+        & (env[:, 3] + margin >= lower[element, 2])
+    )
+    candidates = np.unique(element[overlap])
+    if len(candidates) == 0:
+        return []
+
+    # narrow phase
+    verts = [meshes[keys[i]][0] for i in candidates]
+    counts = np.array([len(v) for v in verts])
+    located = alignment.project(np.concatenate(verts))
+    roll = np.nan_to_num(alignment.evaluate(located.distance)[:, CANT_ROTATION])
+    cos, sin = np.cos(roll), np.sin(roll)
+    plane = np.column_stack(
+        (located.offset * cos + located.height * sin, -located.offset * sin + located.height * cos)
+    )
+    valid = (
+        located.on_alignment
+        & (located.distance >= start)
+        & (located.distance <= end)
+        & np.isfinite(located.height)
+    )
+
+    intrusions = []
+    for i, lo, hi in zip(candidates, np.cumsum(counts) - counts, np.cumsum(counts)):
+        faces = meshes[keys[i]][1]
+        faces = faces[valid[lo:hi][faces].all(axis=1)]
+        if len(faces) == 0:
+            continue
+        hit = triangles_intersecting_polygon(plane[lo:hi][faces], profile)
+        if not hit.any():
+            continue
+        vertices = lo + np.unique(faces[hit])
+        nearest = vertices[np.argmin(np.abs(located.offset[vertices]))]
+        intrusions.append(
+            Intrusion(
+                element=keys[i],
+                station_start=float(located.distance[vertices].min()),
+                station_end=float(located.distance[vertices].max()),
+                offset=float(located.offset[nearest]),
+                height=float(located.height[nearest]),
+            )
+        )
+
+    return sorted(intrusions, key=lambda x: x.station_start)
+
+
+def check_models(alignment, profile: np.ndarray, paths: list, **kwargs) -> list:
+    """
+    Elements of federated models intruding into a gauge swept along an alignment.
+
+    @param alignment: `alignment_tools.alignment.Alignment` in the coordinates of the models
+    @param profile: (M, 2) gauge as (offset, elevation) relative to the alignment
+    @param paths: paths of the federated IFC models
+    @param kwargs: arguments of `check_clearance()`
+    @return: `Intrusion` of each intruding element with its model, in order of station
+    """
+    intrusions = []
+    for path in paths:
+        model = ifcopenshell.open(path)
+        for intrusion in check_clearance(alignment, profile, element_meshes(model), **kwargs):
+            intrusion.model = path
+            intrusions.append(intrusion)
+
+    return sorted(intrusions, key=lambda x: x.station_start)
@@ -0,0 +1,205 @@
+"""
+Numeric comparison of calculated alignment geometry against reference polylines.
+
+The reference data in the bSI-RailwayRoom alignment test set are dense
+polylines of (X, Y, Z) points with a CurveLength station per point.
+Calculated vertices are compared to those polylines by their shortest
+distance to any reference segment, using a k-d tree over the segment
+midpoints so that each query only touches a handful of candidate segments.
+"""
+
+import csv
+from dataclasses import asdict
+from dataclasses import dataclass
+import json
+import os
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+@dataclass
+class DeviationMetrics:
+    """
+    Summary of the deviation of calculated points from a reference polyline.
+
+    @param count: number of calculated points compared
+    @param max: largest point-to-polyline distance
+    @param rms: root mean square of the point-to-polyline distances
+    @param max_station: reference station at which `max` occurs
+    @param station_max: largest distance between a calculated point and the
+        reference point at the same station (chord length along the calculated points)
+    """
+
+    count: int
+    max: float
+    rms: float
+    max_station: float
+    station_max: float
+
+    def within(self, max_tol: float = None, rms_tol: float = None) -> bool:
+        """
+        True if the metrics satisfy the given tolerances (None to ignore).
+        """
+        if max_tol is not None and not self.max <= max_tol:
+            return False
+        if rms_tol is not None and not self.rms <= rms_tol:
+            return False
+        return True
+
+
+def cumulative_length(polyline: np.ndarray) -> np.ndarray:
+    """
+    Chord length from the first vertex to each vertex of a polyline.
+    """
+    polyline = np.asarray(polyline, dtype=np.float64)
+    steps = np.linalg.norm(np.diff(polyline, axis=0), axis=1)
+
+    return np.concatenate(([0.0], np.cumsum(steps)))
+
+
+def _closest_on_segments(points, start, delta, seg_len2, candidates):
+    """
+    Distance and segment parameter of each point to each of its candidate segments.
+    """
+    a = start[candidates]
+    ab = delta[candidates]
+    ap = points[:, None, :] - a
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.einsum("nkd,nkd->nk", ap, ab) / seg_len2[candidates]
+    t = np.clip(np.nan_to_num(t, nan=0.0), 0.0, 1.0)
+    dist = np.linalg.norm(ap - t[..., None] * ab, axis=2)
+
+    return dist, t
+
+
+def polyline_deviation(
+    points: np.ndarray,
+    polyline: np.ndarray,
+    stations: np.ndarray = None,
+    k: int = 8,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Shortest distance from each point to a polyline, and the station of its foot point.
+
+    Candidate segments are the `k` segments with the nearest midpoints. The
+    result is exact: any point whose true nearest segment could lie outside
+    its candidates (judged from the longest half segment length) is
+    re-queried with a larger `k` until the bound holds.
+
+    @param points: (N, D) calculated points
+    @param polyline: (M, D) reference polyline vertices, M >= 2
+    @param stations: (M,) station of each polyline vertex, defaults to cumulative chord length
+    @param k: initial number of candidate segments per point
+    @return: (N,) distances and (N,) stations of the closest point on the polyline
+    """
+    points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+    polyline = np.atleast_2d(np.asarray(polyline, dtype=np.float64))
+    if len(polyline) < 2:
+        raise ValueError("Reference polyline must have at least 2 vertices.")
+    if points.shape[1] != polyline.shape[1]:
+        raise ValueError(
+            f"Dimension mismatch: points are {points.shape[1]}D, polyline is {polyline.shape[1]}D."
+        )
+    if stations is None:
+        stations = cumulative_length(polyline)
+    stations = np.asarray(stations, dtype=np.float64)
+
+    start = polyline[:-1]
+    delta = np.diff(polyline, axis=0)
+    seg_len2 = np.einsum("md,md->m", delta, delta)
+    half_max = 0.5 * np.sqrt(seg_len2.max())
+    tree = cKDTree(start + 0.5 * delta)
+    n_segments = len(start)
+
+    dist = np.empty(len(points))
+    seg = np.empty(len(points), dtype=np.intp)
+    t = np.empty(len(points))
+    todo = np.arange(len(points))
+    while len(todo):
+        kk = min(k, n_segments)
+        mid_dist, candidates = tree.query(points[todo], k=kk)
+        candidates = candidates.reshape(len(todo), kk)
+        mid_dist = mid_dist.reshape(len(todo), kk)
+        d, tt = _closest_on_segments(points[todo], start, delta, seg_len2, candidates)
+        best = np.argmin(d, axis=1)
+        rows = np.arange(len(todo))
+        dist[todo] = d[rows, best]
+        seg[todo] = candidates[rows, best]
+        t[todo] = tt[rows, best]
+        if kk == n_segments:
+            break
+        # a segment beyond the k-th midpoint is at least (mid_dist - half_max) away
+        unresolved = mid_dist[:, -1] - half_max < dist[todo]
+        todo = todo[unresolved]
+        k *= 4
+
+    foot_station = stations[seg] + t * (stations[seg + 1] - stations[seg])
+
+    return dist, foot_station
+
+
+def deviation_metrics(
+    points: np.ndarray,
+    polyline: np.ndarray,
+    stations: np.ndarray = None,
+) -> DeviationMetrics:
+    """
+    Deviation metrics of calculated points against a reference polyline.
+
+    @param points: (N, D) calculated points, in order along the alignment
+    @param polyline: (M, D) reference polyline vertices
+    @param stations: (M,) station of each reference vertex, defaults to cumulative chord length
+    @return: `DeviationMetrics` for the comparison
+    """
+    points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+    polyline = np.atleast_2d(np.asarray(polyline, dtype=np.float64))
+    if stations is None:
+        stations = cumulative_length(polyline)
+    stations = np.asarray(stations, dtype=np.float64)
+
+    dist, foot_station = polyline_deviation(points, polyline, stations)
+    i_max = int(np.argmax(dist))
+
+    # compare each point with the reference point at the same station
+    along = stations[0] + cumulative_length(points)
+    at_station = np.column_stack(
+        [np.interp(along, stations, polyline[:, j]) for j in range(polyline.shape[1])]
+    )
+    station_err = np.linalg.norm(points - at_station, axis=1)
+
+    return DeviationMetrics(
+        count=len(points),
+        max=float(dist[i_max]),
+        rms=float(np.sqrt(np.mean(dist**2))),
+        max_station=float(foot_station[i_max]),
+        station_max=float(station_err.max()),
+    )
+
+
+def write_report(rows: list[dict], path: str) -> None:
+    """
+    Write one report row per case to CSV or JSON, chosen by the file suffix.
+
+    @param rows: flat dicts, e.g. a case label merged with `asdict(DeviationMetrics)`
+    @param path: output `.csv` or `.json` file
+    """
+    rows = [asdict(r) if isinstance(r, DeviationMetrics) else dict(r) for r in rows]
+    suffix = os.path.splitext(path)[1].lower()
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+
+    if suffix == ".json":
+        with open(path, "w") as f:
+            json.dump(rows, f, indent=2)
+    elif suffix == ".csv":
+        fieldnames = []
+        for row in rows:
+            fieldnames += [key for key in row if key not in fieldnames]
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        raise ValueError(f"Unsupported report format '{suffix}'. Use .csv or .json.")
@@ -0,0 +1,558 @@
+"""
+Station-aligned comparison of one alignment delivered by several sources.
+
+The same alignment often comes from several tools, e.g. the IFC exports
+`4REN0_Autodesk.ifc` and `4REN0_Bentley.ifc` and the LandXML `4REN0.xml`
+from OpenRoads. The sources differ in the station at their start, in their
+length unit and in where their coordinates sit on the map. `read_sources()`
+reads the alignments of a file as `AlignmentSource` objects that record all
+three. IFC 4.3 alignments, IFC4X1 alignment curves and LandXML alignments
+are supported.
+Point tables, e.g. the points.npy of `alignment_tools.synthetic`, can be
+compared as well and are resampled by linear interpolation.
+
+`diff_alignments()` samples every source on one common grid of stations,
+in the unit of the first source, the reference, and compares the others
+with it:
+
+- per station range: the largest and RMS horizontal distance, and the
+  largest direction, height and cant difference
+- per segment boundary of either source: the differences at the boundary,
+  and the shift to the nearest boundary of the same layout in the other
+  source
+
+The grid is processed in chunks of `chunk_size` stations, so the memory
+used does not grow with the length of the alignment.
+
+A source whose length unit is declared wrongly, e.g. foot for US survey
+foot, shows as shifts of all boundaries growing with the station. The unit
+of a file can be overridden with `unit_scale` of `read_sources()`.
+
+Usage::
+
+    python -m alignment_tools.differ tests/data/4REN0_Autodesk.ifc tests/data/4REN0_Bentley.ifc tests/data/4REN0.xml \\
+        --ranges out/4REN0_ranges.csv --boundaries out/4REN0_boundaries.csv
+"""
+
+import argparse
+from dataclasses import asdict
+from dataclasses import dataclass
+import math
+import os
+
+import numpy as np
+
+import ifcopenshell
+import ifcopenshell.util.unit
+
+from alignment_tools.alignment import CANT
+from alignment_tools.alignment import COLUMNS
+from alignment_tools.alignment import DIRECTION
+from alignment_tools.alignment import DISTANCE
+from alignment_tools.alignment import X
+from alignment_tools.alignment import Y
+from alignment_tools.alignment import Z
+from alignment_tools.alignment import Alignment
+from alignment_tools.builder import LINEAR_UNITS
+from alignment_tools.builder import HorizontalSegment
+from alignment_tools.builder import VerticalSegment
+from alignment_tools.deviation import write_report
+from alignment_tools.landxml import iter_alignments
+from alignment_tools.stations import DISTANCE_TOLERANCE
+from alignment_tools.stations import segment_starts
+
+LAYOUTS = ("horizontal", "vertical", "cant")
+
+# columns holding lengths, converted between units
+LENGTH_COLUMNS = [i for i, c in enumerate(COLUMNS) if c not in ("Direction", "Cant_Rotation")]
+
+# IfcTransitionCurveType to IfcAlignmentHorizontalSegmentTypeEnum
+TRANSITION_TYPES = {
+    "CLOTHOIDCURVE": "CLOTHOID",
+    "BLOSSCURVE": "BLOSSCURVE",
+    "COSINECURVE": "COSINECURVE",
+    "SINECURVE": "SINECURVE",
+    "BIQUADRATICPARABOLA": "HELMERTCURVE",
+    "CUBICPARABOLA": "CUBIC",
+}
+
+
+@dataclass
+class AlignmentSource:
+    """
+    An alignment to compare.
+
+    Give either `alignment` or `points`.
+
+    @param name: label of the source in the reports
+    @param alignment: business logic of the alignment
+    @param points: (N, 8) points with the columns in `alignment_tools.alignment.COLUMNS`, ascending in Distance
+    @param station_start: station at the start of the alignment
+    @param unit_scale: metres per length unit of the source
+    @param map_conversion: (eastings, northings, x axis abscissa, x axis ordinate, scale)
+        from the coordinates of the source to map coordinates, in the unit of the source
+    """
+
+    name: str
+    alignment: Alignment = None
+    points: np.ndarray = None
+    station_start: float = 0.0
+    unit_scale: float = 1.0
+    map_conversion: tuple = None
+
+    @property
+    def start(self) -> float:
+        return self.alignment.start if self.alignment is not None else float(self.points[0, DISTANCE])
+
+    @property
+    def end(self) -> float:
+        return self.alignment.end if self.alignment is not None else float(self.points[-1, DISTANCE])
+
+    def station(self, distances: np.ndarray) -> np.ndarray:
+        """
+        Stations of distances along.
+        """
+        return self.station_start + (np.asarray(distances, dtype=np.float64) - self.start)
+
+    def boundaries(self) -> dict:
+        """
+        Stations of the segment boundaries by layout, empty for a point table.
+        """
+        if self.alignment is None:
+            return {layout: np.empty(0) for layout in LAYOUTS}
+        alignment = self.alignment
+        lengths = np.array([float(s.SegmentLength) for s in alignment.horizontal])
+        boundaries = {"horizontal": np.unique(segment_starts(np.append(lengths, 0.0), alignment.start))}
+        for layout in ("vertical", "cant"):
+            segments = getattr(alignment, layout)
+            starts = np.array([float(s.StartDistAlong) for s in segments])
+            ends = starts + np.array([float(s.HorizontalLength) for s in segments])
+            boundaries[layout] = np.unique(np.concatenate((starts, ends)))
+
+        # the end of a segment and the start of the next can differ by rounding
+        for layout, distances in boundaries.items():
+            keep = np.diff(distances, prepend=-np.inf) > DISTANCE_TOLERANCE
+            boundaries[layout] = self.station(distances[keep])
+
+        return boundaries
+
+    def sample(self, stations: np.ndarray) -> np.ndarray:
+        """
+        Points at an array of stations, in map coordinates and the unit of the source.
+
+        @param stations: (N,) stations within the extent of the source
+        @return: (N, 8) array with the columns in `COLUMNS`, Distance holding the station
+        """
+        stations = np.asarray(stations, dtype=np.float64)
+        distances = self.start + (stations - self.station_start)
+        if self.alignment is not None:
+            out = self.alignment.evaluate(distances)
+        else:
+            out = np.empty((len(distances), len(COLUMNS)))
+            along = self.points[:, DISTANCE]
+            for column in range(len(COLUMNS)):
+                values = self.points[:, column]
+                if column == DIRECTION:
+                    values = np.unwrap(values)
+                out[:, column] = np.interp(distances, along, values, left=np.nan, right=np.nan)
+        out[:, DISTANCE] = stations
+        if self.map_conversion is not None:
+            eastings, northings, abscissa, ordinate, scale = self.map_conversion
+            norm = math.hypot(abscissa, ordinate)
+            cos, sin = abscissa / norm, ordinate / norm
+            x, y = out[:, X].copy(), out[:, Y]
+            out[:, X] = eastings + scale * (cos * x - sin * y)
+            out[:, Y] = northings + scale * (sin * x + cos * y)
+            out[:, DIRECTION] += math.atan2(sin, cos)
+
+        return out
+
+
+@dataclass
+class RangeDiff:
+    """
+    Differences between a source and the reference over a range of stations.
+
+    NaN where either has no value, e.g. outside a cant layout.
+
+    @param source: name of the compared source
+    @param start: first station of the range
+    @param end: last station of the range
+    @param count: number of stations compared
+    @param horizontal_max: largest horizontal distance between the points
+    @param horizontal_rms: root mean square of the horizontal distances
+    @param direction_max: largest difference of direction, radians
+    @param vertical_max: largest difference of height
+    @param cant_max: largest difference of cant
+    """
+
+    source: str
+    start: float
+    end: float
+    count: int
+    horizontal_max: float
+    horizontal_rms: float
+    direction_max: float
+    vertical_max: float
+    cant_max: float
+
+
+@dataclass
+class BoundaryDiff:
+    """
+    Differences between a source and the reference at a segment boundary.
+
+    @param source: name of the compared source
+    @param owner: name of the source the boundary belongs to
+    @param layout: "horizontal", "vertical" or "cant"
+    @param station: station of the boundary
+    @param shift: station of the nearest boundary of the same layout in the other source minus `station`,
+        NaN if it has none
+    @param horizontal: horizontal distance between the points
+    @param direction: difference of direction, radians
+    @param vertical: difference of height, source minus reference
+    @param cant: difference of cant, source minus reference
+    """
+
+    source: str
+    owner: str
+    layout: str
+    station: float
+    shift: float
+    horizontal: float
+    direction: float
+    vertical: float
+    cant: float
+
+
+@dataclass
+class AlignmentDiff:
+    """
+    Comparison of sources with a reference, see `diff_alignments()`.
+
+    @param reference: name of the reference source
+    @param unit_scale: metres per length unit of the stations and differences
+    @param start: first station of the common grid
+    @param end: last station of the common grid
+    @param ranges: `RangeDiff` list, by source and station
+    @param boundaries: `BoundaryDiff` list, by source and station
+    """
+
+    reference: str
+    unit_scale: float
+    start: float
+    end: float
+    ranges: list
+    boundaries: list
+
+    def summary(self) -> dict:
+        """
+        Largest differences over all station ranges, by source.
+        """
+        summary = {}
+        for r in self.ranges:
+            worst = summary.setdefault(r.source, dict.fromkeys(("horizontal", "direction", "vertical", "cant"), np.nan))
+            for key in worst:
+                worst[key] = float(np.fmax(worst[key], getattr(r, f"{key}_max")))
+
+        return summary
+
+
+def _in_unit(points: np.ndarray, source: AlignmentSource, unit_scale: float) -> np.ndarray:
+    points[:, LENGTH_COLUMNS] *= source.unit_scale / unit_scale
+    return points
+
+
+def _differences(points: np.ndarray, reference: np.ndarray) -> tuple:
+    """
+    Horizontal distance and direction, height and cant difference of points from reference points.
+    """
+    horizontal = np.hypot(points[:, X] - reference[:, X], points[:, Y] - reference[:, Y])
+    direction = np.angle(np.exp(1j * (points[:, DIRECTION] - reference[:, DIRECTION])))
+
+    return horizontal, direction, points[:, Z] - reference[:, Z], points[:, CANT] - reference[:, CANT]
+
+
+def _nearest_shift(stations: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    if not len(candidates):
+        return np.full(len(stations), np.nan)
+    candidates = np.sort(candidates)
+    i = np.clip(np.searchsorted(candidates, stations), 1, max(len(candidates) - 1, 1))
+    below, above = candidates[i - 1], candidates[np.minimum(i, len(candidates) - 1)]
+
+    return np.where(stations - below <= above - stations, below, above) - stations
+
+
+def diff_alignments(
+    sources: list,
+    interval: float = 1.0,
+    range_length: float = 100.0,
+    unit_scale: float = None,
+    chunk_size: int = 65536,
+) -> AlignmentDiff:
+    """
+    Compare alignment sources with the first one on a common grid of stations.
+
+    The grid runs at `interval` over the stations that all sources cover.
+    Each source is sampled at the grid stations in chunks of `chunk_size`
+    and converted to one unit, so differences in the station at the start
+    and in the length unit are taken out before comparing.
+
+    @param sources: `AlignmentSource` list, the first one being the reference
+    @param interval: distance between the grid stations
+    @param range_length: length of the station ranges of the report
+    @param unit_scale: metres per length unit of the stations, the interval and the result,
+        defaults to the unit of the reference
+    @param chunk_size: number of grid stations sampled at once
+    @return: the differences per station range and per segment boundary
+    """
+    if len(sources) < 2:
+        raise ValueError("At least two sources are needed for a comparison.")
+    if interval <= 0.0 or range_length <= 0.0:
+        raise ValueError(f"Interval and range length must be positive, got {interval} and {range_length}.")
+    reference = sources[0]
+    unit_scale = unit_scale or reference.unit_scale
+
+    # station range covered by all sources, in the common unit
+    def extent(source):
+        return source.station(np.array([source.start, source.end])) * source.unit_scale / unit_scale
+
+    start = max(float(extent(s)[0]) for s in sources)
+    end = min(float(extent(s)[1]) for s in sources)
+    if end <= start:
+        raise ValueError(f"The sources do not cover a common range of stations ({start} to {end}).")
+
+    def sample(source, stations):
+        return _in_unit(source.sample(stations * unit_scale / source.unit_scale), source, unit_scale)
+
+    others = sources[1:]
+    bins = max(1, int(math.ceil((end - start) / range_length)))
+    count = np.zeros((len(others), bins), dtype=np.int64)
+    squares = np.zeros((len(others), bins))
+    worst = np.full((len(others), 4, bins), np.nan)
+    steps = int(math.floor((end - start) / interval)) + 1
+    for first in range(0, steps, chunk_size):
+        stations = start + interval * np.arange(first, min(first + chunk_size, steps))
+        if first + chunk_size >= steps and end - stations[-1] > 1e-9:
+            stations = np.append(stations, end)
+        index = np.minimum(((stations - start) / range_length).astype(np.int64), bins - 1)
+        expected = sample(reference, stations)
+        for k, source in enumerate(others):
+            horizontal, *rest = _differences(sample(source, stations), expected)
+            np.add.at(count[k], index, 1)
+            np.add.at(squares[k], index, horizontal**2)
+            for j, values in enumerate((horizontal, *rest)):
+                np.fmax.at(worst[k, j], index, np.abs(values))
+
+    ranges = []
+    for k, source in enumerate(others):
+        for b in range(bins):
+            ranges.append(
+                RangeDiff(
+                    source=source.name,
+                    start=start + b * range_length,
+                    end=min(start + (b + 1) * range_length, end),
+                    count=int(count[k, b]),
+                    horizontal_max=float(worst[k, 0, b]),
+                    horizontal_rms=float(np.sqrt(squares[k, b] / count[k, b])) if count[k, b] else math.nan,
+                    direction_max=float(worst[k, 1, b]),
+                    vertical_max=float(worst[k, 2, b]),
+                    cant_max=float(worst[k, 3, b]),
+                )
+            )
+
+    boundaries = []
+    for source in others:
+        stations = {s.name: {k: v * s.unit_scale / unit_scale for k, v in s.boundaries().items()} for s in (reference, source)}
+        rows = []
+        for owner, other in ((reference, source), (source, reference)):
+            for layout in LAYOUTS:
+                at = stations[owner.name][layout]
+                at = at[(at >= start) & (at <= end)]
+                shift = _nearest_shift(at, stations[other.name][layout])
+                rows += [(float(s), owner.name, layout, float(d)) for s, d in zip(at, shift)]
+        if not rows:
+            continue
+        rows.sort()
+        at = np.array([r[0] for r in rows])
+        differences = _differences(sample(source, at), sample(reference, at))
+        for (station, owner, layout, shift), values in zip(rows, zip(*differences)):
+            boundaries.append(BoundaryDiff(source.name, owner, layout, station, shift, *(float(v) for v in values)))
+
+    return AlignmentDiff(reference.name, unit_scale, start, end, ranges, boundaries)
+
+
+def _linear_unit_scale(model: ifcopenshell.file) -> float:
+    """
+    Metres per length unit of a model.
+
+    A conversion based unit with a name in `alignment_tools.builder.LINEAR_UNITS`
+    is taken by its name, as some exporters write a wrong conversion factor.
+    """
+    for assignment in model.by_type("IfcUnitAssignment"):
+        for unit in assignment.Units:
+            if unit.is_a("IfcConversionBasedUnit") and unit.UnitType == "LENGTHUNIT" and unit.Name in LINEAR_UNITS:
+                return LINEAR_UNITS[unit.Name]
+
+    return ifcopenshell.util.unit.calculate_unit_scale(model)
+
+
+def _map_conversion(model: ifcopenshell.file, unit_scale: float) -> tuple:
+    """
+    (eastings, northings, x axis abscissa, x axis ordinate, scale) of the IfcMapConversion of a model, in project units.
+    """
+    for conversion in model.by_type("IfcMapConversion"):
+        map_unit = getattr(conversion.TargetCRS, "MapUnit", None)
+        to_project = ifcopenshell.util.unit.get_unit_scale(map_unit) / unit_scale if map_unit else 1.0
+        return (
+            conversion.Eastings * to_project,
+            conversion.Northings * to_project,
+            conversion.XAxisAbscissa if conversion.XAxisAbscissa is not None else 1.0,
+            conversion.XAxisOrdinate if conversion.XAxisOrdinate is not None else 0.0,
+            conversion.Scale if conversion.Scale is not None else 1.0,
+        )
+
+    return None
+
+
+def _station_start(entity: ifcopenshell.entity_instance, default: float) -> float:
+    """
+    Station of the first IfcReferent with a Pset_Stationing nested in an alignment.
+    """
+    for rel in entity.IsNestedBy:
+        for obj in rel.RelatedObjects:
+            if not obj.is_a("IfcReferent"):
+                continue
+            for definition in obj.IsDefinedBy:
+                pset = getattr(definition, "RelatingPropertyDefinition", None)
+                if pset is None or pset.Name != "Pset_Stationing":
+                    continue
+                for prop in pset.HasProperties:
+                    if prop.Name == "Station" and prop.NominalValue is not None:
+                        return float(prop.NominalValue.wrappedValue)
+
+    return default
+
+
+def _signed_radius(radius, ccw) -> float:
+    return 0.0 if radius is None else (radius if ccw else -radius)
+
+
+def _ifc4x1_layouts(curve: ifcopenshell.entity_instance) -> tuple:
+    """
+    Horizontal and vertical segments and start distance of an IFC4X1 IfcAlignmentCurve.
+    """
+    horizontal = []
+    for segment in curve.Horizontal.Segments:
+        g = segment.CurveGeometry
+        point = tuple(g.StartPoint.Coordinates[:2])
+        if g.is_a("IfcLineSegment2D"):
+            radii, predefined_type = (0.0, 0.0), "LINE"
+        elif g.is_a("IfcCircularArcSegment2D"):
+            radius = _signed_radius(g.Radius, g.IsCCW)
+            radii, predefined_type = (radius, radius), "CIRCULARARC"
+        else:
+            radii = (_signed_radius(g.StartRadius, g.IsStartRadiusCCW), _signed_radius(g.EndRadius, g.IsEndRadiusCCW))
+            predefined_type = TRANSITION_TYPES.get(g.TransitionCurveType, g.TransitionCurveType)
+        horizontal.append(HorizontalSegment(point, g.StartDirection, *radii, g.SegmentLength, predefined_type))
+
+    vertical = []
+    for s in curve.Vertical.Segments if curve.Vertical else []:
+        g0, length = s.StartGradient, s.HorizontalLength
+        # a convex curve is a crest, the gradient decreases
+        sign = -1.0 if getattr(s, "IsConvex", False) else 1.0
+        if s.is_a("IfcAlignment2DVerSegParabolicArc"):
+            end_gradient = g0 + sign * length / s.ParabolaConstant
+            radius, predefined_type = sign * s.ParabolaConstant, "PARABOLICARC"
+        elif s.is_a("IfcAlignment2DVerSegCircularArc"):
+            sine = g0 / math.hypot(1.0, g0) + sign * length / s.Radius
+            end_gradient = sine / math.sqrt(1.0 - sine * sine)
+            radius, predefined_type = sign * s.Radius, "CIRCULARARC"
+        else:
+            end_gradient, radius, predefined_type = g0, None, "CONSTANTGRADIENT"
+        vertical.append(
+            VerticalSegment(s.StartDistAlong, length, s.StartHeight, g0, end_gradient, radius, predefined_type)
+        )
+
+    return horizontal, vertical, curve.Horizontal.StartDistAlong or 0.0
+
+
+def read_sources(path: str, name: str = None, alignment: str = None, unit_scale: float = None) -> list:
+    """
+    The alignments of an IFC or LandXML file as `AlignmentSource` list.
+
+    The station at the start of an IFC 4.3 alignment is read from the
+    Pset_Stationing of its first referent, that of an IFC4X1 alignment
+    curve is its StartDistAlong and that of a LandXML alignment its
+    staStart. The coordinates of an IFC model are converted to map
+    coordinates with its IfcMapConversion.
+
+    @param path: .ifc or .xml file
+    @param name: label of the sources, defaults to the file name, followed by the alignment name if there are several
+    @param alignment: name of the only alignment to read, None for all
+    @param unit_scale: metres per length unit, overriding the unit of the file
+    @return: `AlignmentSource` list
+    """
+    label = name or os.path.splitext(os.path.basename(path))[0]
+    sources = []
+    if path.lower().endswith(".xml"):
+        for imported in iter_alignments(path):
+            if alignment is not None and imported.name != alignment:
+                continue
+            sources.append(
+                AlignmentSource(
+                    name=imported.name,
+                    alignment=imported.to_alignment(),
+                    station_start=imported.station_start,
+                    unit_scale=unit_scale or LINEAR_UNITS[imported.linear_unit],
+                )
+            )
+    else:
+        model = ifcopenshell.open(path)
+        scale = unit_scale or _linear_unit_scale(model)
+        map_conversion = _map_conversion(model, scale)
+        for entity in model.by_type("IfcAlignment"):
+            if alignment is not None and entity.Name != alignment:
+                continue
+            axis = getattr(entity, "Axis", None)
+            if axis is not None and axis.is_a("IfcAlignmentCurve"):
+                horizontal, vertical, start_distance = _ifc4x1_layouts(axis)
+                business_logic = Alignment(horizontal, vertical, start_distance=start_distance)
+                station_start = start_distance
+            else:
+                business_logic = Alignment().from_entity(entity)
+                station_start = _station_start(entity, business_logic.start)
+            sources.append(AlignmentSource(entity.Name, business_logic, None, station_start, scale, map_conversion))
+
+    for source in sources:
+        source.name = label if len(sources) == 1 else f"{label}:{source.name}"
+
+    return sources
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare an alignment delivered by several IFC and LandXML files.")
+    parser.add_argument("paths", nargs="+", help="IFC or LandXML files, the first one being the reference")
+    parser.add_argument("--alignment", default=None, help="name of the alignment in files with several")
+    parser.add_argument("--unit", default=None, choices=sorted(LINEAR_UNITS), help="linear unit of all files")
+    parser.add_argument("--interval", type=float, default=1.0, help="distance between the compared stations")
+    parser.add_argument("--range", type=float, default=100.0, help="length of the reported station ranges")
+    parser.add_argument("--ranges", default=None, help=".csv or .json report per station range")
+    parser.add_argument("--boundaries", default=None, help=".csv or .json report per segment boundary")
+    args = parser.parse_args()
+
+    sources = []
+    for path in args.paths:
+        found = read_sources(path, alignment=args.alignment, unit_scale=LINEAR_UNITS.get(args.unit))
+        if not found:
+            raise SystemExit(f"No alignment {args.alignment!r} in {path}.")
+        sources.append(found[0])
+
+    diff = diff_alignments(sources, args.interval, args.range)
+    if args.ranges:
+        write_report([asdict(r) for r in diff.ranges], args.ranges)
+    if args.boundaries:
+        write_report([asdict(b) for b in diff.boundaries], args.boundaries)
+    print(f"[INFO] Stations {diff.start:.3f} to {diff.end:.3f}, reference {diff.reference}.")
+    for source, worst in diff.summary().items():
+        print(f"[INFO] {source}: " + ", ".join(f"{key} {value:.6f}" for key, value in worst.items()))
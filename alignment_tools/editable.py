@@ -0,0 +1,277 @@
+"""
+Alignment layouts that can be edited one segment at a time.
+
+In a design loop, changing one radius should not mean building the whole
+alignment again. `EditableAlignment` is an
+`alignment_tools.alignment.Alignment` whose segments can be changed in
+place. Horizontal segments are chained: each one starts at the end point
+and direction of the previous one. The shape of a segment relative to its
+own start only depends on its design parameters. Editing segment i
+therefore evaluates that one segment again. All following segments are
+moved together by one rigid transform, a rotation and a translation that is
+vectorized over their start points, and none of them is evaluated again.
+When the length of a segment changes, the stations downstream change too,
+and the vertical and cant segments after its end move with them.
+
+`sample()` keeps the points of each horizontal segment in the segment's own
+frame. After an edit only the points of the edited segment are calculated
+again; the other points are placed by the new start of their segment. Every
+edit returns a `LayoutEdit` with the range of distances along whose
+geometry changed, so derived output such as corridor tiles can be
+invalidated for that range only.
+"""
+
+from dataclasses import dataclass
+from dataclasses import fields
+
+import numpy as np
+
+from alignment_tools.alignment import COLUMNS
+from alignment_tools.alignment import DIRECTION
+from alignment_tools.alignment import DISTANCE
+from alignment_tools.alignment import X
+from alignment_tools.alignment import Y
+from alignment_tools.alignment import Alignment
+from alignment_tools.builder import CantSegment
+from alignment_tools.builder import HorizontalSegment
+from alignment_tools.builder import VerticalSegment
+from alignment_tools.horizontal import segment_point
+from alignment_tools.stations import distance_grid
+from alignment_tools.stations import segment_starts
+
+
+@dataclass
+class LayoutEdit:
+    """
+    Extent of a segment edit.
+
+    @param layout: "horizontal" or "vertical"
+    @param index: index of the edited segment in its layout
+    @param start: first distance along whose geometry changed
+    @param end: last distance along whose geometry changed
+    @param moved: True if the segments after the edited one were moved
+    @param length_change: change of the length of the horizontal layout
+    """
+
+    layout: str
+    index: int
+    start: float
+    end: float
+    moved: bool = False
+    length_change: float = 0.0
+
+
+def _copy(segment, segment_type):
+    values = {f.name: getattr(segment, f.name, None) for f in fields(segment_type)}
+    if segment_type is HorizontalSegment:
+        point = getattr(values["StartPoint"], "Coordinates", values["StartPoint"])
+        values["StartPoint"] = (float(point[0]), float(point[1]))
+
+    return segment_type(**values)
+
+
+def _update(segment, attributes: dict) -> None:
+    names = {f.name for f in fields(segment)}
+    for name, value in attributes.items():
+        if name not in names:
+            raise ValueError(f"{type(segment).__name__} has no attribute {name}.")
+        setattr(segment, name, value)
+
+
+def _local_points(segment: HorizontalSegment, u: np.ndarray) -> np.ndarray:
+    """
+    (X, Y, Direction) along a segment placed at the origin along the x axis.
+    """
+    local = HorizontalSegment(
+        (0.0, 0.0),
+        0.0,
+        segment.StartRadiusOfCurvature,
+        segment.EndRadiusOfCurvature,
+        segment.SegmentLength,
+        segment.PredefinedType,
+    )
+
+    return segment_point(local, u)
+
+
+def _place(local: np.ndarray, pose: np.ndarray) -> np.ndarray:
+    """
+    Transform (N, 3) local (X, Y, Direction) to the frame of (N, 3) or (3,) poses.
+    """
+    cos, sin = np.cos(pose[..., 2]), np.sin(pose[..., 2])
+    x = pose[..., 0] + cos * local[:, 0] - sin * local[:, 1]
+    y = pose[..., 1] + sin * local[:, 0] + cos * local[:, 1]
+
+    return np.column_stack((x, y, local[:, 2] + pose[..., 2]))
+
+
+def _rigid_transform(poses: np.ndarray, old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """
+    Move (N, 3) poses with the rigid transform that takes pose `old` to pose `new`.
+    """
+    cos, sin = np.cos(-old[2]), np.sin(-old[2])
+    dx, dy = poses[:, 0] - old[0], poses[:, 1] - old[1]
+    local = np.column_stack((cos * dx - sin * dy, sin * dx + cos * dy, poses[:, 2] - old[2]))
+
+    return _place(local, new)
+
+
+class EditableAlignment(Alignment):
+    """
+    Alignment whose horizontal and vertical segments can be edited in place.
+
+    The segments are copied to `alignment_tools.builder.HorizontalSegment`,
+    `alignment_tools.builder.VerticalSegment` and
+    `alignment_tools.builder.CantSegment`, so the layouts they were read
+    from are never changed. After an edit, the StartPoint and
+    StartDirection of the horizontal segments after the edited one follow
+    from its end.
+    """
+
+    def set_layouts(
+        self,
+        horizontal: list = None,
+        vertical: list = None,
+        cant: list = None,
+        start_distance: float = 0.0,
+        rail_head_distance: float = None,
+    ) -> None:
+        horizontal = [_copy(s, HorizontalSegment) for s in horizontal or []]
+        vertical = [_copy(s, VerticalSegment) for s in vertical or []]
+        cant = [_copy(s, CantSegment) for s in cant or []]
+        super().set_layouts(horizontal, vertical, cant, start_distance, rail_head_distance)
+
+        # shape of each segment relative to its start, and the start of each segment and of the end
+        self._local_ends = np.zeros((len(self.horizontal), 3))
+        self._poses = np.zeros((len(self.horizontal) + 1, 3))
+        for i, segment in enumerate(self.horizontal):
+            self._local_ends[i] = _local_points(segment, segment.SegmentLength)
+            self._poses[i] = (*segment.StartPoint, segment.StartDirection)
+        if self.horizontal:
+            self._poses[-1] = _place(self._local_ends[-1:], self._poses[-2])[0]
+        self._sample_interval = None
+        self._samples = [None] * len(self.horizontal)
+
+    def _write_poses(self, index: int) -> None:
+        for segment, pose in zip(self.horizontal[index:], self._poses[index:-1].tolist()):
+            segment.StartPoint = (pose[0], pose[1])
+            segment.StartDirection = pose[2]
+
+    def _shift_profile(self, station: float, length_change: float) -> None:
+        """
+        Move the vertical and cant segments starting at or after a distance along by a change of length.
+        """
+        for segments, starts in ((self.vertical, self._v_starts), (self.cant, self._c_starts)):
+            shifted = np.flatnonzero(starts >= station)
+            starts[shifted] += length_change
+            for i in shifted:
+                segments[i].StartDistAlong = float(starts[i])
+
+    def edit_horizontal(self, index: int, **attributes) -> LayoutEdit:
+        """
+        Change the design parameters of a horizontal segment.
+
+        The segment is evaluated again and the segments after it are moved
+        rigidly so they keep starting at the end of the previous segment.
+        StartPoint and StartDirection can only be changed on the first
+        segment, which moves the whole layout.
+
+        A change of SegmentLength moves the vertical and cant segments that
+        start at or after the end of the edited segment by the same amount,
+        so they keep their place relative to the horizontal segments
+        downstream. The profile over the edited segment is not changed: a
+        longer segment leaves distances without a height or cant, where the
+        points are NaN, and over a shorter one the moved segments apply.
+
+        @param index: index of the segment
+        @param attributes: new values of `HorizontalSegment` attributes
+        @return: extent of the change
+        """
+        if index > 0 and {"StartPoint", "StartDirection"} & attributes.keys():
+            raise ValueError("StartPoint and StartDirection follow from the previous segment.")
+        segment = self.horizontal[index]
+        _update(segment, attributes)
+
+        old_end = self._poses[index + 1].copy()
+        old_length = self._h_lengths[index]
+        start = float(self._h_starts[index])
+        if index == 0:
+            self._poses[0] = (*segment.StartPoint, segment.StartDirection)
+        self._local_ends[index] = _local_points(segment, segment.SegmentLength)
+        new_end = _place(self._local_ends[index : index + 1], self._poses[index])[0]
+        self._samples[index] = None
+
+        moved = not np.array_equal(old_end, new_end)
+        if moved:
+            self._poses[index + 1 :] = _rigid_transform(self._poses[index + 1 :], old_end, new_end)
+            self._poses[index + 1] = new_end
+            self._write_poses(index + 1)
+
+        length_change = float(segment.SegmentLength) - float(old_length)
+        old_alignment_end = self.end
+        self._h_lengths[index] = float(segment.SegmentLength)
+        self._h_starts = segment_starts(self._h_lengths, self.start_distance)
+        if length_change:
+            self._shift_profile(start + float(old_length), length_change)
+        self._projection_index = None
+        if moved or length_change:
+            # everything downstream moved or changed station
+            end = max(old_alignment_end, self.end)
+        else:
+            end = start + float(segment.SegmentLength)
+
+        return LayoutEdit("horizontal", index, start, end, moved, length_change)
+
+    def edit_vertical(self, index: int, **attributes) -> LayoutEdit:
+        """
+        Change the design parameters of a vertical segment.
+
+        Vertical segments are located by StartDistAlong, so no other segment changes.
+
+        @param index: index of the segment
+        @param attributes: new values of `VerticalSegment` attributes
+        @return: extent of the change
+        """
+        segment = self.vertical[index]
+        old_start, old_end = self._v_starts[index], self._v_starts[index] + self._v_lengths[index]
+        _update(segment, attributes)
+        self._v_starts[index] = float(segment.StartDistAlong)
+        self._v_lengths[index] = float(segment.HorizontalLength)
+        start = min(old_start, self._v_starts[index])
+        end = max(old_end, self._v_starts[index] + self._v_lengths[index])
+
+        return LayoutEdit("vertical", index, float(start), float(end))
+
+    def sample(self, point_interval: float = 25.0) -> np.ndarray:
+        """
+        Points along the alignment at a fixed interval within each horizontal segment.
+
+        Each horizontal segment is sampled from its start at `point_interval`
+        and at its end. The points of a segment are kept in the segment's
+        frame between calls and only calculated again after the segment was
+        edited, or for a different interval. Heights and cant are
+        calculated for every call.
+
+        @param point_interval: distance between points within a segment
+        @return: (N, 8) array with the columns in `COLUMNS`
+        """
+        if point_interval != self._sample_interval:
+            self._samples = [None] * len(self.horizontal)
+            self._sample_interval = point_interval
+        for i, segment in enumerate(self.horizontal):
+            if self._samples[i] is None:
+                u = distance_grid(0.0, float(segment.SegmentLength), point_interval)
+                # the start of a segment is the end of the previous one
+                u = u if i == 0 else u[1:]
+                self._samples[i] = np.column_stack((u, _local_points(segment, u)))
+
+        local = np.concatenate(self._samples)
+        counts = [len(s) for s in self._samples]
+        idx = np.repeat(np.arange(len(self._samples)), counts)
+
+        out = np.full((len(local), len(COLUMNS)), np.nan)
+        out[:, DISTANCE] = self._h_starts[idx] + local[:, 0]
+        out[:, X : DIRECTION + 1] = _place(local[:, 1:], self._poses[idx])
+        self._evaluate_profile(out)
+
+        return out
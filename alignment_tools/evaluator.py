@@ -0,0 +1,135 @@
+"""
+Batched evaluation of alignment curves with the IfcOpenShell geometry kernel.
+
+`ifcopenshell.ifcopenshell_wrapper.map_shape()` converts an IfcCurve into the
+kernel's piecewise function representation. Mapping is the expensive step,
+so `CurveEvaluator` maps a curve once and then evaluates whole arrays of
+distances along it, writing the 4x4 placements straight into a NumPy buffer.
+"""
+
+from dataclasses import dataclass
+import itertools
+
+import numpy as np
+
+import ifcopenshell
+import ifcopenshell.geom as geom
+import ifcopenshell.util.unit
+
+
+@dataclass
+class CurvePoints:
+    """
+    Curve geometry at an array of distances along, in project length units.
+
+    @param distance: (N,) distances along the curve
+    @param position: (N, 3) point on the curve
+    @param tangent: (N, 3) unit tangent (local x axis)
+    @param normal: (N, 3) local y axis, i.e. the lateral direction including cant roll
+    @param up: (N, 3) local z axis
+    @param cant_rotation: (N,) roll about the tangent in radians, positive raising the left side
+    """
+
+    distance: np.ndarray
+    position: np.ndarray
+    tangent: np.ndarray
+    normal: np.ndarray
+    up: np.ndarray
+    cant_rotation: np.ndarray
+
+
+class CurveEvaluator:
+    """
+    Evaluate an IfcCompositeCurve, IfcGradientCurve or IfcSegmentedReferenceCurve
+    at many distances along with a single kernel mapping.
+
+    Distances and returned positions are in project length units; the kernel
+    itself works in metres.
+
+    @param curve: the curve entity, e.g. `alignment.Representation.Representations[0].Items[0]`
+    @param settings: geometry settings, defaults to `ifcopenshell.geom.settings()`
+    """
+
+    def __init__(self, curve: ifcopenshell.entity_instance, settings: geom.settings = None) -> None:
+        if settings is None:
+            settings = geom.settings()
+        self.curve = curve
+        self.settings = settings
+        self.unit_scale = ifcopenshell.util.unit.calculate_unit_scale(curve.file)
+
+        wrapper = ifcopenshell.ifcopenshell_wrapper
+        item = wrapper.map_shape(settings, getattr(curve, "wrapped_data", curve))
+        if hasattr(item, "evaluate"):
+            # ifcopenshell 0.8 piecewise_function
+            self._function = item
+        else:
+            self._function = wrapper.function_item_evaluator(settings, item)
+        self._item = item
+
+    @property
+    def start(self) -> float:
+        return self._item.start() / self.unit_scale
+
+    @property
+    def end(self) -> float:
+        return self._item.end() / self.unit_scale
+
+    @property
+    def length(self) -> float:
+        return self._item.length() / self.unit_scale
+
+    def placements(self, distances: np.ndarray) -> np.ndarray:
+        """
+        Placement matrices at an array of distances along.
+
+        @param distances: (N,) distances along the curve
+        @return: (N, 4, 4) matrices, rotation in [:, :3, :3], position in [:, :3, 3]
+        """
+        distances = np.atleast_1d(np.asarray(distances, dtype=np.float64))
+        evaluate = self._function.evaluate
+        flatten = itertools.chain.from_iterable
+        values = flatten(flatten(evaluate(d) for d in (distances * self.unit_scale).tolist()))
+        out = np.fromiter(values, dtype=np.float64, count=16 * len(distances))
+        out = out.reshape(len(distances), 4, 4)
+        out[:, :3, 3] /= self.unit_scale
+
+        return out
+
+    def positions(self, distances: np.ndarray) -> np.ndarray:
+        """
+        (N, 3) points on the curve at an array of distances along.
+        """
+        return self.placements(distances)[:, :3, 3]
+
+    def tangents(self, distances: np.ndarray) -> np.ndarray:
+        """
+        (N, 3) unit tangents at an array of distances along.
+        """
+        tangent = self.placements(distances)[:, :3, 0]
+
+        return tangent / np.linalg.norm(tangent, axis=1, keepdims=True)
+
+    def evaluate(self, distances: np.ndarray) -> CurvePoints:
+        """
+        Positions, local axes and cant roll at an array of distances along.
+        """
+        distances = np.atleast_1d(np.asarray(distances, dtype=np.float64))
+        m = self.placements(distances)
+        axes = m[:, :3, :3] / np.linalg.norm(m[:, :3, :3], axis=1, keepdims=True)
+
+        return CurvePoints(
+            distance=distances,
+            position=m[:, :3, 3],
+            tangent=axes[:, :, 0],
+            normal=axes[:, :, 1],
+            up=axes[:, :, 2],
+            cant_rotation=np.arctan2(axes[:, 2, 1], axes[:, 2, 2]),
+        )
+
+    def cant(self, distances: np.ndarray, rail_head_distance: float) -> np.ndarray:
+        """
+        Cant (superelevation of the left rail over the right) at an array of distances along.
+
+        @param rail_head_distance: IfcAlignmentCant.RailHeadDistance
+        """
+        return rail_head_distance * np.sin(self.evaluate(distances).cant_rotation)
@@ -0,0 +1,306 @@
+"""
+Station-range index of the elements of federated models along an alignment.
+
+Elements of discipline models (drainage, structures, signalling) federated
+with an alignment model are located once: the world coordinates of each
+element's geometry are projected onto the alignment with
+`Alignment.project()`, and the element is stored with the range of stations
+and offsets it covers. Elements without geometry are located by the origin
+of their placement. Stations are distances along the alignment, as
+elsewhere in `alignment_tools`.
+
+The ranges are kept sorted by their first station. A query for stations A
+to B only looks at the elements starting between A minus the longest
+element and B, found with `np.searchsorted`, and filters those with
+vectorized comparisons, so a corridor query over tens of thousands of
+elements takes well under a millisecond.
+
+`federation_index()` keeps the index in a `.npz` file next to the models
+and builds it again when a model or the alignment has changed. Models are
+judged by the size and modification time of their files as in
+`alignment_tools.reference_store`, the alignment by a digest of the design
+parameters of all its segments, so an edited radius or start point is
+noticed even if the length of the alignment stays the same.
+"""
+
+from dataclasses import dataclass
+import hashlib
+import multiprocessing
+import os
+
+import numpy as np
+
+import ifcopenshell
+import ifcopenshell.geom as geom
+import ifcopenshell.util.placement
+
+from alignment_tools.builder import CANT_COLUMNS
+from alignment_tools.builder import HORIZONTAL_COLUMNS
+from alignment_tools.builder import VERTICAL_COLUMNS
+from alignment_tools.builder import segment_table
+from alignment_tools.linear_placement import resolve_linear_placements
+
+INDEX_FILE = "federation_index.npz"
+INDEX_VERSION = 2
+
+
+def _source_stat(path: str) -> list:
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _alignment_key(alignment) -> str:
+    """
+    Digest of the design parameters of all layouts of an alignment.
+    """
+    h = hashlib.sha1()
+    h.update(np.array([alignment.start_distance, alignment.rail_head_distance or np.nan]).tobytes())
+    for segments, columns in (
+        (alignment.horizontal, HORIZONTAL_COLUMNS),
+        (alignment.vertical, VERTICAL_COLUMNS),
+        (alignment.cant, CANT_COLUMNS),
+    ):
+        table = segment_table(segments, columns)
+        for column in columns:
+            values = table[column]
+            h.update(values.astype(str).tobytes() if column == "PredefinedType" else values.tobytes())
+        h.update(b"|")
+
+    return h.hexdigest()
+
+
+@dataclass
+class FederationIndex:
+    """
+    Station and offset ranges of federated elements, sorted by first station.
+
+    @param station_min: (N,) first station covered by each element
+    @param station_max: (N,) last station covered by each element
+    @param offset_min: (N,) smallest offset, positive to the left of the alignment
+    @param offset_max: (N,) largest offset
+    @param global_ids: (N,) GlobalId of each element
+    @param model: (N,) index of the element's model in `models`
+    @param models: paths of the federated models
+    @param stats: [mtime_ns, size] of each model when the index was built
+    @param alignment_key: digest of the segments of all layouts of the alignment
+    """
+
+    station_min: np.ndarray
+    station_max: np.ndarray
+    offset_min: np.ndarray
+    offset_max: np.ndarray
+    global_ids: np.ndarray
+    model: np.ndarray
+    models: list
+    stats: list
+    alignment_key: str
+
+    def __post_init__(self) -> None:
+        lengths = self.station_max - self.station_min
+        self.max_length = float(lengths.max()) if len(lengths) else 0.0
+
+    def __len__(self) -> int:
+        return len(self.global_ids)
+
+    def query(
+        self,
+        start: float,
+        end: float,
+        offset_min: float = -np.inf,
+        offset_max: float = np.inf,
+    ) -> np.ndarray:
+        """
+        Elements whose station and offset ranges overlap the given ranges.
+
+        @param start: first station
+        @param end: last station
+        @param offset_min: smallest offset of the corridor, positive to the left
+        @param offset_max: largest offset of the corridor
+        @return: row indices into the index arrays, in order of first station
+        """
+        lo = np.searchsorted(self.station_min, start - self.max_length, side="left")
+        hi = np.searchsorted(self.station_min, end, side="right")
+        rows = np.arange(lo, hi)
+        keep = (
+            (self.station_max[rows] >= start)
+            & (self.offset_max[rows] >= offset_min)
+            & (self.offset_min[rows] <= offset_max)
+        )
+        return rows[keep]
+
+    def elements(self, rows: np.ndarray) -> list:
+        """
+        (model path, GlobalId) of the elements at the given rows.
+        """
+        return [(self.models[m], str(g)) for m, g in zip(self.model[rows], self.global_ids[rows])]
+
+    def is_stale(self, alignment, paths: list) -> bool:
+        """
+        True if the models or the alignment differ from those the index was built from.
+        """
+        if [os.path.abspath(p) for p in paths] != list(self.models):
+            return True
+        if _alignment_key(alignment) != self.alignment_key:
+            return True
+        try:
+            return [_source_stat(p) for p in paths] != [list(s) for s in self.stats]
+        except FileNotFoundError:
+            return True
+
+    def save(self, path: str) -> None:
+        """
+        Write the index to a .npz file.
+        """
+        np.savez(
+            path,
+            version=INDEX_VERSION,
+            station_min=self.station_min,
+            station_max=self.station_max,
+            offset_min=self.offset_min,
+            offset_max=self.offset_max,
+            global_ids=self.global_ids,
+            model=self.model,
+            models=np.array(self.models, dtype=str),
+            stats=np.array(self.stats, dtype=np.int64).reshape(-1, 2),
+            alignment_key=self.alignment_key,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "FederationIndex":
+        """
+        Read an index written by `save()`, None if it has another version.
+        """
+        with np.load(path) as data:
+            if int(data["version"]) != INDEX_VERSION:
+                return None
+            return cls(
+                station_min=data["station_min"],
+                station_max=data["station_max"],
+                offset_min=data["offset_min"],
+                offset_max=data["offset_max"],
+                global_ids=data["global_ids"],
+                model=data["model"],
+                models=data["models"].tolist(),
+                stats=data["stats"].tolist(),
+                alignment_key=str(data["alignment_key"]),
+            )
+
+
+def element_meshes(model: ifcopenshell.file, elements: list = None) -> dict:
+    """
+    Triangulated geometry of the elements of a model in world coordinates.
+
+    @param model: the model
+    @param elements: the elements to triangulate, all IfcElement if None
+    @return: ((V, 3) vertices, (T, 3) vertex indices of the triangles) by GlobalId,
+        elements without geometry are left out
+    """
+    if elements is None:
+        elements = model.by_type("IfcElement")
+    meshes = {}
+    if not elements:
+        return meshes
+    settings = geom.settings()
+    settings.set("use-world-coords", True)
+    iterator = geom.iterator(settings, model, multiprocessing.cpu_count(), include=elements)
+    if iterator.initialize():
+        while True:
+            shape = iterator.get()
+            verts = np.asarray(shape.geometry.verts, dtype=np.float64).reshape(-1, 3)
+            if len(verts):
+                meshes[shape.guid] = (verts, np.asarray(shape.geometry.faces, dtype=np.int64).reshape(-1, 3))
+            if not iterator.next():
+                break
+
+    return meshes
+
+
+def element_points(model: ifcopenshell.file, use_geometry: bool = True) -> dict:
+    """
+    World coordinates locating each element of a model.
+
+    @param model: the model
+    @param use_geometry: True to use the vertices of the element geometry,
+        False for the origin of the placement only
+    @return: (M, 3) points by GlobalId
+    """
+    elements = [e for e in model.by_type("IfcElement") if e.ObjectPlacement is not None]
+    points = {}
+    if use_geometry:
+        points = {global_id: verts for global_id, (verts, _) in element_meshes(model, elements).items()}
+
+    missing = [e for e in elements if e.GlobalId not in points]
+    if missing:
+        linear = resolve_linear_placements(model) if model.by_type("IfcLinearPlacement") else None
+        for element in missing:
+            if element.ObjectPlacement.is_a("IfcLinearPlacement"):
+                matrix = linear.matrix(element)
+            else:
+                matrix = ifcopenshell.util.placement.get_local_placement(element.ObjectPlacement)
+            points[element.GlobalId] = matrix[None, :3, 3]
+
+    return points
+
+
+def build_federation_index(alignment, paths: list, use_geometry: bool = True) -> FederationIndex:
+    """
+    Locate the elements of federated models along an alignment.
+
+    @param alignment: `alignment_tools.alignment.Alignment` in the coordinates of the models
+    @param paths: paths of the federated IFC models
+    @param use_geometry: True to project the element geometry, False for the placement origins only
+    @return: the index
+    """
+    columns = {key: [] for key in ("station_min", "station_max", "offset_min", "offset_max")}
+    global_ids, model_index = [], []
+    for i, path in enumerate(paths):
+        points = element_points(ifcopenshell.open(path), use_geometry)
+        if not points:
+            continue
+        counts = np.array([len(p) for p in points.values()])
+        located = alignment.project(np.concatenate(list(points.values()))[:, :2])
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        for key, values, reduce in (
+            ("station_min", located.distance, np.minimum),
+            ("station_max", located.distance, np.maximum),
+            ("offset_min", located.offset, np.minimum),
+            ("offset_max", located.offset, np.maximum),
+        ):
+            columns[key].append(reduce.reduceat(values, starts))
+        global_ids.extend(points)
+        model_index.append(np.full(len(points), i))
+
+    columns = {key: np.concatenate(v) if v else np.empty(0) for key, v in columns.items()}
+    order = np.argsort(columns["station_min"], kind="stable")
+
+    return FederationIndex(
+        **{key: values[order] for key, values in columns.items()},
+        global_ids=np.array(global_ids, dtype=str)[order],
+        model=np.concatenate(model_index)[order] if model_index else np.empty(0, dtype=np.int64),
+        models=[os.path.abspath(p) for p in paths],
+        stats=[_source_stat(p) for p in paths],
+        alignment_key=_alignment_key(alignment),
+    )
+
+
+def federation_index(alignment, paths: list, index_path: str = None, use_geometry: bool = True) -> FederationIndex:
+    """
+    The index of federated models, read from `index_path` unless it is missing or stale.
+
+    @param alignment: `alignment_tools.alignment.Alignment` in the coordinates of the models
+    @param paths: paths of the federated IFC models
+    @param index_path: .npz file of the index, `INDEX_FILE` next to the first model by default
+    @param use_geometry: True to project the element geometry, False for the placement origins only
+    @return: the index
+    """
+    if index_path is None:
+        index_path = os.path.join(os.path.dirname(os.path.abspath(paths[0])), INDEX_FILE)
+    if os.path.exists(index_path):
+        index = FederationIndex.load(index_path)
+        if index is not None and not index.is_stale(alignment, paths):
+            return index
+
+    index = build_federation_index(alignment, paths, use_geometry)
+    index.save(index_path)
+
+    return index
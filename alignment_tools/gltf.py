@@ -0,0 +1,159 @@
+"""
+Minimal binary glTF 2.0 (.glb) writer for triangle meshes.
+
+Vertices are converted from the IFC Z-up to the glTF Y-up convention. As
+glTF stores positions in single precision, an origin (by default the
+minimum corner of the mesh) is subtracted from the vertices and kept as the
+translation of the node in double precision, so survey coordinates do not
+lose millimetres.
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+
+GLB_MAGIC = 0x46546C67
+GLB_VERSION = 2
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+FLOAT = 5126
+UNSIGNED_INT = 5125
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+TRIANGLES = 4
+
+
+def z_up_to_y_up(vertices: np.ndarray) -> np.ndarray:
+    """
+    (x, y, z) Z-up to (x, z, -y) Y-up coordinates.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    return np.column_stack((vertices[:, 0], vertices[:, 2], -vertices[:, 1]))
+
+
+def _pad(data: bytes, fill: bytes) -> bytes:
+    return data + fill * (-len(data) % 4)
+
+
+def glb_bytes(meshes: list, origin: np.ndarray = None, extras: dict = None) -> bytes:
+    """
+    Binary glTF with one node per mesh.
+
+    @param meshes: list of (name, SweepMesh) or objects with `vertices` and `indices`
+    @param origin: Z-up point subtracted from the vertices, defaults to the minimum corner
+    @param extras: metadata stored in the asset
+    @return: the .glb file contents
+    """
+    meshes = [m if isinstance(m, tuple) else (None, m) for m in meshes]
+    if origin is None:
+        origin = np.min([m.vertices.min(axis=0) for _, m in meshes], axis=0)
+    origin = np.asarray(origin, dtype=np.float64)
+
+    buffer = bytearray()
+    buffer_views, accessors, gltf_meshes, nodes = [], [], [], []
+
+    def add_view(data: bytes, target: int) -> int:
+        buffer.extend(b"\x00" * (-len(buffer) % 4))
+        buffer_views.append(
+            {"buffer": 0, "byteOffset": len(buffer), "byteLength": len(data), "target": target}
+        )
+        buffer.extend(data)
+        return len(buffer_views) - 1
+
+    for name, mesh in meshes:
+        positions = z_up_to_y_up(mesh.vertices - origin).astype(np.float32)
+        indices = np.asarray(mesh.indices, dtype=np.uint32).ravel()
+
+        accessors.append(
+            {
+                "bufferView": add_view(positions.tobytes(), ARRAY_BUFFER),
+                "componentType": FLOAT,
+                "count": len(positions),
+                "type": "VEC3",
+                "min": positions.min(axis=0).tolist(),
+                "max": positions.max(axis=0).tolist(),
+            }
+        )
+        accessors.append(
+            {
+                "bufferView": add_view(indices.tobytes(), ELEMENT_ARRAY_BUFFER),
+                "componentType": UNSIGNED_INT,
+                "count": len(indices),
+                "type": "SCALAR",
+            }
+        )
+        primitive = {
+            "attributes": {"POSITION": len(accessors) - 2},
+            "indices": len(accessors) - 1,
+            "mode": TRIANGLES,
+        }
+        gltf_meshes.append({"primitives": [primitive]})
+        node = {"mesh": len(gltf_meshes) - 1, "translation": z_up_to_y_up(origin[None, :])[0].tolist()}
+        if name is not None:
+            gltf_meshes[-1]["name"] = name
+            node["name"] = name
+        nodes.append(node)
+
+    asset = {"version": "2.0", "generator": "alignment_tools"}
+    if extras:
+        asset["extras"] = extras
+    document = {
+        "asset": asset,
+        "scene": 0,
+        "scenes": [{"nodes": list(range(len(nodes)))}],
+        "nodes": nodes,
+        "meshes": gltf_meshes,
+        "accessors": accessors,
+        "bufferViews": buffer_views,
+        "buffers": [{"byteLength": len(buffer)}],
+    }
+
+    json_chunk = _pad(json.dumps(document, separators=(",", ":")).encode("utf-8"), b" ")
+    bin_chunk = _pad(bytes(buffer), b"\x00")
+    length = 12 + 8 + len(json_chunk) + 8 + len(bin_chunk)
+
+    return b"".join(
+        (
+            struct.pack("<III", GLB_MAGIC, GLB_VERSION, length),
+            struct.pack("<II", len(json_chunk), CHUNK_JSON),
+            json_chunk,
+            struct.pack("<II", len(bin_chunk), CHUNK_BIN),
+            bin_chunk,
+        )
+    )
+
+
+def write_glb(path: str, meshes: list, origin: np.ndarray = None, extras: dict = None) -> None:
+    """
+    Write meshes to a binary glTF file, see `glb_bytes()`.
+    """
+    if not isinstance(meshes, list):
+        meshes = [meshes]
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(glb_bytes(meshes, origin, extras))
+
+
+def read_glb(path_or_bytes) -> tuple:
+    """
+    Parse a binary glTF into its JSON document and binary chunk.
+    """
+    if isinstance(path_or_bytes, (bytes, bytearray)):
+        data = bytes(path_or_bytes)
+    else:
+        with open(path_or_bytes, "rb") as f:
+            data = f.read()
+    magic, version, length = struct.unpack_from("<III", data, 0)
+    if magic != GLB_MAGIC or version != GLB_VERSION or length != len(data):
+        raise ValueError("Not a glTF 2.0 binary file.")
+    json_length, _ = struct.unpack_from("<II", data, 12)
+    document = json.loads(data[20 : 20 + json_length])
+    bin_length, _ = struct.unpack_from("<II", data, 20 + json_length)
+    start = 28 + json_length
+
+    return document, data[start : start + bin_length]
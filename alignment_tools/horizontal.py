@@ -0,0 +1,199 @@
+"""
+Vectorized position and direction calculation for horizontal alignment segments.
+
+`point_on_<PredefinedType>(segment, u)` returns `(..., 3)` values of
+(X, Y, Direction) at distance `u` along the segment, in the units of the
+segment. The segment is read through its IFC attribute names (StartPoint,
+StartDirection, StartRadiusOfCurvature, EndRadiusOfCurvature, SegmentLength),
+so an IfcAlignmentHorizontalSegment entity or any object with the same
+attributes can be passed. StartPoint may be an IfcCartesianPoint or a
+coordinate pair.
+
+Radii follow the IFC convention: positive turns left (counter-clockwise),
+negative turns right and zero means infinite radius.
+
+Lines and circular arcs are calculated in closed form. For the transition
+curves the curvature varies with the shape functions in
+`alignment_tools.transitions`, the direction is its analytic integral and the
+position is integrated with composite Gauss-Legendre quadrature, split at the
+breaks of a piecewise shape such as the Helmert curve, and vectorized
+over all distances of a segment at once.
+"""
+
+import numpy as np
+
+from alignment_tools.transitions import TRANSITIONS
+from alignment_tools.transitions import Transition
+from alignment_tools.transitions import predefined_type
+
+GAUSS_NODES = 8
+# largest change of direction integrated by a single quadrature panel, radians
+PANEL_ANGLE = 0.25
+
+
+def curvature(radius):
+    """
+    Signed curvature for an IFC radius of curvature, 0 for an infinite radius.
+    """
+    radius = np.asarray(radius, dtype=np.float64)
+    safe = np.where(radius == 0.0, 1.0, radius)
+
+    return np.where(radius == 0.0, 0.0, 1.0 / safe)
+
+
+def _start(segment):
+    point = getattr(segment.StartPoint, "Coordinates", segment.StartPoint)
+    return float(point[0]), float(point[1]), float(segment.StartDirection)
+
+
+def _result(x, y, direction):
+    x, y, direction = np.broadcast_arrays(x, y, direction)
+    return np.stack((x, y, direction), axis=-1)
+
+
+def point_on_LINE(segment, u):
+    """
+    Position and direction on a straight line.
+    """
+    x0, y0, theta0 = _start(segment)
+    u = np.asarray(u, dtype=np.float64)
+
+    return _result(x0 + u * np.cos(theta0), y0 + u * np.sin(theta0), theta0)
+
+
+def point_on_CIRCULARARC(segment, u):
+    """
+    Position and direction on a circular arc.
+    """
+    x0, y0, theta0 = _start(segment)
+    u = np.asarray(u, dtype=np.float64)
+    radius = float(segment.StartRadiusOfCurvature)
+    if radius == 0.0:
+        return point_on_LINE(segment, u)
+    xc = x0 - radius * np.sin(theta0)
+    yc = y0 + radius * np.cos(theta0)
+    theta = theta0 + u / radius
+
+    return _result(xc + radius * np.sin(theta), yc - radius * np.cos(theta), theta)
+
+
+def _transition(segment, u, transition: Transition):
+    x0, y0, theta0 = _start(segment)
+    u = np.asarray(u, dtype=np.float64)
+    length = float(segment.SegmentLength)
+    k0 = float(curvature(segment.StartRadiusOfCurvature))
+    k1 = float(curvature(segment.EndRadiusOfCurvature))
+
+    def direction(s):
+        return theta0 + k0 * s + (k1 - k0) * length * transition.integral(s / length)
+
+    # composite Gauss-Legendre nodes and weights on [0, 1]
+    sweep = abs(k0) * length + abs(k1 - k0) * length
+    panels = max(1, int(np.ceil(sweep / PANEL_ANGLE)))
+    nodes, weights = np.polynomial.legendre.leggauss(GAUSS_NODES)
+    edges = np.arange(panels) / panels
+    tau = (edges[:, None] + (nodes[None, :] + 1.0) / (2.0 * panels)).ravel()
+    w = np.tile(weights / (2.0 * panels), panels)
+
+    # integrate separately between the breaks of a piecewise shape, where it is not smooth
+    flat = u.reshape(-1)
+    x, y = x0, y0
+    edges = [0.0, *(b * length for b in transition.breaks), np.inf]
+    for a, b in zip(edges[:-1], edges[1:]):
+        lower, upper = np.minimum(flat, a), np.minimum(flat, b)
+        width = upper - lower
+        theta = direction(lower[:, None] + width[:, None] * tau[None, :])
+        x = x + width * (np.cos(theta) @ w)
+        y = y + width * (np.sin(theta) @ w)
+
+    return _result(x, y, direction(flat)).reshape(u.shape + (3,))
+
+
+def point_on_CLOTHOID(segment, u):
+    """
+    Position and direction on a clothoid, curvature linear in distance.
+    """
+    return _transition(segment, u, TRANSITIONS["CLOTHOID"])
+
+
+def point_on_BLOSSCURVE(segment, u):
+    """
+    Position and direction on a Bloss transition.
+    """
+    return _transition(segment, u, TRANSITIONS["BLOSSCURVE"])
+
+
+def point_on_COSINECURVE(segment, u):
+    """
+    Position and direction on a cosine transition.
+    """
+    return _transition(segment, u, TRANSITIONS["COSINECURVE"])
+
+
+def point_on_SINECURVE(segment, u):
+    """
+    Position and direction on a sine transition.
+    """
+    return _transition(segment, u, TRANSITIONS["SINECURVE"])
+
+
+def point_on_HELMERTCURVE(segment, u):
+    """
+    Position and direction on a Helmert (Schramm) transition.
+    """
+    return _transition(segment, u, TRANSITIONS["HELMERTCURVE"])
+
+
+def point_on_VIENNESEBEND(segment, u):
+    """
+    Position and direction on a Viennese bend.
+
+    Only the curvature polynomial is used; the term for the height of the
+    centre of gravity above the rails (GravityCenterLineHeight) is ignored.
+    """
+    return _transition(segment, u, TRANSITIONS["VIENNESEBEND"])
+
+
+HORIZONTAL_EVALUATORS = {
+    "LINE": point_on_LINE,
+    "CIRCULARARC": point_on_CIRCULARARC,
+    "CLOTHOID": point_on_CLOTHOID,
+    "BLOSSCURVE": point_on_BLOSSCURVE,
+    "COSINECURVE": point_on_COSINECURVE,
+    "SINECURVE": point_on_SINECURVE,
+    "HELMERTCURVE": point_on_HELMERTCURVE,
+    "VIENNESEBEND": point_on_VIENNESEBEND,
+}
+
+
+def segment_curvature(segment, u):
+    """
+    Signed curvature at distance `u` along a horizontal segment, positive turning left.
+    """
+    u = np.asarray(u, dtype=np.float64)
+    pt = predefined_type(segment)
+    k0 = curvature(segment.StartRadiusOfCurvature)
+    if pt == "LINE":
+        return np.zeros(u.shape)
+    if pt == "CIRCULARARC":
+        return np.full(u.shape, float(k0))
+    if pt not in TRANSITIONS:
+        raise NotImplementedError(f"Horizontal segment type {pt} is not supported.")
+    k1 = curvature(segment.EndRadiusOfCurvature)
+    t = np.clip(u / float(segment.SegmentLength), 0.0, 1.0)
+
+    return k0 + (k1 - k0) * TRANSITIONS[pt].shape(t)
+
+
+def segment_point(segment, u):
+    """
+    Position and direction at distance `u` along a horizontal segment of any supported type.
+    """
+    try:
+        evaluator = HORIZONTAL_EVALUATORS[predefined_type(segment)]
+    except KeyError:
+        raise NotImplementedError(
+            f"Horizontal segment type {predefined_type(segment)} is not supported."
+        ) from None
+
+    return evaluator(segment, u)
@@ -0,0 +1,299 @@
+"""
+Streaming import of LandXML 1.x alignments.
+
+`iter_alignments()` reads a LandXML file incrementally with
+`xml.etree.ElementTree.iterparse`. Each <Alignment> is converted as soon as
+its end tag is read and then released, as is every other element outside
+an alignment, so memory use grows neither with the number of alignments
+nor with other sections such as <Surfaces>. The horizontal geometry is read
+from the <Line>, <Curve> and <Spiral> elements of <CoordGeom>. The vertical
+geometry is read from the <PVI> and <ParaCurve> elements of the first
+<ProfAlign>.
+
+LandXML points are "northing easting [elevation]". They are returned as
+(x, y) = (easting, northing), in the linear unit of the file. Horizontal
+segments start at distance along 0. Profile stations are converted to
+distances along by subtracting the staStart of the alignment.
+
+`convert_landxml()` feeds the alignments to
+`alignment_tools.builder.AlignmentBuilder` in the same pass.
+"""
+
+from dataclasses import dataclass
+import math
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from alignment_tools.alignment import Alignment
+from alignment_tools.builder import LINEAR_UNITS
+from alignment_tools.builder import AlignmentBuilder
+from alignment_tools.builder import HorizontalSegment
+from alignment_tools.builder import VerticalSegment
+
+# LandXML spiType to IfcAlignmentHorizontalSegmentTypeEnum
+SPIRAL_TYPES = {
+    "clothoid": "CLOTHOID",
+    "bloss": "BLOSSCURVE",
+    "cosine": "COSINECURVE",
+    "sinusoid": "SINECURVE",
+    "biquadratic": "HELMERTCURVE",
+}
+
+# shortest gradient run between vertical curves that is kept
+MIN_GRADIENT_LENGTH = 1e-6
+
+
+@dataclass
+class LandXMLAlignment:
+    """
+    An alignment read from LandXML.
+
+    @param name: name attribute of the <Alignment>
+    @param station_start: staStart, the station at distance along 0
+    @param linear_unit: linear unit of the file, a key of `alignment_tools.builder.LINEAR_UNITS`
+    @param horizontal: `HorizontalSegment` list
+    @param vertical: `VerticalSegment` list, empty without a profile
+    """
+
+    name: str
+    station_start: float
+    linear_unit: str
+    horizontal: list
+    vertical: list
+
+    def to_alignment(self):
+        """
+        The `alignment_tools.alignment.Alignment` of the horizontal and vertical segments.
+        """
+        return Alignment(horizontal=self.horizontal, vertical=self.vertical)
+
+
+def _tag(elem: ET.Element) -> str:
+    # drop the namespace, LandXML 1.0, 1.1 and 1.2 use different ones
+    return elem.tag.rsplit("}", 1)[-1]
+
+
+def _child(elem: ET.Element, name: str) -> ET.Element:
+    for child in elem:
+        if _tag(child) == name:
+            return child
+    return None
+
+
+def _point(elem: ET.Element, name: str) -> np.ndarray:
+    """
+    (x, y) = (easting, northing) of a point child element.
+    """
+    child = _child(elem, name)
+    if child is None:
+        raise ValueError(f"<{_tag(elem)}> has no <{name}>.")
+    northing, easting = (float(v) for v in child.text.split()[:2])
+
+    return np.array((easting, northing))
+
+
+def _direction(vector: np.ndarray) -> float:
+    return math.atan2(vector[1], vector[0])
+
+
+def _line(elem: ET.Element) -> HorizontalSegment:
+    start = _point(elem, "Start")
+    chord = _point(elem, "End") - start
+    length = float(elem.get("length") or np.hypot(*chord))
+
+    return HorizontalSegment(tuple(start), _direction(chord), 0.0, 0.0, length, "LINE")
+
+
+def _curve(elem: ET.Element) -> HorizontalSegment:
+    start = _point(elem, "Start")
+    center = _point(elem, "Center")
+    end = _point(elem, "End")
+    sign = -1.0 if elem.get("rot") == "cw" else 1.0
+    radial = start - center
+    radius = float(elem.get("radius") or np.hypot(*radial))
+    length = elem.get("length")
+    if length is None:
+        sweep = _direction(end - center) - _direction(radial)
+        length = radius * ((sign * sweep) % (2.0 * math.pi))
+    # the tangent is the radial direction turned a quarter towards the curve
+    direction = _direction(radial) + sign * math.pi / 2.0
+
+    return HorizontalSegment(tuple(start), direction, sign * radius, sign * radius, float(length), "CIRCULARARC")
+
+
+def _spiral_radius(value: str, sign: float) -> float:
+    radius = float(value or "inf")
+    return 0.0 if math.isinf(radius) else sign * radius
+
+
+def _spiral(elem: ET.Element) -> HorizontalSegment:
+    spiral_type = elem.get("spiType", "clothoid")
+    if spiral_type not in SPIRAL_TYPES:
+        raise NotImplementedError(f"Spiral type {spiral_type} is not supported.")
+    start = _point(elem, "Start")
+    sign = -1.0 if elem.get("rot") == "cw" else 1.0
+
+    return HorizontalSegment(
+        tuple(start),
+        _direction(_point(elem, "PI") - start),
+        _spiral_radius(elem.get("radiusStart"), sign),
+        _spiral_radius(elem.get("radiusEnd"), sign),
+        float(elem.get("length")),
+        SPIRAL_TYPES[spiral_type],
+    )
+
+
+HORIZONTAL_ELEMENTS = {"Line": _line, "Curve": _curve, "Spiral": _spiral}
+
+
+def _coord_geom(elem: ET.Element) -> list:
+    segments = []
+    for child in elem:
+        tag = _tag(child)
+        if tag in HORIZONTAL_ELEMENTS:
+            segments.append(HORIZONTAL_ELEMENTS[tag](child))
+        elif tag != "Feature":
+            raise NotImplementedError(f"<{tag}> is not supported in <CoordGeom>.")
+    return segments
+
+
+def profile_segments(pvis: list, station_start: float = 0.0) -> list:
+    """
+    Vertical segments of a profile defined by points of vertical intersection.
+
+    @param pvis: (station, elevation, curve length) of each PVI, the length 0 for a plain PVI
+    @param station_start: station at distance along 0
+    @return: `VerticalSegment` list of gradient runs and parabolic vertical curves
+    """
+    segments = []
+    if len(pvis) < 2:
+        return segments
+    stations = np.array([p[0] for p in pvis], dtype=np.float64) - station_start
+    elevations = np.array([p[1] for p in pvis], dtype=np.float64)
+    lengths = np.array([p[2] for p in pvis], dtype=np.float64)
+    grades = np.diff(elevations) / np.diff(stations)
+
+    def gradient(start, end, height, grade):
+        if end - start > MIN_GRADIENT_LENGTH:
+            segments.append(VerticalSegment(start, end - start, height, grade, grade, None, "CONSTANTGRADIENT"))
+
+    distance, height = stations[0], elevations[0]
+    for i in range(1, len(pvis) - 1):
+        if lengths[i] <= 0.0:
+            gradient(distance, stations[i], height, grades[i - 1])
+            distance, height = stations[i], elevations[i]
+            continue
+        half = lengths[i] / 2.0
+        g0, g1 = grades[i - 1], grades[i]
+        vpc = stations[i] - half
+        gradient(distance, vpc, height, g0)
+        k = (g1 - g0) / lengths[i]
+        segments.append(
+            VerticalSegment(
+                vpc, lengths[i], elevations[i] - g0 * half, g0, g1, 1.0 / k if k else None, "PARABOLICARC"
+            )
+        )
+        distance, height = stations[i] + half, elevations[i] + g1 * half
+    gradient(distance, stations[-1], height, grades[-1])
+
+    return segments
+
+
+def _prof_align(elem: ET.Element) -> list:
+    pvis = []
+    for child in elem:
+        tag = _tag(child)
+        if tag in ("PVI", "ParaCurve"):
+            station, elevation = (float(v) for v in child.text.split()[:2])
+            pvis.append((station, elevation, float(child.get("length", 0.0))))
+        elif tag != "Feature":
+            raise NotImplementedError(f"<{tag}> is not supported in <ProfAlign>.")
+    return pvis
+
+
+def iter_alignments(source):
+    """
+    Stream the alignments of a LandXML file.
+
+    @param source: path or binary file object of the LandXML file
+    @return: generator of `LandXMLAlignment`
+    """
+    linear_unit = "meter"
+    stack = []
+    open_alignments = 0
+    coord_geom, pvis = None, None
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        tag = _tag(elem)
+        if event == "start":
+            stack.append(elem)
+            open_alignments += tag == "Alignment"
+            continue
+        stack.pop()
+
+        if tag in ("Metric", "Imperial") and _tag(stack[-1]) == "Units":
+            linear_unit = elem.get("linearUnit", linear_unit)
+            if linear_unit not in LINEAR_UNITS:
+                raise NotImplementedError(f"Linear unit {linear_unit} is not supported.")
+        elif tag == "CoordGeom":
+            coord_geom = _coord_geom(elem)
+            elem.clear()
+        elif tag == "ProfAlign":
+            if pvis is None:
+                pvis = _prof_align(elem)
+            elem.clear()
+        elif tag == "Alignment":
+            open_alignments -= 1
+            station_start = float(elem.get("staStart", 0.0))
+            yield LandXMLAlignment(
+                name=elem.get("name"),
+                station_start=station_start,
+                linear_unit=linear_unit,
+                horizontal=coord_geom or [],
+                vertical=profile_segments(pvis or [], station_start),
+            )
+            coord_geom, pvis = None, None
+
+        # release everything read outside an alignment, e.g. <Surfaces> or
+        # <CgPoints>, and the alignments themselves, or the root would
+        # collect the whole file
+        if open_alignments == 0 and stack:
+            elem.clear()
+            stack[-1].remove(elem)
+
+
+def read_landxml(source) -> list:
+    """
+    All alignments of a LandXML file, see `iter_alignments()`.
+    """
+    return list(iter_alignments(source))
+
+
+def convert_landxml(source, name: str = None, schema: str = "IFC4X3_ADD2") -> AlignmentBuilder:
+    """
+    Convert the alignments of a LandXML file to an IFC 4.3 model in one streaming pass.
+
+    The model takes the linear unit of the file. Each alignment gets its
+    horizontal layout, its vertical layout if it has a profile, and its
+    staStart as the station of a referent at its start.
+
+    @param source: path or binary file object of the LandXML file
+    @param name: name of the project
+    @param schema: schema of the model
+    @return: the builder, with the model in `.file` and the IfcAlignments in `.alignments`
+    """
+    builder = None
+    for alignment in iter_alignments(source):
+        if builder is None:
+            builder = AlignmentBuilder(name=name or "LandXML", linear_unit=alignment.linear_unit, schema=schema)
+        builder.add_alignment(
+            alignment.name,
+            alignment.horizontal,
+            alignment.vertical,
+            station_start=alignment.station_start,
+        )
+    if builder is None:
+        raise ValueError("No alignments found.")
+    builder.finalize()
+
+    return builder
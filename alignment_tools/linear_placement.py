@@ -0,0 +1,184 @@
+"""
+Batch resolution of IfcLinearPlacement to world placement matrices.
+
+Resolving linear placements one at a time, e.g. with
+`ifcopenshell.util.placement.get_local_placement()`, maps and evaluates the
+basis curve once per product. Here the placements of a model are grouped by
+the curve of their IfcPointByDistanceExpression, each curve is mapped once
+with `alignment_tools.evaluator.CurveEvaluator`, and all distances along it
+are evaluated in a single vectorized pass.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+
+import ifcopenshell
+import ifcopenshell.geom as geom
+import ifcopenshell.util.placement
+
+from alignment_tools.evaluator import CurveEvaluator
+
+X_AXIS = (1.0, 0.0, 0.0)
+Z_AXIS = (0.0, 0.0, 1.0)
+
+
+@dataclass
+class ResolvedPlacements:
+    """
+    World placement matrices of the products placed by IfcLinearPlacement.
+
+    @param product_ids: (N,) sorted step ids of the placed products
+    @param matrices: (N, 4, 4) world placement matrix of each product, in project length units
+    """
+
+    product_ids: np.ndarray
+    matrices: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    def lookup(self, product_ids: np.ndarray) -> np.ndarray:
+        """
+        (N, 4, 4) placement matrices of an array of product ids.
+        """
+        product_ids = np.atleast_1d(np.asarray(product_ids, dtype=np.int64))
+        idx = np.searchsorted(self.product_ids, product_ids)
+        idx = np.minimum(idx, len(self.product_ids) - 1)
+        missing = self.product_ids[idx] != product_ids
+        if missing.any():
+            raise KeyError(f"No linear placement for products {product_ids[missing].tolist()}.")
+
+        return self.matrices[idx]
+
+    def matrix(self, product: ifcopenshell.entity_instance) -> np.ndarray:
+        """
+        (4, 4) placement matrix of a product.
+        """
+        return self.lookup(product.id())[0]
+
+
+def _direction(direction: ifcopenshell.entity_instance, default: tuple) -> tuple:
+    if direction is None:
+        return default
+    return tuple(direction.DirectionRatios) + (0.0,) * (3 - len(direction.DirectionRatios))
+
+
+def _frame_from_axes(axis: np.ndarray, ref: np.ndarray) -> np.ndarray:
+    """
+    (N, 3, 3) rotations with columns x, y, z from (N, 3) z axes and approximate x axes.
+    """
+    z = axis / np.linalg.norm(axis, axis=1, keepdims=True)
+    x = ref - np.einsum("ij,ij->i", ref, z)[:, None] * z
+    x /= np.linalg.norm(x, axis=1, keepdims=True)
+    y = np.cross(z, x)
+
+    return np.stack((x, y, z), axis=2)
+
+
+def _curve_frames(evaluator: CurveEvaluator, distances: np.ndarray, follow_cant: bool):
+    """
+    Positions, (N, 3, 3) curve axes and (N, 3, 3) placement rotations along a curve.
+    """
+    pts = evaluator.evaluate(distances)
+    curve = np.stack((pts.tangent, pts.normal, pts.up), axis=2)
+    # orthonormalize, the kernel's axes are orthogonal to about 1e-5 only
+    x = pts.tangent
+    y = pts.normal - np.einsum("ij,ij->i", pts.normal, x)[:, None] * x
+    y /= np.linalg.norm(y, axis=1, keepdims=True)
+    if follow_cant:
+        return pts.position, curve, np.stack((x, y, np.cross(x, y)), axis=2)
+
+    # keep the local y axis horizontal
+    up = np.broadcast_to([0.0, 0.0, 1.0], x.shape)
+    lateral = np.cross(up, x)
+    lateral /= np.linalg.norm(lateral, axis=1, keepdims=True)
+    frames = np.stack((x, lateral, np.cross(x, lateral)), axis=2)
+
+    return pts.position, curve, frames
+
+
+def resolve_linear_placements(
+    model: ifcopenshell.file,
+    follow_cant: bool = True,
+    settings: geom.settings = None,
+) -> ResolvedPlacements:
+    """
+    World placement matrices of all products placed by IfcLinearPlacement.
+
+    The placement frame has its x axis along the tangent of the basis curve.
+    With `follow_cant` the frame is rolled with the cant of the curve (the
+    local axes of an IfcSegmentedReferenceCurve), otherwise its y axis is
+    kept horizontal. Positions are the same as those of
+    `ifcopenshell.util.placement.get_local_placement()`.
+    OffsetLongitudinal, OffsetLateral and OffsetVertical are always applied
+    along the x, y and z axes of the curve including cant, Axis and
+    RefDirection rotate relative to the placement frame, and the result is
+    placed relative to PlacementRelTo.
+
+    @param model: the model
+    @param follow_cant: True to roll the placements with the cant of the curve
+    @param settings: geometry settings used to map the curves
+    @return: placement matrices keyed by product id
+    """
+    by_curve = defaultdict(list)
+    for placement in model.by_type("IfcLinearPlacement"):
+        if not placement.PlacesObject:
+            continue
+        location = placement.RelativePlacement.Location
+        if not location.is_a("IfcPointByDistanceExpression"):
+            raise NotImplementedError(f"{location} is not supported as location of {placement}.")
+        if not location.DistanceAlong.is_a("IfcLengthMeasure"):
+            raise NotImplementedError(f"{location.DistanceAlong} is not supported as distance along.")
+        by_curve[location.BasisCurve.id()].append(placement)
+
+    product_ids, matrices = [], []
+    parents = {}
+    for curve_id, placements in by_curve.items():
+        locations = [p.RelativePlacement.Location for p in placements]
+        distances = np.array([loc.DistanceAlong.wrappedValue for loc in locations])
+        offsets = np.array(
+            [
+                [loc.OffsetLongitudinal or 0.0, loc.OffsetLateral or 0.0, loc.OffsetVertical or 0.0]
+                for loc in locations
+            ]
+        )
+
+        evaluator = CurveEvaluator(model.by_id(curve_id), settings)
+        position, curve, frames = _curve_frames(evaluator, distances, follow_cant)
+
+        m = np.zeros((len(placements), 4, 4))
+        m[:, :3, :3] = frames
+        m[:, :3, 3] = position + np.einsum("nij,nj->ni", curve, offsets)
+        m[:, 3, 3] = 1.0
+
+        oriented = [
+            i
+            for i, p in enumerate(placements)
+            if p.RelativePlacement.Axis is not None or p.RelativePlacement.RefDirection is not None
+        ]
+        if oriented:
+            axis = np.array([_direction(placements[i].RelativePlacement.Axis, Z_AXIS) for i in oriented])
+            ref = np.array([_direction(placements[i].RelativePlacement.RefDirection, X_AXIS) for i in oriented])
+            m[oriented, :3, :3] = frames[oriented] @ _frame_from_axes(axis, ref)
+
+        # placements relative to the same parent are transformed together
+        by_parent = defaultdict(list)
+        for i, p in enumerate(placements):
+            by_parent[p.PlacementRelTo.id() if p.PlacementRelTo else 0].append(i)
+        for parent_id, idx in by_parent.items():
+            if parent_id not in parents:
+                parent = model.by_id(parent_id) if parent_id else None
+                parents[parent_id] = ifcopenshell.util.placement.get_local_placement(parent)
+            m[idx] = parents[parent_id] @ m[idx]
+
+        rows = [i for i, p in enumerate(placements) for _ in p.PlacesObject]
+        product_ids.extend(o.id() for p in placements for o in p.PlacesObject)
+        matrices.append(m[rows])
+
+    product_ids = np.array(product_ids, dtype=np.int64)
+    matrices = np.concatenate(matrices) if matrices else np.zeros((0, 4, 4))
+    order = np.argsort(product_ids)
+
+    return ResolvedPlacements(product_ids=product_ids[order], matrices=matrices[order])
@@ -0,0 +1,137 @@
+"""
+Columnar container for points calculated along an alignment.
+
+`AlignmentPoints` holds the rows of `Alignment.evaluate()` and
+`Alignment.create_shape()` in a NumPy structured array with one named field
+per column in `alignment_tools.alignment.COLUMNS`. Columns, station ranges,
+the plain (N, 8) array and a pandas DataFrame are all views of the same
+memory, so a million-point evaluation is held once however it is looked at.
+
+With `compact=True` the Direction, Cant and Cant_Rotation columns are stored
+as float32, which keeps directions to better than 1e-6 rad and cant to well
+below a micrometre. Distances, coordinates and heights stay float64 since
+map coordinates need its precision. A compact container has no plain array
+view and `to_numpy()` returns a copy.
+
+Points are saved as `.npy` files, which keep the column names and types and
+can be loaded memory-mapped.
+"""
+
+import numpy as np
+import pandas as pd
+
+from alignment_tools.alignment import COLUMNS
+
+# columns whose range allows float32 in compact containers
+COMPACT_COLUMNS = ("Direction", "Cant", "Cant_Rotation")
+
+POINT_DTYPE = np.dtype([(name, np.float64) for name in COLUMNS])
+COMPACT_DTYPE = np.dtype([(name, np.float32 if name in COMPACT_COLUMNS else np.float64) for name in COLUMNS])
+
+
+class AlignmentPoints:
+    """
+    Points along an alignment as a structured array with the columns in `COLUMNS`.
+
+    Rows are expected in order of increasing Distance, as returned by
+    `Alignment.create_shape()`, for `between()` to find station ranges.
+
+    @param records: (N,) structured array with dtype `POINT_DTYPE` or `COMPACT_DTYPE`
+    """
+
+    def __init__(self, records: np.ndarray) -> None:
+        if records.dtype not in (POINT_DTYPE, COMPACT_DTYPE):
+            raise ValueError(f"Unsupported point dtype {records.dtype}.")
+        self.records = records
+
+    @classmethod
+    def from_array(cls, points: np.ndarray, compact: bool = False) -> "AlignmentPoints":
+        """
+        Wrap an (N, 8) array with the columns in `COLUMNS`.
+
+        A C-contiguous float64 array is wrapped without copying unless
+        `compact` is set, in which case it is converted once.
+
+        @param points: (N, 8) array as returned by `Alignment.create_shape()`
+        @param compact: True to store the columns in `COMPACT_COLUMNS` as float32
+        @return: points
+        """
+        points = np.ascontiguousarray(points, dtype=np.float64)
+        if points.ndim != 2 or points.shape[1] != len(COLUMNS):
+            raise ValueError(f"Expected an (N, {len(COLUMNS)}) array, got {points.shape}.")
+        records = points.view(POINT_DTYPE)[:, 0]
+        if compact:
+            records = records.astype(COMPACT_DTYPE)
+        return cls(records)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = False) -> "AlignmentPoints":
+        """
+        Read points written by `save()`.
+
+        @param path: path to the .npy file
+        @param mmap: True to map the file read-only instead of reading it into memory
+        @return: points
+        """
+        return cls(np.load(path, mmap_mode="r" if mmap else None))
+
+    def save(self, path: str) -> None:
+        """
+        Write the points to a .npy file.
+
+        @param path: path to the .npy file
+        """
+        np.save(path, self.records)
+
+    @property
+    def compact(self) -> bool:
+        return self.records.dtype == COMPACT_DTYPE
+
+    @property
+    def nbytes(self) -> int:
+        return self.records.nbytes
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        """
+        View of a column by name, e.g. points["X"].
+        """
+        return self.records[column]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        if copy is False and self.compact:
+            raise ValueError("Compact points have no (N, 8) view.")
+        if copy is False and dtype is not None and np.dtype(dtype) != np.float64:
+            raise ValueError(f"Points have no (N, 8) view as {np.dtype(dtype)}.")
+        array = self.to_numpy()
+        # compact points are converted to a new array anyway
+        return array.astype(dtype or array.dtype, copy=bool(copy) and not self.compact)
+
+    def to_numpy(self) -> np.ndarray:
+        """
+        Points as an (N, 8) float64 array, a view unless the points are compact.
+        """
+        if self.compact:
+            return np.stack([self.records[name].astype(np.float64) for name in COLUMNS], axis=1)
+        return self.records.view(np.float64).reshape(len(self.records), len(COLUMNS))
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Points as a DataFrame whose columns are views of the records.
+        """
+        return pd.DataFrame({name: self.records[name] for name in COLUMNS}, copy=False)
+
+    def between(self, start: float = None, end: float = None) -> "AlignmentPoints":
+        """
+        View of the points with start <= Distance <= end.
+
+        @param start: first distance along, None for the start of the points
+        @param end: last distance along, None for the end of the points
+        @return: points sharing memory with these
+        """
+        distances = self.records["Distance"]
+        i = 0 if start is None else int(np.searchsorted(distances, start, side="left"))
+        j = len(distances) if end is None else int(np.searchsorted(distances, end, side="right"))
+        return AlignmentPoints(self.records[i:j])
@@ -0,0 +1,140 @@
+"""
+Opt-in timing of the stages of `Alignment.create_shape()` and `Alignment.evaluate()`.
+
+Pass an `Instrumentation` as `instrumentation=` to record where the time
+of a call goes. Every entry is keyed by pipeline stage and segment type
+and counts calls, cumulative seconds and points produced:
+
+- "stations": the distance grid and the insertion of critical stations
+- "horizontal", "vertical", "cant": evaluation of the segments of a
+  layout, one entry per PredefinedType. The entry with segment type None is
+  the mapping of the distances onto the segments of the layout.
+- "cant_rotation": the rotation of the points by the cant, for alignments
+  with a rail head distance
+- "assembly": in adaptive sampling, the tolerance checks and the insertion
+  of refined points. Its points are the points inserted.
+
+Without an instrumentation object the evaluation runs through the same
+code with `NULL_INSTRUMENTATION`, which reads no clock and records
+nothing. The entries can be read after the call or written to a .json or
+.csv profile with `Instrumentation.write()`, and they accumulate over
+calls. This makes it possible to profile a whole production model and
+find the slowest segment types.
+"""
+
+from contextlib import contextmanager
+from contextlib import nullcontext
+from dataclasses import asdict
+from dataclasses import dataclass
+import time
+
+from alignment_tools.deviation import write_report
+
+STAGES = ("stations", "horizontal", "vertical", "cant", "cant_rotation", "assembly")
+
+
+@dataclass
+class StageTiming:
+    """
+    Accumulated timing of a stage, for one segment type.
+
+    @param stage: one of `STAGES`
+    @param segment_type: PredefinedType of the segments, None for work not tied to a segment type
+    @param calls: number of times the stage ran
+    @param seconds: cumulative time
+    @param points: number of points produced
+    """
+
+    stage: str
+    segment_type: str = None
+    calls: int = 0
+    seconds: float = 0.0
+    points: int = 0
+
+    @property
+    def seconds_per_point(self) -> float:
+        return self.seconds / self.points if self.points else 0.0
+
+
+class Instrumentation:
+    """
+    Collect `StageTiming` entries keyed by (stage, segment type).
+    """
+
+    def __init__(self) -> None:
+        self.timings = {}
+
+    def record(self, stage: str, segment_type: str, seconds: float, points: int = 0) -> None:
+        """
+        Add a call of a stage to its entry.
+        """
+        key = (stage, segment_type)
+        timing = self.timings.get(key)
+        if timing is None:
+            timing = self.timings[key] = StageTiming(stage, segment_type)
+        timing.calls += 1
+        timing.seconds += seconds
+        timing.points += points
+
+    @contextmanager
+    def measure(self, stage: str, segment_type: str = None, points: int = 0):
+        """
+        Record the time spent in a `with` block.
+
+        Yields a `StageTiming` of this call whose `points` can be set in the
+        block, if they are only known at its end.
+        """
+        call = StageTiming(stage, segment_type, points=points)
+        start = time.perf_counter()
+        try:
+            yield call
+        finally:
+            self.record(stage, segment_type, time.perf_counter() - start, call.points)
+
+    def by_stage(self) -> dict:
+        """
+        `StageTiming` of each stage summed over its segment types, in the order of `STAGES`.
+        """
+        totals = {}
+        for timing in self.timings.values():
+            total = totals.setdefault(timing.stage, StageTiming(timing.stage))
+            total.calls += timing.calls
+            total.seconds += timing.seconds
+            total.points += timing.points
+
+        return {stage: totals[stage] for stage in sorted(totals, key=STAGES.index)}
+
+    def hottest(self, count: int = None) -> list:
+        """
+        `StageTiming` entries, most time first.
+        """
+        timings = sorted(self.timings.values(), key=lambda t: t.seconds, reverse=True)
+        return timings[:count] if count is not None else timings
+
+    @property
+    def seconds(self) -> float:
+        return sum(t.seconds for t in self.timings.values())
+
+    def write(self, path: str) -> None:
+        """
+        Write the entries, most time first, to a .json or .csv profile.
+        """
+        write_report(
+            [{**asdict(t), "seconds_per_point": t.seconds_per_point} for t in self.hottest()],
+            path,
+        )
+
+
+class NullInstrumentation(Instrumentation):
+    """
+    Instrumentation that reads no clock and records nothing.
+    """
+
+    def record(self, stage: str, segment_type: str, seconds: float, points: int = 0) -> None:
+        pass
+
+    def measure(self, stage: str, segment_type: str = None, points: int = 0):
+        return nullcontext(StageTiming(stage, segment_type, points=points))
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
@@ -0,0 +1,113 @@
+"""
+Inverse query from points to station and offset along an alignment.
+
+`ProjectionIndex` samples the horizontal layout of an `Alignment` and puts
+the samples in a k-d tree. Each query point starts from the distance of its
+nearest sample, which is then refined with Newton's method on the closed
+form of the horizontal segments: the distance along is moved until the
+vector from the alignment to the point is perpendicular to the tangent.
+Both steps are vectorized over all query points, so the cost per point is a
+tree lookup plus a few segment evaluations instead of a scan over all
+segments.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from alignment_tools.alignment import DIRECTION
+from alignment_tools.alignment import X
+from alignment_tools.alignment import Y
+from alignment_tools.alignment import Z
+
+# largest change of direction between samples of the index, radians
+INDEX_ANGLE = 0.05
+MAX_ITERATIONS = 20
+
+
+@dataclass
+class StationOffset:
+    """
+    Location of points relative to an alignment.
+
+    @param distance: (N,) distance along the alignment of the foot point
+    @param offset: (N,) signed horizontal offset from the alignment, positive to the left
+    @param height: (N,) height of the point above the vertical alignment, NaN for 2D points
+    @param on_alignment: (N,) False if the foot point is clamped to the start or end
+        of the alignment, i.e. the point lies beyond its extent
+    """
+
+    distance: np.ndarray
+    offset: np.ndarray
+    height: np.ndarray
+    on_alignment: np.ndarray
+
+
+class ProjectionIndex:
+    """
+    Spatial index for projecting points onto the horizontal layout of an alignment.
+
+    @param alignment: the alignment to project onto
+    @param spacing: maximum distance between samples of the index, in project length units
+    @param tol: convergence tolerance of the distance along
+    """
+
+    def __init__(self, alignment, spacing: float = 10.0, tol: float = 1e-8) -> None:
+        self.alignment = alignment
+        self.tol = tol
+        samples = alignment.create_shape(angle_tolerance=INDEX_ANGLE, max_spacing=spacing)
+        self.distances = samples[:, 0]
+        self.tree = cKDTree(samples[:, [X, Y]])
+
+    def project(self, points: np.ndarray) -> StationOffset:
+        """
+        Station and offset of an array of points.
+
+        @param points: (N, 2) XY or (N, 3) XYZ points in project length units
+        @return: distance along, offset and height for each point
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        alignment = self.alignment
+        start, end = alignment.start, alignment.end
+
+        _, nearest = self.tree.query(points[:, :2])
+        distance = self.distances[nearest]
+        active = np.arange(len(points))
+
+        for _ in range(MAX_ITERATIONS):
+            if len(active) == 0:
+                break
+            d = distance[active]
+            pts = alignment.evaluate(d)
+            kappa = alignment.curvature(d)
+            tangent = np.column_stack((np.cos(pts[:, DIRECTION]), np.sin(pts[:, DIRECTION])))
+            r = points[active, :2] - pts[:, [X, Y]]
+            along = np.einsum("ij,ij->i", r, tangent)
+            across = r[:, 1] * tangent[:, 0] - r[:, 0] * tangent[:, 1]
+
+            # derivative of the tangential residual; fall back to a plain step
+            # for points near the centre of curvature
+            slope = 1.0 - kappa * across
+            slope = np.where(slope > 0.1, slope, 1.0)
+            updated = np.clip(d + along / slope, start, end)
+            distance[active] = updated
+            active = active[np.abs(updated - d) > self.tol * max(1.0, abs(end))]
+
+        pts = alignment.evaluate(distance)
+        r = points[:, :2] - pts[:, [X, Y]]
+        direction = pts[:, DIRECTION]
+        offset = r[:, 1] * np.cos(direction) - r[:, 0] * np.sin(direction)
+        if points.shape[1] > 2:
+            height = points[:, 2] - pts[:, Z]
+        else:
+            height = np.full(len(points), np.nan)
+        along = r[:, 0] * np.cos(direction) + r[:, 1] * np.sin(direction)
+        clamped = ((distance <= start) & (along < 0.0)) | ((distance >= end) & (along > 0.0))
+
+        return StationOffset(
+            distance=distance,
+            offset=offset,
+            height=height,
+            on_alignment=~clamped,
+        )
@@ -0,0 +1,251 @@
+"""
+Columnar, memory-mapped store for the bSI-RailwayRoom alignment reference tables.
+
+The alignment test set ships one tab-delimited ToolboxProcess `.txt` file per
+test case, laid out as::
+
+    alignment_testset/ToolboxProcess-<H|V|C>/<Layout>Alignment/<SegmentType>/<case>.txt
+
+`ReferenceStore.build()` parses every table once and packs them into a single
+float64 `.npy` array (columns `CurveLength, X, Y, Z, BaseCurve`) plus a JSON
+index of row ranges keyed by layout, segment type and case name.
+`ReferenceStore.load()` returns a read-only view into the memory-mapped array,
+so loading a case copies nothing. Each index entry records the size and
+modification time of its source file; a stale or missing entry triggers an
+incremental rebuild that re-parses only the changed files.
+
+Usage::
+
+    python -m alignment_tools.reference_store ~/src/IFC-Rail-Unit-Test-Reference-Code/alignment_testset
+"""
+
+import argparse
+import glob
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+REFERENCE_COLUMNS = ["CurveLength", "X", "Y", "Z", "BaseCurve"]
+
+INDEX_FILE = "index.json"
+STORE_VERSION = 1
+
+
+def read_reference_table(path: str) -> np.ndarray:
+    """
+    Parse a ToolboxProcess reference table into an (N, 5) float64 array.
+
+    Non-numeric cells (e.g. an empty BaseCurve column) are stored as NaN.
+    """
+    df = pd.read_csv(path, delimiter="\t", skiprows=2, header=None)
+    df = df.iloc[:, : len(REFERENCE_COLUMNS)].apply(pd.to_numeric, errors="coerce")
+    table = np.full((len(df), len(REFERENCE_COLUMNS)), np.nan)
+    table[:, : df.shape[1]] = df.to_numpy(dtype=np.float64)
+
+    return table
+
+
+def table_key(layout: str, segment: str, case: str) -> str:
+    """
+    Index key of a reference table, e.g. `H/Clothoid/Clothoid_100.0_300_inf_1_Meter`.
+    """
+    return f"{layout}/{segment}/{case}"
+
+
+def _source_stat(path: str) -> list[int]:
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+class ReferenceStore:
+    """
+    Packed, memory-mapped reference tables for one alignment test set.
+
+    @param source_dir: the `alignment_testset` directory containing `ToolboxProcess-*`
+    @param store_dir: directory for the packed store, defaults to `<source_dir>/.reference_store`
+    """
+
+    def __init__(self, source_dir: str, store_dir: str = None) -> None:
+        self.source_dir = os.path.abspath(source_dir)
+        if store_dir is None:
+            store_dir = os.path.join(self.source_dir, ".reference_store")
+        self.store_dir = os.path.abspath(store_dir)
+        self._index = None
+        self._data = None
+
+    def discover(self) -> dict[str, str]:
+        """
+        Map of index key to source path for every reference table on disk.
+        """
+        pattern = os.path.join(self.source_dir, "ToolboxProcess-*", "*", "*", "*.txt")
+        sources = {}
+        for path in sorted(glob.glob(pattern)):
+            seg_dir = os.path.dirname(path)
+            layout = os.path.basename(os.path.dirname(os.path.dirname(seg_dir)))
+            layout = layout.split("-", 1)[1]
+            case = os.path.splitext(os.path.basename(path))[0]
+            sources[table_key(layout, os.path.basename(seg_dir), case)] = path
+
+        return sources
+
+    def _read_index(self) -> dict:
+        path = os.path.join(self.store_dir, INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            index = json.load(f)
+        if index.get("version") != STORE_VERSION:
+            return None
+
+        return index
+
+    def _open(self) -> None:
+        index = self._read_index()
+        if index is None:
+            self.build()
+            index = self._read_index()
+        self._index = index
+        data_file = os.path.join(self.store_dir, index["data"])
+        self._data = np.load(data_file, mmap_mode="r") if index["rows"] else np.empty((0, 5))
+
+    def _is_stale(self, entry: dict) -> bool:
+        path = os.path.join(self.source_dir, entry["source"])
+        try:
+            return _source_stat(path) != entry["stat"]
+        except FileNotFoundError:
+            return True
+
+    def build(self) -> int:
+        """
+        Pack all reference tables into the store, re-parsing only changed sources.
+
+        The data file is written under a fresh name and the index is replaced
+        atomically last, through a temporary file and `os.replace()`, so
+        concurrent readers always see a consistent store. Only the data file
+        of the previous index is removed afterwards, which leaves the data
+        files of other builders running on the same store alone.
+
+        @return: number of tables that were (re)parsed
+        """
+        os.makedirs(self.store_dir, exist_ok=True)
+        old_index = self._read_index()
+        old_entries = old_index["entries"] if old_index else {}
+        old_data = None
+        if old_index and old_index["rows"]:
+            old_data = np.load(
+                os.path.join(self.store_dir, old_index["data"]), mmap_mode="r"
+            )
+
+        tables = {}
+        entries = {}
+        parsed = 0
+        for key, path in self.discover().items():
+            source = os.path.relpath(path, self.source_dir)
+            stat = _source_stat(path)
+            old = old_entries.get(key)
+            if old_data is not None and old and old["source"] == source and old["stat"] == stat:
+                tables[key] = old_data[old["offset"] : old["offset"] + old["count"]]
+            else:
+                tables[key] = read_reference_table(path)
+                parsed += 1
+            entries[key] = {"source": source, "stat": stat}
+
+        rows = sum(len(t) for t in tables.values())
+        data_name = f"tables-{uuid.uuid4().hex}.npy"
+        if rows:
+            data = np.lib.format.open_memmap(
+                os.path.join(self.store_dir, data_name),
+                mode="w+",
+                dtype=np.float64,
+                shape=(rows, len(REFERENCE_COLUMNS)),
+            )
+            offset = 0
+            for key, table in tables.items():
+                data[offset : offset + len(table)] = table
+                entries[key].update(offset=offset, count=len(table))
+                offset += len(table)
+            data.flush()
+            del data
+
+        index = {
+            "version": STORE_VERSION,
+            "columns": REFERENCE_COLUMNS,
+            "data": data_name,
+            "rows": rows,
+            "entries": entries,
+        }
+        tmp = os.path.join(self.store_dir, f"{INDEX_FILE}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp, os.path.join(self.store_dir, INDEX_FILE))
+
+        # only the data file of the replaced index: another builder may be writing a new one
+        del old_data
+        if old_index and old_index["data"] != data_name:
+            try:
+                os.remove(os.path.join(self.store_dir, old_index["data"]))
+            except OSError:
+                pass
+
+        self._index = None
+        self._data = None
+
+        return parsed
+
+    def keys(self) -> list[str]:
+        """
+        Index keys of all tables in the store.
+        """
+        if self._index is None:
+            self._open()
+
+        return list(self._index["entries"])
+
+    def load(self, layout: str, segment: str, case: str) -> np.ndarray:
+        """
+        Read-only (N, 5) view of one reference table in the memory-mapped store.
+
+        The source file is checked on every call; if it changed since the store
+        was built, the store is rebuilt before the table is returned.
+
+        @param layout: layout tag, `H`, `V` or `C`
+        @param segment: segment type directory, e.g. `Clothoid`
+        @param case: case name, i.e. the `.txt` file name without suffix
+        @return: columns `CurveLength, X, Y, Z, BaseCurve`
+        """
+        key = table_key(layout, segment, case)
+        if self._index is None:
+            self._open()
+        entry = self._index["entries"].get(key)
+        if entry is None or self._is_stale(entry):
+            self.build()
+            self._open()
+            entry = self._index["entries"].get(key)
+            if entry is None:
+                raise KeyError(f"No reference table '{key}' in {self.source_dir}.")
+
+        return self._data[entry["offset"] : entry["offset"] + entry["count"]]
+
+    def load_frame(self, layout: str, segment: str, case: str) -> pd.DataFrame:
+        """
+        `load()` wrapped in a DataFrame with named columns, without copying.
+        """
+        table = self.load(layout, segment, case)
+
+        return pd.DataFrame(table, columns=REFERENCE_COLUMNS, copy=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Pack the ToolboxProcess reference tables into a memory-mapped store."
+    )
+    parser.add_argument("source_dir", help="alignment_testset directory")
+    parser.add_argument("--store", default=None, help="store directory")
+    args = parser.parse_args()
+
+    store = ReferenceStore(args.source_dir, args.store)
+    parsed = store.build()
+    print(f"[INFO] {len(store.keys())} tables in {store.store_dir} ({parsed} parsed).")
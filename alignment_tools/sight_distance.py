@@ -0,0 +1,288 @@
+"""
+Available sight distance along an alignment, over the profile and in plan.
+
+The sight distance at a station is the distance along the alignment, in
+stations, to the first target hidden from the observer, evaluated on a grid of stations in
+the direction of travel:
+
+- Profile: the eye and the target are at given heights above the road
+  surface. A target is hidden if the road surface between them rises above
+  the line of sight, which limits the sight distance over crest curves.
+- Headlights: over sag curves at night the road ahead is seen where the
+  headlight beam, diverging upward from the grade at the observer, still
+  lies above the surface.
+- Plan: the eye and the target are at the offset of the driver's path and
+  the line of sight has to pass on the near side of an obstruction, e.g. a
+  wall or a cut slope at a constant offset on the inside of a horizontal
+  curve.
+
+All use a horizon sweep instead of checking every pair of stations. The
+observers are advanced together one grid step ahead at a time, and each
+keeps its horizon: the steepest slope to the surface, or the angle to the
+obstruction, seen so far. A target is hidden once it lies below the
+horizon, and the observer is dropped from the sweep. The work is the
+number of stations times the steps to the longest sight distance, done
+in NumPy operations over all observers still looking.
+
+Distances are in the length unit of the alignment. The default heights are
+the metric AASHTO values (1.08 m eye, 0.60 m object for stopping sight
+distance, 1.08 m for passing, 0.60 m headlights with a 1 degree beam).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from alignment_tools.alignment import DIRECTION
+from alignment_tools.alignment import X
+from alignment_tools.alignment import Y
+from alignment_tools.alignment import Z
+from alignment_tools.stations import distance_grid
+from alignment_tools.stations import merge_stations
+
+
+def _horizon_sweep(distances: np.ndarray, max_distance: float, reverse: bool, visible) -> np.ndarray:
+    """
+    Sweep the observers at `distances` ahead one station at a time.
+
+    `visible(observers, targets, ahead)` is called for each step with the
+    indices of the observers still looking, the indices of the stations one
+    step further ahead and their distance from the observers. It updates
+    the horizons of the observers and returns the mask of visible targets.
+
+    @return: (N,) distance to the last visible station, `max_distance` where
+        no station up to `max_distance` or the end of the grid is hidden
+    """
+    distances = np.asarray(distances, dtype=np.float64)
+    n = len(distances)
+    result = np.full(n, float(max_distance))
+    observers = np.arange(n)
+    last = np.zeros(n)
+    for k in range(1, n):
+        observers = observers[observers + k < n] if not reverse else observers[observers - k >= 0]
+        targets = observers - k if reverse else observers + k
+        ahead = np.abs(distances[targets] - distances[observers])
+        within = ahead <= max_distance
+        observers, targets, ahead = observers[within], targets[within], ahead[within]
+        if len(observers) == 0:
+            break
+        hidden = ~visible(observers, targets, ahead)
+        result[observers[hidden]] = last[observers[hidden]]
+        last[observers] = ahead
+        observers = observers[~hidden]
+
+    return result
+
+
+def profile_sight_distance(
+    distances: np.ndarray,
+    heights: np.ndarray,
+    eye_height: float = 1.08,
+    object_height: float = 0.60,
+    max_distance: float = 1000.0,
+    reverse: bool = False,
+) -> np.ndarray:
+    """
+    Sight distance over the vertical profile, limited by crest curves.
+
+    @param distances: (N,) increasing stations of the grid
+    @param heights: (N,) height of the road surface at each station
+    @param eye_height: height of the eye above the surface
+    @param object_height: height of the target above the surface
+    @param max_distance: longest sight distance looked for
+    @param reverse: True to look towards decreasing stations
+    @return: (N,) available sight distance, see `_horizon_sweep()`
+    """
+    heights = np.asarray(heights, dtype=np.float64)
+    eye = heights + eye_height
+    horizon = np.full(len(heights), -np.inf)
+
+    def visible(observers, targets, ahead):
+        rise = heights[targets] - eye[observers]
+        seen = (rise + object_height) / ahead >= horizon[observers]
+        horizon[observers] = np.maximum(horizon[observers], rise / ahead)
+        return seen
+
+    return _horizon_sweep(distances, max_distance, reverse, visible)
+
+
+def headlight_sight_distance(
+    distances: np.ndarray,
+    heights: np.ndarray,
+    headlight_height: float = 0.60,
+    divergence: float = np.radians(1.0),
+    max_distance: float = 1000.0,
+    reverse: bool = False,
+) -> np.ndarray:
+    """
+    Distance lit by the headlights, limited by sag curves.
+
+    @param distances: (N,) increasing stations of the grid
+    @param heights: (N,) height of the road surface at each station
+    @param headlight_height: height of the headlights above the surface
+    @param divergence: upward angle of the beam to the grade at the observer, in radians
+    @param max_distance: longest sight distance looked for
+    @param reverse: True to look towards decreasing stations
+    @return: (N,) available sight distance, see `_horizon_sweep()`
+    """
+    distances = np.asarray(distances, dtype=np.float64)
+    heights = np.asarray(heights, dtype=np.float64)
+    grade = np.gradient(heights, distances) * (-1.0 if reverse else 1.0)
+    beam = np.tan(np.arctan(grade) + divergence)
+
+    def visible(observers, targets, ahead):
+        return heights[targets] - heights[observers] - headlight_height <= beam[observers] * ahead
+
+    return _horizon_sweep(distances, max_distance, reverse, visible)
+
+
+def plan_sight_distance(
+    distances: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    direction: np.ndarray,
+    obstruction_offset: float,
+    driver_offset: float = 0.0,
+    max_distance: float = 1000.0,
+    reverse: bool = False,
+) -> np.ndarray:
+    """
+    Sight distance around horizontal curves past an obstruction at a constant offset.
+
+    The angles to the obstruction and the target are measured from the
+    tangent at the observer, so bends of more than half a turn within the
+    sight distance are not supported.
+
+    @param distances: (N,) increasing stations of the grid
+    @param x: (N,) X of the alignment at each station
+    @param y: (N,) Y of the alignment at each station
+    @param direction: (N,) direction of the alignment in radians
+    @param obstruction_offset: offset of the obstruction, positive to the left
+    @param driver_offset: offset of the eye and the target, e.g. the middle of the inner lane
+    @param max_distance: longest sight distance looked for
+    @param reverse: True to look towards decreasing stations
+    @return: (N,) available sight distance, see `_horizon_sweep()`
+    """
+    direction = np.asarray(direction, dtype=np.float64)
+    normal = np.column_stack((-np.sin(direction), np.cos(direction)))
+    xy = np.column_stack((x, y))
+    path = xy + driver_offset * normal
+    obstruction = xy + obstruction_offset * normal
+    # angles towards the obstruction side are positive
+    side = np.sign(obstruction_offset - driver_offset) * (-1.0 if reverse else 1.0)
+    tangent = np.column_stack((np.cos(direction), np.sin(direction))) * (-1.0 if reverse else 1.0)
+    horizon = np.full(len(direction), np.inf)
+
+    def angle(observers, points):
+        v = points - path[observers]
+        t = tangent[observers]
+        return side * np.arctan2(t[:, 0] * v[:, 1] - t[:, 1] * v[:, 0], t[:, 0] * v[:, 0] + t[:, 1] * v[:, 1])
+
+    def visible(observers, targets, ahead):
+        seen = angle(observers, path[targets]) <= horizon[observers]
+        horizon[observers] = np.minimum(horizon[observers], angle(observers, obstruction[targets]))
+        return seen
+
+    return _horizon_sweep(distances, max_distance, reverse, visible)
+
+
+@dataclass
+class SightDistance:
+    """
+    Available sight distance at the stations of a grid, in one direction of travel.
+
+    @param stations: (N,) stations of the grid
+    @param profile: (N,) sight distance over the profile, NaN where the alignment has no height
+    @param headlight: (N,) distance lit by the headlights, NaN where the alignment has no height
+    @param plan: (N,) sight distance past the obstructions in plan
+    @param max_distance: longest sight distance looked for
+    @param reverse: True if looking towards decreasing stations
+    """
+
+    stations: np.ndarray
+    profile: np.ndarray
+    headlight: np.ndarray
+    plan: np.ndarray
+    max_distance: float
+    reverse: bool = False
+
+    @property
+    def available(self) -> np.ndarray:
+        """
+        (N,) smallest of the profile and plan sight distances.
+        """
+        return np.fmin(self.profile, self.plan)
+
+    def below(self, required: float, which: str = "available") -> list:
+        """
+        Ranges of stations where the sight distance is below a design value.
+
+        @param required: required sight distance, e.g. the stopping sight distance for the design speed
+        @param which: "available", "profile", "headlight" or "plan"
+        @return: (first station, last station, smallest sight distance) of each range
+        """
+        values = getattr(self, which)
+        short = values < required
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], short.astype(np.int8), [0]))))
+        return [
+            (float(self.stations[lo]), float(self.stations[hi - 1]), float(values[lo:hi].min()))
+            for lo, hi in zip(edges[::2], edges[1::2])
+        ]
+
+
+def sight_distance(
+    alignment,
+    start: float = None,
+    end: float = None,
+    step: float = 1.0,
+    eye_height: float = 1.08,
+    object_height: float = 0.60,
+    obstruction_offsets: tuple = (),
+    driver_offset: float = 0.0,
+    max_distance: float = 1000.0,
+    reverse: bool = False,
+) -> SightDistance:
+    """
+    Available sight distance along an alignment.
+
+    The grid has the given step and includes the critical stations, so the
+    boundaries of the vertical curves are sampled exactly.
+
+    @param alignment: `alignment_tools.alignment.Alignment`
+    @param start: first station, the start of the alignment by default
+    @param end: last station, the end of the alignment by default
+    @param step: distance between the stations of the grid
+    @param eye_height: height of the eye above the surface
+    @param object_height: height of the target above the surface, e.g. the eye height for passing sight distance
+    @param obstruction_offsets: offsets of obstructions in plan, positive to the left
+    @param driver_offset: offset of the eye and the target in plan
+    @param max_distance: longest sight distance looked for
+    @param reverse: True to look towards decreasing stations
+    @return: the sight distances
+    """
+    start = alignment.start if start is None else start
+    end = alignment.end if end is None else end
+    stations = merge_stations(distance_grid(start, end, step), alignment.critical_stations())
+    pts = alignment.evaluate(stations)
+
+    profile = np.full(len(stations), np.nan)
+    headlight = np.full(len(stations), np.nan)
+    has_height = np.isfinite(pts[:, Z])
+    if has_height.any():
+        # the profile is swept where the alignment has a height, which is one contiguous range
+        rows = slice(np.argmax(has_height), len(has_height) - np.argmax(has_height[::-1]))
+        profile[rows] = profile_sight_distance(
+            stations[rows], pts[rows, Z], eye_height, object_height, max_distance, reverse
+        )
+        headlight[rows] = headlight_sight_distance(stations[rows], pts[rows, Z], max_distance=max_distance, reverse=reverse)
+
+    plan = np.full(len(stations), float(max_distance))
+    for offset in obstruction_offsets:
+        plan = np.minimum(
+            plan,
+            plan_sight_distance(
+                stations, pts[:, X], pts[:, Y], pts[:, DIRECTION], offset, driver_offset, max_distance, reverse
+            ),
+        )
+
+    return SightDistance(stations, profile, headlight, plan, float(max_distance), reverse)
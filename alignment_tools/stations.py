@@ -0,0 +1,237 @@
+"""
+Vectorized mapping of distances along an alignment to layout segments.
+
+This is the distance -> (segment, u) step of the procedure described in
+`docs/alignment_calculation.md`. Instead of looping over points and
+segments, each distance is located with `np.searchsorted` over the array of
+segment start distances, and the segment start/end stations are merged into
+the distance array with a sorted union.
+
+The mapping arrays are returned as a `StationMapping` so callers can reuse
+them, e.g. to evaluate several quantities on the same segments.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+DISTANCE_TOLERANCE = 1e-9
+
+
+@dataclass
+class StationMapping:
+    """
+    Distances along an alignment mapped onto the segments of one layout.
+
+    @param distance: (N,) distances along the alignment
+    @param segment: (N,) index of the segment containing each distance, -1 if none
+    @param u: (N,) distance along that segment, NaN if none
+    """
+
+    distance: np.ndarray
+    segment: np.ndarray
+    u: np.ndarray
+
+    @property
+    def mapped(self) -> np.ndarray:
+        """
+        (N,) mask of distances that fall on a segment.
+        """
+        return self.segment >= 0
+
+    def groups(self):
+        """
+        Yield (segment index, point indices) for each segment that has points,
+        in order along the alignment.
+        """
+        mapped = np.flatnonzero(self.mapped)
+        if len(mapped) == 0:
+            return
+        order = mapped[np.argsort(self.segment[mapped], kind="stable")]
+        segments = self.segment[order]
+        bounds = np.flatnonzero(np.diff(segments)) + 1
+        for chunk in np.split(order, bounds):
+            yield int(self.segment[chunk[0]]), chunk
+
+
+def segment_starts(lengths: np.ndarray, start: float = 0.0) -> np.ndarray:
+    """
+    Start distance of each segment of a contiguous layout, e.g. a horizontal alignment.
+    """
+    lengths = np.asarray(lengths, dtype=np.float64)
+
+    return start + np.concatenate(([0.0], np.cumsum(lengths[:-1])))
+
+
+def distance_grid(start: float, end: float, interval: float) -> np.ndarray:
+    """
+    Distances from `start` at a fixed `interval`, always including `end`.
+    """
+    if interval <= 0.0:
+        raise ValueError(f"Point interval must be positive, got {interval}.")
+    grid = start + interval * np.arange(int(np.floor((end - start) / interval)) + 1)
+    if end - grid[-1] > DISTANCE_TOLERANCE:
+        grid = np.append(grid, end)
+
+    return grid
+
+
+def iter_station_grid(
+    start: float,
+    end: float,
+    interval: float,
+    critical: np.ndarray,
+    chunk_size: int = 65536,
+    tol: float = DISTANCE_TOLERANCE,
+):
+    """
+    Yield the stations of `merge_stations(distance_grid(start, end, interval), critical)`
+    in ascending chunks of `chunk_size`, the last one possibly shorter.
+
+    Only one chunk of the grid is held at a time, so the memory used does not
+    grow with the length of the alignment.
+    """
+    if interval <= 0.0:
+        raise ValueError(f"Point interval must be positive, got {interval}.")
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size must be positive, got {chunk_size}.")
+    critical = np.unique(np.asarray(critical, dtype=np.float64))
+    count = int(np.floor((end - start) / interval))
+    pending = np.empty(0)
+
+    for k in range(0, count + 1, chunk_size):
+        last = k + chunk_size > count
+        grid = start + interval * np.arange(k, min(k + chunk_size, count) + 1)
+        if last and end - grid[-1] > tol:
+            grid = np.append(grid, end)
+        lo, hi = np.searchsorted(critical, (grid[0] - tol, grid[-1] + tol), side="left")
+        merged = merge_stations(grid, critical[lo:hi], tol)
+        # the first grid point of the next chunk is merged there
+        pending = np.concatenate((pending, merged if last else merged[:-1]))
+        while len(pending) >= chunk_size:
+            yield pending[:chunk_size]
+            pending = pending[chunk_size:]
+
+    if len(pending):
+        yield pending
+
+
+def critical_stations(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Sorted, unique start and end distances of a layout's segments.
+    """
+    starts = np.asarray(starts, dtype=np.float64)
+    ends = starts + np.asarray(lengths, dtype=np.float64)
+
+    return np.unique(np.concatenate((starts, ends)))
+
+
+def merge_stations(
+    distances: np.ndarray,
+    critical: np.ndarray,
+    tol: float = DISTANCE_TOLERANCE,
+) -> np.ndarray:
+    """
+    Sorted union of a distance array and critical stations.
+
+    Critical stations outside the range of `distances` are ignored. A distance
+    within `tol` of a critical station is replaced by the critical station, so
+    segment boundaries are represented exactly and not duplicated.
+    """
+    distances = np.sort(np.asarray(distances, dtype=np.float64))
+    critical = np.unique(np.asarray(critical, dtype=np.float64))
+    if len(distances) == 0 or len(critical) == 0:
+        return distances
+    critical = critical[
+        (critical >= distances[0] - tol) & (critical <= distances[-1] + tol)
+    ]
+    if len(critical) == 0:
+        return distances
+
+    padded = np.concatenate(([-np.inf], critical, [np.inf]))
+    pos = np.searchsorted(critical, distances)
+    nearest = np.minimum(distances - padded[pos], padded[pos + 1] - distances)
+
+    return np.union1d(distances[nearest > tol], critical)
+
+
+def map_stations(
+    distances: np.ndarray,
+    starts: np.ndarray,
+    lengths: np.ndarray,
+    tol: float = DISTANCE_TOLERANCE,
+) -> StationMapping:
+    """
+    Map distances along the alignment onto a layout's segments.
+
+    A distance on the boundary between two segments maps to the start of the
+    later one; the end of the last segment before a gap (or the end of the
+    layout) maps to that segment. Zero-length segments, such as the
+    terminating segment of a layout, never receive points.
+
+    @param distances: (N,) distances along the alignment
+    @param starts: (M,) start distance of each segment, ascending
+    @param lengths: (M,) length of each segment
+    @return: segment index and distance along the segment for each distance
+    """
+    distances = np.asarray(distances, dtype=np.float64)
+    starts = np.asarray(starts, dtype=np.float64)
+    lengths = np.asarray(lengths, dtype=np.float64)
+
+    keep = np.flatnonzero(lengths > 0.0)
+    if len(keep) == 0:
+        return StationMapping(
+            distance=distances,
+            segment=np.full(distances.shape, -1),
+            u=np.full(distances.shape, np.nan),
+        )
+    seg_starts = starts[keep]
+    seg_ends = seg_starts + lengths[keep]
+
+    idx = np.searchsorted(seg_starts, distances + tol, side="right") - 1
+    safe = np.maximum(idx, 0)
+    valid = (idx >= 0) & (distances <= seg_ends[safe] + tol)
+    u = np.clip(distances - seg_starts[safe], 0.0, lengths[keep][safe])
+
+    return StationMapping(
+        distance=distances,
+        segment=np.where(valid, keep[safe], -1),
+        u=np.where(valid, u, np.nan),
+    )
+
+
+class StationCursor:
+    """
+    Map successive chunks of distances onto a layout's segments.
+
+    Each chunk is located among the segments from the one reached by the
+    previous chunk onwards, so a long alignment processed in ascending chunks
+    is searched once rather than from its first segment for every chunk.
+    Distances within a chunk may be in any order, but no chunk may go below
+    the largest distance of the previous one.
+
+    @param starts: (M,) start distance of each segment, ascending
+    @param lengths: (M,) length of each segment
+    """
+
+    def __init__(self, starts: np.ndarray, lengths: np.ndarray, tol: float = DISTANCE_TOLERANCE) -> None:
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.lengths = np.asarray(lengths, dtype=np.float64)
+        self.tol = tol
+        self.position = 0
+
+    def map(self, distances: np.ndarray) -> StationMapping:
+        """
+        Map a chunk of distances, see `map_stations()`.
+        """
+        distances = np.asarray(distances, dtype=np.float64)
+        if len(distances) == 0:
+            return map_stations(distances, self.starts[:0], self.lengths[:0], self.tol)
+        first, largest = self.position, float(distances.max())
+        last = max(first, int(np.searchsorted(self.starts, largest + self.tol, side="right")))
+        mapping = map_stations(distances, self.starts[first:last], self.lengths[first:last], self.tol)
+        mapping.segment = np.where(mapping.segment >= 0, mapping.segment + first, -1)
+        # the last segment starting before the largest distance may still contain the next chunk
+        self.position = max(first, int(np.searchsorted(self.starts, largest - self.tol, side="left")) - 1)
+
+        return mapping
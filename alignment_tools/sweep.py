@@ -0,0 +1,167 @@
+"""
+Sweep a cross-section along sampled alignment points into a triangle mesh.
+
+The cross-section is placed at each station in the frame of the alignment:
+offsets along the horizontal normal (positive to the left, as in IFC) and
+elevations along the vertical, rolled about the tangent by the cant
+rotation. All stations are transformed at once with NumPy broadcasting and
+the side faces between consecutive stations are generated as index arrays,
+so no solid modelling kernel is involved. Write the mesh with
+`alignment_tools.gltf.write_glb()`.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from alignment_tools.alignment import CANT_ROTATION
+from alignment_tools.alignment import DIRECTION
+from alignment_tools.alignment import X
+from alignment_tools.alignment import Y
+from alignment_tools.alignment import Z
+
+
+@dataclass
+class SweepMesh:
+    """
+    Indexed triangle mesh.
+
+    @param vertices: (V, 3) vertex positions, Z up, in project length units
+    @param indices: (T, 3) vertex indices of each triangle, counter-clockwise seen from outside
+    """
+
+    vertices: np.ndarray
+    indices: np.ndarray
+
+
+def signed_area(polygon: np.ndarray) -> float:
+    """
+    Signed area of a 2D polygon, positive if counter-clockwise.
+    """
+    x, y = np.asarray(polygon, dtype=np.float64).T
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def triangulate_polygon(polygon: np.ndarray) -> np.ndarray:
+    """
+    Triangulate a simple counter-clockwise 2D polygon by ear clipping.
+
+    @param polygon: (M, 2) vertices
+    @return: (M - 2, 3) counter-clockwise triangles as indices into `polygon`
+    """
+    polygon = np.asarray(polygon, dtype=np.float64)
+    remaining = list(range(len(polygon)))
+    triangles = []
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    while len(remaining) > 3:
+        for k in range(len(remaining)):
+            i, j, l = remaining[k - 1], remaining[k], remaining[(k + 1) % len(remaining)]
+            a, b, c = polygon[i], polygon[j], polygon[l]
+            if cross(a, b, c) <= 0.0:
+                continue
+            others = [polygon[m] for m in remaining if m not in (i, j, l)]
+            if any(cross(a, b, p) >= 0.0 and cross(b, c, p) >= 0.0 and cross(c, a, p) >= 0.0 for p in others):
+                continue
+            triangles.append((i, j, l))
+            del remaining[k]
+            break
+        else:
+            raise ValueError("Polygon is not simple or not counter-clockwise.")
+    triangles.append(tuple(remaining))
+
+    return np.array(triangles, dtype=np.int64)
+
+
+def sweep_profile(
+    profile: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    z: np.ndarray,
+    direction: np.ndarray,
+    cant_rotation: np.ndarray = None,
+    closed: bool = True,
+    caps: bool = True,
+    height: float = None,
+) -> SweepMesh:
+    """
+    Sweep a cross-section along stations of an alignment.
+
+    @param profile: (M, 2) cross-section as (offset, elevation), offset positive to the left
+    @param x: (N,) X of each station
+    @param y: (N,) Y of each station
+    @param z: (N,) Z of each station
+    @param direction: (N,) horizontal direction of the alignment at each station, radians
+    @param cant_rotation: (N,) roll about the tangent, positive raising the left side; None or NaN for none
+    @param closed: True if the profile is a closed polygon, False for an open polyline (e.g. a surface)
+    @param caps: True to close the ends of a closed profile
+    @param height: Z used where `z` is NaN, e.g. along an alignment without a
+        vertical layout; None to reject stations without a height
+    @return: the swept mesh
+    """
+    profile = np.asarray(profile, dtype=np.float64)
+    n = len(x)
+    m = len(profile)
+    if n < 2:
+        raise ValueError("At least two stations are needed for a sweep.")
+    if closed and signed_area(profile) < 0.0:
+        profile = profile[::-1]
+    z = np.asarray(z, dtype=np.float64)
+    if not np.isfinite(z).all():
+        if height is None:
+            raise ValueError(
+                "Z is NaN at some stations, e.g. outside the vertical layout. Pass `height` to sweep at a fixed height."
+            )
+        z = np.where(np.isfinite(z), z, height)
+
+    roll = np.zeros(n) if cant_rotation is None else np.nan_to_num(np.asarray(cant_rotation, dtype=np.float64))
+    direction = np.asarray(direction, dtype=np.float64)
+    normal = np.column_stack((-np.sin(direction), np.cos(direction), np.zeros(n)))
+    up = np.broadcast_to([0.0, 0.0, 1.0], (n, 3))
+    lateral = normal * np.cos(roll)[:, None] + up * np.sin(roll)[:, None]
+    vertical = up * np.cos(roll)[:, None] - normal * np.sin(roll)[:, None]
+
+    origin = np.column_stack((x, y, z))
+    vertices = (
+        origin[:, None, :]
+        + profile[None, :, 0, None] * lateral[:, None, :]
+        + profile[None, :, 1, None] * vertical[:, None, :]
+    ).reshape(-1, 3)
+
+    # two triangles per profile edge per pair of stations
+    edges = m if closed else m - 1
+    j = np.arange(edges)
+    a = np.arange(n - 1)[:, None] * m + j[None, :]
+    a1 = np.arange(n - 1)[:, None] * m + ((j + 1) % m)[None, :]
+    b, b1 = a + m, a1 + m
+    sides = np.stack(
+        (np.stack((a, a1, b1), axis=-1), np.stack((a, b1, b), axis=-1)), axis=2
+    ).reshape(-1, 3)
+
+    faces = [sides]
+    if closed and caps:
+        cap = triangulate_polygon(profile)
+        faces.append(cap[:, ::-1])
+        faces.append(cap + (n - 1) * m)
+
+    return SweepMesh(vertices=vertices, indices=np.concatenate(faces).astype(np.uint32))
+
+
+def sweep_points(profile: np.ndarray, points: np.ndarray, **kwargs) -> SweepMesh:
+    """
+    Sweep a cross-section along the rows of `Alignment.create_shape()`.
+
+    Keyword arguments are passed to `sweep_profile()`, e.g. `height` for an
+    alignment without a vertical layout.
+    """
+    return sweep_profile(
+        profile,
+        x=points[:, X],
+        y=points[:, Y],
+        z=points[:, Z],
+        direction=points[:, DIRECTION],
+        cant_rotation=points[:, CANT_ROTATION],
+        **kwargs,
+    )
@@ -0,0 +1,384 @@
+"""
+Reproducible synthetic alignments for scale testing.
+
+The fixtures in `tests/data` and `assets/models` are small. The alignments
+made here can be as large as a 200 km rail line with 20k segments and full
+cant, so the memory and time taken by the rest of the tooling can be
+measured as the size grows. The same `SyntheticSpec` always gives the same
+layouts, on any machine.
+
+The horizontal layout repeats tangent, transition, circular arc and
+transition, turning left or right at random. Each transition type is drawn
+from `SyntheticSpec.transitions`. The vertical layout alternates gradient
+runs with parabolic and circular vertical curves. The cant layout follows
+the horizontal segments: no cant on tangents, a transition up to the cant of
+the arc and down again, and constant cant on the arc, raising the outer
+rail.
+
+`write_synthetic()` writes the model, built with
+`alignment_tools.builder.AlignmentBuilder`, and its companion tables to a
+directory:
+
+- alignment.ifc: the IFC4X3_ADD2 model
+- horizontal.csv, vertical.csv, cant.csv: the segment tables
+- points.npy: (N, 8) business logic points with the columns in
+  `alignment_tools.alignment.COLUMNS`
+- manifest.json: the spec, the number of segments of each type and the
+  sizes of the files
+
+Usage::
+
+    python -m alignment_tools.synthetic out/synthetic --segments 20000 --length 200000 --seed 1
+"""
+
+import argparse
+from collections import Counter
+from dataclasses import asdict
+from dataclasses import dataclass
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from alignment_tools.alignment import COLUMNS
+from alignment_tools.alignment import Alignment
+from alignment_tools.builder import CANT_COLUMNS
+from alignment_tools.builder import HORIZONTAL_COLUMNS
+from alignment_tools.builder import VERTICAL_COLUMNS
+from alignment_tools.builder import AlignmentBuilder
+from alignment_tools.builder import HorizontalSegment
+from alignment_tools.horizontal import segment_point
+from alignment_tools.stations import distance_grid
+from alignment_tools.stations import merge_stations
+from alignment_tools.vertical import segment_height
+
+MANIFEST_VERSION = 1
+
+HORIZONTAL_TRANSITIONS = ("CLOTHOID", "BLOSSCURVE", "HELMERTCURVE", "SINECURVE", "COSINECURVE", "VIENNESEBEND")
+VERTICAL_CURVES = ("PARABOLICARC", "CIRCULARARC")
+CANT_TRANSITIONS = ("LINEARTRANSITION", "BLOSSCURVE", "HELMERTCURVE", "SINECURVE", "COSINECURVE", "VIENNESEBEND")
+
+# smallest change of gradient over a vertical curve
+MIN_GRADE_CHANGE = 0.002
+
+
+@dataclass
+class SyntheticSpec:
+    """
+    Parameters of a synthetic alignment.
+
+    Segment lengths are drawn from their ranges and, if `length` is given,
+    scaled so that the horizontal layout has that length.
+
+    @param segments: number of horizontal segments, without the terminator
+    @param seed: seed of the random generator
+    @param length: length of the horizontal layout, None to keep the drawn lengths
+    @param tangent_length: (min, max) length of a tangent
+    @param transition_length: (min, max) length of a transition
+    @param arc_length: (min, max) length of a circular arc
+    @param radius: (min, max) radius of a circular arc
+    @param transitions: horizontal transition types to draw from
+    @param vertical_segments: number of vertical segments, None for half the horizontal segments
+    @param vertical_curves: vertical curve types to draw from
+    @param max_gradient: largest gradient of a gradient run
+    @param start_height: height at the start
+    @param cant_transitions: cant transition types to draw from
+    @param max_cant: cant of an arc with the smallest radius
+    @param rail_head_distance: IfcAlignmentCant.RailHeadDistance
+    """
+
+    segments: int = 400
+    seed: int = 0
+    length: float = None
+    tangent_length: tuple = (100.0, 800.0)
+    transition_length: tuple = (60.0, 200.0)
+    arc_length: tuple = (100.0, 600.0)
+    radius: tuple = (800.0, 5000.0)
+    transitions: tuple = HORIZONTAL_TRANSITIONS
+    vertical_segments: int = None
+    vertical_curves: tuple = VERTICAL_CURVES
+    max_gradient: float = 0.025
+    start_height: float = 100.0
+    cant_transitions: tuple = CANT_TRANSITIONS
+    max_cant: float = 0.16
+    rail_head_distance: float = 1.5
+
+
+@dataclass
+class SyntheticLayouts:
+    """
+    Segment tables of a synthetic alignment, with the columns of `alignment_tools.builder`.
+
+    @param horizontal: DataFrame with `HORIZONTAL_COLUMNS`, StartPoint holding (x, y) tuples
+    @param vertical: DataFrame with `VERTICAL_COLUMNS`
+    @param cant: DataFrame with `CANT_COLUMNS`
+    @param rail_head_distance: IfcAlignmentCant.RailHeadDistance
+    """
+
+    horizontal: pd.DataFrame
+    vertical: pd.DataFrame
+    cant: pd.DataFrame
+    rail_head_distance: float
+
+    def alignment(self) -> Alignment:
+        """
+        Business logic of the layouts.
+        """
+        return Alignment(
+            list(self.horizontal.itertuples(index=False)),
+            list(self.vertical.itertuples(index=False)),
+            list(self.cant.itertuples(index=False)),
+            rail_head_distance=self.rail_head_distance,
+        )
+
+    def counts(self) -> dict:
+        """
+        Number of segments of each type, by layout.
+        """
+        return {
+            layout: dict(sorted(Counter(getattr(self, layout)["PredefinedType"]).items()))
+            for layout in ("horizontal", "vertical", "cant")
+        }
+
+
+def _uniform(rng: np.random.Generator, bounds: tuple, size: int) -> np.ndarray:
+    return rng.uniform(bounds[0], bounds[1], size)
+
+
+def _horizontal(spec: SyntheticSpec, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Repeat tangent, transition, arc, transition for `spec.segments` segments.
+    """
+    n = spec.segments
+    kind = np.arange(n) % 4
+    tangent, arc = kind == 0, kind == 2
+    transition = (kind == 1) | (kind == 3)
+
+    lengths = np.empty(n)
+    lengths[tangent] = _uniform(rng, spec.tangent_length, tangent.sum())
+    lengths[transition] = _uniform(rng, spec.transition_length, transition.sum())
+    lengths[arc] = _uniform(rng, spec.arc_length, arc.sum())
+    if spec.length is not None:
+        lengths *= spec.length / lengths.sum()
+
+    # one radius and side per curve, i.e. per group of four segments
+    curves = (n + 3) // 4
+    radius = _uniform(rng, spec.radius, curves) * rng.choice([-1.0, 1.0], curves)
+    radius = np.repeat(radius, 4)[:n]
+    start_radius = np.where(arc | (kind == 3), radius, 0.0)
+    end_radius = np.where(arc | (kind == 1), radius, 0.0)
+
+    types = np.full(n, "LINE", dtype=object)
+    types[arc] = "CIRCULARARC"
+    types[transition] = rng.choice(list(spec.transitions), transition.sum())
+
+    # each segment starts at the end of the previous one
+    points, directions = [], []
+    x, y, direction = 0.0, 0.0, 0.0
+    for row in zip(start_radius.tolist(), end_radius.tolist(), lengths.tolist(), types.tolist()):
+        points.append((x, y))
+        directions.append(direction)
+        x, y, direction = segment_point(HorizontalSegment((x, y), direction, *row), row[2]).tolist()
+
+    return pd.DataFrame(
+        {
+            "StartPoint": points,
+            "StartDirection": directions,
+            "StartRadiusOfCurvature": start_radius,
+            "EndRadiusOfCurvature": end_radius,
+            "SegmentLength": lengths,
+            "PredefinedType": types,
+        },
+        columns=list(HORIZONTAL_COLUMNS),
+    )
+
+
+def _gradients(spec: SyntheticSpec, rng: np.random.Generator, count: int) -> np.ndarray:
+    """
+    Gradients of the runs, each one differing from the previous by at least `MIN_GRADE_CHANGE`.
+    """
+    gradients = [rng.uniform(-spec.max_gradient, spec.max_gradient)]
+    steps = rng.uniform(MIN_GRADE_CHANGE, spec.max_gradient, count - 1) * rng.choice([-1.0, 1.0], count - 1)
+    for step in steps.tolist():
+        gradient = gradients[-1] + step
+        if abs(gradient) > spec.max_gradient:
+            gradient = gradients[-1] - step
+        gradients.append(gradient)
+
+    return np.array(gradients)
+
+
+def _vertical(spec: SyntheticSpec, rng: np.random.Generator, length: float) -> pd.DataFrame:
+    """
+    Alternate gradient runs and vertical curves over `length`.
+    """
+    n = spec.vertical_segments or max(2, spec.segments // 2)
+    runs = (n + 1) // 2
+    # a curve at the end needs the gradient of a run after it
+    gradients = _gradients(spec, rng, n // 2 + 1)
+
+    # run and curve lengths, curves between 20 % and 60 % of the run they follow
+    lengths = np.empty(n)
+    lengths[0::2] = rng.uniform(1.0, 2.0, runs)
+    lengths[1::2] = lengths[0 : n - 1 : 2] * rng.uniform(0.2, 0.6, n // 2)
+    lengths *= length / lengths.sum()
+    starts = np.concatenate(([0.0], np.cumsum(lengths[:-1])))
+
+    index = np.arange(n)
+    start_gradient, end_gradient = gradients[index // 2], gradients[(index + 1) // 2]
+    types = np.full(n, "CONSTANTGRADIENT", dtype=object)
+    types[1::2] = rng.choice(list(spec.vertical_curves), n // 2)
+
+    a0, a1 = np.arctan(start_gradient), np.arctan(end_gradient)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        radius = np.select(
+            [types == "PARABOLICARC", types == "CIRCULARARC"],
+            [lengths / (end_gradient - start_gradient), lengths / (np.sin(a1) - np.sin(a0))],
+            np.nan,
+        )
+
+    table = pd.DataFrame(
+        {
+            "StartDistAlong": starts,
+            "HorizontalLength": lengths,
+            "StartHeight": np.nan,
+            "StartGradient": start_gradient,
+            "EndGradient": end_gradient,
+            "RadiusOfCurvature": radius,
+            "PredefinedType": types,
+        },
+        columns=list(VERTICAL_COLUMNS),
+    )
+    # each segment starts at the height of the end of the previous one
+    height = spec.start_height
+    heights = []
+    for segment in table.itertuples(index=False):
+        heights.append(height)
+        height = float(segment_height(segment._replace(StartHeight=height), segment.HorizontalLength))
+    table["StartHeight"] = heights
+
+    return table
+
+
+def _cant(spec: SyntheticSpec, rng: np.random.Generator, horizontal: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cant over the horizontal segments, raising the outer rail on arcs.
+    """
+    lengths = horizontal["SegmentLength"].to_numpy()
+    starts = np.concatenate(([0.0], np.cumsum(lengths[:-1])))
+    types = horizontal["PredefinedType"].to_numpy()
+
+    def cant(radius, side):
+        # left turns (positive radius) raise the right rail
+        radius = radius.to_numpy()
+        outer = radius < 0.0 if side == "Left" else radius > 0.0
+        with np.errstate(divide="ignore"):
+            value = spec.max_cant * spec.radius[0] / np.abs(radius)
+        return np.where(outer & (radius != 0.0), value, 0.0)
+
+    transition = ~np.isin(types, ["LINE", "CIRCULARARC"])
+    cant_types = np.full(len(types), "CONSTANTCANT", dtype=object)
+    cant_types[transition] = rng.choice(list(spec.cant_transitions), transition.sum())
+
+    start_radius, end_radius = horizontal["StartRadiusOfCurvature"], horizontal["EndRadiusOfCurvature"]
+    return pd.DataFrame(
+        {
+            "StartDistAlong": starts,
+            "HorizontalLength": lengths,
+            "StartCantLeft": cant(start_radius, "Left"),
+            "EndCantLeft": cant(end_radius, "Left"),
+            "StartCantRight": cant(start_radius, "Right"),
+            "EndCantRight": cant(end_radius, "Right"),
+            "PredefinedType": cant_types,
+        },
+        columns=list(CANT_COLUMNS),
+    )
+
+
+def synthetic_layouts(spec: SyntheticSpec) -> SyntheticLayouts:
+    """
+    Segment tables of a synthetic alignment, the same for the same spec.
+    """
+    if spec.segments < 1:
+        raise ValueError(f"A synthetic alignment needs at least one segment, got {spec.segments}.")
+    rng = np.random.default_rng(spec.seed)
+    horizontal = _horizontal(spec, rng)
+    vertical = _vertical(spec, rng, float(horizontal["SegmentLength"].sum()))
+    cant = _cant(spec, rng, horizontal)
+
+    return SyntheticLayouts(horizontal, vertical, cant, spec.rail_head_distance)
+
+
+def _write_table(table: pd.DataFrame, path: str) -> None:
+    if "StartPoint" in table:
+        x, y = zip(*table["StartPoint"])
+        table = table.drop(columns="StartPoint")
+        table.insert(0, "StartPointY", y)
+        table.insert(0, "StartPointX", x)
+    table.to_csv(path, index=False)
+
+
+def write_synthetic(spec: SyntheticSpec, out_dir: str, point_interval: float = 1.0, name: str = None) -> dict:
+    """
+    Write a synthetic alignment model and its companion tables to a directory.
+
+    @param spec: parameters of the alignment
+    @param out_dir: output directory, created if needed
+    @param point_interval: distance between the business logic points, None to write no points
+    @param name: name of the IfcAlignment, defaults to one made from the spec
+    @return: the manifest, also written to manifest.json
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    layouts = synthetic_layouts(spec)
+    name = name or f"Synthetic-{spec.segments}-{spec.seed}"
+
+    builder = AlignmentBuilder()
+    builder.add_alignment(
+        name,
+        layouts.horizontal,
+        layouts.vertical,
+        layouts.cant,
+        rail_head_distance=layouts.rail_head_distance,
+    )
+    files = {"model": "alignment.ifc"}
+    builder.write(os.path.join(out_dir, files["model"]))
+    for layout in ("horizontal", "vertical", "cant"):
+        files[layout] = f"{layout}.csv"
+        _write_table(getattr(layouts, layout), os.path.join(out_dir, files[layout]))
+
+    alignment = layouts.alignment()
+    if point_interval is not None:
+        distances = merge_stations(distance_grid(alignment.start, alignment.end, point_interval), alignment.critical_stations())
+        files["points"] = "points.npy"
+        np.save(os.path.join(out_dir, files["points"]), alignment.evaluate(distances))
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "name": name,
+        "spec": asdict(spec),
+        "length": alignment.length,
+        "point_interval": point_interval,
+        "columns": list(COLUMNS),
+        "segments": layouts.counts(),
+        "files": {key: {"path": path, "size": os.path.getsize(os.path.join(out_dir, path))} for key, path in files.items()},
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a reproducible synthetic alignment and its reference tables.")
+    parser.add_argument("out_dir", help="output directory")
+    parser.add_argument("--segments", type=int, default=SyntheticSpec.segments, help="number of horizontal segments")
+    parser.add_argument("--length", type=float, default=None, help="length of the horizontal layout")
+    parser.add_argument("--seed", type=int, default=SyntheticSpec.seed, help="seed of the random generator")
+    parser.add_argument("--point-interval", type=float, default=1.0, help="distance between reference points")
+    parser.add_argument("--no-points", action="store_true", help="do not write the reference points")
+    args = parser.parse_args()
+
+    spec = SyntheticSpec(segments=args.segments, seed=args.seed, length=args.length)
+    manifest = write_synthetic(spec, args.out_dir, None if args.no_points else args.point_interval)
+    print(f"[INFO] {manifest['name']}: {manifest['length'] / 1000.0:.1f} km, segments {manifest['segments']}.")
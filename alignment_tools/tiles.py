@@ -0,0 +1,287 @@
+"""
+Station-range tiled corridor export with levels of detail.
+
+The corridor is cut into tiles of `tile_length` along the alignment and
+each tile is swept and written as a separate .glb for every level of
+detail. Coarser levels use a larger station spacing and a simplified
+cross-section. A `manifest.json` next to the tiles lists the station range,
+bounds and file of each tile and level, so a viewer can load only the
+tiles and level it needs.
+
+Every tile file is named after a hash of its content (the evaluated
+stations, the cross-section and the level settings). Exporting again into
+the same directory only sweeps and writes the tiles whose hash changed, and
+removes files that are no longer referenced. If the range of stations that
+changed is known, e.g. from an edit with `alignment_tools.editable`, pass it
+as `changed` and only the tiles overlapping it are evaluated and hashed; the
+other tiles are taken from the previous manifest.
+"""
+
+from dataclasses import asdict
+from dataclasses import dataclass
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from alignment_tools.alignment import X
+from alignment_tools.alignment import Y
+from alignment_tools.alignment import Z
+from alignment_tools.alignment import Alignment
+from alignment_tools.gltf import glb_bytes
+from alignment_tools.stations import distance_grid
+from alignment_tools.stations import merge_stations
+from alignment_tools.sweep import sweep_points
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class LevelOfDetail:
+    """
+    Sampling of one level of detail.
+
+    @param point_interval: station spacing, used if `chord_tolerance` is None
+    @param chord_tolerance: adaptive sampling tolerance, see `Alignment.create_shape`
+    @param profile_tolerance: tolerance for simplifying the cross-section, 0 to keep it as is
+    """
+
+    point_interval: float = 5.0
+    chord_tolerance: float = None
+    profile_tolerance: float = 0.0
+
+
+DEFAULT_LODS = (
+    LevelOfDetail(point_interval=5.0),
+    LevelOfDetail(point_interval=25.0, profile_tolerance=0.1),
+    LevelOfDetail(point_interval=100.0, profile_tolerance=1.0),
+)
+
+
+@dataclass
+class TileExport:
+    """
+    Result of a tiled export.
+
+    @param manifest: the contents written to the manifest
+    @param written: paths of the tile files written
+    @param unchanged: paths of the tile files that were up to date
+    @param removed: paths of stale tile files removed
+    """
+
+    manifest: dict
+    written: list
+    unchanged: list
+    removed: list
+
+
+def simplify_polygon(polygon: np.ndarray, tol: float) -> np.ndarray:
+    """
+    Simplify a closed polygon with the Douglas-Peucker algorithm, keeping at least 3 vertices.
+    """
+    polygon = np.asarray(polygon, dtype=np.float64)
+    if tol <= 0.0 or len(polygon) <= 3:
+        return polygon
+
+    def keep(points: np.ndarray) -> np.ndarray:
+        mask = np.zeros(len(points), dtype=bool)
+        mask[[0, -1]] = True
+        stack = [(0, len(points) - 1)]
+        while stack:
+            i, j = stack.pop()
+            if j <= i + 1:
+                continue
+            chord = points[j] - points[i]
+            rel = points[i + 1 : j] - points[i]
+            length = np.linalg.norm(chord)
+            if length > 0.0:
+                dist = np.abs(chord[0] * rel[:, 1] - chord[1] * rel[:, 0]) / length
+            else:
+                dist = np.linalg.norm(rel, axis=1)
+            k = int(np.argmax(dist))
+            if dist[k] > tol:
+                mask[i + 1 + k] = True
+                stack.extend(((i, i + 1 + k), (i + 1 + k, j)))
+        return mask
+
+    # split the ring at the vertex farthest from the first one
+    far = int(np.argmax(np.linalg.norm(polygon - polygon[0], axis=1)))
+    ring = np.vstack((polygon, polygon[:1]))
+    mask = np.zeros(len(polygon), dtype=bool)
+    mask[: far + 1] |= keep(ring[: far + 1])
+    second = keep(ring[far:])
+    mask[far:] |= second[:-1]
+    if mask.sum() < 3:
+        # keep the vertex farthest from the line between the two kept ones
+        chord = polygon[far] - polygon[0]
+        rel = polygon - polygon[0]
+        mask[int(np.argmax(np.abs(chord[0] * rel[:, 1] - chord[1] * rel[:, 0])))] = True
+
+    return polygon[mask]
+
+
+def _stations(alignment, lod: LevelOfDetail, start: float, end: float, boundaries: np.ndarray) -> np.ndarray:
+    """
+    Sampling stations of a level of detail from `start` to `end`, with the tile boundaries.
+    """
+    critical = alignment.critical_stations()
+    if lod.chord_tolerance is not None:
+        # each interval between critical stations is refined on its own, so
+        # refining only those around the range gives the stations of the whole alignment
+        first = max(int(np.searchsorted(critical, start, side="right")) - 1, 0)
+        last = int(np.searchsorted(critical, end, side="left")) + 1
+        distances = Alignment._refine(alignment.evaluate, critical[first:last], lod.chord_tolerance, None)[:, 0]
+    else:
+        distances = merge_stations(distance_grid(alignment.start, alignment.end, lod.point_interval), critical)
+    distances = distances[(distances >= start) & (distances <= end)]
+
+    # merge_stations() ignores boundaries outside the distances, so add the ends first
+    distances = np.concatenate(([start], distances, [end]))
+    return merge_stations(distances, boundaries[(boundaries >= start) & (boundaries <= end)])
+
+
+def _tile_hash(points: np.ndarray, profile: np.ndarray, lod: LevelOfDetail, origin: np.ndarray) -> str:
+    h = hashlib.sha1()
+    for array in (points, profile, origin):
+        h.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+    h.update(json.dumps(asdict(lod), sort_keys=True).encode("utf-8"))
+
+    return h.hexdigest()
+
+
+def _read_manifest(out_dir: str) -> dict:
+    path = os.path.join(out_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+
+    return manifest
+
+
+def _reusable(previous: dict, alignment, tile_length: float, lods: tuple, name: str) -> bool:
+    """
+    True if the tiles of a previous manifest were cut and sampled the same way.
+    """
+    return (
+        previous is not None
+        and previous["name"] == name
+        and previous["start"] == float(alignment.start)
+        and previous["tile_length"] == float(tile_length)
+        and previous["lods"] == [asdict(lod) for lod in lods]
+    )
+
+
+def export_tiles(
+    alignment,
+    profile: np.ndarray,
+    out_dir: str,
+    tile_length: float = 500.0,
+    lods: tuple = DEFAULT_LODS,
+    name: str = "corridor",
+    changed=None,
+) -> TileExport:
+    """
+    Sweep a cross-section along an alignment into station-range tiles at several levels of detail.
+
+    @param alignment: `alignment_tools.alignment.Alignment` to sweep along
+    @param profile: (M, 2) closed cross-section as (offset, elevation), offset positive to the left
+    @param out_dir: directory for the manifest and the tiles
+    @param tile_length: length of the alignment covered by each tile
+    @param lods: levels of detail, finest first
+    @param name: prefix of the tile file names
+    @param changed: (start, end) of the stations whose geometry changed since the
+        previous export into `out_dir`, or a `alignment_tools.editable.LayoutEdit`.
+        Only the tiles overlapping it are evaluated, the others are taken from
+        the previous manifest, so the cross-section must not have changed.
+        None to evaluate all tiles.
+    @return: the manifest and the files written, kept and removed
+    """
+    if tile_length <= 0.0:
+        raise ValueError(f"Tile length must be positive, got {tile_length}.")
+    profile = np.asarray(profile, dtype=np.float64)
+    os.makedirs(out_dir, exist_ok=True)
+    previous = _read_manifest(out_dir)
+
+    boundaries = distance_grid(alignment.start, alignment.end, tile_length)
+    ranges = list(zip(boundaries[:-1].tolist(), boundaries[1:].tolist()))
+    kept = {}
+    if changed is not None and _reusable(previous, alignment, tile_length, lods, name):
+        lo, hi = (changed.start, changed.end) if hasattr(changed, "start") else changed
+        kept = {
+            (t["start"], t["end"]): t
+            for t in previous["tiles"]
+            if (t["start"], t["end"]) in ranges and (t["end"] < lo or t["start"] > hi)
+        }
+    evaluated = [r for r in ranges if r not in kept]
+    if evaluated:
+        first, last = evaluated[0][0], evaluated[-1][1]
+        points = [alignment.evaluate(_stations(alignment, lod, first, last, boundaries)) for lod in lods]
+    if previous is not None:
+        # keep the origin so unchanged tiles stay valid
+        origin = np.array(previous["origin"], dtype=np.float64)
+    else:
+        xyz = np.nan_to_num(points[0][:, [X, Y, Z]])
+        origin = np.floor(xyz.min(axis=0))
+
+    # conservative tile bounds: stations expanded by the size of the cross-section
+    reach = float(np.linalg.norm(profile, axis=1).max())
+
+    written, unchanged, tiles = [], [], []
+    for start, end in ranges:
+        if (start, end) in kept:
+            tile = kept[(start, end)]
+            unchanged.extend(os.path.join(out_dir, lod["uri"]) for lod in tile["lods"])
+            tiles.append(tile)
+            continue
+        tile = {"start": float(start), "end": float(end), "lods": []}
+        for level, (lod, pts) in enumerate(zip(lods, points)):
+            rows = pts[(pts[:, 0] >= start) & (pts[:, 0] <= end)]
+            section = simplify_polygon(profile, lod.profile_tolerance)
+            digest = _tile_hash(rows, section, lod, origin)
+            file_name = f"{name}_{start:012.3f}_lod{level}_{digest[:12]}.glb"
+            path = os.path.join(out_dir, file_name)
+
+            if os.path.exists(path):
+                unchanged.append(path)
+            else:
+                # the origin and bounds treat a missing height as 0, so does the mesh
+                mesh = sweep_points(section, rows, height=0.0)
+                with open(path, "wb") as f:
+                    f.write(glb_bytes([(f"{name}_{start:.3f}_lod{level}", mesh)], origin=origin))
+                written.append(path)
+
+            tile["lods"].append(
+                {"level": level, "uri": file_name, "hash": digest, "stations": len(rows)}
+            )
+            if level == 0:
+                xyz = np.nan_to_num(rows[:, [X, Y, Z]])
+                tile["bounds"] = [(xyz.min(axis=0) - reach).tolist(), (xyz.max(axis=0) + reach).tolist()]
+        tiles.append(tile)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "name": name,
+        "start": float(alignment.start),
+        "end": float(alignment.end),
+        "tile_length": float(tile_length),
+        "origin": origin.tolist(),
+        "up_axis": "Y",
+        "lods": [asdict(lod) for lod in lods],
+        "tiles": tiles,
+    }
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    referenced = {lod["uri"] for tile in tiles for lod in tile["lods"]}
+    removed = []
+    for file_name in sorted(os.listdir(out_dir)):
+        if file_name.startswith(f"{name}_") and file_name.endswith(".glb") and file_name not in referenced:
+            os.remove(os.path.join(out_dir, file_name))
+            removed.append(os.path.join(out_dir, file_name))
+
+    return TileExport(manifest=manifest, written=written, unchanged=unchanged, removed=removed)
@@ -0,0 +1,103 @@
+"""
+Normalized transition shape functions shared by the cant and horizontal layouts.
+
+Each transition varies a quantity (cant, curvature) from its start to its end
+value as `start + (end - start) * shape(t)`, with `t = u / length` running
+from 0 to 1. The shape functions and their integrals are written with NumPy
+operations only, so they accept scalars or arrays of any shape.
+
+The integral, `integral(t) = int_0^t shape(s) ds`, is what turns a curvature
+into a heading along a horizontal transition.
+"""
+
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Transition:
+    """
+    A transition shape function and its integral over [0, t].
+
+    `breaks` are the values of t in (0, 1) where the shape is piecewise, so
+    numerical integration can be split there.
+    """
+
+    shape: Callable[[np.ndarray], np.ndarray]
+    integral: Callable[[np.ndarray], np.ndarray]
+    breaks: tuple = ()
+
+
+def _helmert_shape(t):
+    return np.where(t < 0.5, 2.0 * t**2, 1.0 - 2.0 * (1.0 - t) ** 2)
+
+
+def _helmert_integral(t):
+    return np.where(
+        t < 0.5, 2.0 * t**3 / 3.0, t - 0.5 + 2.0 * (1.0 - t) ** 3 / 3.0
+    )
+
+
+LINEAR = Transition(
+    shape=lambda t: t,
+    integral=lambda t: t**2 / 2.0,
+)
+
+BLOSS = Transition(
+    shape=lambda t: 3.0 * t**2 - 2.0 * t**3,
+    integral=lambda t: t**3 - t**4 / 2.0,
+)
+
+COSINE = Transition(
+    shape=lambda t: (1.0 - np.cos(np.pi * t)) / 2.0,
+    integral=lambda t: t / 2.0 - np.sin(np.pi * t) / (2.0 * np.pi),
+)
+
+SINE = Transition(
+    shape=lambda t: t - np.sin(2.0 * np.pi * t) / (2.0 * np.pi),
+    integral=lambda t: t**2 / 2.0 + (np.cos(2.0 * np.pi * t) - 1.0) / (4.0 * np.pi**2),
+)
+
+HELMERT = Transition(
+    shape=_helmert_shape,
+    integral=_helmert_integral,
+    breaks=(0.5,),
+)
+
+VIENNESE = Transition(
+    shape=lambda t: 35.0 * t**4 - 84.0 * t**5 + 70.0 * t**6 - 20.0 * t**7,
+    integral=lambda t: 7.0 * t**5 - 14.0 * t**6 + 10.0 * t**7 - 2.5 * t**8,
+)
+
+# keyed by the IFC PredefinedType of the segment
+TRANSITIONS = {
+    "LINEARTRANSITION": LINEAR,
+    "CLOTHOID": LINEAR,
+    "BLOSSCURVE": BLOSS,
+    "COSINECURVE": COSINE,
+    "SINECURVE": SINE,
+    "HELMERTCURVE": HELMERT,
+    "VIENNESEBEND": VIENNESE,
+}
+
+
+def predefined_type(segment) -> str:
+    """
+    PredefinedType of a segment as an upper case string.
+
+    Accepts IFC entities (string attribute) as well as segments using an enum.
+    """
+    pt = segment.PredefinedType
+    return str(getattr(pt, "name", pt)).upper()
+
+
+def as_result(value: np.ndarray):
+    """
+    Return a float for 0-d results so scalar input gives scalar output.
+    """
+    value = np.asarray(value)
+    if value.ndim == 0:
+        return float(value)
+    return value
@@ -0,0 +1,114 @@
+"""
+Vectorized height calculation for vertical alignment segments.
+
+`h_on_<PredefinedType>(segment, u)` returns the height at distance `u` along
+the segment (measured horizontally from StartDistAlong). `u` may be a scalar
+or an array of any shape; scalar input returns a float. The segment is read
+through its IFC attribute names (StartHeight, StartGradient, EndGradient,
+HorizontalLength, RadiusOfCurvature), so an IfcAlignmentVerticalSegment
+entity or any object with the same attributes can be passed. Attributes may
+themselves be arrays, e.g. one value per point, and broadcast against `u`.
+"""
+
+import numpy as np
+
+from alignment_tools.transitions import as_result
+from alignment_tools.transitions import predefined_type
+
+
+def _attributes(segment):
+    return (
+        np.asarray(segment.StartHeight, dtype=np.float64),
+        np.asarray(segment.StartGradient, dtype=np.float64),
+        np.asarray(segment.EndGradient, dtype=np.float64),
+        np.asarray(segment.HorizontalLength, dtype=np.float64),
+    )
+
+
+def _radius(segment):
+    radius = getattr(segment, "RadiusOfCurvature", None)
+    return None if radius is None else np.abs(np.asarray(radius, dtype=np.float64))
+
+
+def h_on_CONSTANTGRADIENT(segment, u):
+    """
+    Height on a constant gradient segment.
+    """
+    z0, g0, _, _ = _attributes(segment)
+    u = np.asarray(u, dtype=np.float64)
+
+    return as_result(z0 + g0 * u)
+
+
+def h_on_PARABOLICARC(segment, u):
+    """
+    Height on a parabolic vertical curve, whose gradient varies linearly
+    from StartGradient to EndGradient over HorizontalLength.
+    """
+    z0, g0, g1, length = _attributes(segment)
+    u = np.asarray(u, dtype=np.float64)
+
+    return as_result(z0 + g0 * u + (g1 - g0) / (2.0 * length) * u**2)
+
+
+def h_on_CIRCULARARC(segment, u):
+    """
+    Height on a circular vertical curve.
+
+    RadiusOfCurvature is used if present, otherwise the radius follows from
+    the start and end gradients and the horizontal length. The arc is a sag
+    curve if the gradient increases and a crest curve otherwise.
+    """
+    z0, g0, g1, length = _attributes(segment)
+    u = np.asarray(u, dtype=np.float64)
+    sin0 = g0 / np.sqrt(1.0 + g0**2)
+    sin1 = g1 / np.sqrt(1.0 + g1**2)
+    radius = _radius(segment)
+    if radius is None:
+        radius = length / np.abs(sin1 - sin0)
+    sign = np.where(g1 >= g0, 1.0, -1.0)
+
+    # centre of the circle relative to the start of the segment
+    xc = -sign * radius * sin0
+    zc = z0 + sign * radius / np.sqrt(1.0 + g0**2)
+
+    return as_result(zc - sign * np.sqrt(radius**2 - (u - xc) ** 2))
+
+
+def h_on_CLOTHOID(segment, u):
+    """
+    Height on a vertical clothoid, approximated by a cubic parabola.
+
+    The curvature of the profile varies linearly over the segment. It starts
+    at 1 / RadiusOfCurvature if given (zero otherwise), and the end curvature
+    is chosen so that the gradient reaches EndGradient.
+    """
+    z0, g0, g1, length = _attributes(segment)
+    u = np.asarray(u, dtype=np.float64)
+    radius = _radius(segment)
+    k0 = 0.0 if radius is None else np.sign(g1 - g0) / radius
+    k1 = 2.0 * (g1 - g0) / length - k0
+
+    return as_result(z0 + g0 * u + k0 * u**2 / 2.0 + (k1 - k0) * u**3 / (6.0 * length))
+
+
+VERTICAL_EVALUATORS = {
+    "CONSTANTGRADIENT": h_on_CONSTANTGRADIENT,
+    "PARABOLICARC": h_on_PARABOLICARC,
+    "CIRCULARARC": h_on_CIRCULARARC,
+    "CLOTHOID": h_on_CLOTHOID,
+}
+
+
+def segment_height(segment, u):
+    """
+    Height at distance `u` along a vertical segment of any supported type.
+    """
+    try:
+        evaluator = VERTICAL_EVALUATORS[predefined_type(segment)]
+    except KeyError:
+        raise NotImplementedError(
+            f"Vertical segment type {predefined_type(segment)} is not supported."
+        ) from None
+
+    return evaluator(segment, u)
@@ -1,14 +1,33 @@
+import argparse
+from dataclasses import asdict
+from dataclasses import dataclass
 from enum import Enum
+import multiprocessing as mp
+from multiprocessing.connection import wait
 import os
 import pathlib
+import signal
+import time
+import traceback
 
 from matplotlib import pyplot as plt
 import numpy as np
-import pandas as pd
 
 import ifcopenshell
 import ifcopenshell.geom as geom
 
+from alignment_tools.deviation import DeviationMetrics
+from alignment_tools.deviation import deviation_metrics
+from alignment_tools.deviation import write_report
+from alignment_tools.reference_store import ReferenceStore
+
+TESTSET_PATH = os.path.join(
+    pathlib.PurePath("/root"),
+    "src",
+    "IFC-Rail-Unit-Test-Reference-Code",
+    "alignment_testset",
+)
+
 
 class LayoutTypeEnum(Enum):
     HORIZONTAL = "H"
@@ -39,14 +58,18 @@ def synthetic_test(
     segment_type: SegmentTypeEnum,
     test_index: int = 1,
     interactive: bool = False,
-) -> None:
+    plot: bool = True,
+) -> DeviationMetrics:
     """
     Load synthetic data from https://github.com/bSI-RailwayRoom/IFC-Rail-Unit-Test-Reference-Code/tree/master/alignment_testset
-    and plot the provided X,Y coordinates against those calculated by `ifcopenshell`.
+    and compare the provided X,Y,Z coordinates against those calculated by `ifcopenshell`.
 
     @param transition_type: Transition typ (e.g. `Clothoid`) to load and test
     @param test_index: index of the Alignment With Cant (AWC) Unit Test (UT)
     @param interactive: True to display in jupyter notebook, False to write image to disk
+    @param plot: False to skip plotting and only calculate the deviation metrics
+    @return: deviation of the calculated vertices from the reference polyline,
+        None if `ifcopenshell.geom.create_shape()` generated no vertices
     """
 
     if test_index < 1 or test_index > 16:
@@ -55,20 +78,7 @@ def synthetic_test(
 
     layout_name = str.capitalize(layout_type.name)
     layout_tag = f"{layout_name}Alignment"
-    base_path = os.path.join(
-        pathlib.PurePath("/root"),
-        "src",
-        "IFC-Rail-Unit-Test-Reference-Code",
-        "alignment_testset",
-    )
-
-    ifc_path = os.path.join(base_path, "IFC-WithGeneratedGeometry")
-    txt_path = os.path.join(
-        base_path,
-        f"ToolboxProcess-{layout_type.value}",
-        layout_tag,
-        segment_type.value,
-    )
+    ifc_path = os.path.join(TESTSET_PATH, "IFC-WithGeneratedGeometry")
 
     segment_tag = segment_type.value
     test_data = {
@@ -113,9 +123,6 @@ def synthetic_test(
     }
     test_case = test_data[layout_name][test_index]
 
-    txt_file = f"{test_case}.txt"
-    in_txt = os.path.join(txt_path, txt_file)
-
     test_title = f"{layout_tag}_{test_case}"
     test_file = f"GENERATED__{layout_tag}_{test_case}.ifc"
 
@@ -124,16 +131,9 @@ def synthetic_test(
         test_file = f"{test_file[:-6]}.ifc"
     in_file = os.path.join(ifc_path, test_file)
 
-    df1 = pd.read_csv(in_txt, delimiter="\t", skiprows=2, header=None)
-    df1 = df1.set_axis(
-        [
-            "CurveLength",
-            "X",
-            "Y",
-            "Z",
-            "BaseCurve",
-        ],
-        axis="columns",
+    # reference tables are parsed once into a memory-mapped store, see alignment_tools.reference_store
+    df1 = ReferenceStore(TESTSET_PATH).load_frame(
+        layout_type.value, segment_type.value, test_case
     )
     model = ifcopenshell.open(in_file)
 
@@ -156,8 +156,14 @@ def synthetic_test(
     if len(verts) == 0:
         msg += f"\n[ERROR] No vertices generated by ifcopenshell.geom.create_shape()."
         print(msg)
+        return None
     verts = np.array(shape.verts).reshape((-1, 3))
-    
+
+    reference = df1[["X", "Y", "Z"]].to_numpy()
+    metrics = deviation_metrics(verts, reference, df1["CurveLength"].to_numpy())
+    if not plot:
+        return metrics
+
     x, y, z = verts.T
 
     if layout_type == LayoutTypeEnum.HORIZONTAL:
@@ -192,47 +198,269 @@ def synthetic_test(
         plt.show()
     else:
         out_file = os.path.join("out", "png", f"{test_title}.png")
-        if not "[ERROR]" in msg:
-            print(f"[INFO] writing output to {out_file}...")
-            plt.savefig(out_file)
+        print(f"[INFO] writing output to {out_file}...")
+        plt.savefig(out_file)
 
     plt.close()
 
+    return metrics
+
+
+class CaseStatus(Enum):
+    PASSED = "passed"
+    FAILED = "failed"
+    CRASHED = "crashed"
+    TIMEOUT = "timeout"
+
+
+@dataclass
+class CaseResult:
+    """
+    Outcome of a single `synthetic_test()` case run in its own worker process.
+    """
+
+    layout_type: LayoutTypeEnum
+    segment_type: SegmentTypeEnum
+    test_index: int
+    status: CaseStatus
+    elapsed: float
+    message: str = ""
+    metrics: DeviationMetrics = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.layout_type.name}/{self.segment_type.value}/{self.test_index}"
+
+    def report_row(self) -> dict:
+        row = {
+            "layout": self.layout_type.name,
+            "segment": self.segment_type.value,
+            "test_index": self.test_index,
+            "status": self.status.value,
+            "elapsed": round(self.elapsed, 3),
+        }
+        if self.metrics is not None:
+            row.update(asdict(self.metrics))
+
+        return row
+
+
+HORIZONTAL_SEGMENT_TYPES = [
+    SegmentTypeEnum.LINE,
+    SegmentTypeEnum.CIRCULARARC,
+    SegmentTypeEnum.CLOTHOID,
+    SegmentTypeEnum.CUBIC,
+    SegmentTypeEnum.HELMERTCURVE,
+    SegmentTypeEnum.BLOSSCURVE,
+    SegmentTypeEnum.COSINECURVE,
+    SegmentTypeEnum.SINECURVE,
+    SegmentTypeEnum.VIENNESEBEND,
+]
+
+VERTICAL_SEGMENT_TYPES = [
+    SegmentTypeEnum.CIRCULARARC,
+    SegmentTypeEnum.CLOTHOID,
+    SegmentTypeEnum.CONSTANTGRADIENT,
+    SegmentTypeEnum.PARABOLICARC,
+]
+
+CANT_SEGMENT_TYPES = [
+    SegmentTypeEnum.BLOSSCURVE,
+    SegmentTypeEnum.CONSTANTCANT,
+    SegmentTypeEnum.COSINECURVE,
+    SegmentTypeEnum.HELMERTCURVE,
+    SegmentTypeEnum.LINEARTRANSITION,
+    SegmentTypeEnum.SINECURVE,
+    SegmentTypeEnum.VIENNESEBEND,
+]
+
+
+def sweep_cases() -> list[tuple[LayoutTypeEnum, SegmentTypeEnum, int]]:
+    """
+    Full (layout, segment type, test index) matrix of the synthetic conformance sweep.
+
+    The vertical clothoid cases are included; a segfault in one of them is
+    isolated to its worker process by `run_sweep()`.
+    """
+    cases = []
+    for segment_type in HORIZONTAL_SEGMENT_TYPES:
+        cases += [(LayoutTypeEnum.HORIZONTAL, segment_type, i) for i in range(1, 9)]
+    for segment_type in VERTICAL_SEGMENT_TYPES:
+        cases += [(LayoutTypeEnum.VERTICAL, segment_type, i) for i in range(1, 9)]
+    for segment_type in CANT_SEGMENT_TYPES:
+        cases += [(LayoutTypeEnum.CANT, segment_type, i) for i in range(1, 17)]
+
+    return cases
+
+
+def _run_case(conn, plot, layout_type, segment_type, test_index) -> None:
+    """
+    Worker process entry point. Reports back over `conn` unless the process dies.
+    """
+    try:
+        metrics = synthetic_test(layout_type, segment_type, test_index, False, plot)
+    except Exception:
+        conn.send((CaseStatus.FAILED.value, traceback.format_exc(), None))
+    else:
+        if metrics is None:
+            message = "No vertices generated by ifcopenshell.geom.create_shape()."
+            conn.send((CaseStatus.FAILED.value, message, None))
+        else:
+            conn.send((CaseStatus.PASSED.value, "", asdict(metrics)))
+    finally:
+        conn.close()
+
+
+def _collect(proc, conn, case, started, status=None, message="") -> CaseResult:
+    metrics = None
+    if status is None and conn.poll():
+        try:
+            value, message, values = conn.recv()
+            status = CaseStatus(value)
+            if values is not None:
+                metrics = DeviationMetrics(**values)
+        except EOFError:
+            pass
+    if status is None:
+        status = CaseStatus.CRASHED
+        if proc.exitcode is not None and proc.exitcode < 0:
+            message = f"terminated by {signal.Signals(-proc.exitcode).name}"
+        else:
+            message = f"exited with code {proc.exitcode} without reporting a result"
+    conn.close()
+
+    return CaseResult(*case, status, time.perf_counter() - started, message, metrics)
+
+
+def run_sweep(
+    cases: list[tuple[LayoutTypeEnum, SegmentTypeEnum, int]] = None,
+    processes: int = None,
+    timeout: float = 300.0,
+    plot: bool = True,
+) -> list[CaseResult]:
+    """
+    Run `synthetic_test()` cases concurrently, one worker process per case.
+
+    Each case runs in a fresh process so that a segfault or hang in the
+    geometry kernel only loses that case; it is recorded as crashed (or timed
+    out) and the rest of the sweep continues.
+
+    @param cases: (layout, segment type, test index) tuples, defaults to `sweep_cases()`
+    @param processes: number of concurrent workers, defaults to `os.cpu_count()`
+    @param timeout: wall-clock seconds allowed per case before it is killed
+    @param plot: False to only calculate deviation metrics without writing PNGs
+    @return: one `CaseResult` per case, in the order of `cases`
+    """
+    if cases is None:
+        cases = sweep_cases()
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    ctx = mp.get_context()
+    pending = list(enumerate(cases))[::-1]
+    running = {}
+    results = [None] * len(cases)
+
+    while pending or running:
+        while pending and len(running) < processes:
+            index, case = pending.pop()
+            recv_conn, send_conn = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_run_case, args=(send_conn, plot, *case), daemon=True)
+            proc.start()
+            send_conn.close()
+            running[proc.sentinel] = (index, proc, recv_conn, case, time.perf_counter())
+
+        ready = wait(list(running), timeout=0.5)
+        now = time.perf_counter()
+        for sentinel in list(running):
+            index, proc, conn, case, started = running[sentinel]
+            if sentinel in ready:
+                proc.join()
+                result = _collect(proc, conn, case, started)
+            elif now - started > timeout:
+                proc.kill()
+                proc.join()
+                result = _collect(
+                    proc, conn, case, started, CaseStatus.TIMEOUT, f"exceeded {timeout} s"
+                )
+            else:
+                continue
+            del running[sentinel]
+            results[index] = result
+            line = f"[{result.status.value.upper()}] {result.label} ({result.elapsed:.1f} s)"
+            if result.metrics is not None:
+                line += f" max={result.metrics.max:.3e} rms={result.metrics.rms:.3e}"
+            print(line)
+
+    return results
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the bSI-RailwayRoom synthetic alignment sweep."
+    )
+    parser.add_argument(
+        "-j",
+        "--processes",
+        type=int,
+        default=None,
+        help="number of concurrent worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=300.0,
+        help="seconds allowed per case before it is killed (default: 300)",
+    )
+    parser.add_argument(
+        "--no-plot",
+        action="store_true",
+        help="only calculate deviation metrics, do not write PNGs to out/png",
+    )
+    parser.add_argument(
+        "--report",
+        default=os.path.join("out", "report", "synthetic_sweep.json"),
+        help="deviation report, .json or .csv (default: out/report/synthetic_sweep.json)",
+    )
+    parser.add_argument(
+        "--max-tol",
+        type=float,
+        default=None,
+        help="fail the sweep if any case deviates by more than this",
+    )
+    parser.add_argument(
+        "--rms-tol",
+        type=float,
+        default=None,
+        help="fail the sweep if any case has an RMS deviation above this",
+    )
+    args = parser.parse_args()
 
-    for i in range(8):
-        synthetic_test(LayoutTypeEnum.HORIZONTAL, SegmentTypeEnum.LINE, i + 1, False)
-        synthetic_test(LayoutTypeEnum.HORIZONTAL, SegmentTypeEnum.CIRCULARARC, i + 1, False)
-        synthetic_test(LayoutTypeEnum.HORIZONTAL, SegmentTypeEnum.CLOTHOID, i + 1, False)
-        synthetic_test(LayoutTypeEnum.HORIZONTAL, SegmentTypeEnum.CUBIC, i + 1, False)
-        synthetic_test(LayoutTypeEnum.HORIZONTAL, SegmentTypeEnum.HELMERTCURVE, i + 1, False)
-        synthetic_test(LayoutTypeEnum.HORIZONTAL, SegmentTypeEnum.BLOSSCURVE, i + 1, False)
-        synthetic_test(LayoutTypeEnum.HORIZONTAL, SegmentTypeEnum.COSINECURVE, i + 1, False)
-        synthetic_test(LayoutTypeEnum.HORIZONTAL, SegmentTypeEnum.SINECURVE, i + 1, False)
-        synthetic_test(LayoutTypeEnum.HORIZONTAL, SegmentTypeEnum.VIENNESEBEND, i + 1, False)
-
-        synthetic_test(LayoutTypeEnum.VERTICAL, SegmentTypeEnum.CIRCULARARC, i + 1, False)
-        # segfault on CLOTHOID
-        # synthetic_test(LayoutTypeEnum.VERTICAL, SegmentTypeEnum.CLOTHOID, i + 1, False)
-        synthetic_test(LayoutTypeEnum.VERTICAL, SegmentTypeEnum.CONSTANTGRADIENT, i + 1, False)
-        synthetic_test(LayoutTypeEnum.VERTICAL, SegmentTypeEnum.PARABOLICARC, i + 1, False)
-
-        synthetic_test(LayoutTypeEnum.CANT, SegmentTypeEnum.BLOSSCURVE, i + 1, False)
-        synthetic_test(LayoutTypeEnum.CANT, SegmentTypeEnum.CONSTANTCANT, i + 1, False)
-        synthetic_test(LayoutTypeEnum.CANT, SegmentTypeEnum.COSINECURVE, i + 1, False)
-        synthetic_test(LayoutTypeEnum.CANT, SegmentTypeEnum.HELMERTCURVE, i + 1, False)
-        synthetic_test(LayoutTypeEnum.CANT, SegmentTypeEnum.LINEARTRANSITION, i + 1, False)
-        synthetic_test(LayoutTypeEnum.CANT, SegmentTypeEnum.SINECURVE, i + 1, False)
-        synthetic_test(LayoutTypeEnum.CANT, SegmentTypeEnum.VIENNESEBEND, i + 1, False)
-
-        synthetic_test(LayoutTypeEnum.CANT, SegmentTypeEnum.BLOSSCURVE, i + 9, False)
-        synthetic_test(LayoutTypeEnum.CANT, SegmentTypeEnum.CONSTANTCANT, i + 9, False)
-        synthetic_test(LayoutTypeEnum.CANT, SegmentTypeEnum.COSINECURVE, i + 9, False)
-        synthetic_test(LayoutTypeEnum.CANT, SegmentTypeEnum.HELMERTCURVE, i + 9, False)
-        synthetic_test(LayoutTypeEnum.CANT, SegmentTypeEnum.LINEARTRANSITION, i + 9, False)
-        synthetic_test(LayoutTypeEnum.CANT, SegmentTypeEnum.SINECURVE, i + 9, False)
-        synthetic_test(LayoutTypeEnum.CANT, SegmentTypeEnum.VIENNESEBEND, i + 9, False)
+    # pack (or refresh) the reference tables once, before the workers read them
+    if os.path.isdir(TESTSET_PATH):
+        ReferenceStore(TESTSET_PATH).build()
 
+    results = run_sweep(
+        processes=args.processes, timeout=args.timeout, plot=not args.no_plot
+    )
+    write_report([r.report_row() for r in results], args.report)
+    print(f"[INFO] deviation report written to {args.report}")
+
+    for status in CaseStatus:
+        selected = [r for r in results if r.status == status]
+        print(f"[INFO] {status.value}: {len(selected)}")
+        if status != CaseStatus.PASSED:
+            for r in selected:
+                print(f"    {r.label}: {r.message.strip().splitlines()[-1]}")
+
+    out_of_tol = [
+        r
+        for r in results
+        if r.metrics is not None and not r.metrics.within(args.max_tol, args.rms_tol)
+    ]
+    for r in out_of_tol:
+        print(f"[ERROR] {r.label} out of tolerance: max={r.metrics.max:.3e} rms={r.metrics.rms:.3e}")
 
     print(f"[INFO] done.")
+    if out_of_tol or any(r.status != CaseStatus.PASSED for r in results):
+        raise SystemExit(1)
@@ -0,0 +1,284 @@
+"""
+Benchmarks of the alignment geometry paths on the bundled models.
+
+The paths timed are:
+- reading the layouts with `Alignment.from_entity()`
+- `Alignment.create_shape()` at several point intervals
+- tessellation of the alignment curves by the geometry kernel with `ifcopenshell.geom.create_shape()`
+- the vertical and cant evaluators of each segment type, at several numbers of points
+- resolution of linear placements with `resolve_linear_placements()`, at several numbers of products
+
+The models are 4REN0_Autodesk and UT_LinearPlacement_2 from tests/data, the
+ACCA sleepers model from assets/models/alignment_validation and the FHWA
+Bridge Geometry Manual example. The FHWA asset is written in IFC4X3_RC4, so
+the example alignment is built again with `AlignmentBuilder` from the
+parameters of examples/FHWA_Bridge_Geometry_Manual/Alignment.py.
+
+Run from the root of the repo::
+
+    python -m benchmarks.bench_alignment
+    python -m benchmarks.bench_alignment -k create_shape --threshold 0.1
+    python -m benchmarks.bench_alignment --update-baseline
+
+Results are written to out/benchmarks/latest.json and compared with
+benchmarks/baseline.json. The run fails if any case is slower than its
+baseline by more than the threshold.
+"""
+
+import argparse
+import functools
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+import ifcopenshell
+import ifcopenshell.geom as geom
+import ifcopenshell.guid
+
+from alignment_tools.alignment import Alignment
+from alignment_tools.benchmark import DEFAULT_MIN_DIFFERENCE
+from alignment_tools.benchmark import DEFAULT_THRESHOLD
+from alignment_tools.benchmark import compare
+from alignment_tools.benchmark import read_results
+from alignment_tools.benchmark import time_case
+from alignment_tools.benchmark import write_results
+from alignment_tools.builder import AlignmentBuilder
+from alignment_tools.builder import HorizontalSegment
+from alignment_tools.builder import VerticalSegment
+from alignment_tools.cant import CANT_EVALUATORS
+from alignment_tools.cant import AlignmentCantSide
+from alignment_tools.linear_placement import resolve_linear_placements
+from alignment_tools.vertical import VERTICAL_EVALUATORS
+
+ROOT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODEL_PATHS = {
+    "4REN0_Autodesk": os.path.join(ROOT_PATH, "tests", "data", "4REN0_Autodesk.ifc"),
+    "UT_LinearPlacement_2": os.path.join(ROOT_PATH, "tests", "data", "UT_LinearPlacement_2.ifc"),
+    "ACCA_sleepers": os.path.join(
+        ROOT_PATH, "assets", "models", "alignment_validation", "ACCA_sleepers-linear-placement-cant-implicit.ifc"
+    ),
+}
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+OUTPUT_PATH = os.path.join(ROOT_PATH, "out", "benchmarks", "latest.json")
+
+POINT_INTERVALS = (25.0, 5.0, 1.0)
+EVALUATOR_SIZES = (1_000, 100_000)
+PLACEMENT_SIZES = (100, 1_000, 10_000)
+CURVE_TYPES = ("IfcCompositeCurve", "IfcGradientCurve", "IfcSegmentedReferenceCurve")
+
+
+def fhwa_model() -> ifcopenshell.file:
+    "the alignment of examples/FHWA_Bridge_Geometry_Manual/Alignment.py"
+    horizontal = [
+        HorizontalSegment((500.0, 2500.0), np.radians(327.0613), 0.0, 0.0, 1956.785654, "LINE"),
+        HorizontalSegment((2142.237995, 1436.014820), np.radians(327.0613), 1000.0, 1000.0, 1919.222667, "CIRCULARARC"),
+        HorizontalSegment((3660.446123, 2050.736173), np.radians(77.0247), 0.0, 0.0, 1886.905454, "LINE"),
+        HorizontalSegment((4084.115884, 3889.462938), np.radians(77.0247), -1250.0, -1250.0, 1848.115835, "CIRCULARARC"),
+        HorizontalSegment((5469.395067, 4847.566310), np.radians(352.3133), 0.0, 0.0, 1564.635765, "LINE"),
+        HorizontalSegment((7019.971367, 4638.286073), np.radians(352.3133), -950.0, -950.0, 1049.119737, "CIRCULARARC"),
+        HorizontalSegment((7790.932128, 4006.730765), np.radians(289.0395), 0.0, 0.0, 2112.285084, "LINE"),
+    ]
+    vertical = []
+    for start, height, g0, g1, length in (
+        (0.0, 100.0, 0.0175, 0.0175, 1200.0),
+        (1200.0, 121.0, 0.0175, -0.01, 1600.0),
+        (2800.0, 127.0, -0.01, -0.01, 1600.0),
+        (4400.0, 111.0, -0.01, 0.02, 1200.0),
+        (5600.0, 117.0, 0.02, 0.02, 800.0),
+        (6400.0, 133.0, 0.02, -0.02, 2000.0),
+        (8400.0, 133.0, -0.02, -0.02, 1000.0),
+        (9400.0, 113.0, -0.02, -0.005, 800.0),
+        (10200.0, 103.0, -0.005, -0.005, 2600.0),
+    ):
+        if g0 == g1:
+            vertical.append(VerticalSegment(start, length, height, g0, g1, None, "CONSTANTGRADIENT"))
+        else:
+            vertical.append(VerticalSegment(start, length, height, g0, g1, length / (g1 - g0), "PARABOLICARC"))
+    builder = AlignmentBuilder("FHWA Bridge Geometry Manual", linear_unit="foot")
+    builder.add_alignment("Example Alignment", horizontal, vertical)
+    builder.finalize()
+
+    return builder.file
+
+
+@functools.lru_cache(maxsize=None)
+def load_model(name: str) -> ifcopenshell.file:
+    if name == "FHWA":
+        return fhwa_model()
+    return ifcopenshell.open(MODEL_PATHS[name])
+
+
+def sleeper_model(count: int) -> ifcopenshell.file:
+    "ACCA model with `count` sleepers placed along the alignment, see tests/test_linear_placement.py"
+    model = ifcopenshell.open(MODEL_PATHS["ACCA_sleepers"])
+    template = model.by_type("IfcLinearPlacement")[0]
+    curve = template.RelativePlacement.Location.BasisCurve
+    spacing = 900.0 / count
+    for i in range(count):
+        location = model.create_entity(
+            "IfcPointByDistanceExpression",
+            DistanceAlong=model.create_entity("IfcLengthMeasure", spacing * i),
+            OffsetLateral=0.75 if i % 2 else 0.0,
+            BasisCurve=curve,
+        )
+        placement = model.create_entity(
+            "IfcLinearPlacement",
+            template.PlacementRelTo,
+            model.create_entity("IfcAxis2PlacementLinear", location),
+        )
+        model.create_entity("IfcTrackElement", ifcopenshell.guid.new(), ObjectPlacement=placement)
+
+    return model
+
+
+def vertical_segment(predefined_type: str) -> VerticalSegment:
+    return VerticalSegment(0.0, 400.0, 100.0, -0.02, 0.03, 8000.0, predefined_type)
+
+
+def cant_segment(predefined_type: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        StartDistAlong=0.0,
+        HorizontalLength=120.0,
+        StartCantLeft=0.0,
+        EndCantLeft=0.16,
+        StartCantRight=0.0,
+        EndCantRight=0.0,
+        PredefinedType=predefined_type,
+    )
+
+
+def cases():
+    """
+    Benchmark cases as (name, group, params, setup), `setup()` returning the function to time.
+    """
+    models = ("4REN0_Autodesk", "UT_LinearPlacement_2", "ACCA_sleepers", "FHWA")
+    for model in models:
+
+        def setup(model=model):
+            entity = load_model(model).by_type("IfcAlignment")[0]
+            return lambda: Alignment().from_entity(entity)
+
+        yield f"from_entity[{model}]", "from_entity", {"model": model}, setup
+
+    for model in models:
+        for interval in POINT_INTERVALS:
+
+            def setup(model=model, interval=interval):
+                alignment = Alignment().from_entity(load_model(model).by_type("IfcAlignment")[0])
+                return lambda: alignment.create_shape(point_interval=interval)
+
+            params = {"model": model, "point_interval": interval}
+            yield f"create_shape[{model}-{interval:g}]", "create_shape", params, setup
+
+    for model in models:
+        for curve_type in CURVE_TYPES:
+
+            def setup(model=model, curve_type=curve_type):
+                curves = [c for c in load_model(model).by_type(curve_type) if c.is_a() == curve_type]
+                if not curves:
+                    return None
+                settings = geom.settings()
+                return lambda: geom.create_shape(settings, curves[0])
+
+            params = {"model": model, "curve": curve_type}
+            yield f"tessellate[{model}-{curve_type}]", "tessellate", params, setup
+
+    for predefined_type, evaluator in VERTICAL_EVALUATORS.items():
+        for size in EVALUATOR_SIZES:
+
+            def setup(evaluator=evaluator, predefined_type=predefined_type, size=size):
+                segment = vertical_segment(predefined_type)
+                u = np.linspace(0.0, segment.HorizontalLength, size)
+                return lambda: evaluator(segment, u)
+
+            params = {"type": predefined_type, "points": size}
+            yield f"vertical[{predefined_type}-{size}]", "vertical", params, setup
+
+    for predefined_type, evaluator in CANT_EVALUATORS.items():
+        for size in EVALUATOR_SIZES:
+
+            def setup(evaluator=evaluator, predefined_type=predefined_type, size=size):
+                segment = cant_segment(predefined_type)
+                u = np.linspace(0.0, segment.HorizontalLength, size)
+                return lambda: evaluator(segment, u, AlignmentCantSide.LEFT)
+
+            params = {"type": predefined_type, "points": size}
+            yield f"cant[{predefined_type}-{size}]", "cant", params, setup
+
+    for size in PLACEMENT_SIZES:
+
+        def setup(size=size):
+            model = sleeper_model(size)
+            return lambda: resolve_linear_placements(model)
+
+        yield f"linear_placement[ACCA_sleepers-{size}]", "linear_placement", {"products": size}, setup
+
+
+def run(pattern: str = None, repeat: int = 5) -> list:
+    """
+    Time the benchmark cases whose name contains `pattern`.
+
+    @param pattern: substring of the case names to run, None for all
+    @param repeat: number of timed calls of each case
+    @return: `BenchmarkResult` list
+    """
+    results = []
+    for name, group, params, setup in cases():
+        if pattern and pattern not in name:
+            continue
+        func = setup()
+        if func is None:
+            continue
+        result = time_case(name, group, func, params, repeat=repeat)
+        print(f"[INFO] {name}: min {result.min * 1e3:.3f} ms, median {result.median * 1e3:.3f} ms")
+        results.append(result)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the alignment geometry paths and compare with a baseline.")
+    parser.add_argument("-k", "--pattern", default=None, help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="timed calls per case (default: 5)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON (default: benchmarks/baseline.json)")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="results JSON (default: out/benchmarks/latest.json)")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"relative slowdown that fails the run (default: {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--min-difference",
+        type=float,
+        default=DEFAULT_MIN_DIFFERENCE,
+        help=f"slowdown in seconds that is always tolerated (default: {DEFAULT_MIN_DIFFERENCE})",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="store the results of the cases run in the baseline",
+    )
+    args = parser.parse_args()
+
+    results = run(args.pattern, args.repeat)
+    write_results(results, args.output)
+    print(f"[INFO] results written to {args.output}")
+
+    baseline = read_results(args.baseline)
+    if args.update_baseline:
+        baseline.update({r.name: r for r in results})
+        write_results(list(baseline.values()), args.baseline)
+        print(f"[INFO] {len(results)} cases stored in {args.baseline}")
+        raise SystemExit(0)
+
+    missing = [r.name for r in results if r.name not in baseline]
+    if missing:
+        print(f"[WARNING] {len(missing)} cases have no baseline")
+    regressions = compare(results, baseline, args.threshold, args.min_difference)
+    for r in regressions:
+        print(f"[ERROR] {r.name} slower than baseline: {r.current * 1e3:.3f} ms vs {r.baseline * 1e3:.3f} ms ({r.ratio:.2f}x)")
+    print("[INFO] done.")
+    if regressions:
+        raise SystemExit(1)
@@ -0,0 +1,248 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import ifcopenshell
+
+from alignment_tools.alignment import Alignment
+from alignment_tools.alignment import COLUMNS
+from alignment_tools.deviation import polyline_deviation
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data")
+ASSETS_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "assets", "models", "alignment_validation"
+)
+
+# notebooks/004-cx64-sweeps.ipynb, create_shape(use_representation=False, point_interval=25)
+REN_POINTS = [
+    (0.00000, 0.269990, 1291.933570, -0.742491, 753.746629),
+    (25.00000, 18.449292, 1274.773392, -0.770645, 753.103918),
+    (100.00000, 69.990000, 1220.319628, -0.855104, 751.175782),
+    (250.00000, 158.405861, 1099.368457, -1.024023, 747.319511),
+    (425.00000, 234.124280, 941.911374, -1.221095, 742.841181),
+    (484.31607, 252.571392, 885.548334, -1.287892, 741.618686),
+]
+
+
+@pytest.fixture(scope="module")
+def ren_alignment() -> Alignment:
+    model = ifcopenshell.open(os.path.join(DATA_PATH, "4REN0_Autodesk.ifc"))
+    yield Alignment().from_entity(model.by_type("IfcAlignment")[0])
+
+
+@pytest.fixture(scope="module")
+def acca_alignment() -> Alignment:
+    model = ifcopenshell.open(
+        os.path.join(ASSETS_PATH, "ACCA_sleepers-linear-placement-cant-implicit.ifc")
+    )
+    yield Alignment().from_entity(model.by_type("IfcAlignment")[0])
+
+
+@pytest.fixture(scope="module")
+def tangent_alignment() -> Alignment:
+    "1 km tangent followed by a 300 m radius curve"
+    line = SimpleNamespace(
+        StartPoint=(0.0, 0.0),
+        StartDirection=0.0,
+        StartRadiusOfCurvature=0.0,
+        EndRadiusOfCurvature=0.0,
+        SegmentLength=1000.0,
+        PredefinedType="LINE",
+    )
+    arc = SimpleNamespace(
+        StartPoint=(1000.0, 0.0),
+        StartDirection=0.0,
+        StartRadiusOfCurvature=300.0,
+        EndRadiusOfCurvature=300.0,
+        SegmentLength=200.0,
+        PredefinedType="CIRCULARARC",
+    )
+    yield Alignment(horizontal=[line, arc])
+
+
+def max_deviation(alignment: Alignment, pts: np.ndarray) -> float:
+    dense = alignment.evaluate(np.linspace(alignment.start, alignment.end, 100001))
+    xyz = [COLUMNS.index(c) for c in ("X", "Y", "Z")]
+    dist, _ = polyline_deviation(np.nan_to_num(dense[:, xyz]), np.nan_to_num(pts[:, xyz]))
+    return float(dist.max())
+
+
+class TestFixedInterval:
+    """
+    Test calculation of alignment points at a fixed interval.
+    """
+
+    def test_columns(self, ren_alignment):
+        """
+        Points shall be returned with the columns of Alignment.create_shape.
+        """
+        pts = ren_alignment.create_shape(use_representation=False, point_interval=25)
+        assert pts.shape[1] == len(COLUMNS) == 8
+        assert pts[0, 0] == pytest.approx(0.0)
+        assert pts[-1, 0] == pytest.approx(ren_alignment.end)
+
+    def test_horizontal_and_vertical(self, ren_alignment):
+        """
+        Positions, directions and heights shall match the reference calculation.
+        """
+        expected = np.array(REN_POINTS)
+        pts = ren_alignment.evaluate(expected[:, 0])
+        assert pts[:, :5] == pytest.approx(expected, abs=1e-5)
+        assert np.isnan(pts[:, 5:]).all()
+
+    def test_critical_stations(self, ren_alignment):
+        """
+        Horizontal and vertical segment boundaries shall be included.
+        """
+        pts = ren_alignment.create_shape(point_interval=25)
+        for station in (404.93, 484.31607, 1104.93):
+            assert np.isclose(pts[:, 0], station).sum() == 1
+
+    def test_cant(self, acca_alignment):
+        """
+        Cant, cant rotation and reference height shall follow the cant layout.
+        """
+        pts = acca_alignment.evaluate([200.0, 425.0, 500.0])
+        assert pts[:, 5] == pytest.approx([0.0, 0.5, 1.0], abs=1e-6)
+        assert pts[2, 6] == pytest.approx(np.arcsin(1.0 / 1.5))
+        assert pts[2, 7] == pytest.approx(0.5)
+
+    def test_from_tables(self, ren_alignment):
+        """
+        An alignment built from segment tables shall match the one read from the model.
+        """
+        alignment = Alignment(
+            horizontal=[
+                SimpleNamespace(**{**seg.get_info(), "StartPoint": seg.StartPoint.Coordinates})
+                for seg in ren_alignment.horizontal
+            ],
+            vertical=ren_alignment.vertical,
+        )
+        d = np.linspace(0.0, alignment.end, 50)
+        assert alignment.evaluate(d) == pytest.approx(ren_alignment.evaluate(d), nan_ok=True)
+
+
+class TestAdaptive:
+    """
+    Test adaptive sampling of alignment points.
+    """
+
+    @pytest.mark.parametrize("tol", [0.1, 0.01])
+    def test_chord_tolerance(self, ren_alignment, tol):
+        """
+        The polyline through the points shall stay within the chord tolerance.
+        """
+        pts = ren_alignment.create_shape(chord_tolerance=tol)
+        assert max_deviation(ren_alignment, pts) <= tol
+
+    def test_boundaries_kept(self, ren_alignment):
+        """
+        Segment boundaries shall always be included.
+        """
+        pts = ren_alignment.create_shape(chord_tolerance=0.1)
+        assert np.all(np.isin(ren_alignment.critical_stations(), pts[:, 0]))
+        assert np.all(np.diff(pts[:, 0]) > 0.0)
+
+    def test_tangent_not_sampled(self, tangent_alignment):
+        """
+        Points shall be placed on the curve only, not along the tangent.
+        """
+        pts = tangent_alignment.create_shape(chord_tolerance=0.01)
+        assert pts[pts[:, 0] <= 1000.0, 0].tolist() == [0.0, 1000.0]
+        assert max_deviation(tangent_alignment, pts) <= 0.01
+        fixed = tangent_alignment.create_shape(point_interval=5.0)
+        assert max_deviation(tangent_alignment, fixed) > 0.01
+        assert len(pts) < len(fixed) / 3
+
+    def test_angle_tolerance(self, tangent_alignment):
+        """
+        Direction shall change by at most the angular tolerance between points.
+        """
+        pts = tangent_alignment.create_shape(angle_tolerance=0.01)
+        assert np.abs(np.diff(pts[:, 3])).max() <= 0.01
+
+    def test_max_spacing(self, tangent_alignment):
+        """
+        Points shall be at most max_spacing apart.
+        """
+        pts = tangent_alignment.create_shape(chord_tolerance=0.01, max_spacing=100.0)
+        assert np.diff(pts[:, 0]).max() <= 100.0
+
+    def test_cant_change(self, acca_alignment):
+        """
+        Points shall be placed where the cant changes, even on a tangent.
+        """
+        pts = acca_alignment.create_shape(chord_tolerance=0.01)
+        on_tangent = pts[pts[:, 0] <= 400.0, 0]
+        transition = pts[(pts[:, 0] > 400.0) & (pts[:, 0] < 450.0), 0]
+        assert on_tangent.tolist() == [0.0, 400.0]
+        assert len(transition) > 0
+
+
+class TestStreaming:
+    """
+    Test evaluation of the alignment chunk by chunk.
+    """
+
+    @pytest.mark.parametrize("chunk_size", [1, 5, 64])
+    def test_chunks(self, acca_alignment, chunk_size):
+        """
+        Joined chunks shall match create_shape() at the same interval.
+        """
+        expected = acca_alignment.create_shape(point_interval=10.0)
+        chunks = list(acca_alignment.iter_stations(step=10.0, chunk_size=chunk_size))
+        assert all(len(c) == chunk_size for c in chunks[:-1])
+        np.testing.assert_allclose(np.concatenate(chunks), expected, rtol=0.0, atol=1e-12)
+
+    def test_range(self, ren_alignment):
+        """
+        A station range shall start and end at the given stations and include the boundaries within it.
+        """
+        pts = np.concatenate(list(ren_alignment.iter_stations(100.0, 500.0, step=50.0, chunk_size=4)))
+        assert pts[[0, -1], 0] == pytest.approx([100.0, 500.0])
+        critical = ren_alignment.critical_stations()
+        inside = critical[(critical > 100.0) & (critical < 500.0)]
+        assert np.isin(inside, pts[:, 0]).all()
+        np.testing.assert_allclose(pts, ren_alignment.evaluate(pts[:, 0]), rtol=0.0, atol=1e-12)
+
+
+class TestLazy:
+    """
+    Test reading the layouts of an alignment on first use.
+    """
+
+    @pytest.fixture
+    def model(self):
+        yield ifcopenshell.open(
+            os.path.join(ASSETS_PATH, "ACCA_sleepers-linear-placement-cant-implicit.ifc")
+        )
+
+    def test_nothing_read(self, model):
+        """
+        A lazy alignment shall not read its layouts before it is used.
+        """
+        alignment = Alignment().from_entity(model.by_type("IfcAlignment")[0], lazy=True)
+        assert "horizontal" not in vars(alignment)
+        assert alignment.end > alignment.start
+        assert "horizontal" in vars(alignment)
+        assert alignment.horizontal.decoded == 0
+
+    def test_range_decoded(self, model, acca_alignment):
+        """
+        Only the segments of an evaluated range shall be decoded, with the same results.
+        """
+        alignment = Alignment().from_entity(model.by_type("IfcAlignment")[0], lazy=True)
+        distances = np.linspace(10.0, 50.0, 9)
+        np.testing.assert_array_equal(alignment.evaluate(distances), acca_alignment.evaluate(distances))
+        assert alignment.horizontal.decoded == 1
+        assert alignment.vertical.decoded == 1
+        assert alignment.cant.decoded == 1
+        assert len(alignment.horizontal) > 1
+
+        expected = acca_alignment.create_shape(point_interval=10.0)
+        np.testing.assert_array_equal(alignment.create_shape(point_interval=10.0), expected)
+        # all but the zero-length terminating segment
+        assert alignment.horizontal.decoded == len(alignment.horizontal) - 1
+        assert alignment.horizontal[0].StartPoint == pytest.approx((0.0, 0.0))
@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+import pytest
+
+import ifcopenshell.guid
+
+from alignment_tools import batch
+from alignment_tools.batch import EvaluationSettings
+from alignment_tools.batch import evaluate_model
+from alignment_tools.builder import AlignmentBuilder
+from alignment_tools.synthetic import SyntheticSpec
+from alignment_tools.synthetic import synthetic_layouts
+
+SETTINGS = EvaluationSettings(point_interval=10.0)
+
+
+@pytest.fixture(scope="module")
+def network(tmp_path_factory):
+    "model with three synthetic alignments and one without layouts"
+    builder = AlignmentBuilder()
+    layouts = {}
+    for seed in (1, 2, 3):
+        layouts[seed] = synthetic_layouts(SyntheticSpec(segments=12, seed=seed, length=2000.0))
+        builder.add_alignment(
+            f"Line {seed}",
+            layouts[seed].horizontal,
+            layouts[seed].vertical,
+            layouts[seed].cant,
+            rail_head_distance=layouts[seed].rail_head_distance,
+        )
+    builder.file.create_entity("IfcAlignment", GlobalId=ifcopenshell.guid.new(), Name="Empty")
+    path = str(tmp_path_factory.mktemp("batch") / "network.ifc")
+    builder.write(path)
+    yield path, layouts
+
+
+class TestEvaluateModel:
+    """
+    Test evaluation of all alignments of a model.
+    """
+
+    def test_serial(self, network):
+        """
+        Each alignment shall be evaluated as by create_shape(), alignments without layouts reported.
+        """
+        path, layouts = network
+        result = evaluate_model(path, SETTINGS, workers=0)
+        assert sorted(result.names.values()) == ["Empty", "Line 1", "Line 2", "Line 3"]
+        assert [result.names[g] for g in result.errors] == ["Empty"]
+        for global_id, points in result.points.items():
+            seed = int(result.names[global_id].split()[-1])
+            expected = layouts[seed].alignment().create_shape(point_interval=10.0)
+            np.testing.assert_allclose(points.to_numpy(), expected, rtol=0.0, atol=1e-9)
+
+    def test_workers(self, network):
+        """
+        Points from worker processes shall be the same as evaluated in this process and released on close.
+        """
+        path, _ = network
+        serial = evaluate_model(path, SETTINGS, workers=0)
+        with evaluate_model(path, SETTINGS, workers=2) as result:
+            assert result.names == serial.names
+            assert result.errors.keys() == serial.errors.keys()
+            assert len(result.blocks) == 3
+            for global_id, points in serial.points.items():
+                np.testing.assert_array_equal(result.points[global_id].to_numpy(), points.to_numpy())
+        assert result.points == {} and result.blocks == []
+
+    def test_selected(self, network):
+        """
+        Only the given alignments shall be evaluated.
+        """
+        path, _ = network
+        everything = evaluate_model(path, SETTINGS, workers=0)
+        first = next(iter(everything.points))
+        with evaluate_model(path, SETTINGS, workers=1, alignments=[first]) as result:
+            assert list(result.points) == [first]
+            assert result.errors == {}
+
+
+@pytest.fixture(scope="module")
+def broken(tmp_path_factory):
+    "model with a synthetic alignment and one whose horizontal segment has no design parameters"
+    builder = AlignmentBuilder()
+    layouts = synthetic_layouts(SyntheticSpec(segments=12, seed=1, length=2000.0))
+    builder.add_alignment("Line", layouts.horizontal, layouts.vertical)
+    file = builder.file
+    alignment = file.create_entity("IfcAlignment", GlobalId=ifcopenshell.guid.new(), Name="Broken")
+    horizontal = file.create_entity("IfcAlignmentHorizontal", GlobalId=ifcopenshell.guid.new())
+    segment = file.create_entity("IfcAlignmentSegment", GlobalId=ifcopenshell.guid.new())
+    file.create_entity("IfcRelNests", GlobalId=ifcopenshell.guid.new(), RelatingObject=alignment, RelatedObjects=[horizontal])
+    file.create_entity("IfcRelNests", GlobalId=ifcopenshell.guid.new(), RelatingObject=horizontal, RelatedObjects=[segment])
+    path = str(tmp_path_factory.mktemp("batch") / "broken.ifc")
+    builder.write(path)
+    yield path
+
+
+class TestFailures:
+    """
+    Test failures while evaluating a model.
+    """
+
+    @pytest.mark.parametrize("workers", (0, 2))
+    def test_malformed_alignment(self, broken, workers):
+        """
+        An alignment failing with any exception shall be reported without failing the batch.
+        """
+        with evaluate_model(broken, SETTINGS, workers=workers) as result:
+            assert sorted(result.names.values()) == ["Broken", "Line"]
+            (error,) = result.errors.values()
+            assert error.startswith("AttributeError")
+            assert len(result.points) == 1
+
+    @pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="shared memory blocks are not files here")
+    def test_released_on_failure(self, network, monkeypatch):
+        """
+        All shared memory blocks shall be released if collecting the results fails.
+        """
+        path, _ = network
+        before = set(os.listdir("/dev/shm"))
+        from_array = batch.AlignmentPoints.from_array
+        calls = []
+
+        def failing(points):
+            calls.append(points)
+            if len(calls) == 2:
+                raise RuntimeError("collecting failed")
+            return from_array(points)
+
+        monkeypatch.setattr(batch.AlignmentPoints, "from_array", failing)
+        with pytest.raises(RuntimeError):
+            evaluate_model(path, SETTINGS, workers=2)
+        assert set(os.listdir("/dev/shm")) <= before
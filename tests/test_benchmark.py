@@ -0,0 +1,64 @@
+import pytest
+
+from alignment_tools.benchmark import BenchmarkResult
+from alignment_tools.benchmark import compare
+from alignment_tools.benchmark import read_results
+from alignment_tools.benchmark import time_case
+from alignment_tools.benchmark import write_results
+
+
+def result(name, times):
+    return BenchmarkResult(name=name, group=name.split("[")[0], params={}, times=times)
+
+
+class TestBenchmark:
+    """
+    Test timing of benchmark cases and comparison with baselines.
+    """
+
+    def test_time_case(self):
+        """
+        Each timed call shall be recorded after the warm-up calls.
+        """
+        calls = []
+        timed = time_case("case", "group", lambda: calls.append(1), {"size": 10}, repeat=3, warmup=2)
+        assert len(calls) == 5
+        assert len(timed.times) == 3
+        assert timed.params == {"size": 10}
+        assert 0.0 <= timed.min <= timed.median
+
+    def test_round_trip(self, tmp_path):
+        """
+        Results shall be read back from the JSON they were written to.
+        """
+        path = str(tmp_path / "baseline.json")
+        assert read_results(path) == {}
+        results = [result("a[1]", [0.3, 0.1, 0.2]), result("b[2]", [1.0])]
+        write_results(results, path)
+        read = read_results(path)
+        assert list(read) == ["a[1]", "b[2]"]
+        assert read["a[1]"] == results[0]
+        assert read["a[1]"].min == 0.1
+
+    def test_compare(self):
+        """
+        Only cases slower than baseline by more than the threshold and the minimum difference shall be flagged.
+        """
+        baseline = {
+            "slow": result("slow", [0.100]),
+            "noise": result("noise", [0.00001]),
+            "ok": result("ok", [0.100]),
+            "faster": result("faster", [0.100]),
+        }
+        results = [
+            result("slow", [0.150, 0.200]),
+            result("noise", [0.00005]),
+            result("ok", [0.120]),
+            result("faster", [0.050]),
+            result("new", [1.0]),
+        ]
+        regressions = compare(results, baseline, threshold=0.25)
+        assert [r.name for r in regressions] == ["slow"]
+        assert regressions[0].ratio == pytest.approx(1.5)
+        assert [r.name for r in compare(results, baseline, threshold=0.1)] == ["slow", "ok"]
+        assert [r.name for r in compare(results, baseline, threshold=0.1, min_difference=0.0)] == ["noise", "slow", "ok"]
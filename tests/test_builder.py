@@ -0,0 +1,309 @@
+import numpy as np
+import pytest
+
+import ifcopenshell
+import ifcopenshell.util.unit
+import ifcopenshell.validate
+
+from alignment_tools.alignment import Alignment
+from alignment_tools.builder import AlignmentBuilder
+from alignment_tools.builder import HorizontalSegment
+from alignment_tools.builder import VerticalSegment
+from alignment_tools.builder import create_hcurve
+from alignment_tools.builder import create_segment_representations
+from alignment_tools.builder import create_tangent
+from alignment_tools.evaluator import CurveEvaluator
+from alignment_tools.horizontal import segment_point
+
+
+def spiral_tables():
+    "tangent, spiral, right-hand curve, spiral and tangent, over a crest curve"
+    horizontal = [HorizontalSegment((100.0, 50.0), 0.3, 0.0, 0.0, 200.0, "LINE")]
+    for predefined_type, start_radius, end_radius, length in (
+        ("CLOTHOID", 0.0, -300.0, 80.0),
+        ("CIRCULARARC", -300.0, -300.0, 150.0),
+        ("CLOTHOID", -300.0, 0.0, 80.0),
+        ("LINE", 0.0, 0.0, 100.0),
+    ):
+        previous = horizontal[-1]
+        x, y, direction = segment_point(previous, previous.SegmentLength)
+        horizontal.append(
+            HorizontalSegment((x, y), direction, start_radius, end_radius, length, predefined_type)
+        )
+    vertical = [
+        VerticalSegment(0.0, 100.0, 10.0, 0.02, 0.02, None, "CONSTANTGRADIENT"),
+        VerticalSegment(100.0, 200.0, 12.0, 0.02, -0.03, -4000.0, "PARABOLICARC"),
+        VerticalSegment(300.0, 310.0, 11.0, -0.03, -0.03, None, "CONSTANTGRADIENT"),
+    ]
+    return horizontal, vertical
+
+
+@pytest.fixture(scope="module")
+def built():
+    horizontal, vertical = spiral_tables()
+    builder = AlignmentBuilder(linear_unit="USSurveyFoot")
+    alignment = builder.add_alignment("A", horizontal, vertical, station_start=1000.0)
+    yield builder, alignment
+
+
+class TestAlignmentBuilder:
+    """
+    Test creation of alignments from segment tables.
+    """
+
+    def test_layouts(self, built):
+        """
+        The alignment shall nest layouts with the segments of the tables and a terminator.
+        """
+        _, alignment = built
+        layouts = [o for rel in alignment.IsNestedBy for o in rel.RelatedObjects]
+        assert [o.is_a() for o in layouts] == ["IfcAlignmentHorizontal", "IfcAlignmentVertical", "IfcReferent"]
+        horizontal = [o.DesignParameters for o in layouts[0].IsNestedBy[0].RelatedObjects]
+        assert [s.PredefinedType for s in horizontal] == [
+            "LINE", "CLOTHOID", "CIRCULARARC", "CLOTHOID", "LINE", "LINE",
+        ]
+        assert horizontal[-1].SegmentLength == 0.0
+        vertical = [o.DesignParameters for o in layouts[1].IsNestedBy[0].RelatedObjects]
+        assert vertical[-1].StartDistAlong == pytest.approx(610.0)
+        assert vertical[-1].StartHeight == pytest.approx(11.0 - 0.03 * 310.0)
+
+    def test_station(self, built):
+        """
+        The station at the start shall be recorded in Pset_Stationing of the referent.
+        """
+        _, alignment = built
+        referent = [o for rel in alignment.IsNestedBy for o in rel.RelatedObjects][-1]
+        pset = referent.IsDefinedBy[0].RelatingPropertyDefinition
+        assert pset.Name == "Pset_Stationing"
+        assert pset.HasProperties[0].NominalValue.wrappedValue == 1000.0
+
+    def test_unit(self, built):
+        """
+        The model shall use the linear unit of the tables.
+        """
+        builder, _ = built
+        assert ifcopenshell.util.unit.calculate_unit_scale(builder.file) == pytest.approx(1200.0 / 3937.0)
+
+    @pytest.mark.parametrize("representation", [0, 1])
+    def test_representation(self, built, representation):
+        """
+        The representations shall match the business logic.
+        """
+        _, alignment = built
+        business_logic = Alignment().from_entity(alignment)
+        distances = np.linspace(0.0, business_logic.end, 400)
+        expected = business_logic.evaluate(distances)[:, [1, 2, 4]]
+        curve = alignment.Representation.Representations[representation].Items[0]
+        actual = CurveEvaluator(curve).positions(distances)
+        np.testing.assert_allclose(actual[:, : 2 + representation], expected[:, : 2 + representation], atol=1e-5)
+
+    def test_valid(self, built, tmp_path):
+        """
+        The model shall be valid against the schema.
+        """
+        builder, _ = built
+        builder.write(str(tmp_path / "built.ifc"))
+        logger = ifcopenshell.validate.json_logger()
+        ifcopenshell.validate.validate(ifcopenshell.open(str(tmp_path / "built.ifc")), logger)
+        assert logger.statements == []
+
+    def test_unsupported(self):
+        """
+        A segment type without a geometry helper shall raise NotImplementedError.
+        """
+        horizontal = [HorizontalSegment((0.0, 0.0), 0.0, 0.0, 100.0, 50.0, "CUBIC")]
+        with pytest.raises(NotImplementedError):
+            AlignmentBuilder().add_alignment("A", horizontal)
+
+    @pytest.mark.parametrize("predefined_type", ["BLOSSCURVE", "VIENNESEBEND", "HELMERTCURVE", "COSINECURVE", "SINECURVE"])
+    @pytest.mark.parametrize("start_radius, end_radius", [(0.0, -300.0), (-300.0, 0.0), (500.0, -300.0), (400.0, 800.0)])
+    def test_transitions(self, predefined_type, start_radius, end_radius):
+        """
+        The spirals of the other transition types and circular vertical curves shall match the business logic.
+        """
+        horizontal = [HorizontalSegment((100.0, 50.0), 0.3, 0.0, 0.0, 200.0, "LINE")]
+        following = "CIRCULARARC" if end_radius else "LINE"
+        for row in ((start_radius, end_radius, 80.0, predefined_type), (end_radius, end_radius, 100.0, following)):
+            previous = horizontal[-1]
+            x, y, direction = segment_point(previous, previous.SegmentLength)
+            horizontal.append(HorizontalSegment((x, y), direction, *row))
+        vertical = [
+            VerticalSegment(0.0, 100.0, 10.0, 0.02, 0.02, None, "CONSTANTGRADIENT"),
+            VerticalSegment(100.0, 150.0, 12.0, 0.02, -0.03, None, "CIRCULARARC"),
+            VerticalSegment(250.0, 80.0, 11.7, -0.03, 0.04, 1500.0, "CIRCULARARC"),
+        ]
+        # join the second arc to the end of the first
+        first = Alignment()
+        first.set_layouts(horizontal, vertical[:2])
+        vertical[2].StartHeight = float(first.evaluate(np.array([250.0]))[0, 4])
+        vertical[2].HorizontalLength = 1500.0 * (0.04 / np.hypot(1.0, 0.04) + 0.03 / np.hypot(1.0, 0.03))
+
+        builder = AlignmentBuilder()
+        alignment = builder.add_alignment("A", horizontal, vertical)
+        business_logic = Alignment().from_entity(alignment)
+        distances = np.linspace(0.0, 250.0 + vertical[2].HorizontalLength, 300)
+        expected = business_logic.evaluate(distances)[:, [1, 2, 4]]
+        for representation in (0, 1):
+            curve = alignment.Representation.Representations[representation].Items[0]
+            actual = CurveEvaluator(curve).positions(distances)
+            np.testing.assert_allclose(actual[:, : 2 + representation], expected[:, : 2 + representation], atol=1e-5)
+
+
+def fhwa_tables():
+    "the horizontal and vertical layouts of examples/FHWA_Bridge_Geometry_Manual/Alignment.py as tables"
+    horizontal = {
+        "StartPoint": np.array(
+            [
+                (500.0, 2500.0),
+                (2142.237995, 1436.014820),
+                (3660.446123, 2050.736173),
+                (4084.115884, 3889.462938),
+                (5469.395067, 4847.566310),
+                (7019.971367, 4638.286073),
+                (7790.932128, 4006.730765),
+            ]
+        ),
+        "StartDirection": np.radians([327.0613, 327.0613, 77.0247, 77.0247, 352.3133, 352.3133, 289.0395]),
+        "StartRadiusOfCurvature": [0.0, 1000.0, 0.0, -1250.0, 0.0, -950.0, 0.0],
+        "EndRadiusOfCurvature": [0.0, 1000.0, 0.0, -1250.0, 0.0, -950.0, 0.0],
+        "SegmentLength": [1956.785654, 1919.222667, 1886.905454, 1848.115835, 1564.635765, 1049.119737, 2112.285084],
+        "PredefinedType": ["LINE", "CIRCULARARC"] * 3 + ["LINE"],
+    }
+    vertical = {
+        "StartDistAlong": [0.0, 1200.0, 2800.0, 4400.0, 5600.0],
+        "HorizontalLength": [1200.0, 1600.0, 1600.0, 1200.0, 800.0],
+        "StartHeight": [100.0, 121.0, 127.0, 111.0, 117.0],
+        "StartGradient": [0.0175, 0.0175, -0.01, -0.01, 0.02],
+        "EndGradient": [0.0175, -0.01, -0.01, 0.02, 0.02],
+        "PredefinedType": ["CONSTANTGRADIENT", "PARABOLICARC"] * 2 + ["CONSTANTGRADIENT"],
+    }
+    return horizontal, vertical
+
+
+class TestBulkBuilder:
+    """
+    Test creation of alignments from column tables with shared entities.
+    """
+
+    def test_tables(self):
+        """
+        Tables of columns shall give the same layouts as lists of segments.
+        """
+        horizontal, vertical = spiral_tables()
+        columns = {
+            "StartPoint": np.array([s.StartPoint for s in horizontal]),
+            "StartDirection": np.array([s.StartDirection for s in horizontal]),
+            "StartRadiusOfCurvature": np.array([s.StartRadiusOfCurvature for s in horizontal]),
+            "EndRadiusOfCurvature": np.array([s.EndRadiusOfCurvature for s in horizontal]),
+            "SegmentLength": np.array([s.SegmentLength for s in horizontal]),
+            "PredefinedType": np.array([s.PredefinedType for s in horizontal]),
+        }
+        builder = AlignmentBuilder()
+        from_lists = Alignment().from_entity(builder.add_alignment("lists", horizontal, vertical))
+        from_columns = Alignment().from_entity(builder.add_alignment("columns", columns, vertical))
+        distances = np.linspace(0.0, from_lists.end, 100)
+        np.testing.assert_array_equal(from_lists.evaluate(distances), from_columns.evaluate(distances))
+
+    def test_shared_entities(self):
+        """
+        Parent curves, directions and placements shall be created once per model.
+        """
+        horizontal, vertical = fhwa_tables()
+        builder = AlignmentBuilder(linear_unit="foot")
+        builder.add_alignment("A", horizontal, vertical)
+        builder.add_alignment("B", horizontal, vertical)
+        model = builder.file
+        assert len(model.by_type("IfcLine")) == 1
+        assert sorted(c.Radius for c in model.by_type("IfcCircle")) == [950.0, 1000.0, 1250.0]
+        assert len(model.by_type("IfcPolynomialCurve")) == 2
+        assert len(model.by_type("IfcCurveSegment")) == 2 * (8 + 6)
+        # tangent and curve share the start point, direction and placement
+        a_segments = model.by_type("IfcCompositeCurve")[0].Segments
+        assert a_segments[0].Placement != a_segments[1].Placement
+        assert a_segments[1].Placement.RefDirection == a_segments[0].Placement.RefDirection
+        b_segments = model.by_type("IfcCompositeCurve")[1].Segments
+        assert [s.Placement for s in a_segments] == [s.Placement for s in b_segments]
+
+    def test_aggregates(self, tmp_path):
+        """
+        One IfcRelAggregates shall relate the project to all alignments, also those added after a write.
+        """
+        horizontal, vertical = fhwa_tables()
+        builder = AlignmentBuilder(linear_unit="foot")
+        for name in "AB":
+            builder.add_alignment(name, horizontal, vertical)
+        assert not builder.file.by_type("IfcRelAggregates")
+        builder.write(str(tmp_path / "first.ifc"))
+        builder.add_alignment("C", horizontal, vertical)
+        builder.write(str(tmp_path / "second.ifc"))
+        for path, names in (("first.ifc", ["A", "B"]), ("second.ifc", ["A", "B", "C"])):
+            model = ifcopenshell.open(str(tmp_path / path))
+            (aggregates,) = model.by_type("IfcRelAggregates")
+            assert aggregates.RelatingObject == model.by_type("IfcProject")[0]
+            assert [a.Name for a in aggregates.RelatedObjects] == names
+
+    def test_fewer_entities(self, tmp_path):
+        """
+        The model shall be smaller than one built with the per-segment helpers.
+        """
+        horizontal, _ = fhwa_tables()
+        builder = AlignmentBuilder(linear_unit="foot")
+        for i in range(20):
+            builder.add_alignment(f"A{i}", horizontal)
+        builder.write(str(tmp_path / "bulk.ifc"))
+
+        reference = AlignmentBuilder(linear_unit="foot")
+        model = reference.file
+        for i in range(20):
+            curve_segments, alignment_segments = [], []
+            for j, predefined_type in enumerate(horizontal["PredefinedType"]):
+                point = model.createIfcCartesianPoint(tuple(horizontal["StartPoint"][j]))
+                direction = horizontal["StartDirection"][j]
+                length = horizontal["SegmentLength"][j]
+                if predefined_type == "LINE":
+                    created = create_tangent(model, point, direction, length)
+                else:
+                    radius = horizontal["StartRadiusOfCurvature"][j]
+                    created = create_hcurve(model, point, direction, radius, length)
+                curve_segments.append(created[0])
+                alignment_segments.append(created[1])
+            create_segment_representations(model, reference.placement, reference.axis_context, curve_segments, alignment_segments)
+        reference.write(str(tmp_path / "per_segment.ifc"))
+
+        assert len(builder.file.by_type("IfcCartesianPoint")) < len(model.by_type("IfcCartesianPoint")) / 4
+        assert len(builder.file.by_type("IfcDirection")) < len(model.by_type("IfcDirection")) / 4
+        assert (tmp_path / "bulk.ifc").stat().st_size < (tmp_path / "per_segment.ifc").stat().st_size
+
+    def test_cant(self):
+        """
+        A cant table shall be nested as IfcAlignmentCant and read back by Alignment.
+        """
+        horizontal, vertical = spiral_tables()
+        cant = {
+            "StartDistAlong": [0.0, 200.0, 280.0, 430.0],
+            "HorizontalLength": [200.0, 80.0, 150.0, 80.0],
+            "StartCantLeft": [0.0, 0.0, 0.0, 0.0],
+            "EndCantLeft": [0.0, 0.0, 0.0, 0.0],
+            "StartCantRight": [0.0, 0.0, 0.1, 0.1],
+            "EndCantRight": [0.0, 0.1, 0.1, 0.0],
+            "PredefinedType": ["CONSTANTCANT", "LINEARTRANSITION", "CONSTANTCANT", "LINEARTRANSITION"],
+        }
+        builder = AlignmentBuilder()
+        with pytest.raises(ValueError):
+            builder.add_alignment("A", horizontal, vertical, cant)
+        entity = builder.add_alignment("A", horizontal, vertical, cant, rail_head_distance=1.5)
+        alignment = Alignment().from_entity(entity)
+        assert alignment.rail_head_distance == 1.5
+        assert [s.PredefinedType for s in alignment.cant][-1] == "CONSTANTCANT"
+        points = alignment.evaluate([100.0, 240.0, 300.0, 510.0])
+        np.testing.assert_allclose(points[:, 5], [0.0, -0.05, -0.1, 0.0], atol=1e-12)
+
+    def test_without_segment_representations(self):
+        """
+        Segments shall have no representation if not requested, the alignment shall keep its own.
+        """
+        horizontal, vertical = fhwa_tables()
+        builder = AlignmentBuilder()
+        alignment = builder.add_alignment("A", horizontal, vertical, segment_representations=False)
+        assert all(s.Representation is None for s in builder.file.by_type("IfcAlignmentSegment"))
+        assert len(alignment.Representation.Representations) == 2
@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from alignment_tools.cant import AlignmentCantSide
+from alignment_tools.cant import CANT_EVALUATORS
+from alignment_tools.cant import c_on_CONSTANTCANT
+from alignment_tools.cant import c_on_LINEARTRANSITION
+from alignment_tools.cant import segment_cant
+from alignment_tools.transitions import TRANSITIONS
+
+# calcs/UT_AWC_1 Cant Interpolation.xlsx
+LINEAR_CANT = [
+    (00.0, 0.00),
+    (05.0, 0.004375),
+    (10.0, 0.008750),
+    (15.0, 0.013125),
+    (20.0, 0.017500),
+    (25.0, 0.021875),
+    (30.0, 0.026250),
+    (55.0, 0.048125),
+    (60.0, 0.052500),
+    (65.0, 0.056875),
+    (70.0, 0.061250),
+    (72.0, 0.063000),
+]
+
+
+def cant_segment(predefined_type, start=0.0, end=0.063, length=72.0) -> SimpleNamespace:
+    return SimpleNamespace(
+        StartDistAlong=0.0,
+        HorizontalLength=length,
+        StartCantLeft=-start,
+        EndCantLeft=-end,
+        StartCantRight=start,
+        EndCantRight=end,
+        PredefinedType=predefined_type,
+    )
+
+
+class TestCantEvaluators:
+    """
+    Test vectorized calculation of cant.
+    """
+
+    def test_determine_side(self):
+        """
+        ValueError shall be raised if side of the alignment is not specified properly
+        """
+        with pytest.raises(ValueError):
+            c_on_CONSTANTCANT(cant_segment("CONSTANTCANT"), 10.0, "left")
+
+    def test_constant_cant(self):
+        """
+        Amount of cant on a constant segment shall be calculated correctly.
+        """
+        seg = cant_segment("CONSTANTCANT", start=0.063)
+        assert c_on_CONSTANTCANT(seg, 10.0, AlignmentCantSide.LEFT) == pytest.approx(-0.063)
+        right = c_on_CONSTANTCANT(seg, np.zeros(5), AlignmentCantSide.RIGHT)
+        assert right == pytest.approx(np.full(5, 0.063))
+
+    def test_linear_transition_array(self):
+        """
+        Cant amounts along a linear transition shall be calculated for an array of distances.
+        """
+        u, expected = np.array(LINEAR_CANT).T
+        seg = cant_segment("LINEARTRANSITION")
+        assert c_on_LINEARTRANSITION(seg, u, AlignmentCantSide.LEFT) == pytest.approx(-expected)
+        assert c_on_LINEARTRANSITION(seg, u, AlignmentCantSide.RIGHT) == pytest.approx(expected)
+
+    def test_scalar_result(self):
+        """
+        A scalar distance shall return a float.
+        """
+        c = c_on_LINEARTRANSITION(cant_segment("LINEARTRANSITION"), 5.0, AlignmentCantSide.RIGHT)
+        assert isinstance(c, float)
+        assert c == pytest.approx(0.004375)
+
+    @pytest.mark.parametrize(
+        "predefined_type", sorted(set(CANT_EVALUATORS) - {"CONSTANTCANT"})
+    )
+    def test_transition_end_values(self, predefined_type):
+        """
+        Transitions shall run from the start cant to the end cant, symmetric about the midpoint.
+        """
+        seg = cant_segment(predefined_type, start=0.02, end=0.1, length=80.0)
+        u = np.array([0.0, 20.0, 40.0, 60.0, 80.0])
+        c = segment_cant(seg, u, AlignmentCantSide.RIGHT)
+        assert c[[0, 2, 4]] == pytest.approx([0.02, 0.06, 0.1])
+        assert c[1] + c[3] == pytest.approx(0.12)
+        assert np.all(np.diff(c) > 0.0)
+
+
+@pytest.mark.parametrize("name", sorted(TRANSITIONS))
+def test_transition_integral(name):
+    """
+    Transition integrals shall match numerical integration of the shape function.
+    """
+    transition = TRANSITIONS[name]
+    t = np.linspace(0.0, 1.0, 20001)
+    f = transition.shape(t)
+    numeric = np.concatenate(([0.0], np.cumsum((f[1:] + f[:-1]) / 2.0 * np.diff(t))))
+    assert transition.integral(t) == pytest.approx(numeric, abs=1e-8)
+    assert transition.integral(1.0) == pytest.approx(0.5)
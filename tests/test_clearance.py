@@ -0,0 +1,117 @@
+import os
+
+import numpy as np
+import pytest
+
+import ifcopenshell
+
+from alignment_tools.alignment import DIRECTION
+from alignment_tools.alignment import X
+from alignment_tools.alignment import Y
+from alignment_tools.alignment import Z
+from alignment_tools.alignment import Alignment
+from alignment_tools.clearance import check_clearance
+from alignment_tools.clearance import check_models
+from alignment_tools.clearance import triangles_intersecting_polygon
+
+ASSETS_PATH = os.path.join(os.path.dirname(__file__), "..", "assets", "models")
+FEDERATED = ("Catch_Basin_LR.ifc", "Column_LR.ifc", "Signal_Foundation_LR.ifc")
+
+GAUGE = np.array([(-1.5, 0.0), (1.5, 0.0), (1.5, 4.5), (-1.5, 4.5)])
+BOX_FACES = np.array(
+    [
+        (0, 2, 1), (0, 3, 2), (4, 5, 6), (4, 6, 7), (0, 1, 5), (0, 5, 4),
+        (1, 2, 6), (1, 6, 5), (2, 3, 7), (2, 7, 6), (3, 0, 4), (3, 4, 7),
+    ]
+)
+
+
+def box(alignment: Alignment, station: float, offset: tuple, height: tuple, length: float = 0.4) -> tuple:
+    "mesh of a box aligned with the alignment at a station, offsets and heights as (min, max)"
+    pt = alignment.evaluate([station])[0]
+    tangent = np.array([np.cos(pt[DIRECTION]), np.sin(pt[DIRECTION])])
+    normal = np.array([-tangent[1], tangent[0]])
+    verts = []
+    for z in height:
+        for along, across in ((-1, 0), (1, 0), (1, 1), (-1, 1)):
+            xy = pt[[X, Y]] + along * length / 2.0 * tangent + offset[across] * normal
+            verts.append((*xy, pt[Z] + z))
+    return np.array(verts), BOX_FACES
+
+
+@pytest.fixture(scope="module")
+def acca_alignment() -> Alignment:
+    model = ifcopenshell.open(
+        os.path.join(ASSETS_PATH, "alignment_validation", "ACCA_sleepers-linear-placement-cant-implicit.ifc")
+    )
+    yield Alignment().from_entity(model.by_type("IfcAlignment")[0])
+
+
+class TestClearance:
+    """
+    Test the swept gauge clearance check.
+    """
+
+    def test_triangles(self):
+        """
+        Triangles shall intersect a polygon by a vertex inside either or by crossing edges.
+        """
+        triangles = np.array(
+            [
+                [(0.0, 1.0), (5.0, 1.0), (5.0, 2.0)],
+                [(-3.0, 2.0), (3.0, 2.0), (0.0, 2.1)],
+                [(-1.0, -5.0), (1.0, -5.0), (0.0, 10.0)],
+                [(2.0, 0.0), (3.0, 0.0), (3.0, 1.0)],
+            ]
+        )
+        assert triangles_intersecting_polygon(triangles, GAUGE).tolist() == [True, True, True, False]
+
+    def test_intrusions(self, acca_alignment):
+        """
+        Elements inside the gauge or crossing it shall be reported, elements outside it not.
+        """
+        meshes = {
+            "inside": box(acca_alignment, 200.0, (0.75, 1.25), (1.0, 1.5)),
+            "outside": box(acca_alignment, 250.0, (3.0, 3.5), (1.0, 1.5)),
+            "beam": box(acca_alignment, 300.0, (-3.0, 3.0), (2.0, 2.2)),
+            "beyond": box(acca_alignment, 950.0, (0.0, 0.5), (1.0, 1.5), length=0.0),
+            "above": box(acca_alignment, 100.0, (-0.5, 0.5), (4.7, 5.0)),
+        }
+        meshes["beyond"] = (meshes["beyond"][0] + [100.0, -100.0, 0.0], BOX_FACES)
+        intrusions = check_clearance(acca_alignment, GAUGE, meshes, bucket=100.0)
+        assert [i.element for i in intrusions] == ["inside", "beam"]
+        inside = intrusions[0]
+        assert (inside.station_start, inside.station_end) == pytest.approx((199.8, 200.2))
+        assert (inside.offset, inside.height) == pytest.approx((0.75, 1.0))
+        assert intrusions[1].station_start == pytest.approx(299.8)
+
+    def test_cant(self, acca_alignment):
+        """
+        The gauge shall be rolled by the cant rotation.
+        """
+        meshes = {
+            "tangent": box(acca_alignment, 200.0, (-2.7, -2.3), (2.8, 3.2)),
+            "canted": box(acca_alignment, 700.0, (-2.7, -2.3), (2.8, 3.2)),
+            "lifted": box(acca_alignment, 700.0, (1.0, 1.4), (0.0, 0.3)),
+        }
+        intrusions = check_clearance(acca_alignment, GAUGE, meshes, step=5.0)
+        assert [i.element for i in intrusions] == ["canted"]
+        assert intrusions[0].offset == pytest.approx(-2.3, abs=1e-3)
+
+    def test_models(self):
+        """
+        Elements of federated models shall be reported with their model.
+        """
+        folder = os.path.join(ASSETS_PATH, "model_federation")
+        model = ifcopenshell.open(os.path.join(folder, "Column_LR.ifc"))
+        alignment = Alignment().from_entity(model.by_type("IfcAlignment")[0])
+        paths = [os.path.join(folder, name) for name in FEDERATED]
+
+        assert check_models(alignment, GAUGE, paths) == []
+        wide = np.array([(-33.0, 0.0), (33.0, 0.0), (33.0, 10.0), (-33.0, 10.0)])
+        intrusions = check_models(alignment, wide, paths)
+        assert [os.path.basename(i.model) for i in intrusions] == list(FEDERATED)
+        column = intrusions[1]
+        assert column.element == "2hiDvZsFf6sgFJJo4buERh"
+        assert (column.station_start, column.station_end) == pytest.approx((101.0, 104.0))
+        assert column.offset == pytest.approx(-31.0)
@@ -0,0 +1,100 @@
+import json
+
+import numpy as np
+import pytest
+
+from alignment_tools.deviation import deviation_metrics
+from alignment_tools.deviation import polyline_deviation
+from alignment_tools.deviation import write_report
+
+
+@pytest.fixture(scope="module")
+def arc_polyline() -> np.ndarray:
+    "Quarter circle of radius 100 densified to 1 m chords."
+    theta = np.linspace(0.0, np.pi / 2, 158)
+    yield np.column_stack([100.0 * np.cos(theta), 100.0 * np.sin(theta)])
+
+
+class TestPolylineDeviation:
+    """
+    Test point-to-polyline deviation.
+    """
+
+    def test_points_on_polyline(self, arc_polyline):
+        """
+        Points on the reference polyline shall have zero deviation.
+        """
+        dist, _ = polyline_deviation(arc_polyline, arc_polyline)
+        assert dist == pytest.approx(0.0, abs=1e-9)
+
+    def test_offset_points(self, arc_polyline):
+        """
+        Points offset radially shall deviate by the offset, less the chord sagitta.
+        """
+        theta = np.linspace(0.05, 1.5, 500)
+        pts = np.column_stack([102.0 * np.cos(theta), 102.0 * np.sin(theta)])
+        dist, _ = polyline_deviation(pts, arc_polyline)
+        assert dist.min() >= 2.0 - 1e-9
+        assert dist.max() <= 2.0 + 0.01
+
+    def test_matches_brute_force(self, arc_polyline):
+        """
+        Deviation shall match an exhaustive search over all segments.
+        """
+        rng = np.random.default_rng(7)
+        pts = rng.uniform(-50.0, 150.0, size=(200, 2))
+        dist, _ = polyline_deviation(pts, arc_polyline, k=2)
+
+        a = arc_polyline[:-1]
+        ab = np.diff(arc_polyline, axis=0)
+        ap = pts[:, None, :] - a
+        t = np.clip(np.einsum("nkd,kd->nk", ap, ab) / np.einsum("kd,kd->k", ab, ab), 0, 1)
+        brute = np.linalg.norm(ap - t[..., None] * ab, axis=2).min(axis=1)
+        assert dist == pytest.approx(brute)
+
+    def test_foot_station(self):
+        """
+        Station of the foot point shall be interpolated from the reference stations.
+        """
+        line = np.array([[0.0, 0.0], [10.0, 0.0], [20.0, 0.0]])
+        _, sta = polyline_deviation([[12.5, 3.0]], line, stations=[100.0, 110.0, 120.0])
+        assert sta[0] == pytest.approx(112.5)
+
+
+class TestDeviationMetrics:
+    """
+    Test summary metrics and reporting.
+    """
+
+    def test_metrics(self):
+        """
+        Max, RMS and station of the maximum shall be reported.
+        """
+        line = np.array([[0.0, 0.0], [100.0, 0.0]])
+        pts = np.array([[0.0, 0.0], [40.0, 0.3], [80.0, -0.4], [100.0, 0.0]])
+        metrics = deviation_metrics(pts, line, stations=[1000.0, 1100.0])
+        assert metrics.count == 4
+        assert metrics.max == pytest.approx(0.4)
+        assert metrics.rms == pytest.approx(np.sqrt((0.09 + 0.16) / 4))
+        assert metrics.max_station == pytest.approx(1080.0)
+        assert metrics.within(max_tol=0.5)
+        assert not metrics.within(rms_tol=0.1)
+
+    def test_write_report(self, tmp_path):
+        """
+        Report shall be written as JSON or CSV according to the suffix.
+        """
+        line = np.array([[0.0, 0.0], [100.0, 0.0]])
+        metrics = deviation_metrics(line, line)
+        rows = [{"case": "Line/1", **metrics.__dict__}]
+
+        write_report(rows, str(tmp_path / "report.json"))
+        with open(tmp_path / "report.json") as f:
+            assert json.load(f)[0]["case"] == "Line/1"
+
+        write_report(rows, str(tmp_path / "report.csv"))
+        with open(tmp_path / "report.csv") as f:
+            assert f.readline().strip().split(",")[:3] == ["case", "count", "max"]
+
+        with pytest.raises(ValueError):
+            write_report(rows, str(tmp_path / "report.txt"))
@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+import pytest
+
+from alignment_tools.alignment import Z
+from alignment_tools.builder import LINEAR_UNITS
+from alignment_tools.differ import LENGTH_COLUMNS
+from alignment_tools.differ import AlignmentSource
+from alignment_tools.differ import diff_alignments
+from alignment_tools.differ import read_sources
+from alignment_tools.synthetic import SyntheticSpec
+from alignment_tools.synthetic import synthetic_layouts
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data")
+REN_FILES = ("4REN0_Autodesk.ifc", "4REN0_Bentley.ifc", "4REN0.xml")
+
+
+def ren_sources(unit_scale: float = None) -> list:
+    return [read_sources(os.path.join(DATA_PATH, f), unit_scale=unit_scale)[0] for f in REN_FILES]
+
+
+@pytest.fixture(scope="module")
+def synthetic():
+    "a synthetic alignment with cant, starting at station 1000 m"
+    layouts = synthetic_layouts(SyntheticSpec(segments=24, seed=5, length=3000.0))
+    yield AlignmentSource("metres", layouts.alignment(), station_start=1000.0)
+
+
+class TestReadSources:
+    """
+    Test reading of alignment sources.
+    """
+
+    def test_ifc4x1(self):
+        """
+        An IFC4X1 alignment curve shall be read with its units and the station at its start.
+        """
+        (source,) = read_sources(os.path.join(DATA_PATH, "4REN0_Bentley.ifc"))
+        assert source.name == "4REN0_Bentley"
+        assert source.unit_scale == LINEAR_UNITS["USSurveyFoot"]
+        assert source.station_start == pytest.approx(384220.07)
+        assert [s.PredefinedType for s in source.alignment.horizontal] == [
+            "CIRCULARARC", "LINE", "CIRCULARARC", "LINE", "CIRCULARARC",
+        ]
+        assert [s.StartRadiusOfCurvature for s in source.alignment.horizontal[::2]] == pytest.approx([-888.0, 600.0, -589.0])
+        vertical = source.alignment.vertical
+        for previous, segment in zip(vertical[:-1], vertical[1:]):
+            assert previous.EndGradient == pytest.approx(segment.StartGradient)
+
+    def test_stations(self):
+        """
+        The sources shall cover the same stations in their own units.
+        """
+        for source in ren_sources():
+            stations = source.station(np.array([source.start, source.end]))
+            np.testing.assert_allclose(stations, (384220.07, 387911.7586), atol=1e-3)
+
+
+class TestDiffAlignments:
+    """
+    Test station-aligned comparison of alignment sources.
+    """
+
+    def test_same_alignment(self):
+        """
+        The IFC exports and the LandXML of one alignment shall agree in the same unit.
+        """
+        diff = diff_alignments(ren_sources(LINEAR_UNITS["USSurveyFoot"]), interval=2.0, range_length=500.0)
+        assert (diff.start, diff.end) == pytest.approx((384220.07, 387911.7586), abs=1e-3)
+        assert {r.source for r in diff.ranges} == {"4REN0_Bentley", "4REN0"}
+        assert sum(r.count for r in diff.ranges) == 2 * (int((diff.end - diff.start) / 2.0) + 2)
+        for worst in diff.summary().values():
+            assert worst["horizontal"] < 1e-5
+            assert worst["vertical"] < 1e-5
+            assert np.isnan(worst["cant"])
+        layouts = {(b.owner, b.layout) for b in diff.boundaries}
+        assert ("4REN0_Autodesk", "vertical") in layouts and ("4REN0", "horizontal") in layouts
+        assert max(abs(b.shift) for b in diff.boundaries) < 1e-4
+
+    def test_units(self):
+        """
+        Stations shall be converted to the unit of the reference, which shifts boundaries with a foot declared as US survey foot.
+        """
+        diff = diff_alignments(ren_sources(), interval=2.0, range_length=500.0)
+        ratio = LINEAR_UNITS["USSurveyFoot"] / LINEAR_UNITS["foot"]
+        assert diff.start == pytest.approx(384220.07 * ratio)
+        shifts = [b.shift for b in diff.boundaries if b.owner == "4REN0_Autodesk" and b.layout == "horizontal"]
+        np.testing.assert_allclose(np.abs(shifts), 385000.0 * (ratio - 1.0), rtol=0.01)
+
+    def test_chunks(self):
+        """
+        The result shall not depend on the number of stations sampled at once.
+        """
+        sources = ren_sources(LINEAR_UNITS["USSurveyFoot"])
+        whole = diff_alignments(sources, interval=5.0)
+        chunked = diff_alignments(sources, interval=5.0, chunk_size=97)
+        assert len(chunked.ranges) == len(whole.ranges)
+        for a, b in zip(chunked.ranges, whole.ranges):
+            assert (a.source, a.start, a.count) == (b.source, b.start, b.count)
+            assert a.horizontal_max == b.horizontal_max
+            assert a.horizontal_rms == pytest.approx(b.horizontal_rms)
+            assert a.vertical_max == b.vertical_max
+
+    def test_points(self, synthetic):
+        """
+        A point table in another unit and with another start station shall be resampled and compared.
+        """
+        feet = LINEAR_UNITS["foot"]
+        points = synthetic.alignment.evaluate(np.linspace(0.0, synthetic.alignment.end, 30001))
+        points[:, Z] += 0.01
+        points[:, LENGTH_COLUMNS] /= feet
+        table = AlignmentSource("feet", points=points, station_start=1000.0 / feet, unit_scale=feet)
+
+        diff = diff_alignments([synthetic, table], interval=1.0, range_length=1000.0)
+        assert (diff.start, diff.end) == pytest.approx((1000.0, 4000.0))
+        worst = diff.summary()["feet"]
+        assert worst["horizontal"] < 1e-3
+        assert worst["vertical"] == pytest.approx(0.01, abs=1e-4)
+        assert 0.0 < worst["cant"] < 1e-3
+        assert {b.owner for b in diff.boundaries} == {"metres"}
+        assert all(np.isnan(b.shift) for b in diff.boundaries)
+        assert max(b.vertical for b in diff.boundaries) == pytest.approx(0.01, abs=1e-4)
+
+    def test_no_overlap(self, synthetic):
+        """
+        Sources without common stations shall raise ValueError.
+        """
+        other = AlignmentSource("later", synthetic.alignment, station_start=10000.0)
+        with pytest.raises(ValueError):
+            diff_alignments([synthetic, other])
@@ -0,0 +1,147 @@
+import numpy as np
+import pytest
+
+from alignment_tools.alignment import Alignment
+from alignment_tools.builder import CantSegment
+from alignment_tools.builder import HorizontalSegment
+from alignment_tools.builder import VerticalSegment
+from alignment_tools.editable import EditableAlignment
+from alignment_tools.horizontal import segment_point
+
+
+def chained(parameters, start=((100.0, 50.0), 0.3)):
+    "horizontal segments each starting at the end of the previous one"
+    point, direction = start
+    segments = []
+    for predefined_type, start_radius, end_radius, length in parameters:
+        segments.append(HorizontalSegment(point, direction, start_radius, end_radius, length, predefined_type))
+        x, y, direction = segment_point(segments[-1], length)
+        point = (x, y)
+    return segments
+
+
+LAYOUT = [
+    ("LINE", 0.0, 0.0, 200.0),
+    ("CLOTHOID", 0.0, -300.0, 80.0),
+    ("CIRCULARARC", -300.0, -300.0, 150.0),
+    ("CLOTHOID", -300.0, 0.0, 80.0),
+    ("LINE", 0.0, 0.0, 100.0),
+    ("CIRCULARARC", 500.0, 500.0, 120.0),
+    ("LINE", 0.0, 0.0, 100.0),
+]
+
+VERTICAL = [
+    VerticalSegment(0.0, 300.0, 10.0, 0.02, 0.02, None, "CONSTANTGRADIENT"),
+    VerticalSegment(300.0, 200.0, 16.0, 0.02, -0.03, -4000.0, "PARABOLICARC"),
+    VerticalSegment(500.0, 330.0, 15.5, -0.03, -0.03, None, "CONSTANTGRADIENT"),
+]
+
+CANT = [
+    CantSegment(0.0, 280.0, 0.0, None, 0.0, None, "CONSTANTCANT"),
+    CantSegment(280.0, 150.0, 0.0, 0.0, 0.1, 0.1, "CONSTANTCANT"),
+    CantSegment(430.0, 80.0, 0.0, 0.0, 0.1, 0.0, "LINEARTRANSITION"),
+    CantSegment(510.0, 320.0, 0.0, None, 0.0, None, "CONSTANTCANT"),
+]
+
+
+class TestEditableAlignment:
+    """
+    Test incremental re-layout of edited segments.
+    """
+
+    def test_edit_horizontal(self):
+        """
+        An edited alignment shall equal one laid out from scratch with the new parameters.
+        """
+        horizontal = chained(LAYOUT)
+        alignment = EditableAlignment(horizontal, VERTICAL)
+        edit = alignment.edit_horizontal(2, StartRadiusOfCurvature=-250.0, EndRadiusOfCurvature=-250.0)
+        assert edit.moved and edit.length_change == 0.0
+        assert (edit.start, edit.end) == (280.0, 830.0)
+
+        layout = list(LAYOUT)
+        layout[2] = ("CIRCULARARC", -250.0, -250.0, 150.0)
+        expected = Alignment(chained(layout), VERTICAL)
+        distances = np.linspace(0.0, expected.end, 500)
+        np.testing.assert_allclose(alignment.evaluate(distances), expected.evaluate(distances), atol=1e-9)
+        np.testing.assert_allclose(alignment.sample(10.0), expected.evaluate(alignment.sample(10.0)[:, 0]), atol=1e-9)
+        # the segments read are copies
+        assert horizontal[2].StartRadiusOfCurvature == -300.0
+
+    def test_edit_length(self):
+        """
+        Changing a length shall shift the distances along downstream.
+        """
+        alignment = EditableAlignment(chained(LAYOUT))
+        edit = alignment.edit_horizontal(4, SegmentLength=150.0)
+        assert edit.length_change == 50.0
+        assert (edit.start, edit.end) == (510.0, 880.0)
+        assert alignment.end == 880.0
+
+        layout = list(LAYOUT)
+        layout[4] = ("LINE", 0.0, 0.0, 150.0)
+        expected = Alignment(chained(layout))
+        distances = np.linspace(0.0, expected.end, 500)
+        np.testing.assert_allclose(alignment.evaluate(distances), expected.evaluate(distances), atol=1e-9)
+
+    def test_edit_length_profile(self):
+        """
+        The vertical and cant segments after a segment whose length changed shall move with the stations downstream.
+        """
+        alignment = EditableAlignment(chained(LAYOUT), VERTICAL, CANT, rail_head_distance=1.5)
+        before = alignment.evaluate([400.0, 470.0, 700.0])
+        alignment.edit_horizontal(1, SegmentLength=100.0)
+        after = alignment.evaluate([420.0, 490.0, 720.0])
+        np.testing.assert_array_equal(after[:, 4:], before[:, 4:])
+        assert [s.StartDistAlong for s in alignment.vertical] == [0.0, 320.0, 520.0]
+        assert [s.StartDistAlong for s in alignment.cant] == [0.0, 300.0, 450.0, 530.0]
+        assert VERTICAL[1].StartDistAlong == 300.0 and CANT[1].StartDistAlong == 280.0
+        # the profile over the lengthened segment is not extended
+        assert np.isnan(alignment.evaluate([310.0])[0, 4])
+
+        layout = list(LAYOUT)
+        layout[1] = ("CLOTHOID", 0.0, -300.0, 100.0)
+        expected = Alignment(chained(layout), alignment.vertical, alignment.cant, rail_head_distance=1.5)
+        sampled = alignment.sample(10.0)
+        np.testing.assert_allclose(sampled, expected.evaluate(sampled[:, 0]), atol=1e-9)
+
+    def test_cached_samples(self):
+        """
+        Only the points of the edited segment shall be calculated again.
+        """
+        alignment = EditableAlignment(chained(LAYOUT), VERTICAL)
+        before = alignment.sample(5.0)
+        cached = list(alignment._samples)
+        alignment.edit_horizontal(3, EndRadiusOfCurvature=1000.0)
+        after = alignment.sample(5.0)
+        assert [a is b for a, b in zip(cached, alignment._samples)] == [True, True, True, False, True, True, True]
+        # upstream points are unchanged, downstream points are moved
+        upstream = before[:, 0] <= 510.0 - 80.0
+        np.testing.assert_array_equal(before[upstream], after[upstream])
+        assert not np.allclose(before[-1], after[-1])
+        assert len(after) == len(np.unique(after[:, 0]))
+
+    def test_edit_vertical(self):
+        """
+        A vertical edit shall change the heights within the range of the segment only.
+        """
+        alignment = EditableAlignment(chained(LAYOUT), VERTICAL)
+        before = alignment.sample(5.0)
+        edit = alignment.edit_vertical(1, EndGradient=-0.02)
+        assert (edit.layout, edit.start, edit.end) == ("vertical", 300.0, 500.0)
+        after = alignment.sample(5.0)
+        changed = np.flatnonzero(before[:, 4] != after[:, 4])
+        assert before[changed, 0].min() > 300.0 and before[changed, 0].max() <= 500.0
+        assert VERTICAL[1].EndGradient == -0.03
+
+    def test_invalid_edit(self):
+        """
+        Downstream start points and unknown attributes shall not be editable.
+        """
+        alignment = EditableAlignment(chained(LAYOUT))
+        with pytest.raises(ValueError):
+            alignment.edit_horizontal(1, StartDirection=0.0)
+        with pytest.raises(ValueError):
+            alignment.edit_horizontal(1, Radius=100.0)
+        alignment.edit_horizontal(0, StartPoint=(0.0, 0.0))
+        assert alignment.evaluate([0.0])[0, 1:3].tolist() == [0.0, 0.0]
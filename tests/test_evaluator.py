@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pytest
+
+import ifcopenshell
+import ifcopenshell.geom
+
+from alignment_tools.evaluator import CurveEvaluator
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data")
+ASSETS_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "assets", "models", "alignment_validation"
+)
+
+
+@pytest.fixture(scope="module")
+def ren_model():
+    yield ifcopenshell.open(os.path.join(DATA_PATH, "4REN0_Autodesk.ifc"))
+
+
+@pytest.fixture(scope="module")
+def acca_model():
+    yield ifcopenshell.open(
+        os.path.join(ASSETS_PATH, "ACCA_sleepers-linear-placement-cant-implicit.ifc")
+    )
+
+
+class TestCurveEvaluator:
+    """
+    Test batched evaluation of alignment curves.
+    """
+
+    def test_placements_shape(self, acca_model):
+        """
+        Placements shall be returned as an (N, 4, 4) array.
+        """
+        curve = acca_model.by_type("IfcSegmentedReferenceCurve")[0]
+        ev = CurveEvaluator(curve)
+        m = ev.placements(np.linspace(400.0, 450.0, 11))
+        assert m.shape == (11, 4, 4)
+        assert m[:, 3, 3] == pytest.approx(1.0)
+
+    def test_matches_single_evaluation(self, acca_model):
+        """
+        Batched placements shall equal those evaluated one distance at a time.
+        """
+        curve = acca_model.by_type("IfcSegmentedReferenceCurve")[0]
+        ev = CurveEvaluator(curve)
+        distances = np.array([0.0, 120.0, 425.0, 449.0, 700.0])
+        batch = ev.placements(distances)
+        for d, m in zip(distances, batch):
+            assert m == pytest.approx(ev.placements([d])[0])
+
+    def test_project_units(self, ren_model):
+        """
+        Distances and positions shall be in project units (US feet for 4REN0).
+        """
+        curve = ren_model.by_type("IfcCompositeCurve")[0]
+        ev = CurveEvaluator(curve)
+        assert ev.length == pytest.approx(3691.6886, abs=1e-3)
+
+        pts = ev.positions([0.0, 484.31607])
+        # start points of the first two horizontal segments
+        assert pts[0, :2] == pytest.approx([0.26999, 1291.93357], abs=1e-4)
+        assert pts[1, :2] == pytest.approx([252.57139, 885.54833], abs=1e-4)
+
+        tangents = ev.tangents([0.0])
+        assert np.linalg.norm(tangents, axis=1) == pytest.approx(1.0)
+        assert np.arctan2(tangents[0, 1], tangents[0, 0]) == pytest.approx(-0.742491459713325)
+
+    def test_evaluate(self, ren_model):
+        """
+        Axes of evaluated points shall be orthonormal and without roll on an uncanted alignment.
+        """
+        curve = ren_model.by_type("IfcGradientCurve")[0]
+        pts = CurveEvaluator(curve).evaluate(np.linspace(0.0, 3600.0, 37))
+        assert np.einsum("nd,nd->n", pts.tangent, pts.normal) == pytest.approx(0.0, abs=1e-9)
+        assert pts.cant_rotation == pytest.approx(0.0, abs=1e-9)
+        assert pts.position[0, 2] == pytest.approx(753.74663, abs=1e-3)
@@ -0,0 +1,126 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import ifcopenshell
+
+from alignment_tools.alignment import Alignment
+from alignment_tools.editable import EditableAlignment
+from alignment_tools.federation import FederationIndex
+from alignment_tools.federation import build_federation_index
+from alignment_tools.federation import federation_index
+
+FEDERATION_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "assets", "models", "model_federation"
+)
+MODELS = ("Catch_Basin_LR.ifc", "Column_LR.ifc", "Signal_Foundation_LR.ifc")
+
+
+@pytest.fixture
+def models(tmp_path):
+    "copies of the federated models, so the index is written next to them in a temporary directory"
+    paths = []
+    for name in MODELS:
+        shutil.copy(os.path.join(FEDERATION_PATH, name), tmp_path / name)
+        paths.append(str(tmp_path / name))
+    yield paths
+
+
+@pytest.fixture(scope="module")
+def alignment() -> Alignment:
+    model = ifcopenshell.open(os.path.join(FEDERATION_PATH, "Column_LR.ifc"))
+    yield Alignment().from_entity(model.by_type("IfcAlignment")[0])
+
+
+class TestFederationIndex:
+    """
+    Test the station-range index of federated elements.
+    """
+
+    def test_ranges(self, alignment, models):
+        """
+        Each element shall cover the stations and offsets of its geometry.
+        """
+        index = build_federation_index(alignment, models)
+        assert len(index) == 3
+        column = int(np.flatnonzero(index.model == 1)[0])
+        assert index.global_ids[column] == "2hiDvZsFf6sgFJJo4buERh"
+        assert index.station_min[column] == pytest.approx(101.0)
+        assert index.station_max[column] == pytest.approx(104.0)
+        assert (index.offset_min[column], index.offset_max[column]) == pytest.approx((-34.0, -31.0))
+
+        origins = build_federation_index(alignment, models, use_geometry=False)
+        assert origins.station_min.tolist() == pytest.approx([100.0, 101.0, 101.0])
+        assert origins.offset_min.tolist() == pytest.approx([-30.0, -31.0, -31.0])
+
+    def test_query(self, alignment, models):
+        """
+        Elements overlapping the station and offset ranges shall be found.
+        """
+        index = build_federation_index(alignment, models)
+        assert len(index.query(100.0, 102.0, -40.0, 0.0)) == 3
+        assert len(index.query(100.0, 102.0, 0.0, 40.0)) == 0
+        assert len(index.query(104.5, 110.0)) == 1
+        assert len(index.query(110.0, 150.0)) == 0
+        elements = index.elements(index.query(104.5, 110.0))
+        assert elements == [(os.path.abspath(models[2]), "12sKq_weP4DAurrO0J4oq7")]
+
+    def test_persisted(self, alignment, models):
+        """
+        The index shall be saved next to the models and built again when a model changes.
+        """
+        index = federation_index(alignment, models)
+        path = os.path.join(os.path.dirname(models[0]), "federation_index.npz")
+        assert os.path.exists(path)
+        loaded = FederationIndex.load(path)
+        assert not loaded.is_stale(alignment, models)
+        np.testing.assert_array_equal(loaded.global_ids, index.global_ids)
+        np.testing.assert_array_equal(loaded.station_max, index.station_max)
+
+        stat = os.stat(models[1])
+        os.utime(models[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+        assert loaded.is_stale(alignment, models)
+        assert loaded.is_stale(alignment, models[:2])
+        federation_index(alignment, models)
+        assert not FederationIndex.load(path).is_stale(alignment, models)
+
+    def test_edited_alignment(self, alignment, models):
+        """
+        The index shall be stale after an edit that keeps the extent of the alignment.
+        """
+        index = federation_index(alignment, models)
+        edited = EditableAlignment(alignment.horizontal, alignment.vertical, alignment.cant, alignment.start_distance)
+        assert not index.is_stale(edited, models)
+        edit = edited.edit_horizontal(0, StartPoint=(1.0, 0.0))
+        assert edit.length_change == 0.0 and (edited.start, edited.end) == (alignment.start, alignment.end)
+        assert index.is_stale(edited, models)
+
+    def test_many(self):
+        """
+        Queries over many elements shall match a scan of all elements.
+        """
+        rng = np.random.default_rng(7)
+        n = 50000
+        station_min = np.sort(rng.uniform(0.0, 100000.0, n))
+        offset_min = rng.uniform(-50.0, 50.0, n)
+        index = FederationIndex(
+            station_min=station_min,
+            station_max=station_min + rng.exponential(5.0, n),
+            offset_min=offset_min,
+            offset_max=offset_min + rng.uniform(0.0, 5.0, n),
+            global_ids=np.arange(n).astype(str),
+            model=np.zeros(n, dtype=np.int64),
+            models=["network.ifc"],
+            stats=[[0, 0]],
+            alignment_key="",
+        )
+        for start, length, offset in zip(rng.uniform(0.0, 100000.0, 20), rng.uniform(0.0, 500.0, 20), rng.uniform(0.0, 30.0, 20)):
+            expected = np.flatnonzero(
+                (index.station_min <= start + length)
+                & (index.station_max >= start)
+                & (index.offset_max >= -offset)
+                & (index.offset_min <= offset)
+            )
+            np.testing.assert_array_equal(index.query(start, start + length, -offset, offset), expected)
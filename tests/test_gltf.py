@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from alignment_tools.gltf import glb_bytes
+from alignment_tools.gltf import read_glb
+from alignment_tools.gltf import write_glb
+from alignment_tools.sweep import SweepMesh
+
+# state plane coordinates, too large for float32 at millimetre precision
+ORIGIN = np.array([2107283.125, 1409120.5, 753.0])
+
+
+@pytest.fixture(scope="module")
+def triangle() -> SweepMesh:
+    vertices = ORIGIN + np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 2.0, 0.001]])
+    yield SweepMesh(vertices=vertices, indices=np.array([[0, 1, 2]], dtype=np.uint32))
+
+
+class TestGlb:
+    """
+    Test binary glTF output.
+    """
+
+    def test_roundtrip(self, triangle, tmp_path):
+        """
+        Written buffers shall read back with Y up and the origin in the node translation.
+        """
+        path = tmp_path / "out" / "mesh.glb"
+        write_glb(str(path), [("lane", triangle)], extras={"alignment": "4REN0"})
+        document, binary = read_glb(str(path))
+
+        node = document["nodes"][0]
+        assert node["name"] == "lane"
+        assert node["translation"] == pytest.approx([ORIGIN[0], ORIGIN[2], -ORIGIN[1]])
+        assert document["asset"]["extras"] == {"alignment": "4REN0"}
+
+        view = document["bufferViews"][document["accessors"][0]["bufferView"]]
+        positions = np.frombuffer(binary, np.float32, 9, view["byteOffset"]).reshape(3, 3)
+        assert positions[2] == pytest.approx([0.0, 0.001, -2.0], abs=1e-7)
+        view = document["bufferViews"][document["accessors"][1]["bufferView"]]
+        assert np.frombuffer(binary, np.uint32, 3, view["byteOffset"]).tolist() == [0, 1, 2]
+
+    def test_alignment(self, triangle):
+        """
+        Chunks shall be 4-byte aligned and the header length shall match.
+        """
+        data = glb_bytes([triangle])
+        assert len(data) % 4 == 0
+        document, binary = read_glb(data)
+        assert document["buffers"][0]["byteLength"] <= len(binary)
+
+    def test_not_glb(self):
+        """
+        ValueError shall be raised for data that is not binary glTF.
+        """
+        with pytest.raises(ValueError):
+            read_glb(b"\x00" * 32)
@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from scipy.special import fresnel
+
+from alignment_tools.horizontal import HORIZONTAL_EVALUATORS
+from alignment_tools.horizontal import point_on_CIRCULARARC
+from alignment_tools.horizontal import point_on_CLOTHOID
+from alignment_tools.horizontal import segment_point
+from alignment_tools.transitions import HELMERT
+
+
+def horizontal_segment(predefined_type, start_radius, end_radius, length=150.0):
+    return SimpleNamespace(
+        StartPoint=(10.0, 20.0),
+        StartDirection=0.0,
+        StartRadiusOfCurvature=start_radius,
+        EndRadiusOfCurvature=end_radius,
+        SegmentLength=length,
+        PredefinedType=predefined_type,
+    )
+
+
+class TestHorizontalEvaluators:
+    """
+    Test vectorized calculation of positions on horizontal segments.
+    """
+
+    def test_circular_arc(self):
+        """
+        Points on a circular arc shall lie on the circle, turning right for a negative radius.
+        """
+        seg = horizontal_segment("CIRCULARARC", -500.0, -500.0)
+        pts = point_on_CIRCULARARC(seg, np.linspace(0.0, 150.0, 7))
+        centre = np.array([10.0, 20.0 - 500.0])
+        assert np.linalg.norm(pts[:, :2] - centre, axis=1) == pytest.approx(np.full(7, 500.0))
+        assert pts[-1, 2] == pytest.approx(-150.0 / 500.0)
+
+    def test_clothoid_fresnel(self):
+        """
+        A clothoid from a tangent shall match the Fresnel integrals.
+        """
+        seg = horizontal_segment("CLOTHOID", 0.0, 300.0)
+        u = np.linspace(0.0, 150.0, 16)
+        pts = point_on_CLOTHOID(seg, u)
+        a = np.sqrt(300.0 * 150.0 * np.pi)
+        s, c = fresnel(u / a)
+        assert pts[:, 0] == pytest.approx(10.0 + a * c, abs=1e-8)
+        assert pts[:, 1] == pytest.approx(20.0 + a * s, abs=1e-8)
+        assert pts[:, 2] == pytest.approx(u**2 / (2.0 * 300.0 * 150.0))
+
+    @pytest.mark.parametrize("predefined_type", sorted(set(HORIZONTAL_EVALUATORS) - {"LINE", "CIRCULARARC"}))
+    def test_transition_end_direction(self, predefined_type):
+        """
+        Transitions shall turn by the mean of the start and end curvature over their length.
+        """
+        seg = horizontal_segment(predefined_type, 1000.0, -250.0)
+        pts = segment_point(seg, [0.0, 150.0])
+        assert pts[0] == pytest.approx([10.0, 20.0, 0.0])
+        assert pts[1, 2] == pytest.approx(150.0 * (1.0 / 1000.0 - 1.0 / 250.0) / 2.0)
+
+    def test_scalar_and_broadcast(self):
+        """
+        Results shall have the shape of the distances with (X, Y, Direction) last.
+        """
+        seg = horizontal_segment("CLOTHOID", 0.0, 300.0)
+        assert segment_point(seg, 75.0).shape == (3,)
+        assert segment_point(seg, np.zeros((4, 5))).shape == (4, 5, 3)
+
+    def test_helmert_across_kink(self):
+        """
+        Positions on a Helmert curve shall be integrated accurately across the kink of its shape at mid-length.
+        """
+        length, radius = 165.0, 300.0
+        seg = horizontal_segment("HELMERTCURVE", 0.0, radius, length)
+        u = np.array([41.25, 82.5, 123.75, 165.0])
+        pts = segment_point(seg, u)
+
+        # reference: trapezoidal rule on a fine grid with a node at the kink
+        s = np.linspace(0.0, length, 400001)
+        theta = length / radius * HELMERT.integral(s / length)
+        ds = np.diff(s)
+        x = 10.0 + np.concatenate(([0.0], np.cumsum(ds * (np.cos(theta[1:]) + np.cos(theta[:-1])) / 2.0)))
+        y = 20.0 + np.concatenate(([0.0], np.cumsum(ds * (np.sin(theta[1:]) + np.sin(theta[:-1])) / 2.0)))
+        rows = np.searchsorted(s, u - 1e-9)
+        np.testing.assert_allclose(pts[:, 0], x[rows], rtol=0.0, atol=1e-9)
+        np.testing.assert_allclose(pts[:, 1], y[rows], rtol=0.0, atol=1e-9)
+        np.testing.assert_allclose(pts[:, 2], theta[rows], rtol=0.0, atol=1e-12)
@@ -0,0 +1,182 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+import ifcopenshell
+import ifcopenshell.util.unit
+
+from alignment_tools.alignment import Alignment
+from alignment_tools import landxml
+from alignment_tools.evaluator import CurveEvaluator
+from alignment_tools.landxml import convert_landxml
+from alignment_tools.landxml import iter_alignments
+from alignment_tools.landxml import profile_segments
+from alignment_tools.landxml import read_landxml
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data")
+# IfcMapConversion of 4REN0_Autodesk.ifc
+EASTINGS, NORTHINGS = 41371.0, 62385.0
+
+SPIRAL_XML = """<?xml version="1.0"?>
+<LandXML xmlns="http://www.landxml.org/schema/LandXML-1.2" version="1.2">
+  <Units><Metric linearUnit="meter" directionUnit="radians"/></Units>
+  <Alignments>
+    <Alignment name="S" length="200" staStart="0">
+      <CoordGeom>
+        <Line length="100"><Start>0 0</Start><End>0 100</End></Line>
+        <Spiral length="100" radiusStart="INF" radiusEnd="250" rot="ccw" spiType="clothoid">
+          <Start>0 100</Start><PI>0 166.7</PI><End>6.65 199.6</End>
+        </Spiral>
+      </CoordGeom>
+    </Alignment>
+  </Alignments>
+</LandXML>
+"""
+
+
+def many_alignments(count: int) -> bytes:
+    "LandXML with `count` copies of the 4REN0 alignment"
+    with open(os.path.join(DATA_PATH, "4REN0.xml"), "rb") as f:
+        text = f.read().decode("utf-8-sig")
+    start = text.index("<Alignment ")
+    end = text.index("</Alignment>") + len("</Alignment>")
+    copies = "".join(
+        text[start:end].replace('name="GCHC"', f'name="GCHC{i}"', 1) for i in range(count)
+    )
+    return (text[:start] + copies + text[end:]).encode("utf-8")
+
+
+class CountingReader(io.BytesIO):
+    "binary file that records how far it has been read"
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.high_water = self.tell()
+        return data
+
+
+@pytest.fixture(scope="module")
+def ren_reference() -> Alignment:
+    model = ifcopenshell.open(os.path.join(DATA_PATH, "4REN0_Autodesk.ifc"))
+    yield Alignment().from_entity(model.by_type("IfcAlignment")[0])
+
+
+class TestLandXML:
+    """
+    Test streaming import of LandXML alignments.
+    """
+
+    def test_read(self):
+        """
+        The alignment, units and segment types shall be read.
+        """
+        (alignment,) = read_landxml(os.path.join(DATA_PATH, "4REN0.xml"))
+        assert alignment.name == "GCHC"
+        assert alignment.station_start == pytest.approx(384220.07)
+        assert alignment.linear_unit == "USSurveyFoot"
+        assert [s.PredefinedType for s in alignment.horizontal] == [
+            "CIRCULARARC", "LINE", "CIRCULARARC", "LINE", "CIRCULARARC",
+        ]
+        assert [s.StartRadiusOfCurvature for s in alignment.horizontal[::2]] == pytest.approx([-888.0, 600.0, -589.0])
+        assert [s.PredefinedType for s in alignment.vertical] == ["CONSTANTGRADIENT", "PARABOLICARC"] * 4 + [
+            "CONSTANTGRADIENT"
+        ]
+
+    def test_matches_autodesk(self, ren_reference):
+        """
+        The imported geometry shall match the IFC export of the same alignment.
+        """
+        (alignment,) = read_landxml(os.path.join(DATA_PATH, "4REN0.xml"))
+        imported = alignment.to_alignment()
+        assert imported.length == pytest.approx(ren_reference.length, abs=1e-4)
+        distances = np.linspace(0.0, ren_reference.end, 500)
+        actual = imported.evaluate(distances)
+        expected = ren_reference.evaluate(distances)
+        np.testing.assert_allclose(actual[:, 1] - EASTINGS, expected[:, 1], atol=1e-4)
+        np.testing.assert_allclose(actual[:, 2] - NORTHINGS, expected[:, 2], atol=1e-4)
+        np.testing.assert_allclose(np.cos(actual[:, 3]), np.cos(expected[:, 3]), atol=1e-6)
+        np.testing.assert_allclose(actual[:, 4], expected[:, 4], atol=1e-4)
+
+    def test_spiral(self):
+        """
+        A clothoid shall start tangent to the preceding line and end at the given point.
+        """
+        (alignment,) = read_landxml(io.BytesIO(SPIRAL_XML.encode("utf-8")))
+        line, spiral = alignment.horizontal
+        assert spiral.StartDirection == pytest.approx(line.StartDirection)
+        assert (spiral.StartRadiusOfCurvature, spiral.EndRadiusOfCurvature) == (0.0, 250.0)
+        end = alignment.to_alignment().evaluate([200.0])[0]
+        assert end[1:3] == pytest.approx((199.6, 6.65), abs=0.01)
+
+    def test_streaming(self):
+        """
+        An alignment shall be returned before the rest of the file is read.
+        """
+        source = CountingReader(many_alignments(200))
+        alignments = iter_alignments(source)
+        first = next(alignments)
+        assert first.name == "GCHC0"
+        assert source.high_water < len(source.getvalue()) / 10
+        assert sum(1 for _ in alignments) == 199
+
+    def test_releases_other_sections(self, monkeypatch):
+        """
+        Elements outside the alignments, e.g. a large surface, shall not be kept in the tree.
+        """
+        points = "".join(f'<P id="{i}">{i} {i} 0</P>' for i in range(20000))
+        surface = f'<Surfaces><Surface name="TIN"><Definition surfType="TIN"><Pnts>{points}</Pnts></Definition></Surface></Surfaces>'
+        text = many_alignments(2).decode("utf-8")
+        text = text.replace("<Alignments", surface + "<Alignments", 1)
+
+        roots = []
+        iterparse = landxml.ET.iterparse
+
+        def recording(source, events):
+            for event, elem in iterparse(source, events):
+                if not roots:
+                    roots.append(elem)
+                yield event, elem
+
+        monkeypatch.setattr(landxml.ET, "iterparse", recording)
+        alignments = iter_alignments(io.BytesIO(text.encode("utf-8")))
+        next(alignments)
+        # only the part of the next alignment parsed ahead is left
+        assert not any(landxml._tag(e) in ("Surfaces", "P") for e in roots[0].iter())
+        assert sum(1 for _ in roots[0].iter()) < 100
+        assert sum(1 for _ in alignments) == 1
+        assert len(roots[0]) == 0
+
+    def test_convert(self):
+        """
+        Every alignment shall be converted with a representation matching the imported geometry.
+        """
+        builder = convert_landxml(io.BytesIO(many_alignments(300)))
+        assert len(builder.file.by_type("IfcAlignment")) == 300
+        assert ifcopenshell.util.unit.calculate_unit_scale(builder.file) == pytest.approx(1200.0 / 3937.0)
+
+        (imported,) = read_landxml(os.path.join(DATA_PATH, "4REN0.xml"))
+        expected = imported.to_alignment()
+        distances = np.linspace(0.0, expected.end, 200)
+        curve = builder.alignments[-1].Representation.Representations[1].Items[0]
+        actual = CurveEvaluator(curve).positions(distances)
+        np.testing.assert_allclose(actual, expected.evaluate(distances)[:, [1, 2, 4]], atol=1e-5)
+
+    def test_plain_pvi(self):
+        """
+        A PVI without a vertical curve shall join two gradient runs.
+        """
+        segments = profile_segments([(100.0, 10.0, 0.0), (150.0, 11.0, 0.0), (250.0, 10.0, 0.0)], 100.0)
+        assert [(s.StartDistAlong, s.HorizontalLength, s.StartGradient) for s in segments] == [
+            (0.0, 50.0, pytest.approx(0.02)),
+            (50.0, 100.0, pytest.approx(-0.01)),
+        ]
+
+    def test_unsupported(self):
+        """
+        Unsupported geometry shall raise NotImplementedError.
+        """
+        xml = SPIRAL_XML.replace('spiType="clothoid"', 'spiType="radioid"')
+        with pytest.raises(NotImplementedError):
+            read_landxml(io.BytesIO(xml.encode("utf-8")))
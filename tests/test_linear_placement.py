@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+import pytest
+
+import ifcopenshell
+import ifcopenshell.guid
+import ifcopenshell.util.placement
+
+from alignment_tools.evaluator import CurveEvaluator
+from alignment_tools.linear_placement import resolve_linear_placements
+
+ASSETS_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "assets", "models", "alignment_validation"
+)
+SLEEPER_SPACING = 0.6
+
+
+@pytest.fixture(scope="module")
+def sleeper_model():
+    "ACCA model with a sleeper every 0.6 m along the whole alignment"
+    model = ifcopenshell.open(
+        os.path.join(ASSETS_PATH, "ACCA_sleepers-linear-placement-cant-implicit.ifc")
+    )
+    template = model.by_type("IfcLinearPlacement")[0]
+    curve = template.RelativePlacement.Location.BasisCurve
+    for i in range(1500):
+        location = model.create_entity(
+            "IfcPointByDistanceExpression",
+            DistanceAlong=model.create_entity("IfcLengthMeasure", SLEEPER_SPACING * i),
+            OffsetLateral=0.75 if i % 2 else 0.0,
+            OffsetVertical=0.1,
+            BasisCurve=curve,
+        )
+        placement = model.create_entity(
+            "IfcLinearPlacement",
+            template.PlacementRelTo,
+            model.create_entity("IfcAxis2PlacementLinear", location),
+        )
+        model.create_entity(
+            "IfcTrackElement",
+            ifcopenshell.guid.new(),
+            Name=f"Generated_{i}",
+            ObjectPlacement=placement,
+        )
+    yield model
+
+
+class TestLinearPlacement:
+    """
+    Test batch resolution of linear placements.
+    """
+
+    def test_all_products(self, sleeper_model):
+        """
+        A placement matrix shall be returned for every product placed linearly.
+        """
+        resolved = resolve_linear_placements(sleeper_model)
+        placed = [p for p in sleeper_model.by_type("IfcProduct") if p.ObjectPlacement and p.ObjectPlacement.is_a("IfcLinearPlacement")]
+        assert len(resolved) == len(placed) == 1502
+        assert resolved.matrices.shape == (1502, 4, 4)
+        assert np.all(np.diff(resolved.product_ids) > 0)
+
+    def test_matches_ifcopenshell(self, sleeper_model):
+        """
+        Positions shall match ifcopenshell.util.placement.
+        """
+        resolved = resolve_linear_placements(sleeper_model, follow_cant=False)
+        for placement in sleeper_model.by_type("IfcLinearPlacement")[::100]:
+            expected = ifcopenshell.util.placement.get_local_placement(placement)
+            m = resolved.matrix(placement.PlacesObject[0])
+            assert m[:3, 3] == pytest.approx(expected[:3, 3], abs=1e-6)
+            assert m[2, 1] == pytest.approx(0.0, abs=1e-12)
+
+    def test_offsets_and_cant(self, sleeper_model):
+        """
+        Offsets shall be applied along the curve frame, rolled with the cant.
+        """
+        resolved = resolve_linear_placements(sleeper_model)
+        curve = sleeper_model.by_type("IfcSegmentedReferenceCurve")[0]
+        products = [p for p in sleeper_model.by_type("IfcTrackElement") if (p.Name or "").startswith("Generated_")]
+        distances = SLEEPER_SPACING * np.arange(len(products))
+        pts = CurveEvaluator(curve).evaluate(distances)
+        lateral = np.where(np.arange(len(products)) % 2, 0.75, 0.0)
+
+        m = resolved.lookup([p.id() for p in products])
+        expected = pts.position + lateral[:, None] * pts.normal + 0.1 * pts.up
+        assert m[:, :3, 3] == pytest.approx(expected, abs=1e-9)
+        rotation = m[:, :3, :3]
+        assert np.einsum("nji,njk->nik", rotation, rotation) == pytest.approx(
+            np.broadcast_to(np.eye(3), rotation.shape), abs=1e-9
+        )
+        roll = np.arctan2(rotation[:, 2, 1], rotation[:, 2, 2])
+        assert roll == pytest.approx(pts.cant_rotation, abs=1e-4)
+        assert np.abs(roll).max() > 0.1
+
+    def test_missing_product(self, sleeper_model):
+        """
+        KeyError shall be raised for products without a linear placement.
+        """
+        resolved = resolve_linear_placements(sleeper_model)
+        with pytest.raises(KeyError):
+            resolved.matrix(sleeper_model.by_type("IfcAlignment")[0])
@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+import pytest
+
+import ifcopenshell
+
+from alignment_tools.alignment import Alignment
+from alignment_tools.alignment import COLUMNS
+from alignment_tools.points import COMPACT_COLUMNS
+from alignment_tools.points import AlignmentPoints
+
+ASSETS_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "assets", "models", "alignment_validation"
+)
+
+
+@pytest.fixture(scope="module")
+def acca_alignment() -> Alignment:
+    model = ifcopenshell.open(
+        os.path.join(ASSETS_PATH, "ACCA_sleepers-linear-placement-cant-implicit.ifc")
+    )
+    yield Alignment().from_entity(model.by_type("IfcAlignment")[0])
+
+
+class TestAlignmentPoints:
+    """
+    Test the columnar container for alignment points.
+    """
+
+    def test_views(self, acca_alignment):
+        """
+        Columns, the plain array and the DataFrame shall share memory with the points.
+        """
+        pts = acca_alignment.create_shape(point_interval=5.0)
+        points = AlignmentPoints.from_array(pts)
+        assert len(points) == len(pts)
+        assert np.shares_memory(points["Cant"], pts)
+        assert np.shares_memory(np.asarray(points), pts)
+        copied = np.array(points)
+        assert not np.shares_memory(copied, pts)
+        copied[:] = 0.0
+        np.testing.assert_array_equal(points.to_numpy(), pts)
+        assert np.asarray(points, dtype=np.float32).dtype == np.float32
+        frame = points.to_frame()
+        assert list(frame.columns) == list(COLUMNS)
+        assert np.shares_memory(frame["X"].to_numpy(), pts)
+        np.testing.assert_array_equal(frame.to_numpy(), pts)
+
+    def test_compact(self, acca_alignment):
+        """
+        Compact points shall store directions and cant as float32 and keep the other columns exact.
+        """
+        pts = acca_alignment.create_shape(point_interval=5.0)
+        points = acca_alignment.points(compact=True, point_interval=5.0)
+        assert points.compact
+        assert points.nbytes == len(pts) * (8 * 8 - 4 * len(COMPACT_COLUMNS))
+        for name in COLUMNS:
+            expected = np.float32 if name in COMPACT_COLUMNS else np.float64
+            assert points[name].dtype == expected
+        np.testing.assert_allclose(points.to_numpy(), pts, rtol=1e-7, atol=1e-9)
+        with pytest.raises(ValueError):
+            np.asarray(points, copy=False)
+
+    def test_between(self, acca_alignment):
+        """
+        A station range shall be a view of the points within it.
+        """
+        points = acca_alignment.points(point_interval=5.0)
+        start = float(points["Distance"][0])
+        part = points.between(start + 10.0, start + 30.0)
+        np.testing.assert_allclose(part["Distance"], start + np.arange(10.0, 31.0, 5.0))
+        assert np.shares_memory(part.records, points.records)
+        assert len(points.between(end=start)) == 1
+        assert len(points.between(start - 10.0, start - 1.0)) == 0
+
+    def test_save(self, acca_alignment, tmp_path):
+        """
+        Points shall be read back unchanged, also memory-mapped.
+        """
+        for compact in (False, True):
+            points = acca_alignment.points(compact=compact, point_interval=5.0)
+            path = str(tmp_path / "points.npy")
+            points.save(path)
+            for mmap in (False, True):
+                loaded = AlignmentPoints.load(path, mmap=mmap)
+                assert loaded.compact == compact
+                np.testing.assert_array_equal(loaded.records, points.records)
+            assert isinstance(AlignmentPoints.load(path, mmap=True).records, np.memmap)
+
+    def test_shape(self):
+        """
+        Arrays without the point columns shall raise ValueError.
+        """
+        with pytest.raises(ValueError):
+            AlignmentPoints.from_array(np.zeros((4, 5)))
+        with pytest.raises(ValueError):
+            AlignmentPoints(np.zeros(4))
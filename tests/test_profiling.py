@@ -0,0 +1,93 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import ifcopenshell
+
+from alignment_tools.alignment import Alignment
+from alignment_tools import profiling
+from alignment_tools.profiling import NULL_INSTRUMENTATION
+from alignment_tools.profiling import STAGES
+from alignment_tools.profiling import Instrumentation
+
+ASSETS_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "assets", "models", "alignment_validation"
+)
+
+
+@pytest.fixture(scope="module")
+def acca_alignment() -> Alignment:
+    model = ifcopenshell.open(
+        os.path.join(ASSETS_PATH, "ACCA_sleepers-linear-placement-cant-implicit.ifc")
+    )
+    yield Alignment().from_entity(model.by_type("IfcAlignment")[0])
+
+
+class TestInstrumentation:
+    """
+    Test timing of the stages of create_shape.
+    """
+
+    def test_fixed_interval(self, acca_alignment):
+        """
+        Points shall be counted per stage and segment type, without changing the result.
+        """
+        instrumentation = Instrumentation()
+        pts = acca_alignment.create_shape(point_interval=5.0, instrumentation=instrumentation)
+        np.testing.assert_array_equal(pts, acca_alignment.create_shape(point_interval=5.0))
+
+        timings = instrumentation.timings
+        assert timings[("stations", None)].points == len(pts)
+        assert sum(t.points for (stage, kind), t in timings.items() if stage == "horizontal" and kind) == len(pts)
+        assert {kind for stage, kind in timings if stage == "horizontal"} == {None, "LINE", "CLOTHOID", "CIRCULARARC"}
+        assert {kind for stage, kind in timings if stage == "cant"} == {None, "CONSTANTCANT", "LINEARTRANSITION"}
+        assert timings[("horizontal", "CLOTHOID")].calls == 1
+        # the station mapping and the cant rotation are recorded once each
+        assert timings[("cant", None)].calls == timings[("cant_rotation", None)].calls == 1
+        assert list(instrumentation.by_stage()) == ["stations", "horizontal", "vertical", "cant", "cant_rotation"]
+        assert instrumentation.seconds == pytest.approx(sum(t.seconds for t in instrumentation.by_stage().values()))
+
+    def test_adaptive(self, acca_alignment):
+        """
+        Refinement shall be recorded as assembly, and timings shall accumulate over calls.
+        """
+        instrumentation = Instrumentation()
+        pts = acca_alignment.create_shape(chord_tolerance=0.01, instrumentation=instrumentation)
+        stations = instrumentation.timings[("stations", None)]
+        assembly = instrumentation.timings[("assembly", None)]
+        assert assembly.calls > 1
+        assert stations.points + assembly.points == len(pts)
+        assert list(instrumentation.by_stage()) == list(STAGES)
+        calls = instrumentation.timings[("horizontal", "CLOTHOID")].calls
+        acca_alignment.create_shape(chord_tolerance=0.01, instrumentation=instrumentation)
+        assert instrumentation.timings[("horizontal", "CLOTHOID")].calls == 2 * calls
+
+    def test_not_instrumented(self, acca_alignment, monkeypatch):
+        """
+        Without instrumentation no clock shall be read and nothing recorded.
+        """
+        expected = acca_alignment.create_shape(chord_tolerance=0.01, instrumentation=Instrumentation())
+
+        def clock():
+            raise AssertionError("clock read without instrumentation")
+
+        monkeypatch.setattr(profiling.time, "perf_counter", clock)
+        np.testing.assert_array_equal(acca_alignment.create_shape(chord_tolerance=0.01), expected)
+        assert NULL_INSTRUMENTATION.timings == {}
+
+    def test_write(self, acca_alignment, tmp_path):
+        """
+        The profile shall be written with the most expensive entry first.
+        """
+        instrumentation = Instrumentation()
+        acca_alignment.create_shape(point_interval=1.0, instrumentation=instrumentation)
+        instrumentation.write(str(tmp_path / "profile.json"))
+        instrumentation.write(str(tmp_path / "profile.csv"))
+        with open(tmp_path / "profile.json") as f:
+            rows = json.load(f)
+        assert len(rows) == len(instrumentation.timings)
+        assert rows == sorted(rows, key=lambda r: r["seconds"], reverse=True)
+        assert set(rows[0]) == {"stage", "segment_type", "calls", "seconds", "points", "seconds_per_point"}
+        assert len((tmp_path / "profile.csv").read_text().splitlines()) == len(rows) + 1
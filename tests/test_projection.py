@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pytest
+
+import ifcopenshell
+
+from alignment_tools.alignment import Alignment
+from alignment_tools.projection import ProjectionIndex
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.fixture(scope="module")
+def ren_alignment() -> Alignment:
+    model = ifcopenshell.open(os.path.join(DATA_PATH, "4REN0_Autodesk.ifc"))
+    yield Alignment().from_entity(model.by_type("IfcAlignment")[0])
+
+
+@pytest.fixture(scope="module")
+def survey_points(ren_alignment):
+    "points at known station, offset and height above the alignment"
+    rng = np.random.default_rng(42)
+    distance = rng.uniform(ren_alignment.start, ren_alignment.end, 10000)
+    offset = rng.uniform(-150.0, 150.0, 10000)
+    pts = ren_alignment.evaluate(distance)
+    normal = np.column_stack((-np.sin(pts[:, 3]), np.cos(pts[:, 3])))
+    xy = pts[:, 1:3] + offset[:, None] * normal
+    yield distance, offset, np.column_stack((xy, pts[:, 4] + 3.5))
+
+
+class TestProjection:
+    """
+    Test projection of points onto an alignment.
+    """
+
+    def test_station_offset(self, ren_alignment, survey_points):
+        """
+        Station, offset and height shall be recovered for points off the alignment.
+        """
+        distance, offset, points = survey_points
+        result = ren_alignment.project(points)
+        assert result.distance == pytest.approx(distance, abs=1e-6)
+        assert result.offset == pytest.approx(offset, abs=1e-6)
+        assert result.height == pytest.approx(np.full(len(points), 3.5), abs=1e-6)
+        assert result.on_alignment.all()
+
+    def test_offset_sign(self, ren_alignment):
+        """
+        Offsets to the left of the alignment shall be positive.
+        """
+        # first curve turns right, so its centre is on the right
+        pts = ren_alignment.evaluate([100.0])
+        centre = pts[0, 1:3] + 888.0 * np.array([np.sin(pts[0, 3]), -np.cos(pts[0, 3])])
+        result = ren_alignment.project(centre[None, :] * 0.9 + pts[0, 1:3] * 0.1)
+        assert result.offset[0] == pytest.approx(-0.9 * 888.0)
+        assert np.isnan(result.height[0])
+
+    def test_beyond_end(self, ren_alignment):
+        """
+        Points beyond the ends shall be clamped to the start or end and flagged.
+        """
+        pts = ren_alignment.evaluate([ren_alignment.start, ren_alignment.end])
+        ahead = np.column_stack((np.cos(pts[:, 3]), np.sin(pts[:, 3])))
+        query = pts[:, 1:3] + np.array([[-50.0], [50.0]]) * ahead
+        result = ren_alignment.project(query)
+        assert result.distance == pytest.approx([ren_alignment.start, ren_alignment.end])
+        assert not result.on_alignment.any()
+
+    def test_matches_brute_force(self, ren_alignment):
+        """
+        Projection shall find the nearest point of a dense sampling of the alignment.
+        """
+        rng = np.random.default_rng(7)
+        lo, hi = np.nanmin(ren_alignment.create_shape()[:, 1:3], axis=0), np.nanmax(
+            ren_alignment.create_shape()[:, 1:3], axis=0
+        )
+        query = rng.uniform(lo, hi, (200, 2))
+        dense = ren_alignment.evaluate(np.linspace(ren_alignment.start, ren_alignment.end, 50001))
+        nearest = np.linalg.norm(query[:, None, :] - dense[None, :, 1:3], axis=2).min(axis=1)
+
+        result = ProjectionIndex(ren_alignment).project(query)
+        foot = ren_alignment.evaluate(result.distance)[:, 1:3]
+        found = np.linalg.norm(query - foot, axis=1)
+        inside = result.on_alignment
+        assert found[inside] == pytest.approx(np.abs(result.offset[inside]))
+        assert np.all(found <= nearest + 1e-6)
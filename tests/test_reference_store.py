@@ -0,0 +1,93 @@
+import os
+
+import numpy as np
+import pytest
+
+from alignment_tools.reference_store import ReferenceStore
+
+
+def write_table(path, n, offset=0.0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("Reference\nCurveLength\tX\tY\tZ\tBaseCurve\n")
+        for i in range(n):
+            f.write(f"{i}.0\t{i + offset}\t{2 * i}\t0.0\t0\n")
+
+
+@pytest.fixture
+def testset(tmp_path):
+    root = tmp_path / "alignment_testset"
+    write_table(str(root / "ToolboxProcess-H" / "HorizontalAlignment" / "Line" / "Line_1.txt"), 5)
+    write_table(str(root / "ToolboxProcess-H" / "HorizontalAlignment" / "Clothoid" / "Clothoid_1.txt"), 7)
+    write_table(str(root / "ToolboxProcess-C" / "CantAlignment" / "BlossCurve" / "BlossCurve_1-H.txt"), 3)
+    yield root
+
+
+class TestReferenceStore:
+    """
+    Test the packed reference table store.
+    """
+
+    def test_build_and_load(self, testset):
+        """
+        All tables shall be packed once and loaded as memory-mapped views.
+        """
+        store = ReferenceStore(str(testset))
+        assert store.build() == 3
+        assert sorted(store.keys()) == [
+            "C/BlossCurve/BlossCurve_1-H",
+            "H/Clothoid/Clothoid_1",
+            "H/Line/Line_1",
+        ]
+        table = store.load("H", "Clothoid", "Clothoid_1")
+        assert table.shape == (7, 5)
+        assert table[:, 2] == pytest.approx(2.0 * np.arange(7))
+        assert isinstance(table, np.memmap)
+        assert not table.flags.writeable
+
+    def test_rebuild_reuses_unchanged(self, testset):
+        """
+        Rebuilding shall only re-parse tables whose source changed.
+        """
+        store = ReferenceStore(str(testset))
+        store.build()
+        assert store.build() == 0
+
+    def test_concurrent_data_file(self, testset):
+        """
+        A build shall remove the data file of the previous index only, not one another builder is writing.
+        """
+        store = ReferenceStore(str(testset))
+        store.build()
+        previous = os.path.join(store.store_dir, store._read_index()["data"])
+        other = os.path.join(store.store_dir, "tables-other.npy")
+        np.save(other, np.zeros((2, 5)))
+        store.build()
+        current = os.path.join(store.store_dir, store._read_index()["data"])
+        assert not os.path.exists(previous)
+        assert sorted(os.listdir(store.store_dir)) == sorted(["index.json", os.path.basename(current), "tables-other.npy"])
+
+    def test_invalidate_on_change(self, testset):
+        """
+        A changed source table shall be re-read on the next load.
+        """
+        store = ReferenceStore(str(testset))
+        assert store.load("H", "Line", "Line_1")[0, 1] == pytest.approx(0.0)
+
+        path = testset / "ToolboxProcess-H" / "HorizontalAlignment" / "Line" / "Line_1.txt"
+        write_table(str(path), 6, offset=10.0)
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        table = store.load("H", "Line", "Line_1")
+        assert table.shape == (6, 5)
+        assert table[0, 1] == pytest.approx(10.0)
+        assert store.load_frame("H", "Clothoid", "Clothoid_1")["Y"].iloc[-1] == pytest.approx(12.0)
+
+    def test_missing_table(self, testset):
+        """
+        KeyError shall be raised for a case that is not in the test set.
+        """
+        store = ReferenceStore(str(testset))
+        with pytest.raises(KeyError):
+            store.load("V", "Clothoid", "nope")
@@ -0,0 +1,99 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import ifcopenshell
+
+from alignment_tools.alignment import Alignment
+from alignment_tools.sight_distance import headlight_sight_distance
+from alignment_tools.sight_distance import plan_sight_distance
+from alignment_tools.sight_distance import profile_sight_distance
+from alignment_tools.sight_distance import sight_distance
+from alignment_tools.vertical import h_on_PARABOLICARC
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data")
+
+# crest curve of ramp 'REN' (tests/test_alignment_calc_vertical.py), US customary units
+REN_CREST = SimpleNamespace(StartHeight=779.9407, StartGradient=0.046063, EndGradient=-0.040500, HorizontalLength=900.0)
+EYE, OBJECT = 3.5, 2.0
+
+
+def crest_sight_distance(curve, eye_height: float, object_height: float) -> float:
+    "sight distance on a crest curve longer than the sight distance, AASHTO Green Book eq. 3-41 solved for S"
+    grades = 100.0 * abs(curve.EndGradient - curve.StartGradient)
+    return np.sqrt(200.0 * curve.HorizontalLength * (np.sqrt(eye_height) + np.sqrt(object_height)) ** 2 / grades)
+
+
+@pytest.fixture(scope="module")
+def ren_alignment() -> Alignment:
+    model = ifcopenshell.open(os.path.join(DATA_PATH, "4REN0_Autodesk.ifc"))
+    yield Alignment().from_entity(model.by_type("IfcAlignment")[0])
+
+
+class TestSightDistance:
+    """
+    Test the sight distance along the profile and in plan.
+    """
+
+    def test_crest(self):
+        """
+        The sight distance over a crest curve shall be the AASHTO value, within the grid step, in both directions.
+        """
+        distances = np.arange(0.0, 900.25, 0.5)
+        heights = h_on_PARABOLICARC(REN_CREST, distances)
+        expected = crest_sight_distance(REN_CREST, EYE, OBJECT)
+        ahead = profile_sight_distance(distances, heights, EYE, OBJECT, max_distance=2000.0)
+        back = profile_sight_distance(distances, heights, EYE, OBJECT, max_distance=2000.0, reverse=True)
+        for values, inside in ((ahead, distances + expected < 900.0), (back, distances - expected > 0.0)):
+            assert values[inside] == pytest.approx(expected, abs=0.5)
+            assert (values[~inside] >= expected - 0.5).all()
+
+    def test_sag(self):
+        """
+        The headlight sight distance over a sag curve shall be the AASHTO value, within the grid step.
+        """
+        sag = SimpleNamespace(StartHeight=100.0, StartGradient=-0.04, EndGradient=0.04, HorizontalLength=900.0)
+        distances = np.arange(0.0, 900.25, 0.5)
+        heights = h_on_PARABOLICARC(sag, distances)
+        # A S^2 = 200 L (H + S tan 1°) for S < L, with H = 2 ft
+        a, b, c = 8.0, -200.0 * 900.0 * np.tan(np.radians(1.0)), -200.0 * 900.0 * 2.0
+        expected = (-b + np.sqrt(b * b - 4.0 * a * c)) / (2.0 * a)
+        lit = headlight_sight_distance(distances, heights, headlight_height=2.0)
+        assert lit[:400] == pytest.approx(expected, abs=1.0)
+        assert (profile_sight_distance(distances, heights, EYE, OBJECT) == 1000.0).all()
+
+    def test_plan(self):
+        """
+        The sight distance past an obstruction inside a circular curve shall follow from the middle ordinate.
+        """
+        radius, clearance = 300.0, 10.0
+        s = np.arange(0.0, 600.1, 0.25)
+        x, y, direction = radius * np.sin(s / radius), radius * (1.0 - np.cos(s / radius)), s / radius
+        expected = 2.0 * radius * np.arccos(1.0 - clearance / radius)
+
+        inside = plan_sight_distance(s, x, y, direction, clearance)
+        assert inside[s + expected < 600.0] == pytest.approx(expected, abs=0.25)
+        reverse = plan_sight_distance(s, x, y, direction, clearance, reverse=True)
+        assert reverse[s - expected > 0.0] == pytest.approx(expected, abs=0.25)
+        assert (plan_sight_distance(s, x, y, direction, -clearance) == 1000.0).all()
+        # along the lane the angle subtended is the same, measured in stations of the alignment
+        lane = plan_sight_distance(s, x, y, direction, clearance + 2.0, driver_offset=2.0)
+        assert lane[0] == pytest.approx(2.0 * radius * np.arccos(1.0 - clearance / (radius - 2.0)), abs=0.25)
+
+    def test_alignment(self, ren_alignment):
+        """
+        Stations with a sight distance below a design value shall be flagged over the crest curve.
+        """
+        result = sight_distance(ren_alignment, step=1.0, eye_height=EYE, object_height=OBJECT)
+        crest = next(v for v in ren_alignment.vertical if v.StartGradient > 0.04 and v.EndGradient < 0.0)
+        expected = crest_sight_distance(crest, EYE, OBJECT)
+        assert np.nanmin(result.profile) == pytest.approx(expected, abs=1.0)
+        assert (result.plan == result.max_distance).all()
+
+        ((first, last, shortest),) = result.below(expected + 2.0)
+        assert crest.StartDistAlong - expected < first < crest.StartDistAlong
+        assert crest.StartDistAlong + crest.HorizontalLength - expected < last < crest.StartDistAlong + crest.HorizontalLength
+        assert shortest == pytest.approx(expected, abs=1.0)
+        assert result.below(expected - 2.0) == []
@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+
+from alignment_tools.stations import StationCursor
+from alignment_tools.stations import critical_stations
+from alignment_tools.stations import distance_grid
+from alignment_tools.stations import iter_station_grid
+from alignment_tools.stations import map_stations
+from alignment_tools.stations import merge_stations
+from alignment_tools.stations import segment_starts
+
+# example alignment from docs/alignment_calculation.md
+H_LENGTHS = [120.0, 90.0, 110.0]
+V_STARTS = [20.0, 90.0, 230.0]
+V_LENGTHS = [70.0, 140.0, 80.0]
+
+
+@pytest.fixture(scope="module")
+def distances() -> np.ndarray:
+    h_starts = segment_starts(H_LENGTHS)
+    grid = distance_grid(0.0, 320.0, 25.0)
+    grid = merge_stations(grid, critical_stations(h_starts, H_LENGTHS))
+    grid = merge_stations(grid, critical_stations(V_STARTS, V_LENGTHS))
+    yield grid
+
+
+class TestStationMapping:
+    """
+    Test vectorized mapping of distances onto layout segments.
+    """
+
+    def test_distance_grid(self):
+        """
+        Distance grid shall include the end of the alignment.
+        """
+        grid = distance_grid(0.0, 320.0, 25.0)
+        assert grid[-2:] == pytest.approx([300.0, 320.0])
+        assert len(grid) == 14
+
+    def test_critical_stations_merged(self, distances):
+        """
+        Segment start and end stations shall be merged into the distance array.
+        """
+        assert distances == pytest.approx(
+            [0, 20, 25, 50, 75, 90, 100, 120, 125, 150, 175, 200, 210, 225, 230, 250, 275, 300, 310, 320]
+        )
+
+    def test_merge_replaces_near_duplicates(self):
+        """
+        Distances within tolerance of a critical station shall not be duplicated.
+        """
+        merged = merge_stations([0.0, 10.0 + 1e-12, 20.0], [10.0, 50.0])
+        assert merged.tolist() == [0.0, 10.0, 20.0]
+
+    def test_horizontal_mapping(self, distances):
+        """
+        Distances shall map to the horizontal segment and u per the documentation.
+        """
+        mapping = map_stations(distances, segment_starts(H_LENGTHS), H_LENGTHS)
+        i = np.searchsorted(distances, [0.0, 120.0, 200.0, 210.0, 320.0])
+        assert mapping.segment[i].tolist() == [0, 1, 1, 2, 2]
+        assert mapping.u[i] == pytest.approx([0.0, 0.0, 80.0, 0.0, 110.0])
+
+    def test_vertical_mapping(self, distances):
+        """
+        Distances outside the vertical layout shall be unmapped.
+        """
+        mapping = map_stations(distances, V_STARTS, V_LENGTHS)
+        assert mapping.segment[[0, -1]].tolist() == [-1, -1]
+        assert np.isnan(mapping.u[[0, -1]]).all()
+
+        i = np.searchsorted(distances, [20.0, 90.0, 225.0, 230.0, 310.0])
+        assert mapping.segment[i].tolist() == [0, 1, 1, 2, 2]
+        assert mapping.u[i] == pytest.approx([0.0, 0.0, 135.0, 0.0, 80.0])
+
+    def test_zero_length_terminator(self):
+        """
+        A zero-length terminating segment shall not receive points.
+        """
+        mapping = map_stations([0.0, 100.0], [0.0, 100.0], [100.0, 0.0])
+        assert mapping.segment.tolist() == [0, 0]
+        assert mapping.u == pytest.approx([0.0, 100.0])
+
+    def test_groups(self, distances):
+        """
+        Points shall be grouped by segment in order along the alignment.
+        """
+        mapping = map_stations(distances, V_STARTS, V_LENGTHS)
+        groups = list(mapping.groups())
+        assert [g[0] for g in groups] == [0, 1, 2]
+        assert sum(len(g[1]) for g in groups) == int(mapping.mapped.sum())
+        assert distances[groups[2][1]] == pytest.approx([230, 250, 275, 300, 310])
+
+
+class TestStreaming:
+    """
+    Test chunked station grids and cursors.
+    """
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 7, 20, 100])
+    def test_station_grid_chunks(self, distances, chunk_size):
+        """
+        Chunks shall have the same size and join up to the merged grid.
+        """
+        critical = np.concatenate(
+            (critical_stations(segment_starts(H_LENGTHS), H_LENGTHS), critical_stations(V_STARTS, V_LENGTHS))
+        )
+        chunks = list(iter_station_grid(0.0, 320.0, 25.0, critical, chunk_size))
+        assert all(len(c) == chunk_size for c in chunks[:-1])
+        assert 0 < len(chunks[-1]) <= chunk_size
+        assert np.concatenate(chunks).tolist() == distances.tolist()
+
+    def test_station_grid_near_boundary(self):
+        """
+        A critical station within tolerance of a chunk boundary shall replace the grid point once.
+        """
+        chunks = list(iter_station_grid(0.0, 40.0, 10.0, [20.0 - 1e-12, 25.0], 2))
+        assert np.concatenate(chunks).tolist() == [0.0, 10.0, 20.0 - 1e-12, 25.0, 30.0, 40.0]
+
+    def test_cursor(self, distances):
+        """
+        Mapping ascending chunks with a cursor shall match mapping all distances at once.
+        """
+        for starts, lengths in ((segment_starts(H_LENGTHS), H_LENGTHS), (V_STARTS, V_LENGTHS)):
+            expected = map_stations(distances, starts, lengths)
+            cursor = StationCursor(starts, lengths)
+            chunks = [cursor.map(c) for c in np.array_split(distances, 7)]
+            assert np.concatenate([c.segment for c in chunks]).tolist() == expected.segment.tolist()
+            np.testing.assert_array_equal(np.concatenate([c.u for c in chunks]), expected.u)
+        assert cursor.position == 2
+
+    def test_cursor_terminator(self):
+        """
+        The end of a layout shall stay mapped when the next chunk starts there.
+        """
+        cursor = StationCursor([0.0, 100.0], [100.0, 0.0])
+        assert cursor.map([50.0, 100.0]).segment.tolist() == [0, 0]
+        assert cursor.map([100.0, 120.0]).segment.tolist() == [0, -1]
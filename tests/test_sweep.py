@@ -0,0 +1,119 @@
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from alignment_tools.alignment import Z
+from alignment_tools.alignment import Alignment
+from alignment_tools.gltf import glb_bytes
+from alignment_tools.sweep import signed_area
+from alignment_tools.sweep import sweep_points
+from alignment_tools.sweep import sweep_profile
+from alignment_tools.sweep import triangulate_polygon
+
+# 16 ft lane to the left of the alignment, 11 in thick (notebooks/004-cx64-sweeps.ipynb)
+LANE = np.array([(0.0, 0.0), (16.0, 0.0), (16.0, -0.91667), (0.0, -0.91667)])
+
+
+def mesh_volume(mesh) -> float:
+    tri = mesh.vertices[mesh.indices]
+    return float(np.einsum("ij,ij->i", tri[:, 0], np.cross(tri[:, 1], tri[:, 2])).sum() / 6.0)
+
+
+@pytest.fixture(scope="module")
+def straight():
+    "100 ft tangent heading north"
+    n = 11
+    yield dict(
+        x=np.zeros(n),
+        y=np.linspace(0.0, 100.0, n),
+        z=np.full(n, 50.0),
+        direction=np.full(n, np.pi / 2.0),
+    )
+
+
+class TestSweep:
+    """
+    Test sweeping a cross-section along an alignment.
+    """
+
+    def test_buffers(self, straight):
+        """
+        Vertex and index buffers shall cover every station and profile edge.
+        """
+        mesh = sweep_profile(LANE, **straight)
+        assert mesh.vertices.shape == (11 * 4, 3)
+        assert mesh.indices.shape == (10 * 4 * 2 + 2 * 2, 3)
+        assert mesh.indices.dtype == np.uint32
+        assert mesh.indices.max() == len(mesh.vertices) - 1
+
+    def test_closed_volume(self, straight):
+        """
+        A capped sweep shall be closed with outward facing triangles.
+        """
+        mesh = sweep_profile(LANE, **straight)
+        assert mesh_volume(mesh) == pytest.approx(16.0 * 0.91667 * 100.0)
+        mesh = sweep_profile(LANE[::-1], **straight)
+        assert mesh_volume(mesh) == pytest.approx(16.0 * 0.91667 * 100.0)
+
+    def test_offset_to_the_left(self, straight):
+        """
+        Positive offsets shall be to the left of the alignment.
+        """
+        mesh = sweep_profile(LANE, **straight)
+        first = mesh.vertices[:4]
+        assert first[:, 0].min() == pytest.approx(-16.0)
+        assert first[:, 0].max() == pytest.approx(0.0)
+        assert first[:, 1] == pytest.approx(np.zeros(4))
+
+    def test_cant_roll(self, straight):
+        """
+        Positive cant rotation shall raise the left side of the profile.
+        """
+        roll = np.full(11, np.arcsin(0.1 / 1.5))
+        mesh = sweep_profile([(0.75, 0.0), (-0.75, 0.0)], closed=False, cant_rotation=roll, **straight)
+        left, right = mesh.vertices[0], mesh.vertices[1]
+        assert left[2] - right[2] == pytest.approx(0.1)
+        assert np.linalg.norm(left - right) == pytest.approx(1.5)
+
+    def test_open_profile(self, straight):
+        """
+        An open profile shall produce a surface without caps.
+        """
+        mesh = sweep_profile([(-5.0, 0.0), (0.0, 0.1), (5.0, 0.0)], closed=False, **straight)
+        assert mesh.indices.shape == (10 * 2 * 2, 3)
+
+    def test_triangulate_non_convex(self):
+        """
+        Non-convex profiles shall be triangulated by ear clipping.
+        """
+        l_shape = np.array([(0, 0), (4, 0), (4, 1), (1, 1), (1, 3), (0, 3)], dtype=float)
+        triangles = triangulate_polygon(l_shape)
+        assert len(triangles) == 4
+        area = sum(signed_area(l_shape[t]) for t in triangles)
+        assert area == pytest.approx(signed_area(l_shape)) == pytest.approx(6.0)
+
+    def test_without_vertical_layout(self):
+        """
+        A sweep along an alignment without heights shall be rejected unless a height is given.
+        """
+        line = SimpleNamespace(
+            StartPoint=(0.0, 0.0),
+            StartDirection=0.0,
+            StartRadiusOfCurvature=0.0,
+            EndRadiusOfCurvature=0.0,
+            SegmentLength=100.0,
+            PredefinedType="LINE",
+        )
+        pts = Alignment(horizontal=[line]).create_shape(point_interval=10.0)
+        assert np.isnan(pts[:, Z]).all()
+        with pytest.raises(ValueError):
+            sweep_points(LANE, pts)
+
+        mesh = sweep_points(LANE, pts, height=12.0)
+        assert np.isfinite(mesh.vertices).all()
+        assert mesh.vertices[:, 2].max() == pytest.approx(12.0)
+        glb = glb_bytes([("lane", mesh)])
+        length = int.from_bytes(glb[12:16], "little")
+        json.loads(glb[20 : 20 + length], parse_constant=lambda c: pytest.fail(f"{c} in glTF JSON"))
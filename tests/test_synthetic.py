@@ -0,0 +1,130 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ifcopenshell
+import ifcopenshell.validate
+
+from alignment_tools.alignment import Alignment
+from alignment_tools.evaluator import CurveEvaluator
+from alignment_tools.horizontal import segment_point
+from alignment_tools.synthetic import CANT_TRANSITIONS
+from alignment_tools.synthetic import HORIZONTAL_TRANSITIONS
+from alignment_tools.synthetic import SyntheticSpec
+from alignment_tools.synthetic import synthetic_layouts
+from alignment_tools.synthetic import write_synthetic
+from alignment_tools.vertical import segment_height
+
+SPEC = SyntheticSpec(segments=96, seed=3, length=20000.0)
+
+
+@pytest.fixture(scope="module")
+def written(tmp_path_factory):
+    out_dir = tmp_path_factory.mktemp("synthetic")
+    manifest = write_synthetic(SPEC, str(out_dir), point_interval=10.0)
+    yield out_dir, manifest
+
+
+class TestSyntheticLayouts:
+    """
+    Test generation of synthetic segment tables.
+    """
+
+    def test_reproducible(self):
+        """
+        The same spec shall give the same tables, another seed different ones.
+        """
+        layouts = synthetic_layouts(SPEC)
+        again = synthetic_layouts(SyntheticSpec(segments=96, seed=3, length=20000.0))
+        for layout in ("horizontal", "vertical", "cant"):
+            pd.testing.assert_frame_equal(getattr(layouts, layout), getattr(again, layout))
+        other = synthetic_layouts(SyntheticSpec(segments=96, seed=4, length=20000.0))
+        assert not np.array_equal(layouts.horizontal["SegmentLength"], other.horizontal["SegmentLength"])
+
+    def test_types(self):
+        """
+        The tables shall mix all transition, vertical curve and cant types.
+        """
+        counts = synthetic_layouts(SPEC).counts()
+        assert set(counts["horizontal"]) == {"LINE", "CIRCULARARC", *HORIZONTAL_TRANSITIONS}
+        assert set(counts["vertical"]) == {"CONSTANTGRADIENT", "PARABOLICARC", "CIRCULARARC"}
+        assert set(counts["cant"]) == {"CONSTANTCANT", *CANT_TRANSITIONS}
+        assert sum(counts["horizontal"].values()) == 96
+        assert sum(counts["vertical"].values()) == 48
+
+    def test_continuous(self):
+        """
+        Each segment shall start where the previous one ends.
+        """
+        layouts = synthetic_layouts(SPEC)
+        assert layouts.horizontal["SegmentLength"].sum() == pytest.approx(20000.0)
+        segments = list(layouts.horizontal.itertuples(index=False))
+        for previous, segment in zip(segments[:-1], segments[1:]):
+            np.testing.assert_allclose(
+                segment_point(previous, previous.SegmentLength),
+                (*segment.StartPoint, segment.StartDirection),
+                atol=1e-9,
+            )
+        segments = list(layouts.vertical.itertuples(index=False))
+        for previous, segment in zip(segments[:-1], segments[1:]):
+            assert previous.StartDistAlong + previous.HorizontalLength == pytest.approx(segment.StartDistAlong)
+            assert segment_height(previous, previous.HorizontalLength) == pytest.approx(segment.StartHeight)
+            assert previous.EndGradient == pytest.approx(segment.StartGradient)
+        cant = layouts.cant
+        np.testing.assert_allclose(cant["EndCantLeft"].iloc[:-1], cant["StartCantLeft"].iloc[1:])
+        np.testing.assert_allclose(cant["EndCantRight"].iloc[:-1], cant["StartCantRight"].iloc[1:])
+
+    def test_no_segments(self):
+        """
+        A spec without segments shall raise ValueError.
+        """
+        with pytest.raises(ValueError):
+            synthetic_layouts(SyntheticSpec(segments=0))
+
+
+class TestWriteSynthetic:
+    """
+    Test writing of synthetic models and their companion tables.
+    """
+
+    def test_files(self, written):
+        """
+        The manifest shall list the written files and the spec the tables can be made again from.
+        """
+        out_dir, manifest = written
+        with open(out_dir / "manifest.json") as f:
+            stored = json.load(f)
+        assert stored["segments"] == manifest["segments"]
+        layouts = synthetic_layouts(SyntheticSpec(**stored["spec"]))
+        pd.testing.assert_frame_equal(layouts.cant, synthetic_layouts(SPEC).cant)
+        for entry in manifest["files"].values():
+            assert (out_dir / entry["path"]).stat().st_size == entry["size"]
+        horizontal = pd.read_csv(out_dir / "horizontal.csv")
+        assert len(horizontal) == 96
+        assert {"StartPointX", "StartPointY"} <= set(horizontal.columns)
+
+    def test_valid(self, written):
+        """
+        The model shall be a valid IFC4X3_ADD2 model.
+        """
+        out_dir, _ = written
+        model = ifcopenshell.open(str(out_dir / "alignment.ifc"))
+        assert model.schema_identifier == "IFC4X3_ADD2"
+        logger = ifcopenshell.validate.json_logger()
+        ifcopenshell.validate.validate(model, logger)
+        assert logger.statements == []
+
+    def test_points(self, written):
+        """
+        The reference points shall match the business logic read back from the model and its representation.
+        """
+        out_dir, _ = written
+        model = ifcopenshell.open(str(out_dir / "alignment.ifc"))
+        entity = model.by_type("IfcAlignment")[0]
+        points = np.load(out_dir / "points.npy")
+        np.testing.assert_allclose(Alignment().from_entity(entity).evaluate(points[:, 0]), points, atol=1e-9)
+        curve = entity.Representation.Representations[1].Items[0]
+        actual = CurveEvaluator(curve).positions(points[:, 0])
+        np.testing.assert_allclose(actual, points[:, [1, 2, 4]], atol=1e-5)
@@ -0,0 +1,140 @@
+import json
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import ifcopenshell
+
+from alignment_tools.alignment import Alignment
+from alignment_tools.gltf import read_glb
+from alignment_tools.tiles import LevelOfDetail
+from alignment_tools.tiles import export_tiles
+from alignment_tools.tiles import simplify_polygon
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data")
+LANE = np.array([(0.0, 0.0), (8.0, 0.05), (16.0, 0.0), (16.0, -0.91667), (0.0, -0.91667)])
+LODS = (
+    LevelOfDetail(point_interval=5.0),
+    LevelOfDetail(chord_tolerance=0.5, profile_tolerance=0.1),
+)
+
+
+def ren_tables():
+    "segments of the 4REN0 alignment as editable tables"
+    model = ifcopenshell.open(os.path.join(DATA_PATH, "4REN0_Autodesk.ifc"))
+    alignment = Alignment().from_entity(model.by_type("IfcAlignment")[0])
+    horizontal = [
+        SimpleNamespace(**{**s.get_info(), "StartPoint": s.StartPoint.Coordinates})
+        for s in alignment.horizontal
+    ]
+    vertical = [SimpleNamespace(**s.get_info()) for s in alignment.vertical]
+    return horizontal, vertical
+
+
+@pytest.fixture
+def tables():
+    yield ren_tables()
+
+
+class TestTiles:
+    """
+    Test tiled level-of-detail corridor export.
+    """
+
+    def test_manifest(self, tables, tmp_path):
+        """
+        The manifest shall list every tile and level with an existing file.
+        """
+        result = export_tiles(Alignment(*tables), LANE, str(tmp_path), tile_length=1000.0, lods=LODS)
+        with open(tmp_path / "manifest.json") as f:
+            manifest = json.load(f)
+        assert manifest == result.manifest
+        assert [t["start"] for t in manifest["tiles"]] == [0.0, 1000.0, 2000.0, 3000.0]
+        assert manifest["tiles"][-1]["end"] == pytest.approx(3691.68863)
+        for tile in manifest["tiles"]:
+            fine, coarse = tile["lods"]
+            assert coarse["stations"] < fine["stations"]
+            for lod in tile["lods"]:
+                document, _ = read_glb(str(tmp_path / lod["uri"]))
+                assert document["nodes"][0]["translation"][0] == manifest["origin"][0]
+        assert len(result.written) == 8
+
+    def test_tiles_join(self, tables, tmp_path):
+        """
+        Adjacent tiles shall share the station at their common boundary.
+        """
+        manifest = export_tiles(Alignment(*tables), LANE, str(tmp_path), 1000.0, LODS).manifest
+        for a, b in zip(manifest["tiles"][:-1], manifest["tiles"][1:]):
+            assert a["end"] == b["start"]
+
+    def test_unchanged(self, tables, tmp_path):
+        """
+        Exporting the same alignment again shall not write any tile.
+        """
+        export_tiles(Alignment(*tables), LANE, str(tmp_path), 1000.0, LODS)
+        result = export_tiles(Alignment(*tables), LANE, str(tmp_path), 1000.0, LODS)
+        assert result.written == []
+        assert len(result.unchanged) == 8
+
+    def test_partial_regeneration(self, tables, tmp_path):
+        """
+        Only the tiles overlapping a changed segment shall be written, stale tiles removed.
+        """
+        export_tiles(Alignment(*tables), LANE, str(tmp_path), 1000.0, LODS)
+        horizontal, vertical = tables
+        segment = vertical[3]
+        segment.StartHeight += 1.0
+        vertical[4].StartHeight += 1.0
+        changed = (segment.StartDistAlong, vertical[4].StartDistAlong + vertical[4].HorizontalLength)
+
+        result = export_tiles(Alignment(horizontal, vertical), LANE, str(tmp_path), 1000.0, LODS)
+        expected = {
+            t["start"]
+            for t in result.manifest["tiles"]
+            if t["start"] <= changed[1] and t["end"] >= changed[0]
+        }
+        assert 0 < len(expected) < 4
+        written = {os.path.basename(p) for p in result.written}
+        assert written == {
+            lod["uri"] for t in result.manifest["tiles"] if t["start"] in expected for lod in t["lods"]
+        }
+        assert len(result.removed) == len(written)
+        assert sorted(os.listdir(tmp_path)) == sorted(
+            ["manifest.json"] + [lod["uri"] for t in result.manifest["tiles"] for lod in t["lods"]]
+        )
+
+    def test_changed_range(self, tables, tmp_path):
+        """
+        With the changed range given only the tiles overlapping it shall be evaluated, with the same result.
+        """
+        export_tiles(Alignment(*tables), LANE, str(tmp_path / "partial"), 1000.0, LODS)
+        horizontal, vertical = tables
+        vertical[3].StartHeight += 1.0
+        vertical[4].StartHeight += 1.0
+        changed = (vertical[3].StartDistAlong, vertical[4].StartDistAlong + vertical[4].HorizontalLength)
+
+        alignment = Alignment(horizontal, vertical)
+        evaluated = []
+        evaluate = alignment.evaluate
+        alignment.evaluate = lambda distances: evaluated.append(distances) or evaluate(distances)
+        result = export_tiles(alignment, LANE, str(tmp_path / "partial"), 1000.0, LODS, changed=changed)
+        overlapping = [t for t in result.manifest["tiles"] if t["start"] <= changed[1] and t["end"] >= changed[0]]
+        assert 0 < len(overlapping) < 4
+        distances = np.concatenate(evaluated)
+        assert distances.min() >= overlapping[0]["start"] - 1000.0
+        assert distances.max() <= overlapping[-1]["end"] + 1000.0
+        assert len(result.unchanged) == 2 * (4 - len(overlapping))
+
+        full = export_tiles(Alignment(horizontal, vertical), LANE, str(tmp_path / "full"), 1000.0, LODS)
+        assert result.manifest == full.manifest
+        assert sorted(os.listdir(tmp_path / "partial")) == sorted(os.listdir(tmp_path / "full"))
+
+    def test_simplify_polygon(self):
+        """
+        Vertices within the tolerance of the simplified outline shall be removed.
+        """
+        assert simplify_polygon(LANE, 0.1).tolist() == LANE[[0, 2, 3, 4]].tolist()
+        assert simplify_polygon(LANE, 0.01).tolist() == LANE.tolist()
+        assert len(simplify_polygon(LANE, 100.0)) == 3
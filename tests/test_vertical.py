@@ -0,0 +1,131 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from alignment_tools.vertical import h_on_CIRCULARARC
+from alignment_tools.vertical import h_on_CLOTHOID
+from alignment_tools.vertical import h_on_CONSTANTGRADIENT
+from alignment_tools.vertical import h_on_PARABOLICARC
+from alignment_tools.vertical import segment_height
+
+# same values as tests/test_alignment_calc_vertical.py
+REN_ELEVATIONS = [
+    (035.0, 781.4939),
+    (085.0, 783.5085),
+    (135.0, 785.2827),
+    (185.0, 786.8164),
+    (235.0, 788.1096),
+    (285.0, 789.1624),
+    (335.0, 789.9748),
+    (435.0, 790.8781),
+    (485.0, 790.9691),
+    (735.0, 787.8173),
+    (785.0, 786.4656),
+    (835.0, 784.8734),
+    (885.0, 783.0408),
+]
+
+
+def vertical_segment(predefined_type, **kwargs) -> SimpleNamespace:
+    attributes = dict(
+        StartDistAlong=0.0,
+        HorizontalLength=200.0,
+        StartHeight=100.0,
+        StartGradient=0.02,
+        EndGradient=-0.03,
+        RadiusOfCurvature=None,
+        PredefinedType=predefined_type,
+    )
+    attributes.update(kwargs)
+    return SimpleNamespace(**attributes)
+
+
+@pytest.fixture(scope="module")
+def vertical_curve() -> SimpleNamespace:
+    "IR-31358, Des 9826510 Sheet 216 of 324 Ramp 'REN'"
+    yield vertical_segment(
+        "PARABOLICARC",
+        StartDistAlong=385965.00,
+        HorizontalLength=900.0,
+        StartHeight=779.9407,
+        StartGradient=0.046063,
+        EndGradient=-0.040500,
+    )
+
+
+class TestVerticalEvaluators:
+    """
+    Test vectorized calculation of heights on vertical segments.
+    """
+
+    def test_parabolic_arc_array(self, vertical_curve):
+        """
+        Elevations along the vertical curve shall be calculated for an array of distances.
+        """
+        u, elev = np.array(REN_ELEVATIONS).T
+        assert h_on_PARABOLICARC(vertical_curve, u) == pytest.approx(elev)
+
+    def test_scalar_result(self, vertical_curve):
+        """
+        A scalar distance shall return a float.
+        """
+        z = h_on_PARABOLICARC(vertical_curve, 35.0)
+        assert isinstance(z, float)
+        assert z == pytest.approx(781.4939)
+
+    def test_broadcast(self, vertical_curve):
+        """
+        Distances of any shape shall be broadcast.
+        """
+        u = np.array(REN_ELEVATIONS)[:12, 0].reshape(3, 4)
+        z = h_on_PARABOLICARC(vertical_curve, u)
+        assert z.shape == (3, 4)
+        assert z[1, 2] == pytest.approx(h_on_PARABOLICARC(vertical_curve, u[1, 2]))
+
+    def test_constant_gradient(self):
+        """
+        Height on a constant gradient shall increase linearly.
+        """
+        seg = vertical_segment("CONSTANTGRADIENT", EndGradient=0.02)
+        assert h_on_CONSTANTGRADIENT(seg, [0.0, 50.0]) == pytest.approx([100.0, 101.0])
+
+    @pytest.mark.parametrize(
+        "evaluator, predefined_type",
+        [
+            (h_on_PARABOLICARC, "PARABOLICARC"),
+            (h_on_CIRCULARARC, "CIRCULARARC"),
+            (h_on_CLOTHOID, "CLOTHOID"),
+        ],
+    )
+    @pytest.mark.parametrize("gradients", [(0.02, -0.03), (-0.03, 0.02)])
+    def test_end_gradient(self, evaluator, predefined_type, gradients):
+        """
+        Curves shall start at StartHeight with StartGradient and end with EndGradient.
+        """
+        g0, g1 = gradients
+        seg = vertical_segment(predefined_type, StartGradient=g0, EndGradient=g1)
+        h = 1e-4
+        assert evaluator(seg, 0.0) == pytest.approx(100.0)
+        assert (evaluator(seg, h) - evaluator(seg, 0.0)) / h == pytest.approx(g0, abs=1e-5)
+        slope = (evaluator(seg, 200.0) - evaluator(seg, 200.0 - h)) / h
+        assert slope == pytest.approx(g1, abs=1e-5)
+
+    def test_circular_arc_radius(self):
+        """
+        Circular arc shall have the given radius of curvature.
+        """
+        seg = vertical_segment("CIRCULARARC", RadiusOfCurvature=4000.0)
+        # curvature of z(u) for a crest curve of radius R
+        z1 = np.gradient(h_on_CIRCULARARC(seg, np.linspace(0, 200, 2001)), 0.1)
+        z2 = np.gradient(z1, 0.1)
+        k = np.abs(z2) / (1 + z1**2) ** 1.5
+        assert k[500:1500] == pytest.approx(1.0 / 4000.0, rel=1e-3)
+
+    def test_dispatch(self, vertical_curve):
+        """
+        Segments shall be evaluated by PredefinedType.
+        """
+        assert segment_height(vertical_curve, 35.0) == pytest.approx(781.4939)
+        with pytest.raises(NotImplementedError):
+            segment_height(vertical_segment("SPIRAL"), 0.0)